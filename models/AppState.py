@@ -8,38 +8,12 @@ from numpy import array as np_array, min as np_min, ptp as np_ptp
 from models.PyCryptoBot import PyCryptoBot
 from models.TradingAccount import TradingAccount
 from models.exchange.ExchangesEnum import Exchange
-from models.exchange.binance import AuthAPI as BAuthAPI
-from models.exchange.coinbase_pro import AuthAPI as CAuthAPI
-from models.exchange.kucoin import AuthAPI as KAuthAPI
 from models.helper.LogHelper import Logger
 
 
 class AppState:
     def __init__(self, app: PyCryptoBot, account: TradingAccount) -> None:
-        if app.getExchange() == Exchange.BINANCE:
-            self.api = BAuthAPI(
-                app.getAPIKey(),
-                app.getAPISecret(),
-                app.getAPIURL(),
-                recv_window=app.getRecvWindow(),
-            )
-        elif app.getExchange() == Exchange.COINBASEPRO:
-            self.api = CAuthAPI(
-                app.getAPIKey(),
-                app.getAPISecret(),
-                app.getAPIPassphrase(),
-                app.getAPIURL(),
-            )
-        elif app.getExchange() == Exchange.KUCOIN:
-            self.api = KAuthAPI(
-                app.getAPIKey(),
-                app.getAPISecret(),
-                app.getAPIPassphrase(),
-                app.getAPIURL(),
-                use_cache=app.useKucoinCache(),
-            )
-        else:
-            self.api = None
+        self.api = app.getAuthAPI()
 
         self.app = app
         self.account = account
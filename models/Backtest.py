@@ -0,0 +1,532 @@
+"""Single pass simulation engine for result only backtests"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.AppState import AppState
+from models.helper.LogHelper import Logger
+from models.helper.MarginHelper import calculate_margin
+from models.PyCryptoBot import PyCryptoBot
+from models.PyCryptoBot import truncate as _truncate
+from models.Strategy import Strategy
+from models.Trading import TechnicalAnalysis
+
+
+class Backtest:
+    def __init__(
+        self, app: PyCryptoBot = None, state: AppState = None, df: pd.DataFrame = pd.DataFrame()
+    ) -> None:
+        """Backtest object model
+
+        Walks a DataFrame already analysed with TechnicalAnalysis.addAll() once, applying
+        the same Strategy rules and fees as the scheduled simulation in pycryptobot.py.
+
+        Parameters
+        ----------
+        app : PyCryptoBot
+            simulation configuration
+        state : AppState
+            state the simulated trades are recorded in
+        df : Pandas DataFrame
+            market data including the technical indicators
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("'df' not a Pandas dataframe")
+
+        if len(df) == 0:
+            raise ValueError("'df' is empty")
+
+        self.app = app
+        self.state = state
+        self.df = df
+
+        self._trades = []
+
+        # the simulation loop reads each of these from a one row DataFrame per iteration
+        self._index = df.index.format()
+        self._dates = [f"{index} 00:00:00" if len(index) == 10 else index for index in self._index]
+        self._close = df["close"].astype(float).tolist()
+        self._obv_pc = df["obv_pc"].astype(float).tolist()
+        self._macdltsignal = df["macdltsignal"].astype(bool).tolist()
+        self._df_high = np.fmax.accumulate(df["close"].to_numpy(dtype=float))
+        self._df_low = np.fmin.accumulate(df["close"].to_numpy(dtype=float))
+
+    @staticmethod
+    def isSupported(app: PyCryptoBot) -> bool:
+        """Simulations the single pass engine gives identical results for"""
+
+        return (
+            app.isSimulation()
+            and not app.isLive()
+            and app.simResultOnly()
+            and app.simuluationSpeed() in ["fast", "fast-sample"]
+            and app.getSmartSwitch() != 1
+            and not app.isVerbose()
+            and not app.shouldSaveGraphs()
+        )
+
+    def run(self, iterations: int = 1) -> dict:
+        """Simulate from the given iteration to the end of the DataFrame
+
+        Parameters
+        ----------
+        iterations : int
+            first iteration (1-based row) to simulate
+
+        Returns
+        -------
+        dict
+            the simulation summary, None if no iteration was simulated
+        """
+
+        self._candidates = self._signalCandidates()
+        self._goldencross = self._goldenCross(iterations)
+        self._strategy = Strategy(self.app, self.state, self.df, iterations)
+
+        processed = False
+        for i in range(max(iterations, 1) - 1, len(self.df)):
+            self.state.iterations = i + 1
+            processed = self._step(i)
+
+        # appended one at a time so the column dtypes match the simulation loop
+        for trade in self._trades:
+            self.app.trade_tracker = pd.concat(
+                [self.app.trade_tracker, pd.DataFrame(trade, index=[0])], ignore_index=True
+            )
+
+        if processed and self.state.iterations == len(self.df):
+            return self._summary()
+
+        return None
+
+    def saveTrades(self) -> None:
+        """Save the simulated trades to the trades file"""
+
+        filename = self.app.getTradesFile()
+        try:
+            if not os.path.isabs(filename):
+                if not os.path.exists("csv"):
+                    os.makedirs("csv")
+                filename = os.path.join(os.curdir, "csv", filename)
+            self.app.trade_tracker.to_csv(filename)
+        except OSError:
+            Logger.critical(f"Unable to save: {filename}")
+
+    def _signalCandidates(self) -> np.ndarray:
+        """Rows where Strategy.getAction() could return something other than WAIT"""
+
+        df = self.df
+        app = self.app
+
+        buy = (
+            (df["ema12gtema26co"].astype(bool) | bool(app.disableBuyEMA()))
+            & (
+                (df["macdgtsignal"].astype(bool) | bool(app.disableBuyMACD()))
+                | df["macdgtsignalco"].astype(bool)
+            )
+            & (df["goldencross"].astype(bool) | bool(app.disableBullOnly()))
+            & ((df["obv_pc"] > -5) | bool(app.disableBuyOBV()))
+            & (df["eri_buy"].astype(bool) | bool(app.disableBuyElderRay()))
+        )
+
+        sell = df["ema12ltema26co"].astype(bool) & (
+            df["macdltsignal"].astype(bool) | bool(app.disableBuyMACD())
+        )
+
+        return (buy | sell).to_numpy()
+
+    def _goldenCross(self, iterations: int = 1) -> list:
+        """PyCryptoBot.is1hSMA50200Bull() at each row, None if it has to be asked each time"""
+
+        if iterations > len(self.df):
+            return None
+
+        # the first lookup fills the 1h cache the same way the simulation loop does
+        self.app.is1hSMA50200Bull(self._dates[max(iterations, 1) - 1])
+
+        cache = self.app.sma50200_1h_cache
+        if (
+            not isinstance(cache, pd.DataFrame)
+            or "date" not in cache
+            or "sma50" in cache
+            or "sma200" in cache
+            or not pd.api.types.is_datetime64_dtype(cache["date"])
+            or not cache["date"].is_monotonic_increasing
+        ):
+            return None
+
+        try:
+            # rolling means only look back, so the last row of each date filtered copy matches
+            ta = TechnicalAnalysis(cache.copy())
+            ta.addSMA(50)
+            ta.addSMA(200)
+            df_cache = ta.getDataFrame()
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+        bull = (df_cache["sma50"] > df_cache["sma200"]).tolist()
+        rows = np.searchsorted(
+            cache["date"].to_numpy(), pd.to_datetime(self._dates).to_numpy(), side="right"
+        )
+
+        # fewer than 200 candles makes addSMA(200) raise, which is1hSMA50200Bull() treats as False
+        return [bool(bull[row - 1]) if row >= 200 else False for row in rows]
+
+    def _analysis(self, i: int) -> TechnicalAnalysis:
+        """TechnicalAnalysis of the 300 candles up to the given row"""
+
+        return TechnicalAnalysis(self.df.iloc[max(i - 299, 0) : i + 1].copy())
+
+    def _step(self, i: int) -> bool:
+        """Simulate one iteration, returns True if the row was processed"""
+
+        app = self.app
+        state = self.state
+
+        price = self._close[i]
+        if price < 0.000001:
+            raise Exception(
+                f"{app.getMarket()} is unsuitable for trading, quote price is less than 0.000001!"
+            )
+
+        current_sim_date = self._dates[i]
+
+        if self._goldencross is None:
+            goldencross = app.is1hSMA50200Bull(current_sim_date)
+        else:
+            goldencross = self._goldencross[i]
+
+        strategy = self._strategy
+        if self._candidates[i]:
+            sdf = self.df.iloc[max(i - 299, 0) : i + 1]
+            strategy = Strategy(app, state, sdf, len(sdf))
+            state.action = strategy.getAction(app, price, current_sim_date)
+        else:
+            state.action = "WAIT"
+
+        immediate_action = False
+        margin, profit, sell_fee, change_pcnt_high = 0, 0, 0, 0
+
+        if (
+            state.last_buy_size > 0
+            and state.last_buy_price > 0
+            and price > 0
+            and state.last_action == "BUY"
+        ):
+            if price > state.last_buy_high:
+                state.last_buy_high = price
+
+            if state.last_buy_high > 0:
+                change_pcnt_high = ((price / state.last_buy_high) - 1) * 100
+            else:
+                change_pcnt_high = 0
+
+            state.last_buy_fee = round(state.last_buy_size * app.getTakerFee(), 8)
+            state.last_buy_filled = round(
+                ((state.last_buy_size - state.last_buy_fee) / state.last_buy_price), 8
+            )
+
+            margin, profit, sell_fee = calculate_margin(
+                buy_size=state.last_buy_size,
+                buy_filled=state.last_buy_filled,
+                buy_price=state.last_buy_price,
+                buy_fee=state.last_buy_fee,
+                sell_percent=app.getSellPercent(),
+                sell_price=price,
+                sell_taker_fee=app.getTakerFee(),
+            )
+
+            # the exit price is only used when selling at resistance
+            if app.sellAtResistance() is True:
+                price_exit = self._analysis(i).getTradeExit(price)
+            else:
+                price_exit = price
+
+            if strategy.isSellTrigger(
+                app,
+                state,
+                price,
+                price_exit,
+                margin,
+                change_pcnt_high,
+                self._obv_pc[i],
+                self._macdltsignal[i],
+            ):
+                state.action = "SELL"
+                state.last_action = "BUY"
+                immediate_action = True
+
+        if immediate_action is not True and strategy.isWaitTrigger(app, margin, goldencross):
+            state.action = "WAIT"
+            immediate_action = False
+
+        if app.enableImmediateBuy():
+            if state.action == "BUY":
+                immediate_action = True
+
+        if state.action == "BUY" and immediate_action is not True:
+            state.action, state.trailing_buy, _, immediate_action = strategy.checkTrailingBuy(
+                app, state, price
+            )
+
+        if immediate_action is not True and state.last_df_index == self._index[i]:
+            return False
+
+        precision = 4
+        if price < 0.01:
+            precision = 8
+
+        if immediate_action:
+            price_text = str(price)
+        else:
+            price_text = "Close: " + str(price)
+
+        if state.last_action == "BUY":
+            # save margin for Summary if open trade
+            if state.last_buy_size > 0:
+                state.open_trade_margin = _truncate(margin, precision) + "%"
+            else:
+                state.open_trade_margin = "0%"
+
+        if state.action == "BUY":
+            self._buy(i, price, price_text)
+        elif state.action == "SELL":
+            self._sell(i, price, price_text, precision)
+
+        state.last_df_index = self._index[i]
+
+        return True
+
+    def _buy(self, i: int, price: float, price_text: str) -> None:
+        """Record a test buy at the given row"""
+
+        app = self.app
+        state = self.state
+
+        state.last_buy_price = price
+        state.last_buy_high = state.last_buy_price
+
+        if state.last_buy_size == 0 and state.last_buy_filled == 0:
+            # Sim mode can now use buymaxsize as the amount used for a buy
+            if app.getBuyMaxSize() != None:
+                state.last_buy_size = app.getBuyMaxSize()
+                state.first_buy_size = app.getBuyMaxSize()
+            else:
+                state.last_buy_size = 1000
+                state.first_buy_size = 1000
+        # add option for buy last sell size
+        elif (
+            app.getBuyMaxSize() != None
+            and app.buyLastSellSize()
+            and state.last_sell_size
+            > state.minimumOrderQuote(quote=state.last_sell_size, balancechk=True)
+        ):
+            state.last_buy_size = state.last_sell_size
+
+        state.buy_count = state.buy_count + 1
+        state.buy_sum = state.buy_sum + state.last_buy_size
+        state.trailing_buy = 0
+
+        app.notifyTelegram(
+            f"{app.getMarket()} ({app.printGranularity()}) -  {self._dates[i]}\n"
+            f" - TEST BUY at {price_text}\n"
+            f" - Buy Size: {_truncate(state.last_buy_size, 4)}"
+        )
+
+        bands = self._analysis(i).getFibonacciRetracementLevels(float(price))
+
+        if len(bands) >= 1 and len(bands) <= 2:
+            if len(bands) == 1:
+                first_key = list(bands.keys())[0]
+                if first_key == "ratio1":
+                    state.fib_low = 0
+                    state.fib_high = bands[first_key]
+                if first_key == "ratio1_618":
+                    state.fib_low = bands[first_key]
+                    state.fib_high = bands[first_key] * 2
+                else:
+                    state.fib_low = bands[first_key]
+
+            elif len(bands) == 2:
+                first_key = list(bands.keys())[0]
+                second_key = list(bands.keys())[1]
+                state.fib_low = bands[first_key]
+                state.fib_high = bands[second_key]
+
+        self._trades.append(
+            {
+                "Datetime": self._dates[i],
+                "Market": app.getMarket(),
+                "Action": "BUY",
+                "Price": price,
+                "Quote": state.last_buy_size,
+                "Base": float(state.last_buy_size) / float(price),
+                "DF_High": self._df_high[i],
+                "DF_Low": self._df_low[i],
+            }
+        )
+
+        state.in_open_trade = True
+        state.last_action = "BUY"
+
+    def _sell(self, i: int, price: float, price_text: str, precision: int) -> None:
+        """Record a test sell at the given row"""
+
+        app = self.app
+        state = self.state
+
+        margin, profit, sell_fee = calculate_margin(
+            buy_size=state.last_buy_size,
+            buy_filled=state.last_buy_filled,
+            buy_price=state.last_buy_price,
+            buy_fee=state.last_buy_fee,
+            sell_percent=app.getSellPercent(),
+            sell_price=price,
+            sell_taker_fee=app.getTakerFee(),
+        )
+
+        if state.last_buy_size > 0:
+            margin_text = _truncate(margin, precision) + "%"
+        else:
+            margin_text = "0%"
+
+        # save last buy before this sell to use in Sim Summary
+        state.previous_buy_size = state.last_buy_size
+        # preserve next sell values for simulator
+        state.sell_count = state.sell_count + 1
+        sell_size = (app.getSellPercent() / 100) * (
+            (price / state.last_buy_price) * (state.last_buy_size - state.last_buy_fee)
+        )
+        state.last_sell_size = sell_size - sell_fee
+        state.sell_sum = state.sell_sum + state.last_sell_size
+
+        # Added to track profit and loss margins during sim runs
+        state.margintracker += float(margin)
+        state.profitlosstracker += float(profit)
+        state.feetracker += float(sell_fee)
+        state.buy_tracker += float(state.last_buy_size)
+
+        app.notifyTelegram(
+            f"{app.getMarket()} ({app.printGranularity()}) {self._dates[i]}\n"
+            f" - TEST SELL at {price_text} (margin: {margin_text}, delta: "
+            f"{round(price - state.last_buy_price, precision)})"
+        )
+
+        self._trades.append(
+            {
+                "Datetime": self._dates[i],
+                "Market": app.getMarket(),
+                "Action": "SELL",
+                "Price": price,
+                "Quote": state.last_sell_size,
+                "Base": state.last_buy_filled,
+                "Margin": margin,
+                "Profit": profit,
+                "Fee": sell_fee,
+                "DF_High": self._df_high[i],
+                "DF_Low": self._df_low[i],
+            }
+        )
+
+        state.in_open_trade = False
+        state.last_action = "SELL"
+
+    def _summary(self) -> dict:
+        """Summarise the simulation as --simresultonly reports it"""
+
+        app = self.app
+        state = self.state
+
+        simulation = {
+            "config": {},
+            "data": {
+                "open_buy_excluded": 1,
+                "buy_count": 0,
+                "sell_count": 0,
+                "first_trade": {"size": 0},
+                "last_trade": {"size": 0},
+                "margin": 0.0,
+            },
+            "exchange": app.getExchange().value,
+        }
+
+        if app.getConfig() != "":
+            simulation["config"] = app.getConfig()
+
+        if state.buy_count == 0:
+            state.last_buy_size = 0
+            state.sell_sum = 0
+        else:
+            state.sell_sum = state.sell_sum + state.last_sell_size
+
+        remove_last_buy = False
+        if state.buy_count > state.sell_count:
+            remove_last_buy = True
+            state.buy_count -= 1  # remove last buy as there has not been a corresponding sell yet
+            state.last_buy_size = state.previous_buy_size
+            simulation["data"]["open_buy_excluded"] = 1
+        else:
+            simulation["data"]["open_buy_excluded"] = 0
+
+        simulation["data"]["buy_count"] = state.buy_count
+        simulation["data"]["sell_count"] = state.sell_count
+        simulation["data"]["first_trade"] = {}
+        simulation["data"]["first_trade"]["size"] = state.first_buy_size
+
+        if state.sell_count > 0:
+            simulation["data"]["last_trade"] = {}
+            simulation["data"]["last_trade"]["size"] = float(
+                _truncate(state.last_sell_size, 2)
+            )
+        else:
+            simulation["data"]["margin"] = 0.0
+
+            app.notifyTelegram(
+                "      Margin: 0.00%\n  ** margin is nil as a sell as not occurred during the simulation\n"
+            )
+
+        app.notifyTelegram(
+            f"Simulation Summary\n"
+            + f"   Market: {app.getMarket()}\n"
+            + f"   Buy Count: {state.buy_count}\n"
+            + f"   Sell Count: {state.sell_count}\n"
+            + f"   First Buy: {state.first_buy_size}\n"
+            + f"   Last Buy: {str(_truncate(state.last_buy_size, 4))}\n"
+            + f"   Last Sell: {str(_truncate(state.last_sell_size, 4))}\n"
+        )
+
+        if state.sell_count > 0:
+            _last_trade_margin = _truncate(
+                (((state.last_sell_size - state.last_buy_size) / state.last_buy_size) * 100),
+                4,
+            )
+
+            simulation["data"]["last_trade"]["margin"] = _last_trade_margin
+            simulation["data"]["all_trades"] = {}
+            simulation["data"]["all_trades"]["quote_currency"] = app.quote_currency
+            simulation["data"]["all_trades"]["value_buys"] = float(
+                _truncate(state.buy_tracker, 2)
+            )
+            simulation["data"]["all_trades"]["profit_loss"] = float(
+                _truncate(state.profitlosstracker, 2)
+            )
+            simulation["data"]["all_trades"]["fees"] = float(
+                _truncate(state.feetracker, 2)
+            )
+            simulation["data"]["all_trades"]["margin"] = float(
+                _truncate(state.margintracker, 4)
+            )
+
+            app.notifyTelegram(f"      Last Trade Margin: {_last_trade_margin}%\n\n")
+            if remove_last_buy:
+                app.notifyTelegram(
+                    f"\nOpen Trade Margin at end of simulation: {state.open_trade_margin}\n"
+                )
+            app.notifyTelegram(
+                f"      All Trades Margin: {_truncate(state.margintracker, 4)}%\n  ** non-live simulation, assuming highest fees\n  ** open trade excluded from margin calculation\n"
+            )
+
+        return simulation
@@ -20,6 +20,8 @@ from models.config import (
 from models.exchange.Granularity import Granularity
 from models.exchange.ExchangesEnum import Exchange
 from models.helper.LogHelper import Logger
+from models.helper.MetricsHelper import Metrics
+from models.helper.SessionHelper import SessionHelper
 
 
 class BotConfig:
@@ -96,7 +98,12 @@ class BotConfig:
         self.disablelog = False
         self.disabletracker = False
         self.enableml = False
+        self.mlrefitinterval = 24
         self.websocket = False
+        self.websockethub = None
+        self.websockethubkey = None
+        self.websockettriggerpcnt = 0.1
+        self.markets = {}
         self.enableexitaftersell = False
         self.use_sell_fee = True
 
@@ -133,6 +140,18 @@ class BotConfig:
             self.cli_args["tradesfile"] if self.cli_args["tradesfile"] else "trades.csv"
         )
 
+        self.candlestore = (
+            self.cli_args["candlestore"] if self.cli_args["candlestore"] else "candles"
+        )
+        self.disablecandlestore = False
+
+        self.apipoolsize = 10
+        self.apitimeout = 30
+        self.apiretries = 3
+
+        self.metricsport = 0
+        self.metricsloginterval = 0
+
         self.config_provided = False
         self.config = {}
 
@@ -168,6 +187,17 @@ class BotConfig:
             consoleloglevel=self.consoleloglevel,
         )
 
+        SessionHelper.configure(
+            pool_size=self.apipoolsize,
+            timeout=self.apitimeout,
+            retries=self.apiretries,
+        )
+
+        try:
+            Metrics.configure(port=self.metricsport, log_interval=self.metricsloginterval)
+        except OSError as err:
+            Logger.warning(f"Unable to serve metrics on port {self.metricsport}: {err}")
+
 # read and set config from file
     def read_config(self, exchange):
         if os.path.isfile(self.config_file):
@@ -468,6 +498,11 @@ class BotConfig:
             type=str,
             help="Path to file to log trades done during simulation. eg './trades/BTCBUSD-trades.csv",
         )
+        parser.add_argument(
+            "--candlestore",
+            type=str,
+            help="Directory of the local market data store. eg './candles'",
+        )
         parser.add_argument(
             "--buypercent", type=int, help="percentage of quote currency to buy"
         )
@@ -588,6 +623,11 @@ class BotConfig:
         parser.add_argument(
             "--disabletracker", action="store_true", help="disable tracker.csv"
         )
+        parser.add_argument(
+            "--disablecandlestore",
+            action="store_true",
+            help="disable the local market data store",
+        )
         parser.add_argument(
             "--recvWindow",
             type=int,
@@ -604,6 +644,21 @@ class BotConfig:
             help="Should Kucoin orders API Cache be used",
         )
         parser.add_argument("--websocket", action="store_true", help="Enable websocket")
+        parser.add_argument(
+            "--websockethub",
+            type=str,
+            help="Use the websocket hub at the given address instead of a websocket per bot. e.g 'websockethub.sock'",
+        )
+        parser.add_argument(
+            "--websockettriggerpcnt",
+            type=float,
+            help="Run the bot when the websocket price moves by this percent, 0 to only run on candle close",
+        )
+        parser.add_argument(
+            "--markets",
+            type=str,
+            help="Run these markets in one process instead of --market, comma separated e.g 'BTC-GBP,ETH-GBP'",
+        )
         parser.add_argument("--logbuysellinjson", action="store_true", help="Enable logging orders in json format")
         parser.add_argument("--startmethod", type=str, help="Enable logging orders in json format")
 
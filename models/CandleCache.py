@@ -0,0 +1,162 @@
+"""In memory cache of higher timeframe market data, valid until the next candle"""
+
+import time
+from threading import Lock
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from models.CandleResampler import resampleCandles
+from models.exchange.Granularity import Granularity
+
+
+class CandleCache:
+    def __init__(
+        self,
+        fetch: Callable[[str, Granularity], pd.DataFrame],
+        retry: int = 60,
+    ) -> None:
+        """Candle cache object model
+
+        Market data is fetched once per candle of its granularity, the cached candles
+        are kept until the open candle closes. In between, the open candle is updated
+        from the websocket's candles, and values calculated from the candles are only
+        recalculated when it changes.
+
+        Parameters
+        ----------
+        fetch : Callable
+            retrieves the latest candles of a market and granularity from the exchange
+        retry : int
+            seconds before fetching again when the exchange has not opened the current candle yet
+        """
+
+        self.fetch = fetch
+        self.retry = retry
+
+        # (market, granularity) -> [candles, expiry epoch, calculated values]
+        self._entries = {}
+        # an entry is fetched and calculated by one thread at a time, other entries in parallel
+        self._locks = {}
+        self._lock = Lock()
+
+    def getHistoricalData(
+        self, market: str, granularity: Granularity, candles: pd.DataFrame = None
+    ) -> pd.DataFrame:
+        """Latest candles of a market, fetched at most once per candle
+
+        Parameters
+        ----------
+        market : str
+            market of the candles
+        granularity : Granularity
+            candle granularity
+        candles : Pandas DataFrame
+            websocket candles of a finer granularity, updating the open candle
+        """
+
+        with self._keyLock(market, granularity):
+            return self._entry(market, granularity, candles)[0]
+
+    def getValue(
+        self,
+        market: str,
+        granularity: Granularity,
+        calculate: Callable[[pd.DataFrame], object],
+        candles: pd.DataFrame = None,
+    ):
+        """Value calculated from the latest candles, recalculated only when they change
+
+        Parameters
+        ----------
+        market : str
+            market of the candles
+        granularity : Granularity
+            candle granularity
+        calculate : Callable
+            calculates the value from a copy of the candles
+        candles : Pandas DataFrame
+            websocket candles of a finer granularity, updating the open candle
+        """
+
+        with self._keyLock(market, granularity):
+            entry = self._entry(market, granularity, candles)
+            if calculate not in entry[2]:
+                entry[2][calculate] = calculate(entry[0].copy())
+
+            return entry[2][calculate]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+
+    def _keyLock(self, market: str, granularity: Granularity) -> Lock:
+        with self._lock:
+            return self._locks.setdefault((market, granularity), Lock())
+
+    def _entry(self, market: str, granularity: Granularity, candles: pd.DataFrame) -> list:
+        """Entry of a market and granularity, called with its lock held"""
+
+        key = (market, granularity)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is None or now >= entry[1]:
+            df = self.fetch(market, granularity)
+            entry = [df, self._expiry(df, granularity, now), {}]
+            with self._lock:
+                self._entries[key] = entry
+
+        if candles is not None:
+            self._update(entry, market, granularity, candles)
+
+        return entry
+
+    def _expiry(self, df: pd.DataFrame, granularity: Granularity, now: float) -> float:
+        """End of the open candle, or a retry if the exchange has not opened it"""
+
+        interval = granularity.to_integer
+        start = now - now % interval
+        if len(df) == 0 or _toEpoch(df["date"].iloc[-1]) < start:
+            return now + min(self.retry, interval)
+
+        return start + interval
+
+    @staticmethod
+    def _update(entry: list, market: str, granularity: Granularity, candles: pd.DataFrame) -> None:
+        """Adds the websocket candles within the open candle to it"""
+
+        df = entry[0]
+        if len(df) == 0 or "market" not in candles:
+            return
+
+        start = _toEpoch(df["date"].iloc[-1])
+        epochs = candles["date"].to_numpy(dtype="datetime64[s]").astype("int64")
+        within = (
+            (candles["market"].to_numpy() == market)
+            & (epochs >= start)
+            & (epochs < start + granularity.to_integer)
+        )
+        if not within.any():
+            return
+
+        bucket = resampleCandles(candles.loc[within], granularity, drop_partial=False).iloc[0]
+        columns = df.columns.get_indexer(["low", "high", "close"])
+        current = tuple(df.iloc[-1, columns])
+        updated = (
+            min(current[0], bucket["low"]),
+            max(current[1], bucket["high"]),
+            bucket["close"],
+        )
+
+        if updated != current:
+            # a new data frame, the candles already returned are not changed
+            df = df.copy()
+            df.iloc[-1, columns] = updated
+            entry[0] = df
+            entry[2] = {}
+
+
+def _toEpoch(date) -> int:
+    return int(np.datetime64(pd.Timestamp(date).to_datetime64(), "s").astype("int64"))
@@ -0,0 +1,87 @@
+"""Higher granularity candles aggregated from finer candles"""
+
+import numpy as np
+import pandas as pd
+
+from models.exchange.Granularity import Granularity
+
+CANDLE_COLUMNS = ["date", "market", "granularity", "low", "high", "open", "close", "volume"]
+
+
+def resampleCandles(
+    df: pd.DataFrame,
+    granularity: Granularity,
+    label=None,
+    drop_partial: bool = True,
+) -> pd.DataFrame:
+    """Candles of a granularity aggregated from the candles of a finer one
+
+    The candles start at multiples of the granularity since the epoch (UTC), as the
+    exchanges align them. The last candle is kept even if it is still open, as the
+    exchanges return it.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+        candles of one market in the exchange data frame format
+    granularity : Granularity
+        granularity to aggregate the candles to
+    label : int or str
+        value of the granularity column, as the exchange REST API returns it
+    drop_partial : bool
+        drop the first candle if the finer candles start after it opens
+    """
+
+    label = granularity.to_integer if label is None else label
+    interval = granularity.to_integer
+
+    if len(df) > 0:
+        df = df.sort_values(by="date", kind="stable")
+        epochs = df["date"].to_numpy(dtype="datetime64[s]").astype("int64")
+        # the last of any candles with the same date
+        keep = np.r_[epochs[1:] != epochs[:-1], True]
+        df, epochs = df.loc[keep], epochs[keep]
+
+        buckets = epochs - epochs % interval
+        if drop_partial and epochs[0] != buckets[0]:
+            complete = buckets != buckets[0]
+            df, epochs, buckets = df.loc[complete], epochs[complete], buckets[complete]
+    else:
+        buckets = np.empty(0, dtype="int64")
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(buckets) > 0 else buckets
+    ends = np.r_[starts[1:], len(buckets)] - 1 if len(starts) > 0 else starts
+
+    dates = pd.to_datetime(buckets[starts], unit="s")
+    try:
+        tsidx = pd.DatetimeIndex(dates, dtype="datetime64[ns]", freq=granularity.get_frequency)
+    except ValueError:
+        tsidx = pd.DatetimeIndex(dates, dtype="datetime64[ns]")
+    tsidx.name = "ts"
+
+    def column(name: str) -> np.ndarray:
+        return df[name].to_numpy(dtype="float64")
+
+    if len(starts) > 0:
+        low = np.minimum.reduceat(column("low"), starts)
+        high = np.maximum.reduceat(column("high"), starts)
+        volume = np.add.reduceat(column("volume"), starts)
+        market = df["market"].iloc[0]
+    else:
+        low = high = volume = np.empty(0, dtype="float64")
+        market = None
+
+    return pd.DataFrame(
+        {
+            "date": tsidx,
+            "market": market,
+            "granularity": label,
+            "low": low,
+            "high": high,
+            "open": column("open")[starts],
+            "close": column("close")[ends],
+            "volume": volume,
+        },
+        index=tsidx,
+        columns=CANDLE_COLUMNS,
+    )
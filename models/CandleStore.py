@@ -0,0 +1,283 @@
+"""Local on-disk store of historical market data"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+
+try:
+    import fcntl
+except ImportError:  # Windows, bots filling the same market at once may drop each other's ranges
+    fcntl = None
+
+# exchanges return at most 300 candles per request
+PAGE_SIZE = 300
+
+CANDLE_DTYPE = np.dtype(
+    [
+        ("epoch", "<i8"),
+        ("low", "<f8"),
+        ("high", "<f8"),
+        ("open", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+
+class CandleStore:
+    def __init__(
+        self,
+        path: str = "candles",
+        exchange: Exchange = Exchange.COINBASEPRO,
+        market: str = "BTC-GBP",
+        granularity: Granularity = Granularity.ONE_HOUR,
+    ) -> None:
+        """Candle store object model
+
+        Closed candles are kept in one memory-mapped NumPy file per exchange, market and
+        granularity, with a JSON index of the date ranges already fetched from the exchange.
+
+        Parameters
+        ----------
+        path : str
+            directory of the store
+        exchange : Exchange
+            exchange the candles are from
+        market : str
+            market the candles are for
+        granularity : Granularity
+            candle granularity
+        """
+
+        self.market = market
+        self.granularity = granularity
+
+        directory = os.path.join(path, exchange.value)
+        filename = f"{market}-{granularity.to_integer}"
+        self._candles_file = os.path.join(directory, f"{filename}.npy")
+        self._index_file = os.path.join(directory, f"{filename}.json")
+        self._lock_file = os.path.join(directory, f"{filename}.lock")
+
+    def getHistoricalData(
+        self,
+        iso8601start: str,
+        iso8601end: str,
+        fetch: Callable[[str, str], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Market data between two dates, fetching only the ranges not already stored
+
+        Parameters
+        ----------
+        iso8601start : str
+            first candle date
+        iso8601end : str
+            last candle date
+        fetch : Callable
+            retrieves at most 300 candles between two ISO 8601 dates from the exchange
+        """
+
+        interval = self.granularity.to_integer
+        start = self._toEpoch(iso8601start)
+        end = self._toEpoch(iso8601end)
+
+        first = -(-start // interval) * interval
+        last = min(end // interval * interval, self._lastClosedCandle())
+
+        # the open candle is still changing, it is never stored
+        if last < first:
+            return fetch(iso8601start, iso8601end)
+
+        index = self._readIndex()
+        if len(self._missingRanges(index["ranges"], first, last)) > 0:
+            with self._locked():
+                # another bot may have fetched them while waiting for the lock
+                index = self._readIndex()
+                missing = self._missingRanges(index["ranges"], first, last)
+                if len(missing) > 0:
+                    self._fill(index, missing, fetch)
+
+        df = self._read(first, last, index.get("granularity"))
+
+        if end // interval * interval > last:
+            df_open = fetch(self._toISO8601(last + interval), iso8601end)
+            if len(df_open) > 0:
+                df = pd.concat([df, df_open]) if len(df) > 0 else df_open
+
+        return df
+
+    def _fill(
+        self,
+        index: dict,
+        missing: list,
+        fetch: Callable[[str, str], pd.DataFrame],
+    ) -> None:
+        """Fetch the missing ranges a page at a time and append them to the store"""
+
+        interval = self.granularity.to_integer
+        pages = []
+        for range_start, range_end in missing:
+            for page_start in range(range_start, range_end + 1, PAGE_SIZE * interval):
+                page_end = min(page_start + (PAGE_SIZE - 1) * interval, range_end)
+                df = fetch(self._toISO8601(page_start), self._toISO8601(page_end))
+
+                # an empty page can also be an API error, so it is fetched again next time
+                if len(df) == 0:
+                    continue
+
+                epochs = df["date"].to_numpy(dtype="datetime64[s]").astype("int64")
+                in_page = (epochs >= page_start) & (epochs <= page_end)
+                if not in_page.any():
+                    continue
+
+                page = np.empty(int(in_page.sum()), dtype=CANDLE_DTYPE)
+                page["epoch"] = epochs[in_page]
+                for column in ["low", "high", "open", "close", "volume"]:
+                    page[column] = df[column].to_numpy(dtype="float64")[in_page]
+                pages.append(page)
+
+                index["ranges"].append([page_start, page_end])
+                if "granularity" not in index:
+                    index["granularity"] = np.asarray(df["granularity"]).item(0)
+
+        if len(pages) == 0:
+            return
+
+        candles = np.concatenate([self._load()] + pages)
+        # later pages replace stored candles of the same date
+        _, last_seen = np.unique(candles["epoch"][::-1], return_index=True)
+        candles = candles[len(candles) - 1 - last_seen]
+
+        index["ranges"] = self._mergeRanges(index["ranges"])
+        self._write(candles, index)
+
+    @contextmanager
+    def _locked(self):
+        """Lock the market's files for a read-merge-write, shared by all processes
+
+        Readers do not take the lock: the candles file is replaced before the index,
+        and only ever gains candles, so it always covers the index read before it.
+        """
+
+        os.makedirs(os.path.dirname(self._lock_file), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+
+        fd = os.open(self._lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+    def _read(self, first: int, last: int, granularity) -> pd.DataFrame:
+        """Stored candles between two epochs in the exchange data frame format"""
+
+        candles = self._load()
+        lower = np.searchsorted(candles["epoch"], first, side="left")
+        upper = np.searchsorted(candles["epoch"], last, side="right")
+        candles = np.array(candles[lower:upper])
+
+        dates = pd.to_datetime(candles["epoch"], unit="s")
+        try:
+            tsidx = pd.DatetimeIndex(
+                dates, dtype="datetime64[ns]", freq=self.granularity.get_frequency
+            )
+        except ValueError:
+            tsidx = pd.DatetimeIndex(dates, dtype="datetime64[ns]")
+        tsidx.name = "ts"
+
+        return pd.DataFrame(
+            {
+                "date": tsidx,
+                "market": self.market,
+                "granularity": granularity,
+                "low": candles["low"],
+                "high": candles["high"],
+                "open": candles["open"],
+                "close": candles["close"],
+                "volume": candles["volume"],
+            },
+            index=tsidx,
+        )
+
+    def _load(self) -> np.ndarray:
+        if not os.path.isfile(self._candles_file):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+        return np.load(self._candles_file, mmap_mode="r")
+
+    def _readIndex(self) -> dict:
+        if not os.path.isfile(self._index_file) or not os.path.isfile(
+            self._candles_file
+        ):
+            return {"ranges": []}
+
+        with open(self._index_file, "r", encoding="utf8") as index_file:
+            return json.load(index_file)
+
+    def _write(self, candles: np.ndarray, index: dict) -> None:
+        """Replace the store files, other bots reading them keep the previous version"""
+
+        os.makedirs(os.path.dirname(self._candles_file), exist_ok=True)
+
+        pid = os.getpid()
+        with open(f"{self._candles_file}.{pid}", "wb") as candles_file:
+            np.save(candles_file, candles)
+        with open(f"{self._index_file}.{pid}", "w", encoding="utf8") as index_file:
+            json.dump(index, index_file)
+
+        os.replace(f"{self._candles_file}.{pid}", self._candles_file)
+        os.replace(f"{self._index_file}.{pid}", self._index_file)
+
+    def _lastClosedCandle(self) -> int:
+        interval = self.granularity.to_integer
+        return int(time.time()) // interval * interval - interval
+
+    def _missingRanges(self, ranges: list, first: int, last: int) -> list:
+        """Parts of first to last (inclusive epochs) not covered by the stored ranges"""
+
+        interval = self.granularity.to_integer
+        missing = []
+        position = first
+        for range_start, range_end in sorted(ranges):
+            if range_end < position:
+                continue
+            if range_start > last:
+                break
+            if range_start > position:
+                missing.append([position, range_start - interval])
+            position = range_end + interval
+
+        if position <= last:
+            missing.append([position, last])
+
+        return missing
+
+    def _mergeRanges(self, ranges: list) -> list:
+        interval = self.granularity.to_integer
+        merged = []
+        for range_start, range_end in sorted(ranges):
+            if len(merged) > 0 and range_start <= merged[-1][1] + interval:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+
+        return merged
+
+    @staticmethod
+    def _toEpoch(iso8601: str) -> int:
+        return int(pd.Timestamp(iso8601).floor("s").value // 10**9)
+
+    @staticmethod
+    def _toISO8601(epoch: int) -> str:
+        return pd.Timestamp(epoch, unit="s").strftime("%Y-%m-%dT%H:%M:%S")
@@ -0,0 +1,59 @@
+"""Scheduler whose jobs can be run early by events of other threads"""
+
+import functools
+import sched
+import threading
+import time
+
+
+class EventScheduler(sched.scheduler):
+    def __init__(self) -> None:
+        """Event scheduler object model
+
+        Jobs are called with the scheduler and the market's PyCryptoBot as their first
+        arguments, as pycryptobot.execute_job() is. trigger() runs the queued job of a
+        market now instead of at its scheduled time, e.g. when a websocket candle
+        closes, so the scheduled time is only a fallback if there are no events.
+        """
+
+        super().__init__(time.time, self._wait)
+        self._wakeup = threading.Event()
+        self._triggered = set()
+
+    def enterabs(self, abstime, priority, action, argument=(), kwargs=None):
+        # a job triggered while it was running is run again straight away
+        if len(argument) > 1 and argument[1] in self._triggered:
+            abstime = min(abstime, self.timefunc())
+
+        return super().enterabs(
+            abstime, priority, functools.partial(self._runEvent, action), argument, kwargs or {}
+        )
+
+    def trigger(self, app) -> None:
+        """Run the job of a market now, safe to call from any thread"""
+
+        self._triggered.add(app)
+        now = self.timefunc()
+        for event in self.queue:
+            if len(event.argument) > 1 and event.argument[1] is app and event.time > now:
+                try:
+                    self.cancel(event)
+                except ValueError:
+                    # the job has just started
+                    continue
+                sched.scheduler.enterabs(
+                    self, now, event.priority, event.action, event.argument, event.kwargs
+                )
+
+        self._wakeup.set()
+
+    def _runEvent(self, action, *args, **kwargs) -> None:
+        if len(args) > 1:
+            self._triggered.discard(args[1])
+        action(*args, **kwargs)
+
+    def _wait(self, seconds: float) -> None:
+        """Sleep until the next job or a trigger (private function)"""
+
+        self._wakeup.wait(seconds)
+        self._wakeup.clear()
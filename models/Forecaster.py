@@ -0,0 +1,167 @@
+"""Seasonal ARIMA price forecasts fitted in the background"""
+
+import threading
+import warnings
+from datetime import timedelta
+
+from pandas import Series
+
+from models.exchange.Granularity import Granularity
+from models.helper.LogHelper import Logger
+
+
+class ARIMAForecaster:
+    def __init__(
+        self,
+        granularity: Granularity = Granularity.ONE_HOUR,
+        steps: int = 3,
+        refit_interval: int = 24,
+        order: tuple = (0, 1, 0),
+        seasonal_order: tuple = (1, 1, 1, 12),
+    ) -> None:
+        """Seasonal ARIMA forecaster object model
+
+        The model is fitted by a background thread. Between refits the fitted
+        parameters are kept and only the new candles are filtered into the model
+        state, so update() and getPrediction() never wait for a fit.
+
+        Parameters
+        ----------
+        granularity : Granularity
+            granularity of the candles
+        steps : int
+            candles ahead to predict
+        refit_interval : int
+            closed candles between refits of the parameters
+        order : tuple
+            SARIMAX (p, d, q) order
+        seasonal_order : tuple
+            SARIMAX (P, D, Q, s) seasonal order
+        """
+
+        if not isinstance(steps, int) or steps < 1:
+            raise ValueError("Forecast steps must be 1 or greater.")
+
+        if not isinstance(refit_interval, int) or refit_interval < 1:
+            raise ValueError("Refit interval must be 1 or greater.")
+
+        self.granularity = granularity
+        self.steps = steps
+        self.refit_interval = refit_interval
+        self.order = order
+        self.seasonal_order = seasonal_order
+
+        # fitted to the closed candles up to _last_ts, the newest candle is still open
+        self._results = None
+        self._params = None
+        self._last_ts = None
+        self._since_fit = 0
+        self._prediction = None
+
+        self._pending = None
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def update(self, df) -> None:
+        """Queues the latest candles for the next forecast, returns immediately
+
+        Candles queued while a forecast is running replace the ones waiting before
+        them, only the latest are forecast.
+
+        Parameters
+        ----------
+        df : Pandas DataFrame
+            candles with a 'close' column, indexed by date, the last one still open
+        """
+
+        closes = Series(df["close"], dtype=float, copy=True)
+
+        with self._condition:
+            self._pending = closes
+            self._condition.notify()
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ARIMAForecaster", daemon=True
+                )
+                self._thread.start()
+
+    def getPrediction(self) -> tuple:
+        """Latest (date, price) prediction, None until the first forecast is ready"""
+
+        return self._prediction
+
+    def stop(self) -> None:
+        """Stops the background thread"""
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def forecast(self, closes: Series) -> tuple:
+        """Forecasts the close price, refitting the model when it is due
+
+        Parameters
+        ----------
+        closes : Pandas Series
+            close prices indexed by date, the last candle still open
+        """
+
+        closed = closes.iloc[:-1]
+
+        if self._results is None or self._last_ts not in closed.index:
+            self._fit(closed)
+        else:
+            new = closed[closed.index > self._last_ts]
+            if self._since_fit + len(new) >= self.refit_interval:
+                self._fit(closed)
+            elif len(new) > 0:
+                # append the new observations with the fitted parameters
+                self._results = self._results.extend(new.to_numpy())
+                self._since_fit += len(new)
+                self._last_ts = closed.index[-1]
+
+        # the open candle is only filtered for this forecast
+        current = self._results.extend(closes.to_numpy()[-1:])
+        price = current.forecast(self.steps)[-1]
+        date = closes.index[-1] + timedelta(seconds=self.granularity.to_integer * self.steps)
+
+        return (str(date), float(price))
+
+    def _fit(self, closed: Series) -> None:
+        """Fits the parameters, starting from the previous fit (private function)"""
+
+        # statsmodels takes about a second to import, so only when a model is fitted
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        model = SARIMAX(
+            closed.to_numpy(),
+            trend="n",
+            order=self.order,
+            seasonal_order=self.seasonal_order,
+        )
+        self._results = model.fit(start_params=self._params, disp=-1)
+        self._params = self._results.params
+        self._last_ts = closed.index[-1]
+        self._since_fit = 0
+
+    def _run(self) -> None:
+        """Forecasts the latest queued candles until stopped (private function)"""
+
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+
+                if self._stopped:
+                    return
+
+                closes, self._pending = self._pending, None
+
+            try:
+                self._prediction = self.forecast(closes)
+            except Exception as err:
+                Logger.debug(f"Seasonal ARIMA forecast failed: {err}")
@@ -0,0 +1,69 @@
+"""Scheduler running the jobs of many markets in one process"""
+
+import functools
+
+from models.EventScheduler import EventScheduler
+from models.helper.LogHelper import Logger
+
+
+class MarketScheduler(EventScheduler):
+    def __init__(self, restart_delay: int = 30) -> None:
+        """Market scheduler object model
+
+        Runs the jobs of many markets one at a time. A job that exits or raises an
+        exception only stops its own market, which is restarted if it has autorestart,
+        while the other markets keep running.
+
+        Parameters
+        ----------
+        restart_delay : int
+            seconds before the job of a market with autorestart is run again after an exception
+        """
+
+        super().__init__()
+        self.restart_delay = restart_delay
+
+    def enterabs(self, abstime, priority, action, argument=(), kwargs=None):
+        return super().enterabs(
+            abstime, priority, functools.partial(self._runJob, action), argument, kwargs or {}
+        )
+
+    def cancelMarket(self, app) -> None:
+        """Cancel the scheduled jobs of a market"""
+
+        for event in self.queue:
+            if len(event.argument) > 1 and event.argument[1] is app:
+                self.cancel(event)
+
+    def getMarkets(self) -> list:
+        """Markets with scheduled jobs"""
+
+        markets = []
+        for event in self.queue:
+            if len(event.argument) > 1 and event.argument[1] not in markets:
+                markets.append(event.argument[1])
+
+        return markets
+
+    def _runJob(self, action, *args, **kwargs) -> None:
+        app = args[1]
+        try:
+            action(*args, **kwargs)
+        except SystemExit:
+            self.cancelMarket(app)
+            Logger.warning(f"{app.getMarket()} bot stopped")
+        except Exception as err:  # pylint: disable=broad-except
+            self.cancelMarket(app)
+            if app.autoRestart():
+                Logger.critical(
+                    f"Restarting {app.getMarket()} in {self.restart_delay} seconds after exception: {repr(err)}"
+                )
+                if not app.disableTelegramErrorMsgs():
+                    app.notifyTelegram(
+                        f"Auto restarting bot for {app.getMarket()} after exception: {repr(err)}"
+                    )
+                self.enter(self.restart_delay, 1, action, args, kwargs)
+            else:
+                Logger.critical(f"{app.getMarket()} bot stopped after exception: {repr(err)}")
+                if not app.disableTelegramErrorMsgs():
+                    app.notifyTelegram(f"Bot for {app.getMarket()} got an exception: {repr(err)}")
@@ -0,0 +1,152 @@
+"""Local ledger of the exchange order history"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS orders (
+        account TEXT NOT NULL,
+        market TEXT NOT NULL,
+        order_id TEXT NOT NULL,
+        created INTEGER NOT NULL,
+        final INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (account, market, order_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS orders_created ON orders (account, market, created)",
+    "CREATE INDEX IF NOT EXISTS orders_open ON orders (account, market, final, created)",
+    """CREATE TABLE IF NOT EXISTS syncs (
+        account TEXT NOT NULL,
+        market TEXT NOT NULL,
+        synced REAL NOT NULL,
+        PRIMARY KEY (account, market)
+    )""",
+)
+
+
+class OrderLedger:
+    def __init__(self, path: str = os.path.join("cache", "orders.db")) -> None:
+        """Order ledger object model
+
+        The orders of each account and market are kept in a SQLite database, so only
+        the orders placed or still open since the last sync are requested from the
+        exchange. Orders are added or replaced by id, they are never removed.
+
+        Parameters
+        ----------
+        path : str
+            file of the ledger
+        """
+
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory != "" and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        for statement in _SCHEMA:
+            self._connection().execute(statement)
+
+    def isSynced(self, account: str, market: str) -> bool:
+        """True once the order history of a market has been synced in full"""
+
+        return self.getSyncTime(account, market) is not None
+
+    def getSyncTime(self, account: str, market: str) -> float:
+        """Epoch of the last complete sync of a market, None if it has not been synced"""
+
+        row = self._connection().execute(
+            "SELECT synced FROM syncs WHERE account = ? AND market = ?", (account, market)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def getResumeOrder(self, account: str, market: str) -> dict:
+        """Order to resume the sync from, the oldest still open or else the newest
+
+        None if there are no orders for the market.
+        """
+
+        row = self._connection().execute(
+            """SELECT data FROM orders
+            WHERE account = ? AND market = ? AND final = 0
+            ORDER BY created, order_id LIMIT 1""",
+            (account, market),
+        ).fetchone()
+        if row is None:
+            row = self._connection().execute(
+                """SELECT data FROM orders
+                WHERE account = ? AND market = ?
+                ORDER BY created DESC, order_id DESC LIMIT 1""",
+                (account, market),
+            ).fetchone()
+
+        return None if row is None else json.loads(row[0])
+
+    def getOrders(self, account: str, market: str) -> list:
+        """Orders of a market as returned by the exchange, oldest first"""
+
+        rows = self._connection().execute(
+            """SELECT data FROM orders WHERE account = ? AND market = ?
+            ORDER BY created, order_id""",
+            (account, market),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def addOrders(self, account: str, market: str, orders: list, synced: bool = False) -> None:
+        """Adds or replaces orders
+
+        Parameters
+        ----------
+        account : str
+            exchange account of the orders
+        market : str
+            market of the orders
+        orders : list
+            (order id, created epoch ms, final, order as returned by the exchange) of each order
+        synced : bool
+            the order history of the market is complete up to these orders
+        """
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                """INSERT OR REPLACE INTO orders
+                (account, market, order_id, created, final, data)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                [
+                    (account, market, str(order_id), int(created), int(bool(final)), json.dumps(data))
+                    for order_id, created, final, data in orders
+                ],
+            )
+            if synced:
+                conn.execute(
+                    "INSERT OR REPLACE INTO syncs (account, market, synced) VALUES (?, ?, ?)",
+                    (account, market, time.time()),
+                )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread, reopened after a fork"""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -1,5 +1,7 @@
+import copy
 import json
 import math
+import os
 import random
 import re
 from datetime import datetime, timedelta
@@ -10,13 +12,22 @@ import urllib3
 from urllib3.exceptions import ReadTimeoutError
 
 from models.BotConfig import BotConfig
+from models.CandleCache import CandleCache
+from models.CandleResampler import resampleCandles
+from models.CandleStore import CandleStore
+from models.Forecaster import ARIMAForecaster
+from models.OrderLedger import OrderLedger
 from models.Trading import TechnicalAnalysis
-from models.config import binanceParseMarket, coinbaseProParseMarket, kucoinParseMarket
+from models.config import (
+    binanceParseMarket,
+    coinbaseProParseMarket,
+    dummyParseMarket,
+    kucoinParseMarket,
+)
+from models.config.default_parser import defaultConfigParse
 from models.exchange.Granularity import Granularity
 from models.exchange.ExchangesEnum import Exchange
-from models.exchange.binance import AuthAPI as BAuthAPI, PublicAPI as BPublicAPI
-from models.exchange.coinbase_pro import AuthAPI as CBAuthAPI, PublicAPI as CBPublicAPI
-from models.exchange.kucoin import AuthAPI as KAuthAPI, PublicAPI as KPublicAPI
+from models.helper.MetricsHelper import Metrics
 from models.helper.TextBoxHelper import TextBox
 
 # disable insecure ssl warning
@@ -44,6 +55,43 @@ def truncate(f: Union[int, float], n: Union[int, float]) -> str:
     return f"{math.floor(f * 10 ** n) / 10 ** n:.{n}f}"
 
 
+def _isEMA1226Bull(df: pd.DataFrame) -> bool:
+    ta = TechnicalAnalysis(df)
+
+    if "ema12" not in df:
+        ta.addEMA(12)
+
+    if "ema26" not in df:
+        ta.addEMA(26)
+
+    df_last = ta.getDataFrame().iloc[-1, :]
+    return bool(df_last["ema12"] > df_last["ema26"])
+
+
+def _isSMA50200Bull(df: pd.DataFrame) -> bool:
+    ta = TechnicalAnalysis(df)
+
+    if "sma50" not in df:
+        ta.addSMA(50)
+
+    if "sma200" not in df:
+        ta.addSMA(200)
+
+    df_last = ta.getDataFrame().iloc[-1, :]
+    return bool(df_last["sma50"] > df_last["sma200"])
+
+
+def _isCryptoRecession(df: pd.DataFrame) -> bool:
+    if len(df) <= 200:
+        return False  # if there is insufficient data, default to False to avoid hard sells
+
+    ta = TechnicalAnalysis(df)
+    ta.addSMA(50)
+    ta.addSMA(200)
+    df_last = ta.getDataFrame().iloc[-1, :]
+    return bool(df_last["sma50"] < df_last["sma200"])
+
+
 class PyCryptoBot(BotConfig):
     def __init__(self, config_file: str = None, exchange: Exchange = None):
         self.config_file = config_file or "config.json"
@@ -56,6 +104,13 @@ class PyCryptoBot(BotConfig):
 
     extraCandlesFound = False
 
+    # API clients are created on first use and reused
+    _public_api = None
+    _auth_api = None
+    _forecaster = None
+    _candle_cache = None
+    _order_ledger = None
+
     trade_tracker = pd.DataFrame(
         columns=[
             "Datetime",
@@ -121,6 +176,9 @@ class PyCryptoBot(BotConfig):
     def getTradesFile(self):
         return self.tradesfile
 
+    def getCandleStore(self):
+        return self.candlestore
+
     def getExchange(self) -> Exchange:
         return self.exchange
 
@@ -246,9 +304,142 @@ class PyCryptoBot(BotConfig):
         websocket,
         iso8601start="",
         iso8601end="",
+    ):
+        if iso8601start != "" and iso8601end != "" and not self.disableCandleStore():
+            # closed candles are kept on disk so only ranges not fetched before hit the exchange
+            store = CandleStore(self.getCandleStore(), self.exchange, market, granularity)
+            return store.getHistoricalData(
+                iso8601start,
+                iso8601end,
+                lambda start, end: self._getHistoricalData(
+                    market, granularity, None, start, end
+                ),
+            )
+
+        return self._getHistoricalData(
+            market, granularity, websocket, iso8601start, iso8601end
+        )
+
+    def getPublicAPI(self):
+        """Public API client of the exchange, returns data from coinbase if not specified"""
+
+        # the exchange modules are imported on first use, so only the configured one is loaded
+        options = (self.exchange, self.getAPIURL())
+        if self._public_api is None or self._public_api[0] != options:
+            if self.exchange == Exchange.BINANCE:
+                from models.exchange.binance import PublicAPI as BPublicAPI
+
+                api = BPublicAPI(api_url=self.getAPIURL())
+            elif self.exchange == Exchange.KUCOIN:
+                from models.exchange.kucoin import PublicAPI as KPublicAPI
+
+                api = KPublicAPI(api_url=self.getAPIURL())
+            else:
+                from models.exchange.coinbase_pro import PublicAPI as CBPublicAPI
+
+                api = CBPublicAPI()
+
+            self._public_api = (options, api)
+
+        return self._public_api[1]
+
+    def getAuthAPI(self):
+        """Authenticated API client of the exchange, None for the dummy exchange"""
+
+        options = (
+            self.exchange,
+            self.getAPIKey(),
+            self.getAPISecret(),
+            self.getAPIPassphrase(),
+            self.getAPIURL(),
+            self.recv_window,
+            self.useKucoinCache(),
+        )
+        if self._auth_api is None or self._auth_api[0] != options:
+            if self.exchange == Exchange.COINBASEPRO:
+                from models.exchange.coinbase_pro import AuthAPI as CBAuthAPI
+
+                api = CBAuthAPI(
+                    self.getAPIKey(),
+                    self.getAPISecret(),
+                    self.getAPIPassphrase(),
+                    self.getAPIURL(),
+                )
+            elif self.exchange == Exchange.BINANCE:
+                from models.exchange.binance import AuthAPI as BAuthAPI
+
+                api = BAuthAPI(
+                    self.getAPIKey(),
+                    self.getAPISecret(),
+                    self.getAPIURL(),
+                    recv_window=self.recv_window,
+                    order_ledger=self.getOrderLedger(),
+                )
+            elif self.exchange == Exchange.KUCOIN:
+                from models.exchange.kucoin import AuthAPI as KAuthAPI
+
+                api = KAuthAPI(
+                    self.getAPIKey(),
+                    self.getAPISecret(),
+                    self.getAPIPassphrase(),
+                    self.getAPIURL(),
+                    use_cache=self.useKucoinCache(),
+                    order_ledger=self.getOrderLedger() if self.useKucoinCache() else None,
+                )
+            else:
+                return None
+
+            self._auth_api = (options, api)
+
+        return self._auth_api[1]
+
+    def getOrderLedger(self) -> OrderLedger:
+        """Local order history shared by the authenticated API clients"""
+
+        if self._order_ledger is None:
+            self._order_ledger = OrderLedger()
+
+        return self._order_ledger
+
+    def forMarket(self, market: str):
+        """Copy of the bot for one of its markets, sharing the API clients and caches
+
+        Parameters
+        ----------
+        market : str
+            one of the markets, whose options in getMarkets() override the bot's
+        """
+
+        # created once here, so that every copy uses the same clients
+        self.getPublicAPI()
+        self.getAuthAPI()
+        self.getCandleCache()
+
+        app = copy.copy(self)
+        app.setMarketOptions(market)
+        app.trade_tracker = PyCryptoBot.trade_tracker
+
+        # a trades file per market, e.g. BTC-GBP-trades.csv
+        directory, filename = os.path.split(self.getTradesFile())
+        app.tradesfile = os.path.join(directory, f"{app.getMarket()}-{filename}")
+        return app
+
+    def setMarketOptions(self, market: str) -> None:
+        """Set the market and the options given for it in getMarkets()"""
+
+        self.setMarket(market)
+        defaultConfigParse(self, self.getMarkets().get(market, {}))
+
+    def _getHistoricalData(
+        self,
+        market,
+        granularity: Granularity,
+        websocket,
+        iso8601start="",
+        iso8601end="",
     ):
         if self.exchange == Exchange.BINANCE:
-            api = BPublicAPI(api_url=self.getAPIURL())
+            api = self.getPublicAPI()
 
             if iso8601start != "" and iso8601end != "":
                 return api.getHistoricalData(
@@ -263,7 +454,7 @@ class PyCryptoBot(BotConfig):
         elif (
             self.exchange == Exchange.KUCOIN
         ):  # returns data from coinbase if not specified
-            api = KPublicAPI(api_url=self.getAPIURL())
+            api = self.getPublicAPI()
 
             if iso8601start != "" and iso8601end == "":
                 return api.getHistoricalData(
@@ -283,7 +474,7 @@ class PyCryptoBot(BotConfig):
             else:
                 return api.getHistoricalData(market, granularity, websocket)
         else:  # returns data from coinbase if not specified
-            api = CBPublicAPI()
+            api = self.getPublicAPI()
 
             if iso8601start != "" and iso8601end == "":
                 return api.getHistoricalData(
@@ -427,6 +618,76 @@ class PyCryptoBot(BotConfig):
 
             return result_df_cache.copy()
 
+    def getResampledDataFrame(
+        self,
+        df: pd.DataFrame,
+        finest_df: pd.DataFrame,
+        market,
+        granularity: Granularity,
+        simstart: str = "",
+    ) -> pd.DataFrame:
+        """Simulation market data of a granularity, resampled from the finest granularity
+
+        Only the 300 candles before the simulation start that the finest granularity does
+        not cover are downloaded.
+        """
+
+        if isinstance(df, pd.DataFrame) and len(df) > 0:
+            return df
+
+        resampled = resampleCandles(
+            finest_df, granularity, self._getGranularityLabel(granularity)
+        )
+        if len(resampled) == 0:
+            return resampled
+
+        interval = timedelta(seconds=granularity.to_integer)
+        first = resampled["date"].iloc[0].to_pydatetime()
+        warmup = self._getHistoricalDataRange(
+            market,
+            granularity,
+            self.getDateFromISO8601Str(simstart) - 300 * interval,
+            first - interval,
+        )
+        if len(warmup) == 0:
+            return resampled
+
+        warmup = warmup[warmup["date"] < first]
+        return pd.concat([warmup, resampled])
+
+    def _getHistoricalDataRange(
+        self, market, granularity: Granularity, start: datetime, end: datetime
+    ) -> pd.DataFrame:
+        """Market data between two dates, 300 candles per request (private function)"""
+
+        interval = timedelta(seconds=granularity.to_integer)
+        frames = []
+        while start <= end:
+            page_end = min(start + 299 * interval, end)
+            frames.append(
+                self.getHistoricalData(
+                    market, granularity, None, str(start.isoformat()), str(page_end.isoformat())
+                )
+            )
+            start = page_end + interval
+
+        frames = [frame for frame in frames if len(frame) > 0]
+        if len(frames) == 0:
+            return pd.DataFrame()
+
+        df = pd.concat(frames)
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    def _getGranularityLabel(self, granularity: Granularity):
+        """Value of the granularity column, as the exchange REST API returns it (private function)"""
+
+        if self.exchange == Exchange.BINANCE:
+            return granularity.to_short
+        elif self.exchange == Exchange.KUCOIN:
+            return granularity.to_medium
+        else:
+            return granularity.to_integer
+
     def getSmartSwitchHistoricalDataChained(
         self,
         market,
@@ -436,18 +697,29 @@ class PyCryptoBot(BotConfig):
     ) -> pd.DataFrame:
 
         if self.isSimulation():
+            # only the finest granularity is downloaded, the others are resampled from it
             if self.getSellSmartSwitch() == 1:
                 self.ema1226_5m_cache = self.getSmartSwitchDataFrame(
                     self.ema1226_5m_cache, market, Granularity.FIVE_MINUTES, start, end
                 )
-            self.ema1226_15m_cache = self.getSmartSwitchDataFrame(
-                self.ema1226_15m_cache, market, Granularity.FIFTEEN_MINUTES, start, end
-            )
-            self.ema1226_1h_cache = self.getSmartSwitchDataFrame(
-                self.ema1226_1h_cache, market, Granularity.ONE_HOUR, start, end
+                self.ema1226_15m_cache = self.getResampledDataFrame(
+                    self.ema1226_15m_cache,
+                    self.ema1226_5m_cache,
+                    market,
+                    Granularity.FIFTEEN_MINUTES,
+                    start,
+                )
+                finest_df = self.ema1226_5m_cache
+            else:
+                self.ema1226_15m_cache = self.getSmartSwitchDataFrame(
+                    self.ema1226_15m_cache, market, Granularity.FIFTEEN_MINUTES, start, end
+                )
+                finest_df = self.ema1226_15m_cache
+            self.ema1226_1h_cache = self.getResampledDataFrame(
+                self.ema1226_1h_cache, finest_df, market, Granularity.ONE_HOUR, start
             )
-            self.ema1226_6h_cache = self.getSmartSwitchDataFrame(
-                self.ema1226_6h_cache, market, Granularity.SIX_HOURS, start, end
+            self.ema1226_6h_cache = self.getResampledDataFrame(
+                self.ema1226_6h_cache, finest_df, market, Granularity.SIX_HOURS, start
             )
 
             if len(self.ema1226_15m_cache) == 0:
@@ -558,214 +830,133 @@ class PyCryptoBot(BotConfig):
     def getSellSmartSwitch(self):
         return self.sell_smart_switch
 
-    def is1hEMA1226Bull(self, iso8601end: str = "", websocket=None):
-        try:
-            if self.isSimulation() and isinstance(self.ema1226_1h_cache, pd.DataFrame):
-                df_data = self.ema1226_1h_cache.loc[
-                    self.ema1226_1h_cache["date"] <= iso8601end
-                ].copy()
-            elif self.exchange == Exchange.COINBASEPRO:
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.ema1226_1h_cache = df_data
-            elif self.exchange == Exchange.BINANCE:
-                api = BPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.ema1226_1h_cache = df_data
-            elif self.exchange == Exchange.KUCOIN:
-                api = KPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.ema1226_1h_cache = df_data
-            else:
-                return False
+    def getCandleCache(self) -> CandleCache:
+        """Cache of the higher timeframe candles, fetched once per candle"""
 
-            ta = TechnicalAnalysis(df_data)
-
-            if "ema12" not in df_data:
-                ta.addEMA(12)
+        options = (self.exchange, self.getAPIURL())
+        if self._candle_cache is None or self._candle_cache[0] != options:
+            cache = CandleCache(
+                lambda market, granularity: self._getHistoricalData(market, granularity, None)
+            )
+            self._candle_cache = (options, cache)
 
-            if "ema26" not in df_data:
-                ta.addEMA(26)
+        return self._candle_cache[1]
 
-            df_last = ta.getDataFrame().copy().iloc[-1, :]
-            df_last["bull"] = df_last["ema12"] > df_last["ema26"]
+    def _getTrend(self, granularity: Granularity, calculate, websocket=None):
+        """Trend of the market in a higher timeframe, from the candle cache (private function)"""
 
-            return bool(df_last["bull"])
-        except Exception:
+        if self.exchange not in (Exchange.COINBASEPRO, Exchange.BINANCE, Exchange.KUCOIN):
             return False
 
-    def is1hSMA50200Bull(self, iso8601end: str = "", websocket=None):
-        try:
-            if self.isSimulation() and isinstance(self.sma50200_1h_cache, pd.DataFrame):
-                df_data = self.sma50200_1h_cache.loc[
-                    self.sma50200_1h_cache["date"] <= iso8601end
-                ].copy()
-            elif self.exchange == Exchange.COINBASEPRO:
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.sma50200_1h_cache = df_data
-            elif self.exchange == Exchange.BINANCE:
-                api = BPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.sma50200_1h_cache = df_data
-            elif self.exchange == Exchange.KUCOIN:
-                api = KPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_HOUR, websocket
-                )
-                self.sma50200_1h_cache = df_data
-            else:
+        # the websocket's candles are of the bot's granularity, they only update the open candle
+        candles = websocket.candles if websocket is not None else None
+        return self.getCandleCache().getValue(self.market, granularity, calculate, candles)
+
+    def _getSimulationTrend(self, cache: str, granularity: Granularity, calculate, iso8601end: str):
+        """Trend of the market in a higher timeframe at a simulation date (private function)
+
+        The candles of the whole simulation are fetched once, with 300 candles before it,
+        and kept in the cache attribute. Each call only uses the candles up to the date.
+        """
+
+        if not isinstance(getattr(self, cache), pd.DataFrame):
+            if self.exchange not in (Exchange.COINBASEPRO, Exchange.BINANCE, Exchange.KUCOIN):
                 return False
 
-            ta = TechnicalAnalysis(df_data)
+            if self.simenddate is None or self.simenddate == "now":
+                end = datetime.now()
+            else:
+                end = self.getDateFromISO8601Str(self.simenddate)
+
+            if self.simstartdate is None:
+                start = end - timedelta(seconds=self.getGranularity().to_integer * 300)
+            else:
+                start = self.getDateFromISO8601Str(self.simstartdate)
 
-            if "sma50" not in df_data:
-                ta.addSMA(50)
+            setattr(
+                self,
+                cache,
+                self._getHistoricalDataRange(
+                    self.market,
+                    granularity,
+                    start - timedelta(seconds=granularity.to_integer * 300),
+                    end,
+                ),
+            )
 
-            if "sma200" not in df_data:
-                ta.addSMA(200)
+        df = getattr(self, cache)
+        return calculate(df.loc[df["date"] <= iso8601end].copy())
 
-            df_last = ta.getDataFrame().copy().iloc[-1, :]
-            df_last["bull"] = df_last["sma50"] > df_last["sma200"]
+    @Metrics.timed("job.trend.1h_ema1226")
+    def is1hEMA1226Bull(self, iso8601end: str = "", websocket=None):
+        try:
+            if self.isSimulation():
+                return self._getSimulationTrend(
+                    "ema1226_1h_cache", Granularity.ONE_HOUR, _isEMA1226Bull, iso8601end
+                )
 
-            return bool(df_last["bull"])
+            return self._getTrend(Granularity.ONE_HOUR, _isEMA1226Bull, websocket)
         except Exception:
             return False
 
-    def isCryptoRecession(self, websocket=None):
+    @Metrics.timed("job.trend.1h_sma50200")
+    def is1hSMA50200Bull(self, iso8601end: str = "", websocket=None):
         try:
-            if self.exchange == Exchange.COINBASEPRO:
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_DAY, websocket
-                )
-            elif self.exchange == Exchange.BINANCE:
-                api = BPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_DAY, websocket
-                )
-            elif self.exchange == Exchange.KUCOIN:
-                api = KPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.ONE_DAY, websocket
+            if self.isSimulation():
+                return self._getSimulationTrend(
+                    "sma50200_1h_cache", Granularity.ONE_HOUR, _isSMA50200Bull, iso8601end
                 )
-            else:
-                return False  # if there is an API issue, default to False to avoid hard sells
-
-            if len(df_data) <= 200:
-                return False  # if there is insufficient data, default to False to avoid hard sells
 
-            ta = TechnicalAnalysis(df_data)
-            ta.addSMA(50)
-            ta.addSMA(200)
-            df_last = ta.getDataFrame().copy().iloc[-1, :]
-            df_last["crypto_recession"] = df_last["sma50"] < df_last["sma200"]
+            return self._getTrend(Granularity.ONE_HOUR, _isSMA50200Bull, websocket)
+        except Exception:
+            return False
 
-            return bool(df_last["crypto_recession"])
+    def isCryptoRecession(self, websocket=None):
+        try:
+            # if there is an API issue, default to False to avoid hard sells
+            return self._getTrend(Granularity.ONE_DAY, _isCryptoRecession, websocket)
         except Exception:
             return False
 
+    @Metrics.timed("job.trend.6h_ema1226")
     def is6hEMA1226Bull(self, iso8601end: str = "", websocket=None):
         try:
-            if self.isSimulation() and isinstance(self.ema1226_6h_cache, pd.DataFrame):
-                df_data = self.ema1226_6h_cache[
-                    (self.ema1226_6h_cache["date"] <= iso8601end)
-                ].copy()
-            elif self.exchange == Exchange.COINBASEPRO:
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
-                )
-                self.ema1226_6h_cache = df_data
-            elif self.exchange == Exchange.BINANCE:
-                api = BPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
-                )
-                self.ema1226_6h_cache = df_data
-            elif self.exchange == Exchange.KUCOIN:
-                api = KPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
+            if self.isSimulation():
+                return self._getSimulationTrend(
+                    "ema1226_6h_cache", Granularity.SIX_HOURS, _isEMA1226Bull, iso8601end
                 )
-                self.ema1226_6h_cache = df_data
-            else:
-                return False
-
-            ta = TechnicalAnalysis(df_data)
 
-            if "ema12" not in df_data:
-                ta.addEMA(12)
-
-            if "ema26" not in df_data:
-                ta.addEMA(26)
-
-            df_last = ta.getDataFrame().copy().iloc[-1, :]
-            df_last["bull"] = df_last["ema12"] > df_last["ema26"]
-
-            return bool(df_last["bull"])
+            return self._getTrend(Granularity.SIX_HOURS, _isEMA1226Bull, websocket)
         except Exception:
             return False
 
+    @Metrics.timed("job.trend.6h_sma50200")
     def is6hSMA50200Bull(self, websocket):
         try:
-            if self.exchange == Exchange.COINBASEPRO:
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
-                )
-            elif self.exchange == Exchange.BINANCE:
-                api = BPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
-                )
-            elif self.exchange == Exchange.KUCOIN:
-                api = KPublicAPI(api_url=self.getAPIURL())
-                df_data = api.getHistoricalData(
-                    self.market, Granularity.SIX_HOURS, websocket
-                )
-            else:
-                return False
-
-            ta = TechnicalAnalysis(df_data)
-            ta.addSMA(50)
-            ta.addSMA(200)
-            df_last = ta.getDataFrame().copy().iloc[-1, :]
-            df_last["bull"] = df_last["sma50"] > df_last["sma200"]
-            return bool(df_last["bull"])
+            return self._getTrend(Granularity.SIX_HOURS, _isSMA50200Bull, websocket)
         except Exception:
             return False
 
     def getTicker(self, market, websocket):
         if self.exchange == Exchange.BINANCE:
-            api = BPublicAPI(api_url=self.getAPIURL())
+            api = self.getPublicAPI()
             return api.getTicker(market, websocket)
 
         elif self.exchange == Exchange.KUCOIN:
-            api = KPublicAPI(api_url=self.getAPIURL())
+            api = self.getPublicAPI()
             return api.getTicker(market)
         else:  # returns data from coinbase if not specified
-            api = CBPublicAPI()
+            api = self.getPublicAPI()
             return api.getTicker(market, websocket)
 
     def getTime(self):
         if self.exchange == Exchange.COINBASEPRO:
-            return CBPublicAPI().getTime()
+            return self.getPublicAPI().getTime()
         elif self.exchange == Exchange.KUCOIN:
-            return KPublicAPI().getTime()
+            return self.getPublicAPI().getTime()
         elif self.exchange == Exchange.BINANCE:
             try:
-                return BPublicAPI().getTime()
+                return self.getPublicAPI().getTime()
             except ReadTimeoutError:
                 return ""
         else:
@@ -873,6 +1064,9 @@ class PyCryptoBot(BotConfig):
     def disableTracker(self) -> bool:
         return self.disabletracker
 
+    def disableCandleStore(self) -> bool:
+        return self.disablecandlestore
+
     def enableInsufficientFundsLogging(self) -> bool:
         return self.enableinsufficientfundslogging
 
@@ -891,9 +1085,45 @@ class PyCryptoBot(BotConfig):
     def enableML(self) -> bool:
         return self.enableml
 
+    def getMLRefitInterval(self) -> int:
+        return self.mlrefitinterval
+
+    def getForecaster(self) -> ARIMAForecaster:
+        """Seasonal ARIMA forecaster of the bot's market, three candles ahead"""
+
+        options = (self.getMarket(), self.getGranularity(), self.getMLRefitInterval())
+        if self._forecaster is None or self._forecaster[0] != options:
+            if self._forecaster is not None:
+                self._forecaster[1].stop()
+
+            forecaster = ARIMAForecaster(
+                self.getGranularity(), steps=3, refit_interval=self.getMLRefitInterval()
+            )
+            self._forecaster = (options, forecaster)
+
+        return self._forecaster[1]
+
     def enableWebsocket(self) -> bool:
         return self.websocket
 
+    def getWebSocketHub(self):
+        return self.websockethub
+
+    def getWebSocketHubKey(self):
+        """Key of the websocket hub, None for the key file the hub creates next to its socket"""
+
+        return self.websockethubkey
+
+    def getWebSocketTriggerPcnt(self) -> float:
+        """Price move since the last run that runs the bot again, 0 for candle closes only"""
+
+        return self.websockettriggerpcnt
+
+    def getMarkets(self) -> dict:
+        """Markets run in one process, with the options of each"""
+
+        return self.markets
+
     def enabledLogBuySellInJson(self) -> bool:
         return self.logbuysellinjson
 
@@ -925,12 +1155,7 @@ class PyCryptoBot(BotConfig):
 
         try:
             if self.exchange == Exchange.COINBASEPRO:
-                api = CBAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIPassphrase(),
-                    self.getAPIURL(),
-                )
+                api = self.getAuthAPI()
                 orders = api.getOrders(self.getMarket(), "", "done")
 
                 if len(orders) == 0:
@@ -956,13 +1181,7 @@ class PyCryptoBot(BotConfig):
                     ),
                 }
             elif self.exchange == Exchange.KUCOIN:
-                api = KAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIPassphrase(),
-                    self.getAPIURL(),
-                    use_cache=self.useKucoinCache(),
-                )
+                api = self.getAuthAPI()
                 orders = api.getOrders(self.getMarket(), "", "done")
 
                 if len(orders) == 0:
@@ -988,12 +1207,7 @@ class PyCryptoBot(BotConfig):
                     ),
                 }
             elif self.exchange == Exchange.BINANCE:
-                api = BAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIURL(),
-                    recv_window=self.recv_window,
-                )
+                api = self.getAuthAPI()
                 orders = api.getOrders(self.getMarket())
 
                 if len(orders) == 0:
@@ -1033,31 +1247,15 @@ class PyCryptoBot(BotConfig):
         elif self.takerfee > 0.0:
             return self.takerfee
         elif self.exchange == Exchange.COINBASEPRO:
-            api = CBAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIPassphrase(),
-                self.getAPIURL(),
-            )
+            api = self.getAuthAPI()
             self.takerfee = api.getTakerFee()
             return self.takerfee
         elif self.exchange == Exchange.BINANCE:
-            api = BAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIURL(),
-                recv_window=self.recv_window,
-            )
+            api = self.getAuthAPI()
             self.takerfee = api.getTakerFee()
             return self.takerfee
         elif self.exchange == Exchange.KUCOIN:
-            api = KAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIPassphrase(),
-                self.getAPIURL(),
-                use_cache=self.useKucoinCache(),
-            )
+            api = self.getAuthAPI()
             self.takerfee = api.getTakerFee()
             return self.takerfee
         else:
@@ -1065,29 +1263,13 @@ class PyCryptoBot(BotConfig):
 
     def getMakerFee(self):
         if self.exchange == Exchange.COINBASEPRO:
-            api = CBAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIPassphrase(),
-                self.getAPIURL(),
-            )
+            api = self.getAuthAPI()
             return api.getMakerFee()
         elif self.exchange == Exchange.BINANCE:
-            api = BAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIURL(),
-                recv_window=self.recv_window,
-            )
+            api = self.getAuthAPI()
             return api.getMakerFee()
         elif self.exchange == Exchange.KUCOIN:
-            api = KAuthAPI(
-                self.getAPIKey(),
-                self.getAPISecret(),
-                self.getAPIPassphrase(),
-                self.getAPIURL(),
-                use_cache=self.useKucoinCache(),
-            )
+            api = self.getAuthAPI()
             return api.getMakerFee()
         else:
             return 0.005
@@ -1099,29 +1281,13 @@ class PyCryptoBot(BotConfig):
                     quote_currency = (buy_percent / 100) * quote_currency
 
             if self.exchange == Exchange.COINBASEPRO:
-                api = CBAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIPassphrase(),
-                    self.getAPIURL(),
-                )
+                api = self.getAuthAPI()
                 return api.marketBuy(market, float(truncate(quote_currency, 8)))
             elif self.exchange == Exchange.KUCOIN:
-                api = KAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIPassphrase(),
-                    self.getAPIURL(),
-                    use_cache=self.useKucoinCache(),
-                )
+                api = self.getAuthAPI()
                 return api.marketBuy(market, float(quote_currency))
             elif self.exchange == Exchange.BINANCE:
-                api = BAuthAPI(
-                    self.getAPIKey(),
-                    self.getAPISecret(),
-                    self.getAPIURL(),
-                    recv_window=self.recv_window,
-                )
+                api = self.getAuthAPI()
                 return api.marketBuy(market, quote_currency)
             else:
                 return None
@@ -1132,29 +1298,13 @@ class PyCryptoBot(BotConfig):
                 if sell_percent > 0 and sell_percent < 100:
                     base_currency = (sell_percent / 100) * base_currency
                 if self.exchange == Exchange.COINBASEPRO:
-                    api = CBAuthAPI(
-                        self.getAPIKey(),
-                        self.getAPISecret(),
-                        self.getAPIPassphrase(),
-                        self.getAPIURL(),
-                    )
+                    api = self.getAuthAPI()
                     return api.marketSell(market, base_currency)
                 elif self.exchange == Exchange.BINANCE:
-                    api = BAuthAPI(
-                        self.getAPIKey(),
-                        self.getAPISecret(),
-                        self.getAPIURL(),
-                        recv_window=self.recv_window,
-                    )
+                    api = self.getAuthAPI()
                     return api.marketSell(market, base_currency, use_fees=self.use_sell_fee)
                 elif self.exchange == Exchange.KUCOIN:
-                    api = KAuthAPI(
-                        self.getAPIKey(),
-                        self.getAPISecret(),
-                        self.getAPIPassphrase(),
-                        self.getAPIURL(),
-                        use_cache=self.useKucoinCache(),
-                    )
+                    api = self.getAuthAPI()
                     return api.marketSell(market, base_currency)
             else:
                 return None
@@ -1177,6 +1327,11 @@ class PyCryptoBot(BotConfig):
                 market
             )
 
+        elif self.exchange == Exchange.DUMMY:
+            (self.market, self.base_currency, self.quote_currency) = dummyParseMarket(
+                market
+            )
+
         return (self.market, self.base_currency, self.quote_currency)
 
     def setLive(self, flag):
@@ -0,0 +1,193 @@
+"""Concurrent market scanner"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+from models.PyCryptoBot import PyCryptoBot
+from models.Trading import MultiMarketAnalysis
+
+# volatility over the last 72 candles
+ATR_PERIOD = 72
+
+
+class Scanner:
+    def __init__(
+        self,
+        app: PyCryptoBot,
+        granularity: Granularity = Granularity.ONE_HOUR,
+        fetch_workers: int = 8,
+        analysis_workers: int = None,
+        batch_size: int = 25,
+    ) -> None:
+        """Scanner object model
+
+        Candles are fetched by a pool of threads, the session's rate limiter keeps
+        them within the exchange limits, and analysed in batches of markets by a
+        pool of processes as they arrive.
+
+        Parameters
+        ----------
+        app : PyCryptoBot
+            bot configured for the exchange to scan
+        granularity : Granularity
+            granularity of the candles analysed
+        fetch_workers : int
+            concurrent candle requests
+        analysis_workers : int
+            analysis processes, defaults to the number of cores
+        batch_size : int
+            markets analysed together by MultiMarketAnalysis
+        """
+
+        self.app = app
+        self.api = app.getPublicAPI()
+        self.granularity = granularity
+        self.fetch_workers = fetch_workers
+        self.analysis_workers = analysis_workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+
+    def getMarkets(self, quote: str) -> pd.DataFrame:
+        """Price and 24 hour volume of the exchange's markets in a quote currency"""
+
+        exchange = self.app.getExchange()
+        resp = self.api.getMarkets24HrStats()
+
+        markets = []
+        if exchange == Exchange.BINANCE:
+            for row in resp:
+                if row["symbol"].endswith(quote):
+                    markets.append(row)
+        elif exchange == Exchange.COINBASEPRO:
+            for market in resp:
+                if market.endswith(f"-{quote}"):
+                    resp[market]["stats_24hour"]["market"] = market
+                    markets.append(resp[market]["stats_24hour"])
+        elif exchange == Exchange.KUCOIN:
+            for result in resp["data"]["ticker"]:
+                if result["symbol"].endswith(f"-{quote}"):
+                    markets.append(result)
+        else:
+            raise ValueError(f"Invalid exchange: {exchange}")
+
+        df_markets = pd.DataFrame(markets)
+
+        if exchange == Exchange.BINANCE:
+            df_markets = df_markets[["symbol", "lastPrice", "quoteVolume"]]
+        elif exchange == Exchange.COINBASEPRO:
+            df_markets = df_markets[["market", "last", "volume"]]
+        elif exchange == Exchange.KUCOIN:
+            df_markets = df_markets[["symbol", "last", "volValue"]]
+
+        df_markets.columns = ["market", "price", "volume"]
+        df_markets["price"] = df_markets["price"].astype(float)
+        df_markets["volume"] = df_markets["volume"].astype(float).round(0).astype(int)
+        df_markets.sort_values(by=["market"], ascending=True, inplace=True)
+        df_markets.set_index("market", inplace=True)
+
+        return df_markets
+
+    def scan(self, df_markets: pd.DataFrame, on_result=None) -> pd.DataFrame:
+        """Volatility and next buy signal of the markets traded in the last 24 hours
+
+        Parameters
+        ----------
+        df_markets : Pandas DataFrame
+            markets from getMarkets()
+        on_result : function
+            called with the results so far, the number of markets scanned and the total
+            each time a batch of markets has been analysed
+        """
+
+        df_markets = df_markets.copy()
+        df_markets["atr72"] = np.nan
+        df_markets["atr72_pcnt"] = np.nan
+        df_markets["buy_next"] = None
+
+        markets = list(df_markets.index[df_markets["volume"] > 0])
+        scanned = 0
+
+        def collect(future, batch):
+            nonlocal scanned
+            try:
+                df_last = future.result()
+                df_markets.loc[df_last.index, "atr72"] = df_last["atr72"]
+                df_markets.loc[df_last.index, "atr72_pcnt"] = (
+                    df_last["atr72"] / df_markets.loc[df_last.index, "price"] * 100
+                ).round(2)
+                df_markets.loc[df_last.index, "buy_next"] = df_last["buy_next"]
+            except Exception as err:
+                print(f"{', '.join(batch)}: {err}")
+
+            scanned += len(batch)
+            if on_result is not None:
+                on_result(df_markets, scanned, len(markets))
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = None
+
+        with ProcessPoolExecutor(self.analysis_workers, mp_context=context) as analysers:
+            # fork the workers before the fetch threads start
+            analysers.submit(int).result()
+
+            with ThreadPoolExecutor(self.fetch_workers) as fetchers:
+                fetches = {
+                    fetchers.submit(
+                        self.api.getHistoricalData, market, self.granularity, None
+                    ): market
+                    for market in markets
+                }
+
+                analyses = {}
+                pending = []
+                for i, fetch in enumerate(as_completed(fetches), start=1):
+                    market = fetches[fetch]
+                    try:
+                        df = fetch.result()
+                        if len(df) < ATR_PERIOD:
+                            raise ValueError("Data range too small.")
+                        pending.append(df.assign(market=market))
+                    except Exception as err:
+                        print(f"{market}: {err}")
+                        scanned += 1
+
+                    if len(pending) > 0 and (
+                        len(pending) == self.batch_size or i == len(fetches)
+                    ):
+                        batch = [df["market"].iloc[0] for df in pending]
+                        analyses[analysers.submit(analyseMarkets, pd.concat(pending))] = batch
+                        pending = []
+
+                    # collect the analyses finished while waiting for candles
+                    for analysis in [future for future in analyses if future.done()]:
+                        collect(analysis, analyses.pop(analysis))
+
+            for analysis in as_completed(analyses):
+                collect(analysis, analyses[analysis])
+
+        return df_markets
+
+
+def analyseMarkets(df: pd.DataFrame) -> pd.DataFrame:
+    """Average true range and whether EMA12 is below EMA26 on the last candle of each market
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+        long format panel of the candles of the markets
+    """
+
+    analysis = MultiMarketAnalysis(df)
+    analysis.addEMA(12)
+    analysis.addEMA(26)
+    analysis.addATR(ATR_PERIOD)
+    df_last = analysis.getLast()
+    df_last["buy_next"] = df_last["ema12"] < df_last["ema26"]
+
+    return df_last[["atr72", "buy_next"]]
@@ -1,7 +1,9 @@
 import sys
 from time import sleep
 from datetime import datetime, timedelta
+import numpy as np
 from models.PyCryptoBot import PyCryptoBot
+from models.TradePairs import pairTrades
 from models.TradingAccount import TradingAccount
 from models.exchange.ExchangesEnum import Exchange
 from models.helper.LogHelper import Logger
@@ -25,43 +27,39 @@ class Stats():
             self.fiat_currency = self.app.getQuoteCurrency()
 
         # get buy/sell pairs (merge as necessary)
-        last_order = None
-        # pylint: disable=unused-variable
-        for index, row in self.orders.iterrows():
-            time = row['created_at'].to_pydatetime()
-            # Logger.debug(row)
-            if row['action'] == 'buy':
-                if self.app.exchange == Exchange.COINBASEPRO:
-                    amount = row['filled'] * row['price'] + row['fees']
-                else:
-                    amount = row['size']
-                if last_order in ['sell', None]:
-                    last_order = 'buy'
-                    self.order_pairs.append({'buy': {'time':time, 'size': float(amount)}, 'sell': None, 'market': self.app.getMarket()})
-                else:
-                    self.order_pairs[-1]['buy']['size'] += float(amount)
-            else:
-                if self.app.exchange == Exchange.COINBASEPRO:
-                    amount = (row['filled'] * row['price']) - row['fees']
-                else:
-                    amount = (float(row['filled']) * float(row['price'])) - row['fees']
-                if last_order == None: # first order is a sell (no pair)
-                    continue
-                if last_order == 'buy':
-                    last_order = 'sell'
-                    if float(amount) > 0:
-                        self.order_pairs[-1]['sell'] = {'time':time, 'size': float(amount)}
-                else:
-                    if float(amount) > 0:
-                        self.order_pairs[-1]['sell']['size'] += float(amount)
-        # remove open trade
-        if len(self.order_pairs) > 0:
-            if self.order_pairs[-1]['sell'] == None:
-                s = []
-                for order in self.order_pairs:
-                    if order["sell"] != None:
-                        s.append(order)
-                self.order_pairs = s
+        df = self.orders.copy()
+        if len(df) == 0:
+            return
+
+        filled = df['filled'].astype(float)
+        price = df['price'].astype(float)
+        fees = df['fees'].astype(float)
+        buy = (df['action'] == 'buy').to_numpy()
+        if self.app.exchange == Exchange.COINBASEPRO:
+            buy_amount = filled * price + fees
+        else:
+            buy_amount = df['size'].astype(float)
+        df['action'] = np.where(buy, 'buy', 'sell')
+        df['amount'] = np.where(buy, buy_amount, filled * price - fees)
+        # sells that return nothing are not added to the trade
+        counted = buy | (df['amount'] > 0).to_numpy()
+        df['amount'] = np.where(counted, df['amount'], 0)
+        df['time'] = df['created_at'].where(counted)
+        df['market'] = self.app.getMarket()
+
+        trades = pairTrades(df, first=['time'], total=['amount'])
+        # drop trades without a sell
+        trades = trades[trades['sell_time'].notna()]
+        self.order_pairs += [
+            {
+                'buy': {'time': buy_time.to_pydatetime(), 'size': float(buy_size)},
+                'sell': {'time': sell_time.to_pydatetime(), 'size': float(sell_size)},
+                'market': pair_market,
+            }
+            for pair_market, buy_time, buy_size, sell_time, sell_size in zip(
+                trades['market'], trades['buy_time'], trades['buy_amount'], trades['sell_time'], trades['sell_amount']
+            )
+        ]
 
         # return [x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles]
 
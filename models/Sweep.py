@@ -0,0 +1,169 @@
+"""Parallel parameter sweep of result only simulations"""
+
+import copy
+import itertools
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from models.AppState import AppState
+from models.Backtest import Backtest
+from models.helper.LogHelper import Logger
+from models.PyCryptoBot import PyCryptoBot
+
+
+class Sweep:
+    def __init__(
+        self,
+        app: PyCryptoBot = None,
+        state: AppState = None,
+        df: pd.DataFrame = pd.DataFrame(),
+        iterations: int = 1,
+    ) -> None:
+        """Sweep object model
+
+        Parameters
+        ----------
+        app : PyCryptoBot
+            base simulation configuration, each combination overrides some of its options
+        state : AppState
+            state every simulation starts from
+        df : Pandas DataFrame
+            market data including the technical indicators from TechnicalAnalysis.addAll()
+        iterations : int
+            first iteration (1-based row) to simulate
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("'df' not a Pandas dataframe")
+
+        if len(df) == 0:
+            raise ValueError("'df' is empty")
+
+        self.app = app
+        self.state = state
+        self.df = df
+        self.iterations = iterations
+
+    def getCombinations(self, options: dict, samples: int = 0, seed: int = None) -> list:
+        """Option combinations to simulate
+
+        Parameters
+        ----------
+        options : dict
+            BotConfig option name to the list of values to try
+        samples : int
+            random search of this many combinations, 0 for the full grid
+        seed : int
+            random search seed
+        """
+
+        for option, values in options.items():
+            if not hasattr(self.app, option):
+                raise ValueError(f"Unknown option: {option}")
+
+            if not isinstance(values, list) or len(values) == 0:
+                raise ValueError(f"Option {option} needs a list of values")
+
+        names = list(options.keys())
+        grid = list(itertools.product(*options.values()))
+
+        if samples > 0 and samples < len(grid):
+            grid = random.Random(seed).sample(grid, samples)
+
+        return [dict(zip(names, values)) for values in grid]
+
+    def run(self, combinations: list, workers: int = None) -> pd.DataFrame:
+        """Simulate each combination in parallel and rank them by margin
+
+        Parameters
+        ----------
+        combinations : list
+            option dicts from getCombinations()
+        workers : int
+            worker processes, defaults to the number of cores
+        """
+
+        # the golden cross check fetches its 1h candles once, before the workers copy the app
+        if self.app.sma50200_1h_cache is None:
+            self.app.is1hSMA50200Bull()
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        # forked workers share the analysed candles, otherwise they are pickled once per worker
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = None
+
+        chunksize = max(1, len(combinations) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_initWorker,
+            initargs=(self,),
+        ) as executor:
+            results = list(executor.map(_simulate, combinations, chunksize=chunksize))
+
+        df_results = pd.DataFrame(results)
+        if len(df_results) > 0:
+            df_results.sort_values(
+                by=["margin", "profit"], ascending=False, inplace=True, ignore_index=True
+            )
+
+        return df_results
+
+    def simulate(self, options: dict) -> dict:
+        """Simulate one combination of options"""
+
+        app = copy.copy(self.app)
+        app.is_sim = 1
+        app.simresultonly = True
+        app.is_verbose = 0
+        app.smart_switch = 0
+        app.disabletelegram = True
+        for option, value in options.items():
+            setattr(app, option, value)
+        app.trade_tracker = PyCryptoBot.trade_tracker
+
+        state = copy.copy(self.state)
+        state.app = app
+
+        Backtest(app, state, self.df).run(self.iterations)
+
+        trades = app.trade_tracker
+        sells = trades[trades["Action"] == "SELL"]
+        margins = sells["Margin"].astype(float).to_numpy()
+
+        # drawdown is the largest fall of the cumulative margin from its previous peak
+        cumulative = np.r_[0.0, np.cumsum(margins)]
+        drawdown = float(np.max(np.maximum.accumulate(cumulative) - cumulative))
+
+        result = dict(options)
+        result["margin"] = float(state.margintracker)
+        result["profit"] = float(state.profitlosstracker)
+        result["trades"] = len(sells)
+        result["win_rate"] = float((margins > 0).mean() * 100) if len(margins) > 0 else 0.0
+        result["drawdown"] = drawdown
+
+        return result
+
+
+# each worker process keeps its own reference to the sweep it was started with
+_sweep = None
+
+
+def _initWorker(sweep: Sweep) -> None:
+    global _sweep  # pylint: disable=global-statement
+    _sweep = sweep
+
+    # strategy warnings from every simulation would only interleave on the console
+    Logger.configure(filelog=0, consolelog=0)
+
+
+def _simulate(options: dict) -> dict:
+    return _sweep.simulate(options)
@@ -0,0 +1,64 @@
+"""Completed trades paired from the order history"""
+
+import numpy as np
+import pandas as pd
+
+
+def pairTrades(df: pd.DataFrame, first: list = (), total: list = ()) -> pd.DataFrame:
+    """Buy orders paired with the sell orders that follow them, per market
+
+    Consecutive orders with the same action in a market are merged into a run, and each
+    run of buys is paired with the run of sells after it. Sells before the first buy of
+    a market and the buys of a trade still open are dropped. The trades are returned
+    ordered by market, then by the order of the runs.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+        orders with market and action columns, oldest first
+    first : list
+        columns returned as the first value of each run that is not null, as buy_<column>
+        and sell_<column>
+    total : list
+        numeric columns returned as the sum over each run
+    """
+
+    columns = ["market"] + [
+        f"{action}_{column}" for action in ("buy", "sell") for column in list(first) + list(total)
+    ]
+    if len(df) == 0:
+        return pd.DataFrame(columns=columns)
+
+    df = df.sort_values(by="market", kind="stable").reset_index(drop=True)
+    market = df["market"].to_numpy()
+    action = df["action"].to_numpy()
+
+    starts = np.flatnonzero(
+        np.r_[True, (market[1:] != market[:-1]) | (action[1:] != action[:-1])]
+    )
+    ends = np.r_[starts[1:], len(df)]
+
+    # a buy run followed by a sell run of the same market, consecutive runs of a market alternate
+    paired = np.flatnonzero(
+        (action[starts[:-1]] == "buy")
+        & (action[starts[1:]] == "sell")
+        & (market[starts[:-1]] == market[starts[1:]])
+    )
+    runs = {"buy": paired, "sell": paired + 1}
+
+    trades = {"market": market[starts[paired]]}
+    positions = np.arange(len(df))
+    for column in first:
+        # position of the first value that is not null, -1 when there is none
+        valid = np.where(df[column].notna().to_numpy(), positions, len(df))
+        found = np.minimum.reduceat(valid, starts)
+        found = np.where(found < ends, found, -1)
+        for side, run in runs.items():
+            trades[f"{side}_{column}"] = df[column].reindex(found[run]).array
+
+    for column in total:
+        sums = np.add.reduceat(pd.to_numeric(df[column]).to_numpy(dtype="float64"), starts)
+        for side, run in runs.items():
+            trades[f"{side}_{column}"] = sums[run]
+
+    return pd.DataFrame(trades, columns=columns)
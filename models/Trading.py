@@ -2,27 +2,36 @@
 
 import warnings
 
+from math import copysign, sqrt
 from re import compile
 from numpy import (
     abs,
+    array_equal,
+    asarray,
+    errstate,
+    flatnonzero,
+    float64,
     floor,
+    fmax,
+    full,
+    isnan,
     max,
     maximum,
-    mean,
     minimum,
     nan,
+    nanmean,
     ndarray,
+    repeat,
     round,
-    sum as np_sum,
     where,
 )
-from pandas import concat, DataFrame, Series
+from pandas import concat, DataFrame, Index, Series
 from datetime import datetime, timedelta
-from statsmodels.tsa.statespace.sarimax import SARIMAX, SARIMAXResultsWrapper
-from statsmodels.tools.sm_exceptions import ConvergenceWarning
+from typing import TYPE_CHECKING
 from models.helper.LogHelper import Logger
 
-warnings.simplefilter("ignore", ConvergenceWarning)
+if TYPE_CHECKING:
+    from statsmodels.tsa.statespace.sarimax import SARIMAXResultsWrapper
 
 
 class TechnicalAnalysis:
@@ -62,6 +71,8 @@ class TechnicalAnalysis:
 
         self.df = data
         self.levels = []
+        self._levels_cache = None
+        self._incremental = None
 
     def getDataFrame(self) -> DataFrame:
         """Returns the Pandas DataFrame"""
@@ -97,22 +108,33 @@ class TechnicalAnalysis:
 
         self.addADXBuySignals()
 
-        self.addCandleAstralBuy()
-        self.addCandleAstralSell()
-        self.addCandleHammer()
-        self.addCandleInvertedHammer()
-        self.addCandleShootingStar()
-        self.addCandleHangingMan()
-        self.addCandleThreeWhiteSoldiers()
-        self.addCandleThreeBlackCrows()
-        self.addCandleDoji()
-        self.addCandleThreeLineStrike()
-        self.addCandleTwoBlackGapping()
-        self.addCandleMorningStar()
-        self.addCandleEveningStar()
-        self.addCandleAbandonedBaby()
-        self.addCandleMorningDojiStar()
-        self.addCandleEveningDojiStar()
+        self.addCandlestickPatterns()
+
+    def addAllIncremental(self, previous=None) -> None:
+        """Adds analysis to the DataFrame, reusing the state of a previous analysis
+
+        If the candles only differ from the previous analysis in the newest row
+        (open candle revised or one candle appended) only that row is calculated,
+        otherwise this falls back to addAll(). The result is identical to addAll().
+        The running state is only built when the next candles can reuse it, as a
+        window that moves when a candle closes has to be recalculated anyway.
+
+        Parameters
+        ----------
+        previous : TechnicalAnalysis
+            Analysis of the previous poll of the same market and granularity
+        """
+
+        result = None
+        if isinstance(previous, TechnicalAnalysis) and previous._incremental is not None:
+            result = previous._incremental.update(self.df)
+
+        if result is None:
+            input_columns = list(self.df.columns)
+            self.addAll()
+            self._incremental = _DeferredIncrementalState(self.df, input_columns)
+        else:
+            self._incremental, self.df = result
 
     """Candlestick References
     https://commodity.com/technical-analysis
@@ -124,26 +146,7 @@ class TechnicalAnalysis:
     def candleHammer(self) -> Series:
         """* Candlestick Detected: Hammer ("Weak - Reversal - Bullish Signal - Up"""
 
-        return (
-            (
-                (self.df["high"] - self.df["low"])
-                > 3 * (self.df["open"] - self.df["close"])
-            )
-            & (
-                (
-                    (self.df["close"] - self.df["low"])
-                    / (0.001 + self.df["high"] - self.df["low"])
-                )
-                > 0.6
-            )
-            & (
-                (
-                    (self.df["open"] - self.df["low"])
-                    / (0.001 + self.df["high"] - self.df["low"])
-                )
-                > 0.6
-            )
-        )
+        return self.__candlestickPattern("hammer")
 
     def addCandleHammer(self) -> None:
         self.df["hammer"] = self.candleHammer()
@@ -151,20 +154,7 @@ class TechnicalAnalysis:
     def candleShootingStar(self) -> Series:
         """* Candlestick Detected: Shooting Star ("Weak - Reversal - Bearish Pattern - Down")"""
 
-        return (
-            (
-                (self.df["open"].shift(1) < self.df["close"].shift(1))
-                & (self.df["close"].shift(1) < self.df["open"])
-            )
-            & (
-                self.df["high"] - maximum(self.df["open"], self.df["close"])
-                >= (abs(self.df["open"] - self.df["close"]) * 3)
-            )
-            & (
-                (minimum(self.df["close"], self.df["open"]) - self.df["low"])
-                <= abs(self.df["open"] - self.df["close"])
-            )
-        )
+        return self.__candlestickPattern("shooting_star")
 
     def addCandleShootingStar(self) -> None:
         self.df["shooting_star"] = self.candleShootingStar()
@@ -172,28 +162,7 @@ class TechnicalAnalysis:
     def candleHangingMan(self) -> Series:
         """* Candlestick Detected: Hanging Man ("Weak - Continuation - Bearish Pattern - Down")"""
 
-        return (
-            (
-                (self.df["high"] - self.df["low"])
-                > (4 * (self.df["open"] - self.df["close"]))
-            )
-            & (
-                (
-                    (self.df["close"] - self.df["low"])
-                    / (0.001 + self.df["high"] - self.df["low"])
-                )
-                >= 0.75
-            )
-            & (
-                (
-                    (self.df["open"] - self.df["low"])
-                    / (0.001 + self.df["high"] - self.df["low"])
-                )
-                >= 0.75
-            )
-            & (self.df["high"].shift(1) < self.df["open"])
-            & (self.df["high"].shift(2) < self.df["open"])
-        )
+        return self.__candlestickPattern("hanging_man")
 
     def addCandleHangingMan(self) -> None:
         self.df["hanging_man"] = self.candleHangingMan()
@@ -201,22 +170,7 @@ class TechnicalAnalysis:
     def candleInvertedHammer(self) -> Series:
         """* Candlestick Detected: Inverted Hammer ("Weak - Continuation - Bullish Pattern - Up")"""
 
-        return (
-            (
-                (self.df["high"] - self.df["low"])
-                > 3 * (self.df["open"] - self.df["close"])
-            )
-            & (
-                (self.df["high"] - self.df["close"])
-                / (0.001 + self.df["high"] - self.df["low"])
-                > 0.6
-            )
-            & (
-                (self.df["high"] - self.df["open"])
-                / (0.001 + self.df["high"] - self.df["low"])
-                > 0.6
-            )
-        )
+        return self.__candlestickPattern("inverted_hammer")
 
     def addCandleInvertedHammer(self) -> None:
         self.df["inverted_hammer"] = self.candleInvertedHammer()
@@ -224,27 +178,7 @@ class TechnicalAnalysis:
     def candleThreeWhiteSoldiers(self) -> Series:
         """*** Candlestick Detected: Three White Soldiers ("Strong - Reversal - Bullish Pattern - Up")"""
 
-        return (
-            (
-                (self.df["open"] > self.df["open"].shift(1))
-                & (self.df["open"] < self.df["close"].shift(1))
-            )
-            & (self.df["close"] > self.df["high"].shift(1))
-            & (
-                self.df["high"] - maximum(self.df["open"], self.df["close"])
-                < (abs(self.df["open"] - self.df["close"]))
-            )
-            & (
-                (self.df["open"].shift(1) > self.df["open"].shift(2))
-                & (self.df["open"].shift(1) < self.df["close"].shift(2))
-            )
-            & (self.df["close"].shift(1) > self.df["high"].shift(2))
-            & (
-                self.df["high"].shift(1)
-                - maximum(self.df["open"].shift(1), self.df["close"].shift(1))
-                < (abs(self.df["open"].shift(1) - self.df["close"].shift(1)))
-            )
-        )
+        return self.__candlestickPattern("three_white_soldiers")
 
     def addCandleThreeWhiteSoldiers(self) -> None:
         self.df["three_white_soldiers"] = self.candleThreeWhiteSoldiers()
@@ -252,27 +186,7 @@ class TechnicalAnalysis:
     def candleThreeBlackCrows(self) -> Series:
         """* Candlestick Detected: Three Black Crows ("Strong - Reversal - Bearish Pattern - Down")"""
 
-        return (
-            (
-                (self.df["open"] < self.df["open"].shift(1))
-                & (self.df["open"] > self.df["close"].shift(1))
-            )
-            & (self.df["close"] < self.df["low"].shift(1))
-            & (
-                self.df["low"] - maximum(self.df["open"], self.df["close"])
-                < (abs(self.df["open"] - self.df["close"]))
-            )
-            & (
-                (self.df["open"].shift(1) < self.df["open"].shift(2))
-                & (self.df["open"].shift(1) > self.df["close"].shift(2))
-            )
-            & (self.df["close"].shift(1) < self.df["low"].shift(2))
-            & (
-                self.df["low"].shift(1)
-                - maximum(self.df["open"].shift(1), self.df["close"].shift(1))
-                < (abs(self.df["open"].shift(1) - self.df["close"].shift(1)))
-            )
-        )
+        return self.__candlestickPattern("three_black_crows")
 
     def addCandleThreeBlackCrows(self) -> None:
         self.df["three_black_crows"] = self.candleThreeBlackCrows()
@@ -280,23 +194,7 @@ class TechnicalAnalysis:
     def candleDoji(self) -> Series:
         """! Candlestick Detected: Doji ("Indecision")"""
 
-        return (
-            (
-                (
-                    abs(self.df["close"] - self.df["open"])
-                    / (self.df["high"] - self.df["low"])
-                )
-                < 0.1
-            )
-            & (
-                (self.df["high"] - maximum(self.df["close"], self.df["open"]))
-                > (3 * abs(self.df["close"] - self.df["open"]))
-            )
-            & (
-                (minimum(self.df["close"], self.df["open"]) - self.df["low"])
-                > (3 * abs(self.df["close"] - self.df["open"]))
-            )
-        )
+        return self.__candlestickPattern("doji")
 
     def addCandleDoji(self) -> None:
         self.df["doji"] = self.candleDoji()
@@ -304,32 +202,7 @@ class TechnicalAnalysis:
     def candleThreeLineStrike(self) -> Series:
         """** Candlestick Detected: Three Line Strike ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return (
-            (
-                (self.df["open"].shift(1) < self.df["open"].shift(2))
-                & (self.df["open"].shift(1) > self.df["close"].shift(2))
-            )
-            & (self.df["close"].shift(1) < self.df["low"].shift(2))
-            & (
-                self.df["low"].shift(1)
-                - maximum(self.df["open"].shift(1), self.df["close"].shift(1))
-                < (abs(self.df["open"].shift(1) - self.df["close"].shift(1)))
-            )
-            & (
-                (self.df["open"].shift(2) < self.df["open"].shift(3))
-                & (self.df["open"].shift(2) > self.df["close"].shift(3))
-            )
-            & (self.df["close"].shift(2) < self.df["low"].shift(3))
-            & (
-                self.df["low"].shift(2)
-                - maximum(self.df["open"].shift(2), self.df["close"].shift(2))
-                < (abs(self.df["open"].shift(2) - self.df["close"].shift(2)))
-            )
-            & (
-                (self.df["open"] < self.df["low"].shift(1))
-                & (self.df["close"] > self.df["high"].shift(3))
-            )
-        )
+        return self.__candlestickPattern("three_line_strike")
 
     def addCandleThreeLineStrike(self) -> None:
         self.df["three_line_strike"] = self.candleThreeLineStrike()
@@ -337,18 +210,7 @@ class TechnicalAnalysis:
     def candleTwoBlackGapping(self) -> Series:
         """*** Candlestick Detected: Two Black Gapping ("Reliable - Reversal - Bearish Pattern - Down")"""
 
-        return (
-            (
-                (self.df["open"] < self.df["open"].shift(1))
-                & (self.df["open"] > self.df["close"].shift(1))
-            )
-            & (self.df["close"] < self.df["low"].shift(1))
-            & (
-                self.df["low"] - maximum(self.df["open"], self.df["close"])
-                < (abs(self.df["open"] - self.df["close"]))
-            )
-            & (self.df["high"].shift(1) < self.df["low"].shift(2))
-        )
+        return self.__candlestickPattern("two_black_gapping")
 
     def addCandleTwoBlackGapping(self) -> None:
         self.df["two_black_gapping"] = self.candleTwoBlackGapping()
@@ -356,19 +218,7 @@ class TechnicalAnalysis:
     def candleMorningStar(self) -> Series:
         """*** Candlestick Detected: Morning Star ("Strong - Reversal - Bullish Pattern - Up")"""
 
-        return (
-            (
-                maximum(self.df["open"].shift(1), self.df["close"].shift(1))
-                < self.df["close"].shift(2)
-            )
-            & (self.df["close"].shift(2) < self.df["open"].shift(2))
-        ) & (
-            (self.df["close"] > self.df["open"])
-            & (
-                self.df["open"]
-                > maximum(self.df["open"].shift(1), self.df["close"].shift(1))
-            )
-        )
+        return self.__candlestickPattern("morning_star")
 
     def addCandleMorningStar(self) -> None:
         self.df["morning_star"] = self.candleMorningStar()
@@ -376,19 +226,7 @@ class TechnicalAnalysis:
     def candleEveningStar(self) -> ndarray:
         """*** Candlestick Detected: Evening Star ("Strong - Reversal - Bearish Pattern - Down")"""
 
-        return (
-            (
-                minimum(self.df["open"].shift(1), self.df["close"].shift(1))
-                > self.df["close"].shift(2)
-            )
-            & (self.df["close"].shift(2) > self.df["open"].shift(2))
-        ) & (
-            (self.df["close"] < self.df["open"])
-            & (
-                self.df["open"]
-                < minimum(self.df["open"].shift(1), self.df["close"].shift(1))
-            )
-        )
+        return self.__candlestickPattern("evening_star")
 
     def addCandleEveningStar(self) -> None:
         self.df["evening_star"] = self.candleEveningStar()
@@ -396,12 +234,7 @@ class TechnicalAnalysis:
     def candleAbandonedBaby(self):
         """** Candlestick Detected: Abandoned Baby ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return (
-            (self.df["open"] < self.df["close"])
-            & (self.df["high"].shift(1) < self.df["low"])
-            & (self.df["open"].shift(2) > self.df["close"].shift(2))
-            & (self.df["high"].shift(1) < self.df["low"].shift(2))
-        )
+        return self.__candlestickPattern("abandoned_baby")
 
     def addCandleAbandonedBaby(self) -> None:
         self.df["abandoned_baby"] = self.candleAbandonedBaby()
@@ -409,41 +242,7 @@ class TechnicalAnalysis:
     def candleMorningDojiStar(self) -> Series:
         """** Candlestick Detected: Morning Doji Star ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return (self.df["close"].shift(2) < self.df["open"].shift(2)) & (
-            abs(self.df["close"].shift(2) - self.df["open"].shift(2))
-            / (self.df["high"].shift(2) - self.df["low"].shift(2))
-            >= 0.7
-        ) & (
-            abs(self.df["close"].shift(1) - self.df["open"].shift(1))
-            / (self.df["high"].shift(1) - self.df["low"].shift(1))
-            < 0.1
-        ) & (
-            self.df["close"] > self.df["open"]
-        ) & (
-            abs(self.df["close"] - self.df["open"]) / (self.df["high"] - self.df["low"])
-            >= 0.7
-        ) & (
-            self.df["close"].shift(2) > self.df["close"].shift(1)
-        ) & (
-            self.df["close"].shift(2) > self.df["open"].shift(1)
-        ) & (
-            self.df["close"].shift(1) < self.df["open"]
-        ) & (
-            self.df["open"].shift(1) < self.df["open"]
-        ) & (
-            self.df["close"] > self.df["close"].shift(2)
-        ) & (
-            (
-                self.df["high"].shift(1)
-                - maximum(self.df["close"].shift(1), self.df["open"].shift(1))
-            )
-            > (3 * abs(self.df["close"].shift(1) - self.df["open"].shift(1)))
-        ) & (
-            minimum(self.df["close"].shift(1), self.df["open"].shift(1))
-            - self.df["low"].shift(1)
-        ) > (
-            3 * abs(self.df["close"].shift(1) - self.df["open"].shift(1))
-        )
+        return self.__candlestickPattern("morning_doji_star")
 
     def addCandleMorningDojiStar(self) -> None:
         self.df["morning_doji_star"] = self.candleMorningDojiStar()
@@ -451,41 +250,7 @@ class TechnicalAnalysis:
     def candleEveningDojiStar(self) -> Series:
         """** Candlestick Detected: Evening Doji Star ("Reliable - Reversal - Bearish Pattern - Down")"""
 
-        return (self.df["close"].shift(2) > self.df["open"].shift(2)) & (
-            abs(self.df["close"].shift(2) - self.df["open"].shift(2))
-            / (self.df["high"].shift(2) - self.df["low"].shift(2))
-            >= 0.7
-        ) & (
-            abs(self.df["close"].shift(1) - self.df["open"].shift(1))
-            / (self.df["high"].shift(1) - self.df["low"].shift(1))
-            < 0.1
-        ) & (
-            self.df["close"] < self.df["open"]
-        ) & (
-            abs(self.df["close"] - self.df["open"]) / (self.df["high"] - self.df["low"])
-            >= 0.7
-        ) & (
-            self.df["close"].shift(2) < self.df["close"].shift(1)
-        ) & (
-            self.df["close"].shift(2) < self.df["open"].shift(1)
-        ) & (
-            self.df["close"].shift(1) > self.df["open"]
-        ) & (
-            self.df["open"].shift(1) > self.df["open"]
-        ) & (
-            self.df["close"] < self.df["close"].shift(2)
-        ) & (
-            (
-                self.df["high"].shift(1)
-                - maximum(self.df["close"].shift(1), self.df["open"].shift(1))
-            )
-            > (3 * abs(self.df["close"].shift(1) - self.df["open"].shift(1)))
-        ) & (
-            minimum(self.df["close"].shift(1), self.df["open"].shift(1))
-            - self.df["low"].shift(1)
-        ) > (
-            3 * abs(self.df["close"].shift(1) - self.df["open"].shift(1))
-        )
+        return self.__candlestickPattern("evening_doji_star")
 
     def addCandleEveningDojiStar(self) -> None:
         self.df["evening_doji_star"] = self.candleEveningDojiStar()
@@ -493,24 +258,7 @@ class TechnicalAnalysis:
     def candleAstralBuy(self) -> Series:
         """*** Candlestick Detected: Astral Buy (Fibonacci 3, 5, 8)"""
 
-        return (
-            (self.df["close"] < self.df["close"].shift(3))
-            & (self.df["low"] < self.df["low"].shift(5))
-            & (self.df["close"].shift(1) < self.df["close"].shift(4))
-            & (self.df["low"].shift(1) < self.df["low"].shift(6))
-            & (self.df["close"].shift(2) < self.df["close"].shift(5))
-            & (self.df["low"].shift(2) < self.df["low"].shift(7))
-            & (self.df["close"].shift(3) < self.df["close"].shift(6))
-            & (self.df["low"].shift(3) < self.df["low"].shift(8))
-            & (self.df["close"].shift(4) < self.df["close"].shift(7))
-            & (self.df["low"].shift(4) < self.df["low"].shift(9))
-            & (self.df["close"].shift(5) < self.df["close"].shift(8))
-            & (self.df["low"].shift(5) < self.df["low"].shift(10))
-            & (self.df["close"].shift(6) < self.df["close"].shift(9))
-            & (self.df["low"].shift(6) < self.df["low"].shift(11))
-            & (self.df["close"].shift(7) < self.df["close"].shift(10))
-            & (self.df["low"].shift(7) < self.df["low"].shift(12))
-        )
+        return self.__candlestickPattern("astral_buy")
 
     def addCandleAstralBuy(self) -> None:
         self.df["astral_buy"] = self.candleAstralBuy()
@@ -518,28 +266,18 @@ class TechnicalAnalysis:
     def candleAstralSell(self) -> Series:
         """*** Candlestick Detected: Astral Sell (Fibonacci 3, 5, 8)"""
 
-        return (
-            (self.df["close"] > self.df["close"].shift(3))
-            & (self.df["high"] > self.df["high"].shift(5))
-            & (self.df["close"].shift(1) > self.df["close"].shift(4))
-            & (self.df["high"].shift(1) > self.df["high"].shift(6))
-            & (self.df["close"].shift(2) > self.df["close"].shift(5))
-            & (self.df["high"].shift(2) > self.df["high"].shift(7))
-            & (self.df["close"].shift(3) > self.df["close"].shift(6))
-            & (self.df["high"].shift(3) > self.df["high"].shift(8))
-            & (self.df["close"].shift(4) > self.df["close"].shift(7))
-            & (self.df["high"].shift(4) > self.df["high"].shift(9))
-            & (self.df["close"].shift(5) > self.df["close"].shift(8))
-            & (self.df["high"].shift(5) > self.df["high"].shift(10))
-            & (self.df["close"].shift(6) > self.df["close"].shift(9))
-            & (self.df["high"].shift(6) > self.df["high"].shift(11))
-            & (self.df["close"].shift(7) > self.df["close"].shift(10))
-            & (self.df["high"].shift(7) > self.df["high"].shift(12))
-        )
+        return self.__candlestickPattern("astral_sell")
 
     def addCandleAstralSell(self, period: int = 14) -> None:
         self.df["astral_sell"] = self.candleAstralSell()
 
+    def addCandlestickPatterns(self) -> None:
+        """Adds every registered candlestick pattern, evaluated in one pass"""
+
+        patterns = CandlestickPatterns.fromDataFrame(self.df).evaluate()
+        for column, values in patterns.items():
+            self.df[column] = values
+
     def addADXBuySignals(self, interval: int = 14) -> None:
         """Adds Average Directional Index (ADX) buy and sell signals to the DataFrame"""
 
@@ -967,9 +705,15 @@ class TechnicalAnalysis:
             nan, -50
         )
 
-    def seasonalARIMAModel(self) -> SARIMAXResultsWrapper:
+    def seasonalARIMAModel(self) -> "SARIMAXResultsWrapper":
         """Returns the Seasonal ARIMA Model for price predictions"""
 
+        # statsmodels takes about a second to import, so only when a model is fitted
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+        warnings.simplefilter("ignore", ConvergenceWarning)
+
         # hyperparameters for SARIMAX
         if not self.df.index.freq:
             freq = (
@@ -1109,15 +853,21 @@ class TechnicalAnalysis:
         ) | ((self.df["elder_ray_bear"] < self.df["elder_ray_bear"].shift(1)))
 
     def getSupportResistanceLevels(self) -> Series:
-        """Calculate the Support and Resistance Levels"""
+        """Calculate the Support and Resistance Levels
 
-        self.levels = []
-        self.__calculateSupportResistenceLevels()
-        levels_ts = {}
-        for level in self.levels:
-            levels_ts[self.df.index[level[0]]] = level[1]
-        # add the support levels to the DataFrame
-        return Series(levels_ts)
+        The levels are kept until the last candle changes, so the callers in one
+        iteration share them.
+        """
+
+        key = self.__supportResistanceKey()
+        if self._levels_cache is None or self._levels_cache[0] != key:
+            self.__calculateSupportResistenceLevels()
+            levels_ts = {}
+            for level in self.levels:
+                levels_ts[self.df.index[level[0]]] = level[1]
+            self._levels_cache = (key, Series(levels_ts))
+
+        return self._levels_cache[1].copy()
 
     def printSupportResistanceLevel(self, price: float = 0) -> None:
         if isinstance(price, int) or isinstance(price, float):
@@ -1445,52 +1195,1349 @@ class TechnicalAnalysis:
             Logger.critical(f"Unable to save: {filename}")
 
     def __calculateSupportResistenceLevels(self):
-        """Support and Resistance levels. (private function)"""
-
-        for i in range(2, self.df.shape[0] - 2):
-            if self.__isSupport(self.df, i):
-                l = self.df["low"][i]
-                if self.__isFarFromLevel(l):
-                    self.levels.append((i, l))
-            elif self.__isResistance(self.df, i):
-                l = self.df["high"][i]
-                if self.__isFarFromLevel(l):
-                    self.levels.append((i, l))
+        """Support and Resistance levels. (private function)
+
+        A support is a low below the two lows either side of it, falling into it and
+        rising after it, a resistance the same with highs. A level is only kept if it
+        is further than the mean candle range from the levels found before it.
+        """
+
+        self.levels = []
+
+        low = self.df["low"].to_numpy(dtype=float64)
+        high = self.df["high"].to_numpy(dtype=float64)
+        if len(low) < 5:
+            return self.levels
+
+        # candle i compared to candles i - 2 to i + 2, for i from 2 to len - 3
+        with errstate(invalid="ignore"):
+            support = (
+                (low[2:-2] < low[1:-3])
+                & (low[2:-2] < low[3:-1])
+                & (low[3:-1] < low[4:])
+                & (low[1:-3] < low[:-4])
+            )
+            resistance = (
+                (high[2:-2] > high[1:-3])
+                & (high[2:-2] > high[3:-1])
+                & (high[3:-1] > high[4:])
+                & (high[1:-3] > high[:-4])
+            )
+
+        candidates = flatnonzero(support | resistance)
+        values = where(support, low[2:-2], high[2:-2])[candidates]
+
+        s = (self.df["high"] - self.df["low"]).mean()
+        if not s > 0:
+            # no level can be nearer than the mean range
+            self.levels = [(int(i) + 2, l) for i, l in zip(candidates, values)]
+            return self.levels
+
+        # levels are bucketed by the mean range, so a bucket holds at most one level
+        # and a level nearer than the mean range is in a neighbouring bucket
+        buckets = {}
+        for i, l, bucket in zip(
+            candidates.tolist(), values.tolist(), (values // s).astype("int64").tolist()
+        ):
+            for b in (bucket, bucket - 1, bucket + 1, bucket - 2, bucket + 2):
+                x = buckets.get(b)
+                if x is not None and abs(l - x) < s:
+                    break
+            else:
+                buckets[bucket] = l
+                self.levels.append((i + 2, l))
+
         return self.levels
 
-    def __isSupport(self, df, i) -> bool:
-        """Is support level? (private function)"""
+    def __candlestickPattern(self, column: str) -> Series:
+        """A registered candlestick pattern of the DataFrame (private function)"""
 
-        try:
-            c1 = df["low"][i] < df["low"][i - 1]
-            c2 = df["low"][i] < df["low"][i + 1]
-            c3 = df["low"][i + 1] < df["low"][i + 2]
-            c4 = df["low"][i - 1] < df["low"][i - 2]
-            support = c1 and c2 and c3 and c4
-            return support
-        except:
-            support = False
-            return support
-
-    def __isResistance(self, df, i) -> bool:
-        """Is resistance level? (private function)"""
-
-        try:  
-            c1 = df["high"][i] > df["high"][i - 1]
-            c2 = df["high"][i] > df["high"][i + 1]
-            c3 = df["high"][i + 1] > df["high"][i + 2]
-            c4 = df["high"][i - 1] > df["high"][i - 2]
-            resistance = c1 and c2 and c3 and c4
-            return resistance
-        except:
-            resistance = False
-            return resistance
+        patterns = CandlestickPatterns.fromDataFrame(self.df).evaluate([column])
+        return Series(patterns[column], index=self.df.index)
 
-    def __isFarFromLevel(self, l) -> float:
-        """Is far from support level? (private function)"""
+    def __supportResistanceKey(self) -> tuple:
+        """The candles the levels were calculated from (private function)"""
 
-        s = mean(self.df["high"] - self.df["low"])
-        return np_sum([abs(l - x) < s for x in self.levels]) == 0
+        if len(self.df) == 0:
+            return (0,)
+
+        return (
+            len(self.df),
+            self.df.index[0],
+            self.df.index[-1],
+            self.df["low"].iloc[-1],
+            self.df["high"].iloc[-1],
+        )
 
     def __truncate(self, f, n) -> float:
         return floor(f * 10 ** n) / 10 ** n
+
+
+class MultiMarketAnalysis:
+    def __init__(self, data=DataFrame()) -> None:
+        """Multi market technical analysis object model
+
+        Calculates indicators for every market of a panel at once. Each market's
+        candles are right aligned in the columns of 2-D arrays (candles x markets),
+        padded with NaN before its first candle, and each indicator is one
+        column-wise rolling or EWM call over all the markets. The values are the
+        same as TechnicalAnalysis calculates per market.
+
+        Parameters
+        ----------
+        data : Pandas DataFrame
+            long format panel, data[ts] = [ 'market', 'low', 'high', 'close', ... ]
+            with the candles of each market in time order
+        """
+
+        if not isinstance(data, DataFrame):
+            raise TypeError("Data is not a Pandas dataframe.")
+
+        if "market" not in data or "close" not in data:
+            raise AttributeError("Pandas DataFrame 'market' and 'close' columns required.")
+
+        self.df = data
+        self.markets = list(data["market"].unique())
+
+        market_idx = data["market"].map({m: i for i, m in enumerate(self.markets)}).to_numpy()
+        lengths = data.groupby("market", sort=False).size().reindex(self.markets).to_numpy()
+        self.length = int(lengths.max()) if len(lengths) > 0 else 0
+        position = data.groupby("market", sort=False).cumcount().to_numpy()
+
+        # row of each panel row in the arrays, the newest candles share the last row
+        self._rows = (self.length - lengths[market_idx] + position, market_idx)
+        self.lengths = dict(zip(self.markets, lengths.tolist()))
+
+        self.arrays = {}
+        for column in ("low", "high", "open", "close", "volume"):
+            if column in data:
+                array = full((self.length, len(self.markets)), nan)
+                array[self._rows] = data[column].to_numpy(dtype=float64)
+                self.arrays[column] = array
+
+        self.indicators = {}
+
+    @classmethod
+    def fromArrays(
+        cls,
+        close: ndarray,
+        high: ndarray = None,
+        low: ndarray = None,
+        markets: list = None,
+    ):
+        """Analysis of 2-D arrays (candles x markets) of markets with the same candles
+
+        Parameters
+        ----------
+        close : NumPy array
+            close prices, one column per market
+        high : NumPy array
+            high prices, required by ATR and ADX
+        low : NumPy array
+            low prices, required by ATR and ADX
+        markets : list
+            market of each column, defaults to the column numbers
+        """
+
+        close = asarray(close, dtype=float64)
+        if close.ndim != 2:
+            raise ValueError("close must be a 2-D array (candles x markets)")
+
+        if markets is None:
+            markets = list(range(close.shape[1]))
+
+        data = {"market": repeat(markets, close.shape[0])}
+        for column, array in (("low", low), ("high", high), ("close", close)):
+            if array is not None:
+                data[column] = asarray(array, dtype=float64).T.ravel()
+
+        return cls(DataFrame(data))
+
+    def getDataFrame(self) -> DataFrame:
+        """The panel with a column per indicator"""
+
+        df = self.df.copy()
+        for name, array in self.indicators.items():
+            df[name] = array[self._rows]
+
+        return df
+
+    def getIndicator(self, name: str) -> DataFrame:
+        """Indicator of every market (columns), the newest candles in the last row"""
+
+        return DataFrame(self.indicators[name], columns=self.markets)
+
+    def getLast(self) -> DataFrame:
+        """The newest candle and indicators of each market"""
+
+        data = {column: array[-1] for column, array in self.arrays.items()}
+        data.update({name: array[-1] for name, array in self.indicators.items()})
+        return DataFrame(data, index=Index(self.markets, name="market"))
+
+    def addEMA(self, period: int) -> None:
+        """Adds the Exponential Moving Average (EMA) of every market"""
+
+        self._checkPeriod(period, 5, 200)
+        self.indicators["ema" + str(period)] = (
+            self._wide("close").ewm(span=period, adjust=False).mean().to_numpy()
+        )
+
+    def addSMA(self, period: int) -> None:
+        """Adds the Simple Moving Average (SMA) of every market"""
+
+        self._checkPeriod(period, 5, 200)
+        self.indicators["sma" + str(period)] = (
+            self._wide("close").rolling(period, min_periods=1).mean().to_numpy()
+        )
+
+    def addATR(self, interval: int = 14) -> None:
+        """Adds the Average True Range (ATR) of every market"""
+
+        self._checkPeriod(interval, 5, 200)
+        atr = (self._trueRange().rolling(interval).sum() / interval).to_numpy()
+        self.indicators["atr" + str(interval)] = self._fillMean(atr)
+
+    def addRSI(self, period: int) -> None:
+        """Adds the Relative Strength Index (RSI) of every market"""
+
+        self._checkPeriod(period, 7, 21)
+
+        diff = self._wide("close").diff(1)
+        avg_gains = diff.clip(lower=0).ewm(com=period - 1, min_periods=period).mean()
+        avg_losses = diff.clip(upper=0).ewm(com=period - 1, min_periods=period).mean()
+
+        with errstate(divide="ignore", invalid="ignore"):
+            rs = abs(avg_gains.to_numpy() / avg_losses.to_numpy())
+            rsi = 100 - 100 / (1 + rs)
+
+        # default to midway-50 for first entries
+        self.indicators["rsi" + str(period)] = self._fill(rsi, 50)
+
+    def addMACD(self) -> None:
+        """Adds the Moving Average Convergence Divergence (MACD) of every market"""
+
+        for period in (12, 26):
+            if "ema" + str(period) not in self.indicators:
+                self.addEMA(period)
+
+        macd = self.indicators["ema12"] - self.indicators["ema26"]
+        self.indicators["macd"] = macd
+        self.indicators["signal"] = (
+            DataFrame(macd).ewm(span=9, adjust=False).mean().to_numpy()
+        )
+
+    def addADX(self, interval: int = 14) -> None:
+        """Adds the Average Directional Index (ADX) of every market"""
+
+        self._checkPeriod(interval, 5, 200)
+
+        high = self._wide("high")
+        low = self._wide("low")
+        minus_dm = (low.shift(1) - low).to_numpy()
+        plus_dm = (high - high.shift(1)).to_numpy()
+
+        with errstate(invalid="ignore"):
+            padding = isnan(self.arrays["close"])
+            # -dm is compared to +dm after +dm is zeroed, as in averageDirectionalIndex()
+            plus_dm = where((plus_dm > minus_dm) & (plus_dm > 0), plus_dm, 0.0)
+            minus_dm = where((minus_dm > plus_dm) & (minus_dm > 0), minus_dm, 0.0)
+            plus_dm[padding] = nan
+            minus_dm[padding] = nan
+
+            tr = self._trueRange().rolling(interval).sum().to_numpy()
+            plus_di = DataFrame(plus_dm).rolling(interval).sum().to_numpy() / tr * 100
+            minus_di = DataFrame(minus_dm).rolling(interval).sum().to_numpy() / tr * 100
+            dx = abs(plus_di - minus_di) / (plus_di + minus_di) * 100
+
+        adx = DataFrame(dx).rolling(interval).mean().to_numpy()
+
+        self.indicators["-di" + str(interval)] = self._fillMean(minus_di)
+        self.indicators["+di" + str(interval)] = self._fillMean(plus_di)
+        self.indicators["adx" + str(interval)] = self._fillMean(adx)
+
+    def _wide(self, column: str) -> DataFrame:
+        if column not in self.arrays:
+            raise AttributeError(f"Pandas DataFrame '{column}' column required.")
+
+        return DataFrame(self.arrays[column])
+
+    def _trueRange(self) -> DataFrame:
+        high = self._wide("high").to_numpy()
+        low = self._wide("low").to_numpy()
+        prev_close = self._wide("close").shift(1).to_numpy()
+
+        # NaN only where all three are, as DataFrame.max(axis=1) skips NaN
+        true_range = fmax(fmax(high - low, abs(high - prev_close)), abs(low - prev_close))
+        return DataFrame(true_range)
+
+    def _fillMean(self, array: ndarray) -> ndarray:
+        with warnings.catch_warnings():
+            # markets without a value have no mean
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return self._fill(array, nanmean(array, axis=0))
+
+    def _fill(self, array: ndarray, value) -> ndarray:
+        filled = where(isnan(array), value, array)
+        filled[isnan(self.arrays["close"])] = nan
+        return filled
+
+    @staticmethod
+    def _checkPeriod(period: int, min_period: int, max_period: int) -> None:
+        if not isinstance(period, int):
+            raise TypeError("Period parameter is not perioderic.")
+
+        if period < min_period or period > max_period:
+            raise ValueError("Period is out of range")
+
+
+"""Candlestick patterns
+
+The candlestick methods of TechnicalAnalysis are evaluated by CandlestickPatterns,
+which extracts the OHLC arrays once and shares the derived arrays (lagged
+prices, bodies, wicks and ranges) between every pattern. Each pattern is a
+function of the CandlestickPatterns instance registered with a column name, so
+more patterns can be added to addAll() without another pass over the DataFrame.
+"""
+
+
+class CandlestickPatterns:
+    # column -> (function, deepest lagged candle used), in the order addAll() adds them
+    _patterns = {}
+
+    def __init__(self, open, high, low, close) -> None:
+        """Candlestick patterns object model
+
+        Parameters
+        ----------
+        open, high, low, close : array_like
+            prices of the candles in time order
+        """
+
+        self._arrays = {
+            "open": asarray(open, dtype=float64),
+            "high": asarray(high, dtype=float64),
+            "low": asarray(low, dtype=float64),
+            "close": asarray(close, dtype=float64),
+        }
+        self._derived = {}
+
+    @classmethod
+    def fromDataFrame(cls, df: DataFrame):
+        """Candlestick patterns of a trading DataFrame"""
+
+        return cls(df["open"], df["high"], df["low"], df["close"])
+
+    @classmethod
+    def register(cls, column: str, lookback: int = 0):
+        """Decorator registering a pattern function returning a bool array
+
+        Parameters
+        ----------
+        column : str
+            DataFrame column the pattern is added as
+        lookback : int
+            deepest lagged candle the pattern uses, e.g. 2 for close(2)
+        """
+
+        if not isinstance(lookback, int) or lookback < 0:
+            raise ValueError("Lookback must be a positive integer.")
+
+        def decorator(function):
+            cls._patterns[column] = (function, lookback)
+            return function
+
+        return decorator
+
+    @classmethod
+    def unregister(cls, column: str) -> None:
+        """Removes a registered pattern"""
+
+        cls._patterns.pop(column, None)
+
+    @classmethod
+    def getPatterns(cls) -> list:
+        """Columns of the registered patterns"""
+
+        return list(cls._patterns)
+
+    @classmethod
+    def getLookback(cls) -> int:
+        """Candles needed to evaluate every pattern on the newest candle"""
+
+        lookbacks = [lookback for _, lookback in cls._patterns.values()]
+        return (int(max(lookbacks)) if len(lookbacks) > 0 else 0) + 1
+
+    def evaluate(self, columns: list = None) -> dict:
+        """Evaluates the patterns (all registered by default), returns column -> bool array"""
+
+        if columns is None:
+            columns = self.getPatterns()
+
+        with errstate(divide="ignore", invalid="ignore"):
+            return {column: asarray(self._patterns[column][0](self), dtype=bool) for column in columns}
+
+    def open(self, lag: int = 0) -> ndarray:
+        return self._lagged("open", lag)
+
+    def high(self, lag: int = 0) -> ndarray:
+        return self._lagged("high", lag)
+
+    def low(self, lag: int = 0) -> ndarray:
+        return self._lagged("low", lag)
+
+    def close(self, lag: int = 0) -> ndarray:
+        return self._lagged("close", lag)
+
+    def body(self, lag: int = 0) -> ndarray:
+        """abs(open - close)"""
+
+        return self._derive("body", lag, lambda: abs(self.open(lag) - self.close(lag)))
+
+    def bodyTop(self, lag: int = 0) -> ndarray:
+        """maximum(open, close)"""
+
+        return self._derive("body_top", lag, lambda: maximum(self.open(lag), self.close(lag)))
+
+    def bodyBottom(self, lag: int = 0) -> ndarray:
+        """minimum(open, close)"""
+
+        return self._derive("body_bottom", lag, lambda: minimum(self.open(lag), self.close(lag)))
+
+    def upperWick(self, lag: int = 0) -> ndarray:
+        """high - maximum(open, close)"""
+
+        return self._derive("upper_wick", lag, lambda: self.high(lag) - self.bodyTop(lag))
+
+    def lowerWick(self, lag: int = 0) -> ndarray:
+        """minimum(open, close) - low"""
+
+        return self._derive("lower_wick", lag, lambda: self.bodyBottom(lag) - self.low(lag))
+
+    def range(self, lag: int = 0) -> ndarray:
+        """high - low"""
+
+        return self._derive("range", lag, lambda: self.high(lag) - self.low(lag))
+
+    @staticmethod
+    def sustained(condition: ndarray, candles: int) -> ndarray:
+        """True where a bool condition holds on a candle and the candles - 1 before it"""
+
+        condition = asarray(condition, dtype=bool)
+        result = condition.copy()
+        result[: candles - 1] = False
+        for lag in range(1, min(candles, len(condition))):
+            result[lag:] &= condition[: len(condition) - lag]
+        return result
+
+    def _lagged(self, column: str, lag: int) -> ndarray:
+        """Prices of the candle lag candles earlier, NaN before the first candle"""
+
+        if lag == 0:
+            return self._arrays[column]
+
+        def shift():
+            values = self._arrays[column]
+            lagged = full(len(values), nan)
+            if lag < len(values):
+                lagged[lag:] = values[: len(values) - lag]
+            return lagged
+
+        return self._derive(column, lag, shift)
+
+    def _derive(self, name: str, lag: int, calculate) -> ndarray:
+        """Calculates a derived array once per instance"""
+
+        key = (name, lag)
+        if key not in self._derived:
+            self._derived[key] = calculate()
+        return self._derived[key]
+
+
+def _truthy(values: ndarray) -> ndarray:
+    """pandas logical operators treat float operands as bool, nan as False"""
+
+    return (values == values) & (values != 0)
+
+
+@CandlestickPatterns.register("astral_buy", lookback=12)
+def _astralBuy(c: CandlestickPatterns) -> ndarray:
+    # close(lag) < close(lag + 3) is close < close(3) lag candles earlier
+    return c.sustained((c.close() < c.close(3)) & (c.low() < c.low(5)), 8)
+
+
+@CandlestickPatterns.register("astral_sell", lookback=12)
+def _astralSell(c: CandlestickPatterns) -> ndarray:
+    return c.sustained((c.close() > c.close(3)) & (c.high() > c.high(5)), 8)
+
+
+@CandlestickPatterns.register("hammer")
+def _hammer(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.range() > 3 * (c.open() - c.close()))
+        & ((c.close() - c.low()) / (0.001 + c.high() - c.low()) > 0.6)
+        & ((c.open() - c.low()) / (0.001 + c.high() - c.low()) > 0.6)
+    )
+
+
+@CandlestickPatterns.register("inverted_hammer")
+def _invertedHammer(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.range() > 3 * (c.open() - c.close()))
+        & ((c.high() - c.close()) / (0.001 + c.high() - c.low()) > 0.6)
+        & ((c.high() - c.open()) / (0.001 + c.high() - c.low()) > 0.6)
+    )
+
+
+@CandlestickPatterns.register("shooting_star", lookback=1)
+def _shootingStar(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.open(1) < c.close(1))
+        & (c.close(1) < c.open())
+        & (c.upperWick() >= c.body() * 3)
+        & (c.lowerWick() <= c.body())
+    )
+
+
+@CandlestickPatterns.register("hanging_man", lookback=2)
+def _hangingMan(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.range() > 4 * (c.open() - c.close()))
+        & ((c.close() - c.low()) / (0.001 + c.high() - c.low()) >= 0.75)
+        & ((c.open() - c.low()) / (0.001 + c.high() - c.low()) >= 0.75)
+        & (c.high(1) < c.open())
+        & (c.high(2) < c.open())
+    )
+
+
+@CandlestickPatterns.register("three_white_soldiers", lookback=2)
+def _threeWhiteSoldiers(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.open() > c.open(1))
+        & (c.open() < c.close(1))
+        & (c.close() > c.high(1))
+        & (c.upperWick() < c.body())
+        & (c.open(1) > c.open(2))
+        & (c.open(1) < c.close(2))
+        & (c.close(1) > c.high(2))
+        & (c.upperWick(1) < c.body(1))
+    )
+
+
+def _blackCandle(c: CandlestickPatterns, lag: int) -> ndarray:
+    """Candle opening within and closing below the previous candle, low - body top < body"""
+
+    return (
+        (c.open(lag) < c.open(lag + 1))
+        & (c.open(lag) > c.close(lag + 1))
+        & (c.close(lag) < c.low(lag + 1))
+        & (c.low(lag) - c.bodyTop(lag) < c.body(lag))
+    )
+
+
+@CandlestickPatterns.register("three_black_crows", lookback=2)
+def _threeBlackCrows(c: CandlestickPatterns) -> ndarray:
+    return _blackCandle(c, 0) & _blackCandle(c, 1)
+
+
+@CandlestickPatterns.register("doji")
+def _doji(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.body() / c.range() < 0.1)
+        & (c.upperWick() > 3 * c.body())
+        & (c.lowerWick() > 3 * c.body())
+    )
+
+
+@CandlestickPatterns.register("three_line_strike", lookback=3)
+def _threeLineStrike(c: CandlestickPatterns) -> ndarray:
+    return (
+        _blackCandle(c, 1)
+        & _blackCandle(c, 2)
+        & (c.open() < c.low(1))
+        & (c.close() > c.high(3))
+    )
+
+
+@CandlestickPatterns.register("two_black_gapping", lookback=2)
+def _twoBlackGapping(c: CandlestickPatterns) -> ndarray:
+    return _blackCandle(c, 0) & (c.high(1) < c.low(2))
+
+
+@CandlestickPatterns.register("morning_star", lookback=2)
+def _morningStar(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.bodyTop(1) < c.close(2))
+        & (c.close(2) < c.open(2))
+        & (c.close() > c.open())
+        & (c.open() > c.bodyTop(1))
+    )
+
+
+@CandlestickPatterns.register("evening_star", lookback=2)
+def _eveningStar(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.bodyBottom(1) > c.close(2))
+        & (c.close(2) > c.open(2))
+        & (c.close() < c.open())
+        & (c.open() < c.bodyBottom(1))
+    )
+
+
+@CandlestickPatterns.register("abandoned_baby", lookback=2)
+def _abandonedBaby(c: CandlestickPatterns) -> ndarray:
+    return (
+        (c.open() < c.close())
+        & (c.high(1) < c.low())
+        & (c.open(2) > c.close(2))
+        & (c.high(1) < c.low(2))
+    )
+
+
+def _dojiStar(c: CandlestickPatterns, conditions: ndarray) -> ndarray:
+    """Long candle, doji, long candle
+
+    As in the original expression, the last comparison applies to the combined
+    conditions: (conditions & lower wick) > 3 * body of the doji.
+    """
+
+    return (
+        conditions
+        & (c.body(2) / c.range(2) >= 0.7)
+        & (c.body(1) / c.range(1) < 0.1)
+        & (c.body() / c.range() >= 0.7)
+        & (c.upperWick(1) > 3 * c.body(1))
+        & _truthy(c.lowerWick(1))
+    ) > 3 * c.body(1)
+
+
+@CandlestickPatterns.register("morning_doji_star", lookback=2)
+def _morningDojiStar(c: CandlestickPatterns) -> ndarray:
+    return _dojiStar(
+        c,
+        (c.close(2) < c.open(2))
+        & (c.close() > c.open())
+        & (c.close(2) > c.close(1))
+        & (c.close(2) > c.open(1))
+        & (c.close(1) < c.open())
+        & (c.open(1) < c.open())
+        & (c.close() > c.close(2)),
+    )
+
+
+@CandlestickPatterns.register("evening_doji_star", lookback=2)
+def _eveningDojiStar(c: CandlestickPatterns) -> ndarray:
+    return _dojiStar(
+        c,
+        (c.close(2) > c.open(2))
+        & (c.close() < c.open())
+        & (c.close(2) < c.close(1))
+        & (c.close(2) < c.open(1))
+        & (c.close(1) > c.open())
+        & (c.open(1) > c.open())
+        & (c.close() < c.close(2)),
+    )
+
+
+"""Incremental analysis
+
+addAllIncremental() keeps the running state of every indicator in addAll() so
+that a poll which only changes the newest candle does not recalculate the whole
+DataFrame. The EWM and rolling window states replicate the pandas window
+aggregations (pandas/_libs/window/aggregations.pyx) step for step, including
+the Kahan/Welford compensation, so the values are identical to addAll(). The
+state is checked against addAll() whenever it is rebuilt.
+"""
+
+_FIBONACCI_BOLLINGER_RATIOS = (
+    ("0_236", 0.236),
+    ("0_382", 0.382),
+    ("0_5", 0.5),
+    ("0_618", 0.618),
+    ("0_786", 0.786),
+    ("1", 1),
+)
+
+_CROSSOVERS = (
+    ("ema8", "ema12"),
+    ("ema12", "ema26"),
+    ("sma50", "sma200"),
+    ("macd", "signal"),
+)
+
+# ADX columns are filled with the column mean, so every row depends on the newest
+_ADX_COLUMNS = ("-di14", "+di14", "adx14")
+
+_OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class _EWMState:
+    """Running state of Series.ewm(...).mean()"""
+
+    __slots__ = ("old_wt_factor", "new_wt", "adjust", "min_periods", "weighted", "old_wt", "nobs")
+
+    def __init__(self, com: float, adjust: bool, min_periods: int = 0) -> None:
+        alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.weighted = None
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def copy(self):
+        state = _EWMState.__new__(_EWMState)
+        for slot in _EWMState.__slots__:
+            setattr(state, slot, getattr(self, slot))
+        return state
+
+    def update(self, cur: float) -> float:
+        is_observation = cur == cur
+        if self.weighted is None:
+            self.weighted = cur
+            self.nobs = int(is_observation)
+        else:
+            self.nobs += is_observation
+            if self.weighted == self.weighted:
+                self.old_wt *= self.old_wt_factor
+                if is_observation:
+                    # pandas skips the update on constant series
+                    if self.weighted != cur:
+                        self.weighted = self.old_wt * self.weighted + self.new_wt * cur
+                        self.weighted /= self.old_wt + self.new_wt
+                    if self.adjust:
+                        self.old_wt += self.new_wt
+                    else:
+                        self.old_wt = 1.0
+            elif is_observation:
+                self.weighted = cur
+
+        return self.weighted if self.nobs >= self.min_periods else nan
+
+
+class _RollingState:
+    """Running state of Series.rolling(...) and Series.expanding() aggregations
+
+    kind is one of sum, mean, var, min or max; a window of None is expanding.
+    """
+
+    __slots__ = (
+        "kind",
+        "window",
+        "min_periods",
+        "values",
+        "nobs",
+        "neg_ct",
+        "sum_x",
+        "mean_x",
+        "ssqdm_x",
+        "compensation_add",
+        "compensation_remove",
+        "num_consecutive_same_value",
+        "prev_value",
+    )
+
+    def __init__(self, kind: str, window: int = None, min_periods: int = None) -> None:
+        self.kind = kind
+        self.window = window
+        if min_periods is None:
+            min_periods = window
+        if kind == "var":
+            min_periods = max([min_periods, 1])
+        self.min_periods = min_periods
+        self.values = []
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def copy(self):
+        state = _RollingState.__new__(_RollingState)
+        for slot in _RollingState.__slots__:
+            setattr(state, slot, getattr(self, slot))
+        state.values = list(self.values)
+        return state
+
+    def update(self, val: float) -> float:
+        if self.prev_value is None:
+            self.prev_value = val
+
+        if self.kind in ("min", "max"):
+            if self.window is not None and len(self.values) == self.window:
+                del self.values[0]
+            self.values.append(val)
+            result = nan
+            nobs = 0
+            for x in self.values:
+                if x == x:
+                    nobs += 1
+                    if result != result or (x < result if self.kind == "min" else x > result):
+                        result = x
+            return result if nobs >= self.min_periods and nobs > 0 else nan
+
+        if self.window is not None and len(self.values) == self.window:
+            self._remove(self.values.pop(0))
+        if self.window is not None:
+            self.values.append(val)
+        self._add(val)
+
+        return self._calculate()
+
+    def _add(self, val: float) -> None:
+        if val != val:
+            return
+
+        self.nobs += 1
+        if self.kind == "var":
+            if val == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = val
+
+            # Welford's method using Kahan summation
+            prev_mean = self.mean_x - self.compensation_add
+            y = val - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x = self.mean_x + t / self.nobs
+            self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+            return
+
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if self.kind == "mean" and copysign(1.0, val) < 0:
+            self.neg_ct += 1
+
+        if val == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = val
+
+    def _remove(self, val: float) -> None:
+        if val != val:
+            return
+
+        self.nobs -= 1
+        if self.kind == "var":
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = val - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+            return
+
+        y = -val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if self.kind == "mean" and copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def _calculate(self) -> float:
+        nobs = self.nobs
+        if self.kind == "sum":
+            if nobs == 0 == self.min_periods:
+                return 0.0
+            if nobs >= self.min_periods:
+                if self.num_consecutive_same_value >= nobs:
+                    return self.prev_value * nobs
+                return self.sum_x
+            return nan
+
+        if self.kind == "mean":
+            if nobs >= self.min_periods and nobs > 0:
+                result = self.sum_x / nobs
+                if self.num_consecutive_same_value >= nobs:
+                    result = self.prev_value
+                elif self.neg_ct == 0 and result < 0:
+                    result = 0.0
+                elif self.neg_ct == nobs and result > 0:
+                    result = 0.0
+                return result
+            return nan
+
+        # sample variance (ddof=1)
+        if nobs >= self.min_periods and nobs > 1:
+            if self.num_consecutive_same_value >= nobs:
+                return 0.0
+            return self.ssqdm_x / (nobs - 1.0)
+        return nan
+
+
+class _IndicatorState:
+    """Running state of the indicators in addAll(), one candle at a time"""
+
+    __slots__ = (
+        "prev",
+        "volume0",
+        "cumprod",
+        "obv",
+        "cma",
+        "sma20",
+        "sma50",
+        "sma200",
+        "ema8",
+        "ema12",
+        "ema13",
+        "ema26",
+        "signal",
+        "gains",
+        "losses",
+        "rsi_min",
+        "rsi_max",
+        "stochrsi_sma",
+        "high_max",
+        "low_min",
+        "tp_mean",
+        "tp_var",
+        "tr_sum",
+        "pdm_sum",
+        "mdm_sum",
+        "dx_mean",
+    )
+
+    def __init__(self) -> None:
+        self.prev = None
+        self.volume0 = None
+        self.cumprod = 1.0
+        self.obv = 0.0
+        self.cma = _RollingState("mean", None, 1)
+        self.sma20 = _RollingState("mean", 20, 1)
+        self.sma50 = _RollingState("mean", 50, 1)
+        self.sma200 = _RollingState("mean", 200, 1)
+        self.ema8 = _EWMState((8 - 1) / 2, False)
+        self.ema12 = _EWMState((12 - 1) / 2, False)
+        self.ema13 = _EWMState((13 - 1) / 2, False)
+        self.ema26 = _EWMState((26 - 1) / 2, False)
+        self.signal = _EWMState((9 - 1) / 2, False)
+        self.gains = _EWMState(14 - 1, True, 14)
+        self.losses = _EWMState(14 - 1, True, 14)
+        self.rsi_min = _RollingState("min", 14)
+        self.rsi_max = _RollingState("max", 14)
+        self.stochrsi_sma = _RollingState("mean", 3, 1)
+        self.high_max = _RollingState("max", 14)
+        self.low_min = _RollingState("min", 14)
+        self.tp_mean = _RollingState("mean", 20)
+        self.tp_var = _RollingState("var", 20)
+        self.tr_sum = _RollingState("sum", 14)
+        self.pdm_sum = _RollingState("sum", 14)
+        self.mdm_sum = _RollingState("sum", 14)
+        self.dx_mean = _RollingState("mean", 14)
+
+    def copy(self):
+        state = _IndicatorState.__new__(_IndicatorState)
+        for slot in _IndicatorState.__slots__:
+            value = getattr(self, slot)
+            if isinstance(value, (_EWMState, _RollingState)):
+                value = value.copy()
+            setattr(state, slot, value)
+        return state
+
+    def update(self, row: tuple) -> dict:
+        """Adds a candle (open, high, low, close, volume), returns its indicator values"""
+
+        open_, high, low, close, volume = row
+        prev = self.prev
+        values = {}
+
+        # numpy scalars keep the pandas division by zero behaviour (inf/nan)
+        with errstate(divide="ignore", invalid="ignore"):
+            if prev is None:
+                self.volume0 = volume
+                close_pc = 0.0
+                obv_change = volume
+            else:
+                prev_close = prev[3]
+                close_pc = float(float64(close) / prev_close - 1)
+                if close_pc != close_pc:
+                    close_pc = 0.0
+                if close == prev_close:
+                    obv_change = 0.0
+                elif close > prev_close:
+                    obv_change = volume
+                elif close < prev_close:
+                    obv_change = -volume
+                else:
+                    obv_change = self.volume0
+
+            self.cumprod = self.cumprod * (1 + close_pc)
+            values["close_pc"] = close_pc
+            values["close_cpc"] = self.cumprod - 1
+            values["cma"] = self.cma.update(close)
+            values["sma20"] = self.sma20.update(close)
+            values["sma50"] = self.sma50.update(close)
+            values["sma200"] = self.sma200.update(close)
+            values["ema8"] = self.ema8.update(close)
+            values["ema12"] = self.ema12.update(close)
+            values["ema13"] = self.ema13.update(close)
+            values["ema26"] = self.ema26.update(close)
+            values["macd"] = values["ema12"] - values["ema26"]
+            values["signal"] = self.signal.update(values["macd"])
+
+            obv_prev = self.obv
+            self.obv = obv_prev + obv_change
+            values["obv"] = self.obv
+            if prev is None:
+                values["obv_pc"] = 0.0
+            else:
+                obv_pc = (float64(self.obv) / obv_prev - 1) * 100
+                values["obv_pc"] = float(round(0.0 if isnan(obv_pc) else obv_pc, 2))
+
+            if prev is None:
+                rsi = 50.0
+            else:
+                diff = close - prev_close
+                avg_gains = self.gains.update(diff if diff > 0 else 0 * diff)
+                avg_losses = self.losses.update(diff if diff < 0 else 0 * diff)
+                rs = abs(float64(avg_gains) / avg_losses)
+                rsi = float(100 - 100 / (1 + rs))
+                if rsi != rsi:
+                    rsi = 50.0
+            values["rsi14"] = rsi
+
+            rsi_min = self.rsi_min.update(rsi)
+            stochrsi = float((float64(rsi) - rsi_min) / (float64(self.rsi_max.update(rsi)) - rsi_min))
+            if stochrsi != stochrsi:
+                stochrsi = 0.5
+            values["stochrsi14"] = stochrsi
+            values["smastoch14"] = 100 * self.stochrsi_sma.update(stochrsi)
+
+            high_max = self.high_max.update(high)
+            williamsr = float(((float64(high_max) - close) / (high_max - self.low_min.update(low))) * -100)
+            values["williamsr14"] = -50.0 if williamsr != williamsr else williamsr
+
+            tp = (high + low + close) / 3
+            fbb_mid = self.tp_mean.update(tp)
+            variance = self.tp_var.update(tp)
+            if variance != variance:
+                fbb_sd = nan
+            elif variance < 0:
+                fbb_sd = 3 * 0.0
+            else:
+                fbb_sd = 3 * sqrt(variance)
+            values["fbb_mid"] = 0.0 if fbb_mid != fbb_mid else fbb_mid
+            values["fbb_sd"] = 0.0 if fbb_sd != fbb_sd else fbb_sd
+
+            if prev is None:
+                mdm = pdm = nan
+                tr = high - low
+            else:
+                mdm = prev[2] - low
+                pdm = high - prev[1]
+                tr = high - low
+                for tr_tmp in (abs(high - prev_close), abs(low - prev_close)):
+                    if tr_tmp > tr:
+                        tr = float(tr_tmp)
+            pdm = pdm if pdm > mdm and pdm > 0 else 0.0
+            mdm = mdm if mdm > pdm and mdm > 0 else 0.0
+
+            tr14 = self.tr_sum.update(tr)
+            pdi = float64(self.pdm_sum.update(pdm)) / tr14 * 100
+            mdi = float64(self.mdm_sum.update(mdm)) / tr14 * 100
+            dx = float((abs(pdi - mdi) / (pdi + mdi)) * 100)
+            values["+di14"] = float(pdi)
+            values["-di14"] = float(mdi)
+            values["adx14"] = self.dx_mean.update(dx)
+
+        self.prev = row
+        return values
+
+
+class _IncrementalState:
+    """State of TechnicalAnalysis.addAllIncremental() for one DataFrame"""
+
+    def __init__(self, input_columns: list, columns: list, index, arrays: dict, adx: dict, base: _IndicatorState) -> None:
+        self.input_columns = input_columns
+        self.columns = columns
+        self.index = index
+        self.arrays = arrays
+        self.adx = adx
+        self.base = base
+
+    @classmethod
+    def fromDataFrame(cls, df: DataFrame, input_columns: list):
+        """Builds the state from a DataFrame analysed by addAll(), None if unsupported"""
+
+        columns = list(df.columns)
+        derived = set(columns[len(input_columns):])
+        known = (
+            set(_INDICATOR_COLUMNS)
+            | set(_ADX_COLUMNS)
+            | {"adx14_trend", "adx14_strength"}
+            | set(CandlestickPatterns.getPatterns())
+        )
+        if (
+            len(df) < 2
+            or columns[: len(input_columns)] != input_columns
+            or not set(_OHLCV_COLUMNS).issubset(input_columns)
+            or derived != known
+        ):
+            return None
+
+        arrays = {column: df[column].to_numpy(copy=True) for column in columns}
+        state = _IndicatorState()
+        adx = {column: [] for column in _ADX_COLUMNS}
+        rows = list(zip(*(asarray(arrays[c], dtype=float64).tolist() for c in _OHLCV_COLUMNS)))
+        for row in rows[:-1]:
+            values = state.update(row)
+            for column in _ADX_COLUMNS:
+                adx[column].append(values[column])
+        base = state.copy()
+        values = state.update(rows[-1])
+        for column in _ADX_COLUMNS:
+            adx[column].append(values[column])
+
+        incremental = cls(
+            input_columns,
+            columns,
+            df.index,
+            arrays,
+            {column: asarray(adx[column], dtype=float64) for column in _ADX_COLUMNS},
+            base,
+        )
+
+        # the replicated state must reproduce addAll() before it can be trusted
+        expected = incremental._lastRow(values, rows[-1], arrays, len(df) - 2)
+        expected.update(incremental._candles(arrays))
+        expected.update(incremental._adxColumns(incremental.adx))
+        for column, value in expected.items():
+            if isinstance(value, ndarray):
+                if not array_equal(value, arrays[column], equal_nan=value.dtype.kind == "f"):
+                    break
+            elif not (value == arrays[column][-1] or (value != value and arrays[column][-1] != arrays[column][-1])):
+                break
+        else:
+            return incremental
+
+        Logger.debug(f"incremental analysis unavailable, {column} differs from addAll()")
+        return None
+
+    def update(self, data: DataFrame):
+        """Returns (state, DataFrame) for the new candles, None if a full addAll() is required"""
+
+        if not self.follows(data, self.input_columns, self.index, self.arrays):
+            return None
+
+        length = len(data)
+        previous_length = len(self.index)
+        base = self.base
+        if length > previous_length:
+            base = base.copy()
+            base.update(self._row(self.arrays, previous_length - 1))
+
+        arrays = {column: data[column].to_numpy(copy=True) for column in self.input_columns}
+        row = self._row(arrays, length - 1)
+        state = base.copy()
+        values = state.update(row)
+
+        derived = self._lastRow(values, row, self.arrays, length - 2)
+        for column, value in derived.items():
+            array = self._extend(self.arrays[column], length)
+            array[-1] = value
+            arrays[column] = array
+
+        adx = {}
+        for column in _ADX_COLUMNS:
+            adx[column] = self._extend(self.adx[column], length)
+            adx[column][-1] = values[column]
+        arrays.update(self._adxColumns(adx))
+
+        for column, value in self._candles(arrays).items():
+            array = self._extend(self.arrays[column], length)
+            array[-1] = value
+            arrays[column] = array
+
+        incremental = _IncrementalState(self.input_columns, self.columns, data.index, arrays, adx, base)
+        df = concat(
+            [
+                data,
+                DataFrame(
+                    {column: arrays[column] for column in self.columns[len(self.input_columns):]},
+                    index=data.index,
+                ),
+            ],
+            axis=1,
+        )
+        return incremental, df
+
+    @staticmethod
+    def follows(data: DataFrame, input_columns: list, index, arrays: dict) -> bool:
+        """True if data only revises the newest candle of index or appends one candle"""
+
+        if list(data.columns) != input_columns:
+            return False
+
+        length = len(data)
+        if length not in (len(index), len(index) + 1) or length < 2:
+            return False
+
+        # everything before the newest candle must be unchanged
+        if not data.index[:-1].equals(index[: length - 1]):
+            return False
+        for column in input_columns:
+            if not array_equal(data[column].to_numpy()[:-1], arrays[column][: length - 1]):
+                return False
+
+        return True
+
+    @staticmethod
+    def _row(arrays: dict, i: int) -> tuple:
+        return tuple(float(arrays[column][i]) for column in _OHLCV_COLUMNS)
+
+    @staticmethod
+    def _extend(array: ndarray, length: int) -> ndarray:
+        extended = ndarray(length, dtype=array.dtype)
+        extended[:-1] = array[: length - 1]
+        return extended
+
+    @staticmethod
+    def _lastRow(values: dict, row: tuple, arrays: dict, previous: int) -> dict:
+        """Indicator values of the newest row, arrays[column][previous] is the row before"""
+
+        high, low = row[1], row[2]
+        last = {column: values[column] for column in _INDICATOR_COLUMNS if column in values}
+
+        last["goldencross"] = values["sma50"] > values["sma200"]
+        last["deathcross"] = values["sma50"] < values["sma200"]
+        last["bullsma50"] = values["sma50"] > arrays["sma50"][previous]
+
+        last["fbb_mid"] = values["fbb_mid"]
+        for suffix, ratio in _FIBONACCI_BOLLINGER_RATIOS:
+            last["fbb_upper" + suffix] = values["fbb_mid"] + (ratio * values["fbb_sd"])
+        for suffix, ratio in _FIBONACCI_BOLLINGER_RATIOS:
+            last["fbb_lower" + suffix] = values["fbb_mid"] - (ratio * values["fbb_sd"])
+
+        last["rsi_value"] = values["smastoch14"]
+        last["rsi15"] = values["smastoch14"] > 15
+        last["rsi15co"] = last["rsi15"] and last["rsi15"] != arrays["rsi15"][previous]
+        last["rsi85"] = values["smastoch14"] < 85
+        last["rsi85co"] = last["rsi85"] and last["rsi85"] != arrays["rsi85"][previous]
+
+        bull = high - values["ema13"]
+        bear = low - values["ema13"]
+        prev_bull = arrays["elder_ray_bull"][previous]
+        prev_bear = arrays["elder_ray_bear"][previous]
+        last["elder_ray_bull"] = bull
+        last["elder_ray_bear"] = bear
+        last["eri_buy"] = bool((bear < 0 and bear > prev_bear) or bull > prev_bull)
+        last["eri_sell"] = bool((bull > 0 and bull < prev_bull) or bear < prev_bear)
+
+        for fast, slow in _CROSSOVERS:
+            for name, above in (("gt", values[fast] > values[slow]), ("lt", values[fast] < values[slow])):
+                column = fast + name + slow
+                last[column] = above
+                last[column + "co"] = bool(above and above != arrays[column][previous])
+
+        return last
+
+    @staticmethod
+    def _adxColumns(adx: dict) -> dict:
+        """ADX columns for all rows, the missing values are filled with the mean"""
+
+        columns = {}
+        for column in _ADX_COLUMNS:
+            filled = adx[column].copy()
+            filled[isnan(filled)] = Series(adx[column]).mean()
+            columns[column] = filled
+
+        columns["adx14_trend"] = where(columns["+di14"] > columns["-di14"], "bull", "bear").astype(object)
+        columns["adx14_strength"] = where(
+            columns["adx14"] > 25,
+            "strong",
+            where(columns["adx14"] < 20, "weak", "normal"),
+        ).astype(object)
+        return columns
+
+    @staticmethod
+    def _candles(arrays: dict) -> dict:
+        """Candlestick patterns of the newest row, evaluated on the last few candles"""
+
+        lookback = CandlestickPatterns.getLookback()
+        tail = CandlestickPatterns(
+            *(arrays[column][-lookback:] for column in ("open", "high", "low", "close"))
+        )
+        return {column: bool(values[-1]) for column, values in tail.evaluate().items()}
+
+
+class _DeferredIncrementalState:
+    """_IncrementalState of a DataFrame, built by the first update that can use it
+
+    Live candles are a fixed size window, so when a candle closes the oldest one drops
+    out and every row is recalculated by addAll(). Replaying the window is only worth
+    it once a later poll revises the open candle of the same window.
+    """
+
+    def __init__(self, df: DataFrame, input_columns: list) -> None:
+        self.df = df.copy()
+        self.input_columns = input_columns
+
+    def update(self, data: DataFrame):
+        """Returns (state, DataFrame) for the new candles, None if a full addAll() is required"""
+
+        arrays = {column: self.df[column].to_numpy() for column in self.input_columns}
+        if not _IncrementalState.follows(data, self.input_columns, self.df.index, arrays):
+            return None
+
+        incremental = _IncrementalState.fromDataFrame(self.df, self.input_columns)
+        if incremental is None:
+            return None
+
+        return incremental.update(data)
+
+
+# columns added by addAll() that only depend on the candles up to their own row
+_INDICATOR_COLUMNS = (
+    "close_pc",
+    "close_cpc",
+    "cma",
+    "sma20",
+    "sma50",
+    "sma200",
+    "ema8",
+    "ema12",
+    "ema26",
+    "goldencross",
+    "deathcross",
+    "bullsma50",
+    "fbb_mid",
+) + tuple("fbb_upper" + suffix for suffix, ratio in _FIBONACCI_BOLLINGER_RATIOS) + tuple(
+    "fbb_lower" + suffix for suffix, ratio in _FIBONACCI_BOLLINGER_RATIOS
+) + (
+    "rsi14",
+    "stochrsi14",
+    "smastoch14",
+    "rsi_value",
+    "rsi15",
+    "rsi15co",
+    "rsi85",
+    "rsi85co",
+    "williamsr14",
+    "macd",
+    "signal",
+    "obv",
+    "obv_pc",
+    "ema13",
+    "elder_ray_bull",
+    "elder_ray_bear",
+    "eri_buy",
+    "eri_sell",
+) + tuple(
+    fast + name + slow + co
+    for fast, slow in _CROSSOVERS
+    for name in ("gt", "lt")
+    for co in ("", "co")
+)
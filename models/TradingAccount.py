@@ -8,10 +8,8 @@ import numpy as np
 import pandas as pd
 
 from models.PyCryptoBot import truncate
+from models.TradePairs import pairTrades
 from models.exchange.ExchangesEnum import Exchange
-from models.exchange.binance import AuthAPI as BAuthAPI
-from models.exchange.coinbase_pro import AuthAPI as CBAuthAPI
-from models.exchange.kucoin import AuthAPI as KAuthAPI
 
 
 class TradingAccount:
@@ -101,12 +99,7 @@ class TradingAccount:
         if self.app.getExchange() == Exchange.BINANCE:
             if self.mode == "live":
                 # if config is provided and live connect to Binance account portfolio
-                model = BAuthAPI(
-                    self.app.getAPIKey(),
-                    self.app.getAPISecret(),
-                    self.app.getAPIURL(),
-                    recv_window=self.app.getRecvWindow(),
-                )
+                model = self.app.getAuthAPI()
                 # retrieve orders from live Binance account portfolio
                 self.orders = model.getOrders(market, action, status)
                 return self.orders
@@ -120,13 +113,7 @@ class TradingAccount:
         if self.app.getExchange() == Exchange.KUCOIN:
             if self.mode == 'live':
                 # if config is provided and live connect to Kucoin account portfolio
-                model = KAuthAPI(
-                    self.app.getAPIKey(), 
-                    self.app.getAPISecret(), 
-                    self.app.getAPIPassphrase(), 
-                    self.app.getAPIURL(),
-                    use_cache=self.app.useKucoinCache(),
-                )
+                model = self.app.getAuthAPI()
                 # retrieve orders from live Kucoin account portfolio
                 self.orders = model.getOrders(market, action, status)
                 return self.orders
@@ -139,12 +126,7 @@ class TradingAccount:
         if self.app.getExchange() == Exchange.COINBASEPRO:
             if self.mode == "live":
                 # if config is provided and live connect to Coinbase Pro account portfolio
-                model = CBAuthAPI(
-                    self.app.getAPIKey(),
-                    self.app.getAPISecret(),
-                    self.app.getAPIPassphrase(),
-                    self.app.getAPIURL(),
-                )
+                model = self.app.getAuthAPI()
                 # retrieve orders from live Coinbase Pro account portfolio
                 self.orders = model.getOrders(market, action, status)
                 return self.orders
@@ -183,13 +165,7 @@ class TradingAccount:
 
         if self.app.getExchange() == Exchange.KUCOIN:
             if self.mode == 'live':
-                model = KAuthAPI(
-                    self.app.getAPIKey(),
-                    self.app.getAPISecret(),
-                    self.app.getAPIPassphrase(),
-                    self.app.getAPIURL(),
-                    use_cache=self.app.useKucoinCache(),
-                )
+                model = self.app.getAuthAPI()
                 trycnt, maxretry = (0, 5)
                 while trycnt <= maxretry:
                     df = model.getAccounts()
@@ -243,12 +219,7 @@ class TradingAccount:
 
         elif self.app.getExchange() == Exchange.BINANCE:
             if self.mode == "live":
-                model = BAuthAPI(
-                    self.app.getAPIKey(),
-                    self.app.getAPISecret(),
-                    self.app.getAPIURL(),
-                    recv_window=self.app.getRecvWindow(),
-                )
+                model = self.app.getAuthAPI()
                 df = model.getAccount()
                 if isinstance(df, pd.DataFrame):
                     if currency == "":
@@ -309,12 +280,7 @@ class TradingAccount:
         elif self.app.getExchange() == Exchange.COINBASEPRO:
             if self.mode == "live":
                 # if config is provided and live connect to Coinbase Pro account portfolio
-                model = CBAuthAPI(
-                    self.app.getAPIKey(),
-                    self.app.getAPISecret(),
-                    self.app.getAPIPassphrase(),
-                    self.app.getAPIURL(),
-                )
+                model = self.app.getAuthAPI()
                 trycnt, maxretry = (0, 5)
                 while trycnt <= maxretry:
                     df = model.getAccounts()
@@ -710,85 +676,32 @@ class TradingAccount:
             # no data, return early
             return False
 
-        df_tracker = pd.DataFrame()
-
-        last_action = ""
-        for market in df["market"].sort_values().unique():
-            df_market = df[df["market"] == market]
-
-            df_buy = pd.DataFrame()
-            df_sell = pd.DataFrame()
-
-            pair = 0
-            # pylint: disable=unused-variable
-            for index, row in df_market.iterrows():
-                if row["action"] == "buy":
-                    pair = 1
-
-                if pair == 1 and (row["action"] != last_action):
-                    if row["action"] == "buy":
-                        df_buy = row
-                    elif row["action"] == "sell":
-                        df_sell = row
-
-                if row["action"] == "sell" and len(df_buy) != 0:
-                    df_pair = pd.DataFrame(
-                        [
-                            [
-                                df_sell["status"],
-                                df_buy["market"],
-                                df_buy["created_at"],
-                                df_buy["type"],
-                                df_buy["size"],
-                                df_buy["value"],
-                                df_buy["fees"],
-                                df_buy["price"],
-                                df_sell["created_at"],
-                                df_sell["type"],
-                                df_sell["size"],
-                                df_sell["value"],
-                                df_sell["fees"],
-                                df_sell["price"],
-                            ]
-                        ],
-                        columns=[
-                            "status",
-                            "market",
-                            "buy_at",
-                            "buy_type",
-                            "buy_size",
-                            "buy_value",
-                            "buy_fees",
-                            "buy_price",
-                            "sell_at",
-                            "sell_type",
-                            "sell_size",
-                            "sell_value",
-                            "sell_fees",
-                            "sell_price",
-                        ],
-                    )
-                    df_tracker = pd.concat([df_tracker, df_pair])
-                    pair = 0
-
-                last_action = row["action"]
-
-        if list(df_tracker.keys()) != [
-            "status",
-            "market",
-            "buy_at",
-            "buy_type",
-            "buy_size",
-            "buy_value",
-            "buy_fees",
-            "buy_price",
-            "sell_at",
-            "sell_type",
-            "sell_size",
-            "sell_value",
-            "sell_fees",
-            "sell_price",
-        ]:
+        # the first buy and first sell of each trade
+        df_tracker = pairTrades(
+            df, first=["created_at", "type", "size", "value", "fees", "price", "status"]
+        )
+        df_tracker = df_tracker.rename(
+            columns={"buy_created_at": "buy_at", "sell_created_at": "sell_at", "sell_status": "status"}
+        )
+        df_tracker = df_tracker[
+            [
+                "status",
+                "market",
+                "buy_at",
+                "buy_type",
+                "buy_size",
+                "buy_value",
+                "buy_fees",
+                "buy_price",
+                "sell_at",
+                "sell_type",
+                "sell_size",
+                "sell_value",
+                "sell_fees",
+                "sell_price",
+            ]
+        ]
+        if len(df_tracker) == 0:
             # no data, return early
             return False
 
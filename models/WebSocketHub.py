@@ -0,0 +1,361 @@
+"""Shares exchange websockets between the bots running on one host"""
+
+import os
+import secrets
+import threading
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import pandas as pd
+
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+from models.exchange.binance import WebSocketClient as BWebSocketClient
+from models.exchange.coinbase_pro import WebSocketClient as CWebSocketClient
+from models.exchange.kucoin import WebSocketClient as KWebSocketClient
+from models.helper.LogHelper import Logger
+
+DEFAULT_ADDRESS = "websockethub.sock"
+
+# exchanges drop websocket connections after 24 hours
+RESTART_SECONDS = 82800
+
+# a bot waits this long for the hub before using the REST API
+REQUEST_TIMEOUT = 10
+
+
+def getAuthKey(address: str, authkey: str = None, create: bool = False) -> bytes:
+    """Key the bots and the hub authenticate each other with
+
+    The key of the config, otherwise the hub creates a random key in a file next to
+    its socket that only the user running it can read, and the bots read it from there.
+
+    Parameters
+    ----------
+    address : str
+        Unix socket path (or Windows named pipe) of the hub
+    authkey : str
+        key of the config, required for a named pipe
+    create : bool
+        create a new key file, for the hub
+    """
+
+    if authkey is not None:
+        return authkey.encode()
+
+    if address.startswith("\\\\.\\pipe\\"):
+        raise ValueError("websockethubkey is required for a websocket hub on a named pipe")
+
+    key_file = f"{address}.key"
+    if create:
+        key = secrets.token_hex(32)
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf8") as fh:
+            fh.write(key)
+        os.chmod(key_file, 0o600)
+        return key.encode()
+
+    with open(key_file, encoding="utf8") as fh:
+        return fh.read().strip().encode()
+
+
+class WebSocketHub:
+    def __init__(
+        self,
+        exchange: Exchange = Exchange.COINBASEPRO,
+        markets: list = None,
+        granularity: Granularity = Granularity.ONE_HOUR,
+        address: str = DEFAULT_ADDRESS,
+        authkey: str = None,
+    ) -> None:
+        """Websocket hub object model
+
+        Holds one exchange websocket per granularity for all the markets of the bots
+        connected to it, and serves their candles and tickers over a local socket.
+
+        Parameters
+        ----------
+        exchange : Exchange
+            exchange to connect to
+        markets : list
+            markets to subscribe to on start, bots can subscribe to others later
+        granularity : Granularity
+            granularity of the markets subscribed to on start
+        address : str
+            Unix socket path (or Windows named pipe) the bots connect to
+        authkey : str
+            key the bots authenticate with, see getAuthKey()
+        """
+
+        self.exchange = exchange
+        self.address = address
+        self._authkey = authkey
+        self.markets = {}
+        self.clients = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+        if markets is not None and len(markets) > 0:
+            self.markets[granularity] = list(markets)
+
+    def start(self) -> None:
+        """Open the exchange websockets of the markets given on start"""
+
+        with self._lock:
+            for granularity in self.markets:
+                self._connect(granularity)
+
+    def serve(self) -> None:
+        """Serve bot requests until the hub is closed"""
+
+        if not self.address.startswith("\\\\.\\pipe\\") and os.path.exists(
+            self.address
+        ):
+            try:
+                Client(self.address).close()
+            except OSError:
+                # left behind by a hub that did not close cleanly
+                os.remove(self.address)
+            else:
+                raise ValueError(f"Websocket hub already running on {self.address}")
+
+        # the requests are pickled, so only bots with the key may connect
+        self._authkey = getAuthKey(self.address, self._authkey, create=True)
+        listener = Listener(self.address, authkey=self._authkey)
+        self._listener = listener
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError):
+                if self._listener is None:
+                    break
+                Logger.warning(f"Websocket hub: connection to {self.address} without the key refused")
+                continue
+            except OSError:
+                break
+
+            if self._listener is None:
+                conn.close()
+                break
+
+            Logger.debug(f"Websocket hub: bot connected to {self.address}")
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+        listener.close()
+
+    def close(self) -> None:
+        """Stop serving bots and close the exchange websockets"""
+
+        if self._listener is not None:
+            self._listener = None
+            try:
+                # wakes serve() up from waiting for the next bot
+                Client(self.address, authkey=self._authkey).close()
+            except (AuthenticationError, OSError):
+                pass
+
+        with self._lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients = {}
+
+    def subscribe(self, market: str, granularity: Granularity) -> None:
+        """Add a market to the granularity's websocket, reconnecting it if required"""
+
+        with self._lock:
+            markets = self.markets.setdefault(granularity, [])
+            client = self.clients.get(granularity)
+
+            if market not in markets:
+                markets.append(market)
+                Logger.info(
+                    f"Websocket hub: subscribing to {market} ({granularity.to_short})"
+                )
+                try:
+                    # the candles of the other markets are kept, only the new one is fetched
+                    self._connect(granularity, keep_candles=True)
+                except Exception:
+                    markets.remove(market)
+                    raise
+            elif (
+                client is None
+                or getattr(client, "stop", False)
+                or client.getTimeElapsed() > RESTART_SECONDS
+            ):
+                self._connect(granularity)
+
+    def getCandles(self, market: str, granularity: Granularity) -> pd.DataFrame:
+        self.subscribe(market, granularity)
+        return self._forMarket(self.clients[granularity].candles, market)
+
+    def getTickers(self, market: str, granularity: Granularity) -> pd.DataFrame:
+        self.subscribe(market, granularity)
+        return self._forMarket(self.clients[granularity].tickers, market)
+
+    def _connect(self, granularity: Granularity, keep_candles: bool = False) -> None:
+        """(Re)open the websocket of a granularity, the caller holds the lock"""
+
+        previous = self.clients.pop(granularity, None)
+        if previous is not None:
+            previous.close()
+
+        markets = self.markets[granularity]
+        if self.exchange == Exchange.BINANCE:
+            client = BWebSocketClient(markets, granularity)
+        elif self.exchange == Exchange.KUCOIN:
+            client = KWebSocketClient(markets, granularity)
+        else:
+            client = CWebSocketClient(markets, granularity)
+
+        if keep_candles and previous is not None:
+            # the clients only fetch the history of markets missing from their buffer
+            client.candle_buffer = previous.candle_buffer
+
+        client.start()
+        self.clients[granularity] = client
+
+    def _handle(self, conn) -> None:
+        """Answer the requests of one bot until it disconnects"""
+
+        try:
+            while True:
+                request = conn.recv()
+
+                try:
+                    command, market, granularity = request
+                    if command == "subscribe":
+                        self.subscribe(market, granularity)
+                        response = True
+                    elif command == "candles":
+                        response = self.getCandles(market, granularity)
+                    elif command == "tickers":
+                        response = self.getTickers(market, granularity)
+                    else:
+                        response = None
+                except Exception as err:  # pylint: disable=broad-except
+                    Logger.error(f"Websocket hub: request {repr(request)} failed: {repr(err)}")
+                    response = RuntimeError(f"Websocket hub request failed: {repr(err)}")
+
+                conn.send(response)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _forMarket(df: pd.DataFrame, market: str) -> pd.DataFrame:
+        if df is None:
+            return None
+
+        return df.loc[df["market"] == market].copy()
+
+
+class HubWebSocketClient:
+    def __init__(
+        self,
+        markets: list,
+        granularity: Granularity = Granularity.ONE_HOUR,
+        address: str = DEFAULT_ADDRESS,
+        authkey: str = None,
+    ) -> None:
+        """Bot side of the websocket hub, used in place of an exchange WebSocketClient
+
+        Parameters
+        ----------
+        markets : list
+            markets of the bot
+        granularity : Granularity
+            granularity of the bot
+        address : str
+            Unix socket path (or Windows named pipe) of the hub
+        authkey : str
+            key of the hub, see getAuthKey()
+        """
+
+        if len(markets) == 0:
+            raise ValueError("A list of one or more markets is required.")
+
+        self.markets = markets
+        self.granularity = granularity
+        self.address = address
+        self.authkey = authkey
+        self.start_time = None
+        self.time_elapsed = 0
+        self._conn = None
+        self._available = True
+        self._lock = threading.Lock()
+
+    @property
+    def candles(self) -> pd.DataFrame:
+        return self._collect("candles")
+
+    @property
+    def tickers(self) -> pd.DataFrame:
+        return self._collect("tickers")
+
+    def start(self) -> None:
+        self.start_time = datetime.now()
+        for market in self.markets:
+            self._request("subscribe", market)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self.start_time = None
+        self.time_elapsed = 0
+
+    def getStartTime(self) -> datetime:
+        return self.start_time
+
+    def getTimeElapsed(self) -> int:
+        if self.start_time is not None:
+            self.time_elapsed = round((datetime.now() - self.start_time).total_seconds())
+
+        return self.time_elapsed
+
+    def _collect(self, command: str) -> pd.DataFrame:
+        """Data of all the bot's markets, None until the hub has some"""
+
+        frames = [self._request(command, market) for market in self.markets]
+        frames = [df for df in frames if df is not None]
+
+        if len(frames) == 0:
+            return None
+        elif len(frames) == 1:
+            return frames[0]
+
+        return pd.concat(frames)
+
+    def _request(self, command: str, market: str):
+        """Send a request to the hub, the bot falls back to the REST API while it is down"""
+
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = Client(self.address, authkey=getAuthKey(self.address, self.authkey))
+
+                self._conn.send((command, market, self.granularity))
+                if not self._conn.poll(REQUEST_TIMEOUT):
+                    raise TimeoutError("no response")
+
+                response = self._conn.recv()
+                self._available = True
+                if isinstance(response, Exception):
+                    Logger.warning(str(response))
+                    return None
+
+                return response
+            except (AuthenticationError, EOFError, OSError) as err:
+                if self._available:
+                    Logger.warning(f"Websocket hub unavailable on {self.address}: {err}")
+                    self._available = False
+
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+                return None
@@ -427,6 +427,64 @@ def defaultConfigParse(app, config):
         else:
             raise TypeError("disabletracker must be of type int")
 
+    if "disablecandlestore" in config:
+        if isinstance(config["disablecandlestore"], int):
+            if config["disablecandlestore"] in [0, 1]:
+                app.disablecandlestore = bool(config["disablecandlestore"])
+        else:
+            raise TypeError("disablecandlestore must be of type int")
+
+    if "candlestore" in config:
+        if isinstance(config["candlestore"], str):
+            app.candlestore = config["candlestore"]
+        else:
+            raise TypeError("candlestore must be of type str")
+
+    if "apipoolsize" in config:
+        if isinstance(config["apipoolsize"], int):
+            if config["apipoolsize"] > 0:
+                app.apipoolsize = config["apipoolsize"]
+            else:
+                raise ValueError("apipoolsize must be greater than 0")
+        else:
+            raise TypeError("apipoolsize must be of type int")
+
+    if "apitimeout" in config:
+        if isinstance(config["apitimeout"], (int, float)):
+            if config["apitimeout"] > 0:
+                app.apitimeout = config["apitimeout"]
+            else:
+                raise ValueError("apitimeout must be greater than 0")
+        else:
+            raise TypeError("apitimeout must be of type int or float")
+
+    if "apiretries" in config:
+        if isinstance(config["apiretries"], int):
+            if config["apiretries"] >= 0:
+                app.apiretries = config["apiretries"]
+            else:
+                raise ValueError("apiretries must be 0 or greater")
+        else:
+            raise TypeError("apiretries must be of type int")
+
+    if "metricsport" in config:
+        if isinstance(config["metricsport"], int):
+            if 0 <= config["metricsport"] <= 65535:
+                app.metricsport = config["metricsport"]
+            else:
+                raise ValueError("metricsport must be between 0 and 65535")
+        else:
+            raise TypeError("metricsport must be of type int")
+
+    if "metricsloginterval" in config:
+        if isinstance(config["metricsloginterval"], int):
+            if config["metricsloginterval"] >= 0:
+                app.metricsloginterval = config["metricsloginterval"]
+            else:
+                raise ValueError("metricsloginterval must be 0 or greater")
+        else:
+            raise TypeError("metricsloginterval must be of type int")
+
     if "enableml" in config:
         if isinstance(config["enableml"], int):
             if config["enableml"] in [0, 1]:
@@ -434,6 +492,15 @@ def defaultConfigParse(app, config):
         else:
             raise TypeError("enableml must be of type int")
 
+    if "mlrefitinterval" in config:
+        if isinstance(config["mlrefitinterval"], int):
+            if config["mlrefitinterval"] > 0:
+                app.mlrefitinterval = config["mlrefitinterval"]
+            else:
+                raise ValueError("mlrefitinterval must be greater than 0")
+        else:
+            raise TypeError("mlrefitinterval must be of type int")
+
     if "websocket" in config:
         if isinstance(config["websocket"], int):
             if config["websocket"] in [0, 1]:
@@ -441,6 +508,43 @@ def defaultConfigParse(app, config):
         else:
             raise TypeError("websocket must be of type int")
 
+    if "websockethub" in config:
+        if isinstance(config["websockethub"], str):
+            app.websockethub = config["websockethub"]
+        else:
+            raise TypeError("websockethub must be of type str")
+
+    if "websockethubkey" in config:
+        if isinstance(config["websockethubkey"], str):
+            app.websockethubkey = config["websockethubkey"]
+        else:
+            raise TypeError("websockethubkey must be of type str")
+
+    if "websockettriggerpcnt" in config:
+        if isinstance(config["websockettriggerpcnt"], (int, float)):
+            if config["websockettriggerpcnt"] >= 0:
+                app.websockettriggerpcnt = float(config["websockettriggerpcnt"])
+            else:
+                raise ValueError("websockettriggerpcnt must be 0 or greater")
+        else:
+            raise TypeError("websockettriggerpcnt must be of type int or float")
+
+    if "markets" in config:
+        # a list of markets, or the options of each market
+        if isinstance(config["markets"], str):
+            app.markets = {
+                market.strip(): {} for market in config["markets"].split(",") if market.strip() != ""
+            }
+        elif isinstance(config["markets"], list):
+            app.markets = {market: {} for market in config["markets"]}
+        elif isinstance(config["markets"], dict):
+            for market, options in config["markets"].items():
+                if not isinstance(options, dict):
+                    raise TypeError(f"markets options of {market} must be of type dict")
+            app.markets = config["markets"]
+        else:
+            raise TypeError("markets must be of type str, list or dict")
+
     if "enableinsufficientfundslogging" in config:
         if isinstance(config["enableinsufficientfundslogging"], int):
             if config["enableinsufficientfundslogging"] in [0, 1]:
@@ -0,0 +1,295 @@
+"""Fixed size candle and ticker buffers for the websocket clients"""
+
+from datetime import datetime
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from models.exchange.Granularity import Granularity
+
+LOW, HIGH, OPEN, CLOSE, VOLUME = range(5)
+
+CANDLE_COLUMNS = [
+    "date",
+    "market",
+    "granularity",
+    "low",
+    "high",
+    "open",
+    "close",
+    "volume",
+]
+
+
+class CandleBuffer:
+    def __init__(
+        self,
+        granularity: Granularity = Granularity.ONE_HOUR,
+        label=None,
+        size: int = 300,
+    ) -> None:
+        """Candle buffer object model
+
+        Keeps the last candles of each market in NumPy ring buffers that websocket
+        messages update in place. Data frames are only built when they are read.
+        Listeners are told when a market's candle closes or its price moves.
+
+        Parameters
+        ----------
+        granularity : Granularity
+            candle granularity
+        label : int or str
+            value of the granularity column, as the exchange REST API returns it
+        size : int
+            candles kept per market
+        """
+
+        self.granularity = granularity
+        self.label = granularity.to_integer if label is None else label
+        self.size = size
+
+        self._epochs = {}
+        self._ohlcv = {}
+        self._count = {}
+        self._head = {}
+        self._tickers = {}
+        self._candles_df = None
+        self._tickers_df = None
+        self._listeners = {}
+        self._lock = Lock()
+
+    def addListener(self, market: str, listener, price_pcnt: float = 0.0) -> None:
+        """Call listener(market, event) from the websocket thread on the market's events
+
+        Parameters
+        ----------
+        market : str
+            market of the events
+        listener : function
+            called with the market and "candle" when a candle closes, or "price" when the
+            price moved by price_pcnt since the last event
+        price_pcnt : float
+            percent of a price move, 0 for candle closes only
+        """
+
+        with self._lock:
+            # [listener, price_pcnt, price of the last event]
+            self._listeners.setdefault(market, []).append([listener, price_pcnt, None])
+
+    def hasMarket(self, market: str) -> bool:
+        return market in self._epochs
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epochs = {}
+            self._ohlcv = {}
+            self._count = {}
+            self._head = {}
+            self._tickers = {}
+            self._candles_df = None
+            self._tickers_df = None
+
+    def clearTickers(self) -> None:
+        with self._lock:
+            self._tickers = {}
+            self._tickers_df = None
+
+    def load(self, df: pd.DataFrame) -> None:
+        """Replace the candles of the markets in a data frame, e.g. from the REST API"""
+
+        with self._lock:
+            for market, df_market in df.groupby("market", sort=False):
+                df_market = df_market.tail(self.size)
+                count = len(df_market)
+
+                self._epochs[market] = np.zeros(self.size, dtype="int64")
+                self._ohlcv[market] = np.zeros((self.size, 5), dtype="float64")
+                self._epochs[market][:count] = (
+                    df_market["date"].to_numpy(dtype="datetime64[s]").astype("int64")
+                )
+                self._ohlcv[market][:count] = df_market[
+                    ["low", "high", "open", "close", "volume"]
+                ].to_numpy(dtype="float64")
+                self._count[market] = count
+                self._head[market] = count % self.size
+
+            self._candles_df = None
+
+    def trade(self, market: str, date: datetime, price: float, size: float) -> None:
+        """Add a trade to its candle, opening a new candle if required"""
+
+        epoch = self._toEpoch(date)
+        epoch -= epoch % self.granularity.to_integer
+
+        with self._lock:
+            row = self._find(market, epoch)
+            # the first trade of a newer candle closes the open one
+            closed = (
+                row is None
+                and self._count.get(market, 0) > 0
+                and epoch > self._epochs[market][(self._head[market] - 1) % self.size]
+            )
+            if row is None:
+                self._append(market, epoch, [price, price, price, price, size])
+            else:
+                ohlcv = self._ohlcv[market][row]
+                if price > ohlcv[HIGH]:
+                    ohlcv[HIGH] = price
+                if price < ohlcv[LOW]:
+                    ohlcv[LOW] = price
+                ohlcv[CLOSE] = price
+                ohlcv[VOLUME] += size
+
+            self._candles_df = None
+
+        if closed:
+            self._notify(market, "candle", price)
+
+    def candle(
+        self,
+        market: str,
+        date: datetime,
+        low: float,
+        high: float,
+        open: float,  # pylint: disable=redefined-builtin
+        close: float,
+        volume: float,
+    ) -> None:
+        """Set a closed candle, replacing the market's candle of the same date"""
+
+        epoch = self._toEpoch(date)
+
+        with self._lock:
+            row = self._find(market, epoch)
+            if row is None:
+                self._append(market, epoch, [low, high, open, close, volume])
+            else:
+                self._ohlcv[market][row] = [low, high, open, close, volume]
+
+            self._candles_df = None
+
+        self._notify(market, "candle", close)
+
+    def ticker(self, market: str, date: datetime, price: float) -> None:
+        with self._lock:
+            # most recently updated markets last
+            self._tickers.pop(market, None)
+            self._tickers[market] = (self._toEpoch(date), price)
+            self._tickers_df = None
+
+        self._notify(market, "price", price)
+
+    def getCandles(self) -> pd.DataFrame:
+        """Candles of all markets, None until there are any"""
+
+        with self._lock:
+            if self._candles_df is None and len(self._epochs) > 0:
+                self._candles_df = self._candlesDataFrame()
+
+            return self._candles_df
+
+    def getTickers(self) -> pd.DataFrame:
+        """Last ticker of each market, None until there are any"""
+
+        with self._lock:
+            if self._tickers_df is None and len(self._tickers) > 0:
+                self._tickers_df = self._tickersDataFrame()
+
+            return self._tickers_df
+
+    def _notify(self, market: str, event: str, price: float) -> None:
+        """Call the market's listeners, outside of the lock as they may read the buffer"""
+
+        for listener in self._listeners.get(market, ()):
+            callback, price_pcnt, last_price = listener
+            if event == "price":
+                if last_price is None:
+                    listener[2] = price
+                    continue
+                if price_pcnt <= 0 or abs(price - last_price) < last_price * price_pcnt / 100:
+                    continue
+
+            listener[2] = price
+            callback(market, event)
+
+    def _find(self, market: str, epoch: int):
+        """Buffer row of a market's candle, the open candle is checked first"""
+
+        if market not in self._epochs or self._count[market] == 0:
+            return None
+
+        latest = (self._head[market] - 1) % self.size
+        if self._epochs[market][latest] == epoch:
+            return latest
+
+        rows = np.flatnonzero(self._epochs[market][: self._count[market]] == epoch)
+        return rows[0] if len(rows) > 0 else None
+
+    def _append(self, market: str, epoch: int, ohlcv: list) -> None:
+        if market not in self._epochs:
+            self._epochs[market] = np.zeros(self.size, dtype="int64")
+            self._ohlcv[market] = np.zeros((self.size, 5), dtype="float64")
+            self._count[market] = 0
+            self._head[market] = 0
+
+        head = self._head[market]
+        self._epochs[market][head] = epoch
+        self._ohlcv[market][head] = ohlcv
+        self._head[market] = (head + 1) % self.size
+        self._count[market] = min(self._count[market] + 1, self.size)
+
+    def _candlesDataFrame(self) -> pd.DataFrame:
+        markets, epochs, ohlcv = [], [], []
+        for market in self._epochs:
+            count = self._count[market]
+            # oldest to newest from the ring buffer
+            rows = np.arange(self._head[market] - count, self._head[market]) % self.size
+            markets.extend([market] * count)
+            epochs.append(self._epochs[market][rows])
+            ohlcv.append(self._ohlcv[market][rows])
+
+        ohlcv = np.concatenate(ohlcv)
+        tsidx = pd.DatetimeIndex(
+            np.concatenate(epochs).astype("datetime64[s]").astype("datetime64[ns]"),
+            name="ts",
+        )
+
+        return pd.DataFrame(
+            {
+                "date": tsidx,
+                "market": markets,
+                "granularity": self.label,
+                "low": ohlcv[:, LOW],
+                "high": ohlcv[:, HIGH],
+                "open": ohlcv[:, OPEN],
+                "close": ohlcv[:, CLOSE],
+                "volume": ohlcv[:, VOLUME],
+            },
+            index=tsidx,
+            columns=CANDLE_COLUMNS,
+        )
+
+    def _tickersDataFrame(self) -> pd.DataFrame:
+        epochs = np.array([epoch for epoch, _ in self._tickers.values()], dtype="int64")
+        dates = epochs.astype("datetime64[s]").astype("datetime64[ns]")
+        candles = (epochs - epochs % self.granularity.to_integer).astype(
+            "datetime64[s]"
+        ).astype("datetime64[ns]")
+        tsidx = pd.DatetimeIndex(dates, name="ts")
+
+        return pd.DataFrame(
+            {
+                "date": tsidx,
+                "market": list(self._tickers.keys()),
+                "price": np.array(
+                    [price for _, price in self._tickers.values()], dtype="float64"
+                ),
+                "candle": candles,
+            },
+            index=tsidx,
+        )
+
+    @staticmethod
+    def _toEpoch(date: datetime) -> int:
+        return int(np.datetime64(date, "s").astype("int64"))
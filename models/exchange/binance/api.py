@@ -8,26 +8,38 @@ import re
 import sys
 import time
 from datetime import datetime, timedelta
+from functools import partial
 from threading import Thread
 from urllib.parse import urlencode
 
 import numpy as np
 import pandas as pd
 import requests
-from requests import Session
 from websocket import create_connection, WebSocketConnectionClosedException
 
+from models.OrderLedger import OrderLedger
+from models.exchange.CandleBuffer import CandleBuffer
 from models.exchange.Granularity import Granularity
 from models.helper.LogHelper import Logger
+from models.helper.SessionHelper import SessionHelper
 
 DEFAULT_MAKER_FEE_RATE = 0.0015  # added 0.0005 to allow for price movements
 DEFAULT_TAKER_FEE_RATE = 0.0015  # added 0.0005 to allow for price movements
 DEFAULT_TRADE_FEE_RATE = 0.0015  # added 0.0005 to allow for price movements
 MULTIPLIER_EQUIVALENTS = [1, 5, 15, 60, 360, 1440]
 DEFAULT_MARKET = "BTCGBP"
+# allOrders returns at most 1000 orders per request
+ORDER_PAGE_SIZE = 1000
+# order statuses that do not change any more
+FINAL_ORDER_STATUSES = ["FILLED", "CANCELED", "REJECTED", "EXPIRED"]
 
 
 class AuthAPIBase:
+    @property
+    def _session(self) -> requests.Session:
+        """Connection pooled session shared by the binance API clients"""
+        return SessionHelper.getSession("binance")
+
     def _isMarketValid(self, market: str) -> bool:
         p = re.compile(r"^[A-Z0-9]{5,17}$")
         if p.match(market):
@@ -48,6 +60,7 @@ class AuthAPI(AuthAPIBase):
         api_url: str = "https://api.binance.com",
         order_history: list = [],
         recv_window: int = 5000,
+        order_ledger: OrderLedger = None,
     ) -> None:
         """Binance API object model
 
@@ -59,6 +72,8 @@ class AuthAPI(AuthAPIBase):
             Your Binance account portfolio API secret
         api_url
             Binance API URL
+        order_ledger : OrderLedger
+            local order history, only the orders since the last sync are requested
         """
 
         # options
@@ -95,6 +110,12 @@ class AuthAPI(AuthAPIBase):
         # api recvWindow
         self.recv_window = recv_window
 
+        self.order_ledger = order_ledger
+        # the ledger keeps the orders of each account apart
+        self._ledger_account = "binance:" + hashlib.sha256(
+            f"{api_url}{api_key}".encode()
+        ).hexdigest()[:16]
+
     def handle_init_error(self, err: str) -> None:
         if self.debug:
             raise TypeError(err)
@@ -102,19 +123,15 @@ class AuthAPI(AuthAPIBase):
             raise SystemExit(err)
 
     def _dispatch_request(self, method: str):
-        session = Session()
-        session.headers.update(
-            {
-                "Content-Type": "application/json; charset=utf-8",
-                "X-MBX-APIKEY": self._api_key,
-            }
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "X-MBX-APIKEY": self._api_key,
+        }
+        return partial(
+            self._session.request,
+            method if method in ["GET", "DELETE", "PUT", "POST"] else "GET",
+            headers=headers,
         )
-        return {
-            "GET": session.get,
-            "DELETE": session.delete,
-            "PUT": session.put,
-            "POST": session.post,
-        }.get(method, "GET")
 
     def createHash(self, uri: str = ""):
         return hmac.new(
@@ -388,9 +405,6 @@ class AuthAPI(AuthAPIBase):
                     if len(resp) == 0:
                         return pd.DataFrame()
 
-                    if full_scan is True:
-                        time.sleep(0.25)
-
                     if isinstance(resp, list):
                         df_tmp = pd.DataFrame.from_dict(resp)
                     else:
@@ -411,12 +425,15 @@ class AuthAPI(AuthAPIBase):
                         f"add to order history to prevent full scan: {self.order_history}"
                     )
             else:
-                # GET /api/v3/allOrders
-                resp = self.authAPI(
-                    "GET",
-                    "/api/v3/allOrders",
-                    {"symbol": market, "recvWindow": self.recv_window},
-                )
+                if self.order_ledger is not None:
+                    resp = self._syncOrders(market)
+                else:
+                    # GET /api/v3/allOrders
+                    resp = self.authAPI(
+                        "GET",
+                        "/api/v3/allOrders",
+                        {"symbol": market, "recvWindow": self.recv_window},
+                    )
 
                 # unexpected data, then return
                 if len(resp) == 0:
@@ -507,6 +524,55 @@ class AuthAPI(AuthAPIBase):
         except:
             return pd.DataFrame()
 
+    def _syncOrders(self, market: str) -> list:
+        """Orders of a market from the order ledger, after requesting the orders since the last sync"""
+
+        account = self._ledger_account
+        synced = self.order_ledger.isSynced(account, market)
+        resume = self.order_ledger.getResumeOrder(account, market) if synced else None
+        # the first sync pages through the whole history, from the first order id
+        order_id = 0 if resume is None else int(resume["orderId"])
+
+        while True:
+            # GET /api/v3/allOrders
+            resp = self.authAPI(
+                "GET",
+                "/api/v3/allOrders",
+                {
+                    "symbol": market,
+                    "orderId": order_id,
+                    "limit": ORDER_PAGE_SIZE,
+                    "recvWindow": self.recv_window,
+                },
+            )
+
+            if not isinstance(resp, list):
+                if not synced:
+                    # GET /api/v3/allOrders
+                    return self.authAPI(
+                        "GET",
+                        "/api/v3/allOrders",
+                        {"symbol": market, "recvWindow": self.recv_window},
+                    )
+                break
+
+            complete = len(resp) < ORDER_PAGE_SIZE
+            self.order_ledger.addOrders(
+                account,
+                market,
+                [
+                    (order["orderId"], order["time"], order["status"] in FINAL_ORDER_STATUSES, order)
+                    for order in resp
+                ],
+                synced=complete,
+            )
+            if complete:
+                break
+
+            order_id = max(int(order["orderId"]) for order in resp) + 1
+
+        return self.order_ledger.getOrders(account, market)
+
     def getTime(self) -> datetime:
         """Retrieves the exchange time"""
 
@@ -777,9 +843,9 @@ class AuthAPI(AuthAPIBase):
             elif resp.status_code == 429 and (
                 resp_message.startswith("Too much request weight used")
             ):
-                message = f"{method} ({resp.status_code}) {self._api_url}{uri} - {resp_message} (sleeping for 5 seconds to prevent being banned)"
+                # the session's rate limiter holds back requests until the limit resets
+                message = f"{method} ({resp.status_code}) {self._api_url}{uri} - {resp_message} (waiting for the rate limit to reset)"
                 Logger.error(f"Error: {message}")
-                time.sleep(5)
                 return {}
             elif resp.status_code != 200:
                 message = f"{method} ({resp.status_code}) {self._api_url}{uri} - {resp_message}"
@@ -1066,7 +1132,7 @@ class PublicAPI(AuthAPIBase):
             raise TypeError("URI is not a string.")
 
         try:
-            resp = requests.get(f"{self._api_url}{uri}", params=payload)
+            resp = self._session.get(f"{self._api_url}{uri}", params=payload)
 
             if resp.status_code != 200:
                 resp_message = resp.json()["msg"]
@@ -1313,11 +1379,32 @@ class WebSocketClient(WebSocket, AuthAPIBase):
         self._ws_url = ws_url
         self.markets = markets
         self.granularity = granularity
-        self.tickers = None
-        self.candles = None
+        self.candle_buffer = CandleBuffer(granularity, granularity.to_short)
         self.start_time = None
         self.time_elapsed = 0
 
+    @property
+    def candles(self) -> pd.DataFrame:
+        return self.candle_buffer.getCandles()
+
+    @candles.setter
+    def candles(self, df: pd.DataFrame) -> None:
+        if df is None:
+            self.candle_buffer.clear()
+        else:
+            self.candle_buffer.load(df)
+
+    @property
+    def tickers(self) -> pd.DataFrame:
+        return self.candle_buffer.getTickers()
+
+    @tickers.setter
+    def tickers(self, df: pd.DataFrame) -> None:
+        if df is not None:
+            raise ValueError("Websocket tickers can only be cleared")
+
+        self.candle_buffer.clearTickers()
+
     def on_open(self):
         self.start_time = datetime.now()
         self.message_count = 0
@@ -1329,50 +1416,15 @@ class WebSocketClient(WebSocket, AuthAPIBase):
             )
 
         if "e" in msg:
-            df = None
             if (
                 msg["e"] == "24hrMiniTicker"
                 and "E" in msg
                 and "s" in msg
                 and "c" in msg
             ):
-                # create dataframe from websocket message
-                df = pd.DataFrame(
-                    columns=["date", "market", "price"],
-                    data=[
-                        [
-                            self.convert_time(msg["E"]),
-                            msg["s"],
-                            msg["c"],
-                        ]
-                    ],
-                )
-
-                # set column types
-                df["date"] = df["date"].astype("datetime64[ns]")
-                df["price"] = df["price"].astype("float64")
-                df["candle"] = df["date"].dt.floor(freq=self.granularity.get_frequency)
-
-            if df is not None:
-                # insert first entry
-                if self.tickers is None and len(df) > 0:
-                    self.tickers = df
-                # append future entries without duplicates
-                elif self.tickers is not None and len(df) > 0:
-                    self.tickers = (
-                        pd.concat([self.tickers, df])
-                        .drop_duplicates(subset="market", keep="last")
-                        .reset_index(drop=True)
-                    )
-
-                # convert dataframes to a time series
-                tsidx = pd.DatetimeIndex(
-                    pd.to_datetime(self.tickers["date"]).dt.strftime(
-                        "%Y-%m-%dT%H:%M:%S.%Z"
-                    )
+                self.candle_buffer.ticker(
+                    msg["s"], self.convert_time(msg["E"]), float(msg["c"])
                 )
-                self.tickers.set_index(tsidx, inplace=True)
-                self.tickers.index.name = "ts"
 
             if msg["e"] == "kline" and "s" in msg and "k" in msg:
                 k = msg["k"]
@@ -1385,81 +1437,22 @@ class WebSocketClient(WebSocket, AuthAPIBase):
                     and "l" in k
                     and "v" in k
                 ):
-                    # create dataframe from websocket message
-                    df = pd.DataFrame(
-                        columns=[
-                            "date",
-                            "market",
-                            "granularity",
-                            "low",
-                            "high",
-                            "open",
-                            "close",
-                            "volume",
-                        ],
-                        data=[
-                            [
-                                self.convert_time(k["t"]), # - timedelta(hours=1),
-                                msg["s"],
-                                k["i"],
-                                float(k["l"]),
-                                float(k["h"]),
-                                float(k["o"]),
-                                float(k["c"]),
-                                float(k["V"]),
-                            ]
-                        ],
-                    )
+                    market = msg["s"]
 
-                    if self.candles is None:
-                        resp = PublicAPI().getHistoricalData(
-                            df["market"].values[0], self.granularity
-                        )
+                    # populate historical data via api for each market
+                    if not self.candle_buffer.hasMarket(market):
+                        resp = PublicAPI().getHistoricalData(market, self.granularity)
                         if len(resp) > 0:
-                            self.candles = resp
-                        else:
-                            self.candles = pd.DataFrame(
-                                columns=[
-                                    "date",
-                                    "market",
-                                    "granularity",
-                                    "low",
-                                    "high",
-                                    "open",
-                                    "close",
-                                    "volume",
-                                ],
-                                data=[],
-                            )
+                            self.candle_buffer.load(resp)
 
                     if k["i"] == self.granularity.to_short and k["x"] is True:
-                        # check if the current candle exists
-                        candle_exists = (
-                            (self.candles["date"] == df["date"].values[0])
-                            & (self.candles["market"] == df["market"].values[0])
-                        ).any()
-                        if not candle_exists:
-                            self.candles = pd.concat([self.candles, df]) #self.candles.append(df)
-
-                        tsidx = pd.DatetimeIndex(
-                            pd.to_datetime(self.candles["date"]).dt.strftime(
-                                "%Y-%m-%dT%H:%M:%S.%Z"
-                            )
-                        )
-                        self.candles.set_index(tsidx, inplace=True)
-                        self.candles.index.name = "ts"
-
-                    if self.candles is not None:
-                        # keep last 300 candles per market
-                        self.candles = self.candles.groupby("market").tail(300)
-                        # sort columns by date
-                        self.candles = self.candles.copy().sort_values(by=["date"])
-                        # set correct column types
-                        self.candles["open"] = self.candles["open"].astype("float64")
-                        self.candles["high"] = self.candles["high"].astype("float64")
-                        self.candles["close"] = self.candles["close"].astype("float64")
-                        self.candles["low"] = self.candles["low"].astype("float64")
-                        self.candles["volume"] = self.candles["volume"].astype(
-                            "float64"
+                        self.candle_buffer.candle(
+                            market,
+                            self.convert_time(k["t"]),  # - timedelta(hours=1),
+                            float(k["l"]),
+                            float(k["h"]),
+                            float(k["o"]),
+                            float(k["c"]),
+                            float(k["V"]),
                         )
         self.message_count += 1
@@ -16,6 +16,8 @@ from requests import Request
 from threading import Thread
 from websocket import create_connection, WebSocketConnectionClosedException
 from models.helper.LogHelper import Logger
+from models.helper.SessionHelper import SessionHelper
+from models.exchange.CandleBuffer import CandleBuffer
 from models.exchange.Granularity import Granularity
 
 MARGIN_ADJUSTMENT = 0.0025
@@ -30,6 +32,11 @@ DEFAULT_MARKET = "BTC-GBP"
 
 
 class AuthAPIBase:
+    @property
+    def _session(self) -> requests.Session:
+        """Connection pooled session shared by the coinbasepro API clients"""
+        return SessionHelper.getSession("coinbasepro")
+
     def _isMarketValid(self, market: str) -> bool:
         p = re.compile(r"^[0-9A-Z]{1,20}\-[1-9A-Z]{2,5}$")
         if p.match(market):
@@ -615,11 +622,11 @@ class AuthAPI(AuthAPIBase):
 
         try:
             if method == "DELETE":
-                resp = requests.delete(self._api_url + uri, auth=self)
+                resp = self._session.delete(self._api_url + uri, auth=self)
             elif method == "GET":
-                resp = requests.get(self._api_url + uri, auth=self)
+                resp = self._session.get(self._api_url + uri, auth=self)
             elif method == "POST":
-                resp = requests.post(self._api_url + uri, json=payload, auth=self)
+                resp = self._session.post(self._api_url + uri, json=payload, auth=self)
 
             if "msg" in resp.json():
                 resp_message = resp.json()["msg"]
@@ -890,9 +897,9 @@ class PublicAPI(AuthAPIBase):
 
         try:
             if method == "GET":
-                resp = requests.get(self._api_url + uri)
+                resp = self._session.get(self._api_url + uri)
             elif method == "POST":
-                resp = requests.post(self._api_url + uri, json=payload)
+                resp = self._session.post(self._api_url + uri, json=payload)
 
             trycnt, maxretry = (1, 5)
             while trycnt <= maxretry:
@@ -905,15 +912,17 @@ class PublicAPI(AuthAPIBase):
                         Logger.error(
                             f"Coinbase Pro API request error - retry attempt {trycnt}: {message}"
                         )
-                    time.sleep(15)
+                    # rate limited requests already wait in the session's rate limiter
+                    if resp.status_code != 429:
+                        time.sleep(15)
                     trycnt += 1
                 else:
                     break
 
                 if method == "GET":
-                    resp = requests.get(self._api_url + uri)
+                    resp = self._session.get(self._api_url + uri)
                 elif method == "POST":
-                    resp = requests.post(self._api_url + uri, json=payload)
+                    resp = self._session.post(self._api_url + uri, json=payload)
 
             resp.raise_for_status()
             return resp.json()
@@ -1159,11 +1168,32 @@ class WebSocketClient(WebSocket):
 
         self.markets = markets
         self.granularity = granularity
-        self.tickers = None
-        self.candles = None
+        self.candle_buffer = CandleBuffer(granularity, granularity.to_integer)
         self.start_time = None
         self.time_elapsed = 0
 
+    @property
+    def candles(self) -> pd.DataFrame:
+        return self.candle_buffer.getCandles()
+
+    @candles.setter
+    def candles(self, df: pd.DataFrame) -> None:
+        if df is None:
+            self.candle_buffer.clear()
+        else:
+            self.candle_buffer.load(df)
+
+    @property
+    def tickers(self) -> pd.DataFrame:
+        return self.candle_buffer.getTickers()
+
+    @tickers.setter
+    def tickers(self, df: pd.DataFrame) -> None:
+        if df is not None:
+            raise ValueError("Websocket tickers can only be cleared")
+
+        self.candle_buffer.clearTickers()
+
     def on_open(self):
         self.message_count = 0
 
@@ -1174,197 +1204,23 @@ class WebSocketClient(WebSocket):
             )
 
         if "time" in msg and "product_id" in msg and "price" in msg:
-            # create dataframe from websocket message
-            df = pd.DataFrame(
-                columns=["date", "market", "price"],
-                data=[
-                    [
-                        datetime.strptime(
-                            msg["time"], "%Y-%m-%dT%H:%M:%S.%fZ"
-                        ).strftime("%Y-%m-%d %H:%M:%S"),
-                        msg["product_id"],
-                        msg["price"],
-                    ]
-                ],
+            date = datetime.strptime(msg["time"], "%Y-%m-%dT%H:%M:%S.%fZ").replace(
+                microsecond=0
             )
+            market = msg["product_id"]
+            price = float(msg["price"])
 
-            # set column types
-            df["date"] = df["date"].astype("datetime64[ns]")
-            df["price"] = df["price"].astype("float64")
-
-            # form candles
-            df["candle"] = df["date"].dt.floor(freq=self.granularity.frequency)
-
-            # candles dataframe is empty
-            if self.candles is None:
-                resp = PublicAPI().getHistoricalData(
-                    df["market"].values[0], self.granularity
-                )
+            # populate historical data via api if it does not exist
+            if not self.candle_buffer.hasMarket(market):
+                resp = PublicAPI().getHistoricalData(market, self.granularity)
                 if len(resp) > 0:
-                    self.candles = resp
+                    self.candle_buffer.load(resp)
                 else:
-                    # create dataframe from websocket message
-                    self.candles = pd.DataFrame(
-                        columns=[
-                            "date",
-                            "market",
-                            "granularity",
-                            "open",
-                            "high",
-                            "close",
-                            "low",
-                            "volume",
-                        ],
-                        data=[
-                            [
-                                df["candle"].values[0],
-                                df["market"].values[0],
-                                self.granularity.to_integer,
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                msg["size"],
-                            ]
-                        ],
-                    )
-            # candles dataframe contains some data
+                    self.candle_buffer.trade(market, date, price, float(msg["size"]))
             else:
-                # check if the current candle exists
-                candle_exists = (
-                    (self.candles["date"] == df["candle"].values[0])
-                    & (self.candles["market"] == df["market"].values[0])
-                ).any()
-                if not candle_exists:
-                    # populate historical data via api if it does not exist
-                    if (
-                        len(
-                            self.candles[
-                                self.candles["market"] == df["market"].values[0]
-                            ]
-                        )
-                        == 0
-                    ):
-                        resp = PublicAPI().getHistoricalData(
-                            df["market"].values[0], self.granularity
-                        )
-                        if len(resp) > 0:
-                            df_new_candle = resp
-                        else:
-                            # create dataframe from websocket message
-                            df_new_candle = pd.DataFrame(
-                                columns=[
-                                    "date",
-                                    "market",
-                                    "granularity",
-                                    "open",
-                                    "high",
-                                    "close",
-                                    "low",
-                                    "volume",
-                                ],
-                                data=[
-                                    [
-                                        df["candle"].values[0],
-                                        df["market"].values[0],
-                                        self.granularity.to_integer,
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        msg["size"],
-                                    ]
-                                ],
-                            )
-
-                    else:
-                        df_new_candle = pd.DataFrame(
-                            columns=[
-                                "date",
-                                "market",
-                                "granularity",
-                                "open",
-                                "high",
-                                "close",
-                                "low",
-                                "volume",
-                            ],
-                            data=[
-                                [
-                                    df["candle"].values[0],
-                                    df["market"].values[0],
-                                    self.granularity.to_integer,
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    msg["size"],
-                                ]
-                            ],
-                        )
-                    self.candles = self.candles.append(df_new_candle)
-                else:
-                    candle = self.candles[
-                        (
-                            (self.candles["date"] == df["candle"].values[0])
-                            & (self.candles["market"] == df["market"].values[0])
-                        )
-                    ]
-
-                    # set high on high
-                    if float(df["price"].values[0]) > float(candle.high.values[0]):
-                        self.candles.at[candle.index.values[0], "high"] = df[
-                            "price"
-                        ].values[0]
-
-                    self.candles.at[candle.index.values[0], "close"] = df[
-                        "price"
-                    ].values[0]
-
-                    # set low on low
-                    if float(df["price"].values[0]) < float(candle.low.values[0]):
-                        self.candles.at[candle.index.values[0], "low"] = df[
-                            "price"
-                        ].values[0]
-
-                    # increment candle base volume
-                    self.candles.at[candle.index.values[0], "volume"] = float(
-                        candle["volume"].values[0]
-                    ) + float(msg["size"])
-
-            # insert first entry
-            if self.tickers is None and len(df) > 0:
-                self.tickers = df
-            # append future entries without duplicates
-            elif self.tickers is not None and len(df) > 0:
-                self.tickers = (
-                    pd.concat([self.tickers, df])
-                    .drop_duplicates(subset="market", keep="last")
-                    .reset_index(drop=True)
-                )
-
-            # convert dataframes to a time series
-            tsidx = pd.DatetimeIndex(
-                pd.to_datetime(self.tickers["date"]).dt.strftime("%Y-%m-%dT%H:%M:%S.%Z")
-            )
-            self.tickers.set_index(tsidx, inplace=True)
-            self.tickers.index.name = "ts"
+                self.candle_buffer.trade(market, date, price, float(msg["size"]))
 
-            tsidx = pd.DatetimeIndex(
-                pd.to_datetime(self.candles["date"]).dt.strftime("%Y-%m-%dT%H:%M:%S.%Z")
-            )
-            self.candles.set_index(tsidx, inplace=True)
-            self.candles.index.name = "ts"
-
-            # set correct column types
-            self.candles["open"] = self.candles["open"].astype("float64")
-            self.candles["high"] = self.candles["high"].astype("float64")
-            self.candles["close"] = self.candles["close"].astype("float64")
-            self.candles["low"] = self.candles["low"].astype("float64")
-            self.candles["volume"] = self.candles["volume"].astype("float64")
-
-            # keep last 300 candles per market
-            self.candles = self.candles.groupby("market").tail(300)
+            self.candle_buffer.ticker(market, date, price)
 
             # print (f'{msg["time"]} {msg["product_id"]} {msg["price"]}')
             # print(json.dumps(msg, indent=4, sort_keys=True))
@@ -1,7 +1,6 @@
 """Remotely control your Kucoin account via their API"""
 
 from ctypes import wstring_at
-from genericpath import exists
 import re
 import json
 import hmac
@@ -17,17 +16,23 @@ from numpy import floor
 from datetime import datetime
 from requests import Request
 from models.helper.LogHelper import Logger
+from models.helper.SessionHelper import SessionHelper
+from models.OrderLedger import OrderLedger
 from requests import Request
 from threading import Thread
 from websocket import create_connection, WebSocketConnectionClosedException
+from models.exchange.CandleBuffer import CandleBuffer
 from models.exchange.Granularity import Granularity
-from urllib import parse
 
 MARGIN_ADJUSTMENT = 0.0025
 DEFAULT_MAKER_FEE_RATE = 0.018
 DEFAULT_TAKER_FEE_RATE = 0.018
 DEFAULT_TRADE_FEE_RATE = 0.018  # added 0.0005 to allow for price movements
 MINIMUM_TRADE_AMOUNT = 10
+# the orders endpoint accepts a range of up to a week
+ORDER_SYNC_WINDOW = 7 * 24 * 3600 * 1000
+# history requested by the first sync of a market
+ORDER_SYNC_HISTORY = 30 * 24 * 3600 * 1000
 SUPPORTED_GRANULARITY = [
     "1min",
     "3min",
@@ -44,6 +49,11 @@ DEFAULT_MARKET = "BTC-USDT"
 
 
 class AuthAPIBase:
+    @property
+    def _session(self) -> requests.Session:
+        """Connection pooled session shared by the kucoin API clients"""
+        return SessionHelper.getSession("kucoin")
+
     def _isMarketValid(self, market: str) -> bool:
         p = re.compile(r"^[0-9A-Z]{1,20}\-[1-9A-Z]{2,5}$")
         if p.match(market):
@@ -66,6 +76,7 @@ class AuthAPI(AuthAPIBase):
         api_url="",
         cache_path="cache",
         use_cache=True,
+        order_ledger: OrderLedger = None,
     ) -> None:
         """kucoin API object model
 
@@ -79,6 +90,12 @@ class AuthAPI(AuthAPIBase):
             Your kucoin account portfolio API passphrase
         api_url
             kucoin API URL
+        cache_path : str
+            folder of the order ledger, if none is given
+        use_cache : bool
+            keep the order history in the order ledger, only the orders since the last sync are requested
+        order_ledger : OrderLedger
+            order ledger shared with other clients
         """
 
         # options
@@ -119,15 +136,16 @@ class AuthAPI(AuthAPIBase):
         self._api_passphrase = api_passphrase
         self._api_url = api_url
 
-        # Make the cache folder if it doesn't exist
-
-        if not os.path.exists(cache_path):
-            os.makedirs(cache_path)
-
-        self._cache_path = cache_path
-        self._cache_filepath = cache_path + os.path.sep + "kucoin_order_cache.json"
-        self._cache_lock_filepath = cache_path + os.path.sep + "kucoin_order_cache.lock"
         self.usekucoincache = use_cache
+        if use_cache and order_ledger is None:
+            order_ledger = OrderLedger(os.path.join(cache_path, "orders.db"))
+        self.order_ledger = order_ledger if use_cache else None
+        # the ledger keeps the orders of each account apart
+        self._ledger_account = "kucoin:" + hashlib.sha256(
+            f"{api_url}{api_key}".encode()
+        ).hexdigest()[:16]
+        # set when the last authAPI call failed, as it then returns an empty data frame
+        self._api_error = False
 
     def handle_init_error(self, err: str) -> None:
         """Handle initialisation error"""
@@ -291,11 +309,11 @@ class AuthAPI(AuthAPIBase):
         if not status in ["done", "active", "all"]:
             raise ValueError("Invalid order status.")
 
-        # Update Cache if needed before continuing on any bot for Kucoin
-        if self.usekucoincache : result = self.buildOrderHistoryCache()
-
-        # GET /orders?status
-        resp = self.authAPI("GET", f"api/v1/orders?symbol={market}", use_order_cache=self.usekucoincache, use_pagination=True)
+        if self.order_ledger is not None and market != "":
+            resp = self._syncOrders(market)
+        else:
+            # GET /orders?status
+            resp = self.authAPI("GET", f"api/v1/orders?symbol={market}", use_pagination=True)
         if len(resp) > 0:
             if status == "active":
                 df = resp.copy()[
@@ -660,145 +678,56 @@ class AuthAPI(AuthAPIBase):
 
         return floor(amount * 10 ** nb_digits) / 10 ** nb_digits
 
-    def validateJSONFile(self, jsonFile):
-        if exists(jsonFile):
-            with open(jsonFile) as json_data:
-                try:
-                    json.load(json_data)
-                except ValueError as err:
-                    return False
-                return True
-        else:
-            return False
-        
-    def buildOrderHistoryCache(self, days_to_keep = 45, enable_purge = True) -> bool:
-        """Intelligently builds an order history cache to use in subsequent api calls"""
-
-        if exists(self._cache_lock_filepath):
-            #Lock file exists - wait
-            last_modified_lock = datetime.now() - datetime.fromtimestamp(
-                os.path.getmtime(
-                    os.path.join(self._cache_lock_filepath)
-                )
-            )
-            while exists(self._cache_lock_filepath):
-                try:
-                    last_modified_lock = datetime.now() - datetime.fromtimestamp(
-                        os.path.getmtime(
-                            os.path.join(self._cache_lock_filepath)
-                        )
-                    )
-                    if last_modified_lock > 1799:
-                        # lock has existed for longer than 30 mins - try and salvage
-                        break
-                except:
-                    pass
-                time.sleep(5)        
-
-        if exists(self._cache_filepath):
-            last_modified = datetime.now() - datetime.fromtimestamp(
-                os.path.getmtime(
-                    os.path.join(self._cache_filepath)
-                )
-            )
+    def _syncOrders(self, market: str) -> pd.DataFrame:
+        """Orders of a market from the order ledger, after requesting the orders since the last sync"""
 
-            # If last build over a day ago
-            if last_modified.seconds < 21599:
-                #print (f"Last modified cache: {last_modified.seconds}")
-                return True
-
-        #pd.set_option('display.max_rows', 4000)
-
-        now = int(round(time.time() * 1000))
-        hour = 1 * 3600 * 1000
-        day = 24 * hour
-        week = 7 * day
-        month = day * 30
-        # Date of Kucoin Starting
-        since = 1504224000000
-        end = min(since + week, now)
-
-        purgeAfter = now - (day * days_to_keep)
-        #endAt = min(since + week, now)
-        startAt = now - (30 * day)
-
-        break_build = False
-        last_timestamp_check = now - (12 * hour)
-
-        #Validate the json cache file
-        if not self.validateJSONFile(self._cache_filepath):
-            # Delete the json file so it can be rebuilt
-            if exists(self._cache_filepath): os.remove(self._cache_filepath)
-
-        #If a previous cache file exists - load it up into the df
-        if exists(self._cache_filepath):
-            df = pd.read_json(self._cache_filepath)
+        account = self._ledger_account
+        now = int(time.time() * 1000)
+        synced = self.order_ledger.getSyncTime(account, market)
+        if synced is None:
+            start = now - ORDER_SYNC_HISTORY
         else:
-            df = pd.DataFrame()
-
-        if not df.empty:                
-            if len(df.columns) > 1:
-                if 'createdAt' in df.columns:
-                    df = df.sort_values(by='createdAt', ascending=True)
-                    startAt = df.createdAt.iloc[-1] + 1
-
-        while (now - (12 * hour)) > startAt:
-
-            st_dt = datetime.fromtimestamp(startAt / 1000.0)
-            st_str = st_dt.strftime("%m/%d/%Y, %H:%M:%S")
-            print (f"Start at HR: {st_str}")
-
-            # Create the lock file
-            if not exists(self._cache_lock_filepath):
-                with open(self._cache_lock_filepath, 'w') as fp:
-                    pass
-                fp.close()
-
-            print ("Doing historic orders build... ")
-            resp = self.authAPI("GET", f"api/v1/orders?startAt={startAt}", use_pagination=True)
-            if last_timestamp_check == startAt : 
-                #print ("Hit Last timestamp check")
-                resp = self.authAPI("GET", f"api/v1/orders?", use_pagination=True)
-                break_build = True
-            if len(resp) > 0:
-                df = df.append(resp)
-                df = df.drop_duplicates('id')
-                df = df.reset_index(drop=True)
-                
-                if 'createdAt' in df.columns: 
-                    df = df.sort_values(by='createdAt', ascending=True)
-                    startAt = df.createdAt.iloc[-1] + 1
-                    last_timestamp_check = startAt
-
-            if break_build : 
+            # a minute of overlap for the clock difference with the exchange
+            start = int(synced * 1000) - 60000
+            resume = self.order_ledger.getResumeOrder(account, market)
+            if resume is not None and bool(resume["isActive"]):
+                start = min(start, int(resume["createdAt"]))
+
+        while start < now:
+            end = min(start + ORDER_SYNC_WINDOW, now)
+
+            # GET /orders?symbol&startAt&endAt
+            self._api_error = False
+            resp = self.authAPI(
+                "GET",
+                f"api/v1/orders?symbol={market}&startAt={start}&endAt={end}",
+                use_pagination=True,
+            )
+            if self._api_error:
+                if synced is None:
+                    # GET /orders?status
+                    return self.authAPI("GET", f"api/v1/orders?symbol={market}", use_pagination=True)
                 break
 
-            time.sleep(5)
-
-        df = df.drop_duplicates('id')
-        # Purge anything older than a month
-        if enable_purge : df = df[df['createdAt'] > purgeAfter]
-        # Do final sort
-        if 'createdAt' in df.columns: 
-            df = df.sort_values(by='createdAt', ascending=True)
-            startAt = df.createdAt.iloc[-1] + 1
-        df = df.reset_index(drop=True)
-
-        # Remove json cache - and then recreate with latest data
-        if exists(self._cache_filepath): os.remove(self._cache_filepath)
-        time.sleep(1)
-        df.to_json(self._cache_filepath, orient="records")
-        time.sleep(1)
-        #Delete Lock File
-        if exists(self._cache_lock_filepath): os.remove(self._cache_lock_filepath)
-        return df
+            orders = []
+            if len(resp) > 0 and "id" in resp:
+                orders = [
+                    (order["id"], order["createdAt"], not bool(order["isActive"]), order)
+                    for order in json.loads(resp.to_json(orient="records"))
+                ]
+            self.order_ledger.addOrders(account, market, orders, synced=end == now)
+            start = end
+
+        orders = self.order_ledger.getOrders(account, market)
+        if len(orders) == 0:
+            return pd.DataFrame()
 
+        # newest first, as the exchange returns them
+        return pd.DataFrame.from_dict(orders[::-1])
 
-    def authAPI(self, method: str, uri: str, payload: str = "", use_order_cache: bool = False, getting_pages: bool = False, page_num: int = 1, per_page: int = 500, use_pagination: bool = False) -> pd.DataFrame:
+    def authAPI(self, method: str, uri: str, payload: str = "", getting_pages: bool = False, page_num: int = 1, per_page: int = 500, use_pagination: bool = False) -> pd.DataFrame:
         """Initiates a REST API call"""
 
-        # Delay if we hit the ratelimit
-        RateLimitDelay = 5
         HitRateLimitCounter = 0
 
         if not isinstance(method, str):
@@ -812,7 +741,6 @@ class AuthAPI(AuthAPIBase):
 
         # Store the original URI for use later
         orig_uri = uri
-        symbol = ""
 
         if method == "GET" and use_pagination and getting_pages:
             # We are getting this and subsequent pages
@@ -823,38 +751,25 @@ class AuthAPI(AuthAPIBase):
         #print(uri)
         #Logger.info(uri)
 
-        # Get the symbol from the URL if it exists in parameters
-        if use_order_cache and ("symbol" in (self._api_url + uri)) and not ("symbols" in (self._api_url + uri)): 
-            #print (self._api_url + uri)
-            try:
-                symbol = parse.parse_qs(parse.urlparse(self._api_url + uri).query)['symbol'][0]
-            except:
-                pass
-            if len(symbol) == 0 : symbol = None
-            #print(f"Symbol from URI - {symbol}")
-        else:
-            symbol = None
-
         try:
             if method == "DELETE":
-                resp = requests.delete(self._api_url + uri, auth=self)
+                resp = self._session.delete(self._api_url + uri, auth=self)
             elif method == "GET":
                 # resp = requests.request('GET', self._api_url + uri, headers=headers)
-                resp = requests.get(self._api_url + uri, auth=self)
+                resp = self._session.get(self._api_url + uri, auth=self)
             elif method == "POST":
-                resp = requests.post(self._api_url + uri, json=payload, auth=self)
+                resp = self._session.post(self._api_url + uri, json=payload, auth=self)
 
             while resp.status_code == 429 and HitRateLimitCounter < 5:
-                # Hit the rate limit - Delay and retry. 
+                # Hit the rate limit - the session's rate limiter waits for it to reset before the retry
                 HitRateLimitCounter += 1
-                time.sleep(RateLimitDelay)
                 if method == "DELETE":
-                    resp = requests.delete(self._api_url + uri, auth=self)
+                    resp = self._session.delete(self._api_url + uri, auth=self)
                 elif method == "GET":
                     # resp = requests.request('GET', self._api_url + uri, headers=headers)
-                    resp = requests.get(self._api_url + uri, auth=self)
+                    resp = self._session.get(self._api_url + uri, auth=self)
                 elif method == "POST":
-                    resp = requests.post(self._api_url + uri, json=payload, auth=self)
+                    resp = self._session.post(self._api_url + uri, json=payload, auth=self)
 
             # Logger.debug(resp.json())
             if resp.status_code != 200:
@@ -884,6 +799,7 @@ class AuthAPI(AuthAPIBase):
                         + " - "
                         + "{}".format(resp.json()["msg"])
                     )
+                    self._api_error = True
                     return pd.DataFrame()
 
             resp.raise_for_status()
@@ -926,31 +842,18 @@ class AuthAPI(AuthAPIBase):
 
             #df = df[~df.tags.notnull()]
 
-            #If a previous cache file exists - load it up into the df
-            if use_order_cache and exists(self._cache_filepath) and "v1/orders" in uri and method == "GET":
-                if exists(self._cache_lock_filepath):
-                    #Lock file exists - wait
-                    while exists(self._cache_lock_filepath):
-                        time.sleep(5)
-                cache_df = pd.read_json(self._cache_filepath)
-                df = df.append(cache_df)
-                df = df.drop_duplicates('id')
-            else:
-                cache_df = None
-            
             # Get subsequent pages - if in original AuthAPI call
             if max_pages != None:
-                if (not getting_pages) and (not use_order_cache) and (max_pages > current_page):
+                if (not getting_pages) and (max_pages > current_page):
                     page_counter = 1
+                    # the session's rate limiter paces the page requests
                     while page_counter <= max_pages:
-                        time.sleep(10)
                         page_counter += 1
                         append_df = self.authAPI(method=method, uri=orig_uri, payload=payload, getting_pages=True, page_num=page_counter, per_page=per_page)
                         df = df.append(append_df)
                         if page_counter == max_pages : break
 
-            #Sort by created Date and only return symbol if that was requested
-            if symbol != None : df = df[df['symbol'] == symbol]
+            #Sort by created Date
             if 'createdAt' in df.columns: df = df.sort_values(by='createdAt', ascending=False)
             return df
 
@@ -972,6 +875,8 @@ class AuthAPI(AuthAPIBase):
     def handle_api_error(self, err: str, reason: str) -> pd.DataFrame:
         """Handle API errors"""
 
+        self._api_error = True
+
         if self.debug:
             if self.die_on_api_error:
                 raise SystemExit(err)
@@ -1233,9 +1138,9 @@ class PublicAPI(AuthAPIBase):
 
         try:
             if method == "GET":
-                resp = requests.get(self._api_url + uri)
+                resp = self._session.get(self._api_url + uri)
             elif method == "POST":
-                resp = requests.post(self._api_url + uri, json=payload)
+                resp = self._session.post(self._api_url + uri, json=payload)
 
             # If API returns an error status code, retry request up to 5 times
             trycnt, maxretry = (1, 5)
@@ -1251,14 +1156,16 @@ class PublicAPI(AuthAPIBase):
                             Logger.warning(
                                 f"Kucoin API request error - attempted {trycnt} times: {message}"
                             )
-                    time.sleep(15)
+                    # rate limited requests already wait in the session's rate limiter
+                    if resp.status_code != 429:
+                        time.sleep(15)
                 else:
                     break
 
                 if method == "GET":
-                    resp = requests.get(self._api_url + uri)
+                    resp = self._session.get(self._api_url + uri)
                 elif method == "POST":
-                    resp = requests.post(self._api_url + uri, json=payload)
+                    resp = self._session.post(self._api_url + uri, json=payload)
 
             resp.raise_for_status()
             return resp.json()
@@ -1496,8 +1403,7 @@ class WebSocketClient(WebSocket):
 
         self.markets = markets
         self.granularity = granularity
-        self.tickers = None
-        self.candles = None
+        self.candle_buffer = CandleBuffer(granularity, granularity.to_medium)
         self.start_time = None
         self.time_elapsed = 0
 
@@ -1506,6 +1412,28 @@ class WebSocketClient(WebSocket):
         # print("token: " + ts["data"]["token"])
         self.token = ts["data"]["token"]
 
+    @property
+    def candles(self) -> pd.DataFrame:
+        return self.candle_buffer.getCandles()
+
+    @candles.setter
+    def candles(self, df: pd.DataFrame) -> None:
+        if df is None:
+            self.candle_buffer.clear()
+        else:
+            self.candle_buffer.load(df)
+
+    @property
+    def tickers(self) -> pd.DataFrame:
+        return self.candle_buffer.getTickers()
+
+    @tickers.setter
+    def tickers(self, df: pd.DataFrame) -> None:
+        if df is not None:
+            raise ValueError("Websocket tickers can only be cleared")
+
+        self.candle_buffer.clearTickers()
+
     def on_open(self):
         self.message_count = 0
 
@@ -1516,199 +1444,26 @@ class WebSocketClient(WebSocket):
             )
 
         if "data" in msg and "time" in msg["data"] and "price" in msg["data"]:
-            # create dataframe from websocket message
-            df = pd.DataFrame(
-                columns=["date", "market", "price"],
-                data=[
-                    [
-                        # pd.to_datetime(msg["data"]["time"], origin="1970-01-01"), #.dt.strftime("%Y-%m-%d %H:%M:%S"),
-                        self.convert_time(msg["data"]["time"]),
-                        self.markets[0],
-                        msg["data"]["price"],
-                    ]
-                ],
-            )
-
-            # set column types
-
-            df["date"] = df["date"].astype("datetime64[ns]")
-            df["price"] = df["price"].astype("float64")
-
-            # form candles
-            df["candle"] = df["date"].dt.floor(freq=self.granularity.frequency)
+            date = self.convert_time(msg["data"]["time"])
+            # the topic ends with the market, e.g. /market/ticker:BTC-USDT
+            if "topic" in msg and ":" in msg["topic"]:
+                market = msg["topic"].split(":")[-1]
+            else:
+                market = self.markets[0]
+            price = float(msg["data"]["price"])
 
-            # candles dataframe is empty
-            if self.candles is None:
-                resp = PublicAPI().getHistoricalData(
-                    str(df["market"].values[0]), self.granularity
-                )
+            # populate historical data via api if it does not exist
+            if not self.candle_buffer.hasMarket(market):
+                resp = PublicAPI().getHistoricalData(market, self.granularity)
                 if len(resp) > 0:
-                    self.candles = resp
+                    self.candle_buffer.load(resp)
                 else:
-                    # create dataframe from websocket message
-                    self.candles = pd.DataFrame(
-                        columns=[
-                            "date",
-                            "market",
-                            "granularity",
-                            "open",
-                            "high",
-                            "close",
-                            "low",
-                            "volume",
-                        ],
-                        data=[
-                            [
-                                self.convert_time(df["candle"].values[0]),
-                                df["market"].values[0],
-                                self.granularity.to_integer,
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                df["price"].values[0],
-                                msg["data"]["size"],
-                            ]
-                        ],
+                    self.candle_buffer.trade(
+                        market, date, price, float(msg["data"]["size"])
                     )
-            # candles dataframe contains some data
             else:
-                # check if the current candle exists
-                candle_exists = (
-                    (self.candles["date"] == df["candle"].values[0])
-                    & (self.candles["market"] == df["market"].values[0])
-                ).any()
-                if not candle_exists:
-                    # populate historical data via api if it does not exist
-                    if (
-                        len(
-                            self.candles[
-                                self.candles["market"] == df["market"].values[0]
-                            ]
-                        )
-                        == 0
-                    ):
-                        resp = PublicAPI().getHistoricalData(
-                            df["market"].values[0], self.granularity
-                        )
-                        if len(resp) > 0:
-                            df_new_candle = resp
-                        else:
-                            # create dataframe from websocket message
-                            df_new_candle = pd.DataFrame(
-                                columns=[
-                                    "date",
-                                    "market",
-                                    "granularity",
-                                    "open",
-                                    "high",
-                                    "close",
-                                    "low",
-                                    "volume",
-                                ],
-                                data=[
-                                    [
-                                        self.convert_time(df["candle"].values[0]),
-                                        df["market"].values[0],
-                                        self.granularity.to_integer,
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        df["price"].values[0],
-                                        msg["data"]["size"],
-                                    ]
-                                ],
-                            )
-
-                    else:
-                        df_new_candle = pd.DataFrame(
-                            columns=[
-                                "date",
-                                "market",
-                                "granularity",
-                                "open",
-                                "high",
-                                "close",
-                                "low",
-                                "volume",
-                            ],
-                            data=[
-                                [
-                                    df["candle"].values[0],
-                                    df["market"].values[0],
-                                    self.granularity.to_integer,
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    df["price"].values[0],
-                                    msg["data"]["size"],
-                                ]
-                            ],
-                        )
-                    self.candles = self.candles.append(df_new_candle)
-                else:
-                    candle = self.candles[
-                        (
-                            (self.candles["date"] == df["candle"].values[0])
-                            & (self.candles["market"] == df["market"].values[0])
-                        )
-                    ]
-
-                    # set high on high
-                    if float(df["price"].values[0]) > float(candle.high.values[0]):
-                        self.candles.at[candle.index.values[0], "high"] = df[
-                            "price"
-                        ].values[0]
-
-                    self.candles.at[candle.index.values[0], "close"] = df[
-                        "price"
-                    ].values[0]
-
-                    # set low on low
-                    if float(df["price"].values[0]) < float(candle.low.values[0]):
-                        self.candles.at[candle.index.values[0], "low"] = df[
-                            "price"
-                        ].values[0]
-
-                    # increment candle base volume
-                    self.candles.at[candle.index.values[0], "volume"] = float(
-                        candle["volume"].values[0]
-                    ) + float(msg["data"]["size"])
-
-            # insert first entry
-            if self.tickers is None and len(df) > 0:
-                self.tickers = df
-            # append future entries without duplicates
-            elif self.tickers is not None and len(df) > 0:
-                self.tickers = (
-                    pd.concat([self.tickers, df])
-                    .drop_duplicates(subset="market", keep="last")
-                    .reset_index(drop=True)
-                )
-
-            # convert dataframes to a time series
-            tsidx = pd.DatetimeIndex(
-                pd.to_datetime(self.tickers["date"]).dt.strftime("%Y-%m-%dT%H:%M:%S.%Z")
-            )
-            self.tickers.set_index(tsidx, inplace=True)
-            self.tickers.index.name = "ts"
-
-            tsidx = pd.DatetimeIndex(
-                pd.to_datetime(self.candles["date"]).dt.strftime("%Y-%m-%dT%H:%M:%S.%Z")
-            )
-            self.candles.set_index(tsidx, inplace=True)
-            self.candles.index.name = "ts"
-
-            # set correct column types
-            self.candles["open"] = self.candles["open"].astype("float64")
-            self.candles["high"] = self.candles["high"].astype("float64")
-            self.candles["close"] = self.candles["close"].astype("float64")
-            self.candles["low"] = self.candles["low"].astype("float64")
-            self.candles["volume"] = self.candles["volume"].astype("float64")
-
-            # keep last 300 candles per market
-            self.candles = self.candles.groupby("market").tail(300)
+                self.candle_buffer.trade(market, date, price, float(msg["data"]["size"]))
 
-            # print (f'{msg["time"]} {msg["product_id"]} {msg["price"]}')
-            # print(json.dumps(msg, indent=4, sort_keys=True))
+            self.candle_buffer.ticker(market, date, price)
 
         self.message_count += 1
@@ -0,0 +1,214 @@
+"""Bot status rows of the web gui dashboard"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+from models.helper.StateStoreHelper import StateStore
+
+INDICATORS = ("BULL", "ERI", "EMA", "MACD", "OBV")
+
+POSITIVE_COLOR = "#3D9970"
+NEGATIVE_COLOR = "#99413d"
+
+
+def getDateFromISO8601Str(date: str):  # pylint: disable=invalid-name
+    """Bot instance uptime tracking"""
+    now = str(datetime.now())
+    # If date passed from datetime.now() remove milliseconds
+    if date.find(".") != -1:
+        dt = date.split(".")[0]
+        date = dt
+    if now.find(".") != -1:
+        dt = now.split(".")[0]
+        now = dt
+
+    now = now.replace("T", " ")
+    now = f"{now}"
+    # Add time in case only a date is passed in
+    date = date.replace("T", " ") if date.find("T") != -1 else date
+    # Add time in case only a date is passed in
+    new_date_str = f"{date} 00:00:00" if len(date) == 10 else date
+
+    started = datetime.strptime(new_date_str, "%Y-%m-%d %H:%M:%S")
+    now = datetime.strptime(now, "%Y-%m-%d %H:%M:%S")
+    duration = now - started
+    duration_in_s = duration.total_seconds()
+    hours = divmod(duration_in_s, 3600)[0]
+    duration_in_s -= 3600 * hours
+    minutes = divmod(duration_in_s, 60)[0]
+    return f"{round(hours)}h {round(minutes)}m"
+
+
+def _percentage(value) -> float:
+    """'1.5%' as 0.015, None when blank (sent to the browser as NaN is)"""
+
+    try:
+        return float(str(value).rstrip("%")) * 0.01
+    except ValueError:
+        return None
+
+
+def _color(value) -> str:
+    if isinstance(value, str) and "%" in value:
+        return NEGATIVE_COLOR if "-" in value else POSITIVE_COLOR
+    return None
+
+
+def getBotRow(pair: str, data: dict) -> dict:
+    """Dashboard table row of a bot, None until the bot has reported its status
+
+    Parameters
+    ----------
+    pair : str
+        market of the bot
+    data : dict
+        state of the bot
+    """
+
+    margincolor = _color(data.get("margin")) or _color(data.get("from_df_high"))
+    if margincolor is None:
+        return None
+
+    try:
+        row = {
+            "Uptime": getDateFromISO8601Str(data["botcontrol"]["started"]),
+            "Trading Pair": pair,
+            "Exchange": data["exchange"],
+            "Action": data["signal"],
+            "Current Price": data["price"],
+            "Margin": _percentage(data["margin"]),
+            "TSLT": str(data.get("trailingstoplosstriggered", "")),
+            "PVLT": str(data.get("preventlosstriggered", "")),
+            "From DF High": _percentage(data.get("from_df_high", "")),
+            "DF High": data.get("df_high", ""),
+            "Margincolor": margincolor,
+        }
+    except (KeyError, AttributeError, ValueError):
+        return None
+    for indicator in INDICATORS:
+        row[indicator] = str(data.get("indicators", {}).get(indicator, ""))
+
+    return row
+
+
+class DashboardFeed:
+    def __init__(self, store: StateStore, min_interval: float = 1.0) -> None:
+        """Dashboard feed object model
+
+        Keeps the table rows of the active bots, rebuilding only the rows of the bots
+        changed in the state store. Each client is sent the rows changed since
+        the version it last received, or every row when their order changed.
+
+        Parameters
+        ----------
+        store : StateStore
+            state store of the bots
+        min_interval : float
+            seconds before the state store is read again
+        """
+
+        self.store = store
+        self.min_interval = min_interval
+
+        # identifies this feed, a client's version is only valid with the same feed
+        self.feed_id = f"{os.getpid()}-{time.time()}"
+        self.version = 0
+
+        self._store_version = 0
+        self._started = {}
+        self._rows = {}
+        self._row_versions = {}
+        self._order = []
+        self._order_version = 0
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Rebuilds the rows of the bots changed since the last refresh"""
+
+        with self._lock:
+            now = time.time()
+            if now - self._refreshed < self.min_interval:
+                return
+            self._refreshed = now
+
+            self._store_version, changed, markets = self.store.getChanges(self._store_version)
+
+            rows = {}
+            for pair, data in changed.items():
+                botcontrol = data.get("botcontrol", {})
+                # only the active bots are shown
+                rows[pair] = getBotRow(pair, data) if botcontrol.get("status") == "active" else None
+                self._started[pair] = botcontrol.get("started")
+
+            # the uptime changes every minute without the bot writing
+            for pair, row in self._rows.items():
+                if pair not in rows and row is not None:
+                    uptime = getDateFromISO8601Str(self._started[pair])
+                    if uptime != row["Uptime"]:
+                        rows[pair] = dict(row, Uptime=uptime)
+
+            removed = [] if markets is None else set(self._rows).difference(markets)
+            rows = {
+                pair: row
+                for pair, row in rows.items()
+                if pair not in self._rows or row != self._rows[pair]
+            }
+            if len(rows) == 0 and len(removed) == 0:
+                return
+
+            self.version += 1
+            for pair in removed:
+                del self._rows[pair], self._row_versions[pair], self._started[pair]
+            for pair, row in rows.items():
+                self._rows[pair] = row
+                self._row_versions[pair] = self.version
+
+            order = sorted(
+                (pair for pair, row in self._rows.items() if row is not None),
+                key=lambda pair: (str(self._rows[pair]["Action"]), pair),
+            )
+            if order != self._order:
+                self._order = order
+                self._order_version = self.version
+
+    def getRows(self) -> list:
+        """Table rows of the bots, sorted by action"""
+
+        self.refresh()
+        with self._lock:
+            return [self._rows[pair] for pair in self._order]
+
+    def getDelta(self, client: dict) -> tuple:
+        """Changes since the version a client last received
+
+        Parameters
+        ----------
+        client : dict
+            {"feed": feed id, "version": version} last returned for the client, None for a new client
+
+        Returns
+        -------
+        tuple
+            (client, rows, changed rows by table index), rows is None unless every row is sent,
+            the changed rows are empty when nothing changed
+        """
+
+        self.refresh()
+        with self._lock:
+            state = {"feed": self.feed_id, "version": self.version}
+            if (
+                client is None
+                or client.get("feed") != self.feed_id
+                or client.get("version", 0) < self._order_version
+            ):
+                return (state, [self._rows[pair] for pair in self._order], {})
+
+            changed = {
+                index: self._rows[pair]
+                for index, pair in enumerate(self._order)
+                if self._row_versions[pair] > client["version"]
+            }
+            return (state, None, changed)
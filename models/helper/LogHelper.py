@@ -1,5 +1,7 @@
 import logging
 
+from models.helper.MetricsHelper import Metrics
+
 
 class Logger:
     logger = None
@@ -67,21 +69,26 @@ class Logger:
             cls.logger.addHandler(fileHandler)
 
     @classmethod
+    @Metrics.timed("logging")
     def debug(cls, str):
         cls.logger.debug(str)
 
     @classmethod
+    @Metrics.timed("logging")
     def info(cls, str):
         cls.logger.info(str)
 
     @classmethod
+    @Metrics.timed("logging")
     def warning(cls, str):
         cls.logger.warning(str)
 
     @classmethod
+    @Metrics.timed("logging")
     def error(cls, str):
         cls.logger.error(str)
 
     @classmethod
+    @Metrics.timed("logging")
     def critical(cls, str):
         cls.logger.critical(str)
@@ -0,0 +1,211 @@
+"""Latency metrics of the bot's stages and exchange API calls"""
+
+import json
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+# upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Latencies since the start, with the most recent ones kept for percentiles"""
+
+    def __init__(self, window: int = 1000) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def getSummary(self) -> dict:
+        """Count and total since the start, mean and percentiles of the recent latencies"""
+
+        recent = sorted(self.recent)
+        summary = {"count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6)}
+        if len(recent) > 0:
+            summary["mean"] = round(sum(recent) / len(recent), 6)
+            for percentile in (50, 95, 99):
+                index = min(len(recent) - 1, int(len(recent) * percentile / 100))
+                summary[f"p{percentile}"] = round(recent[index], 6)
+
+        return summary
+
+
+class Metrics:
+    window = 1000
+    log_interval = 0
+
+    histograms = {}
+    counters = {}
+    _lock = Lock()
+    _server = None
+    _next_summary = 0.0
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def configure(
+        cls, port: int = 0, log_interval: int = 0, host: str = "127.0.0.1", window: int = 1000
+    ) -> None:
+        """Set the metrics options, the HTTP endpoint is started once per process
+
+        Parameters
+        ----------
+        port : int
+            port of the HTTP endpoint serving /metrics and /metrics.json, 0 to disable it
+        log_interval : int
+            seconds between summaries passed to logSummary(), 0 to disable them
+        host : str
+            address the HTTP endpoint listens on
+        window : int
+            recent latencies kept per metric for the percentiles
+        """
+
+        with cls._lock:
+            cls.window = window
+            cls.log_interval = log_interval
+            cls._next_summary = time.time() + log_interval
+
+        if port > 0 and cls._server is None:
+            cls._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            Thread(target=cls._server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def observe(cls, name: str, seconds: float) -> None:
+        with cls._lock:
+            histogram = cls.histograms.get(name)
+            if histogram is None:
+                histogram = cls.histograms[name] = Histogram(cls.window)
+            histogram.observe(seconds)
+
+    @classmethod
+    def increment(cls, name: str, value: int = 1) -> None:
+        with cls._lock:
+            cls.counters[name] = cls.counters.get(name, 0) + value
+
+    @classmethod
+    @contextmanager
+    def timer(cls, name: str):
+        """Observes the time spent in the with block"""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.observe(name, time.perf_counter() - start)
+
+    @classmethod
+    def timed(cls, name: str):
+        """Decorator observing the time spent in each call of the function"""
+
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    cls.observe(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def getSummary(cls) -> dict:
+        with cls._lock:
+            return {
+                "latency": {name: histogram.getSummary() for name, histogram in sorted(cls.histograms.items())},
+                "counters": dict(sorted(cls.counters.items())),
+            }
+
+    @classmethod
+    def logSummary(cls, log) -> bool:
+        """Passes a line per metric to log when the log interval has passed
+
+        Parameters
+        ----------
+        log : function
+            called with each line, e.g. Logger.info
+        """
+
+        now = time.time()
+        with cls._lock:
+            if cls.log_interval <= 0 or now < cls._next_summary:
+                return False
+            cls._next_summary = now + cls.log_interval
+
+        summary = cls.getSummary()
+        for name, latency in summary["latency"].items():
+            log(
+                f"metrics {name}: count={latency['count']} mean={latency.get('mean', 0):.4f}s "
+                f"p95={latency.get('p95', 0):.4f}s max={latency['max']:.4f}s"
+            )
+        for name, value in summary["counters"].items():
+            log(f"metrics {name}: {value}")
+
+        return True
+
+    @classmethod
+    def toPrometheus(cls) -> str:
+        """Metrics in the Prometheus text format"""
+
+        lines = ["# TYPE pycryptobot_latency_seconds histogram"]
+        with cls._lock:
+            for name, histogram in sorted(cls.histograms.items()):
+                label = json.dumps(name)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), histogram.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'pycryptobot_latency_seconds_bucket{{name={label},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"pycryptobot_latency_seconds_sum{{name={label}}} {histogram.sum}")
+                lines.append(f"pycryptobot_latency_seconds_count{{name={label}}} {histogram.count}")
+
+            lines.append("# TYPE pycryptobot_events_total counter")
+            for name, value in sorted(cls.counters.items()):
+                lines.append(f"pycryptobot_events_total{{name={json.dumps(name)}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls.histograms = {}
+            cls.counters = {}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path == "/metrics":
+            body, content_type = Metrics.toPrometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(Metrics.getSummary()), "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
@@ -0,0 +1,227 @@
+"""Exchange rate limits shared by the bots running on one host"""
+
+import math
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+from threading import Lock
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows, limits are only shared between the threads of a process
+    fcntl = None
+
+# tokens, updated, window remaining, window end, blocked until
+STATE = struct.Struct("5d")
+
+# request weights of the Binance endpoints, others weigh 1
+BINANCE_WEIGHTS = {
+    "/api/v3/account": 10,
+    "/api/v3/allOrders": 10,
+    "/api/v3/exchangeInfo": 10,
+    "/api/v3/myTrades": 10,
+    "/api/v3/ticker/24hr": 40,
+}
+
+# budgets are kept a little under the exchange limits
+EXCHANGE_LIMITS = {
+    "binance": {
+        "limit": 1100,
+        "period": 60,
+        "weights": BINANCE_WEIGHTS,
+        "used_header": "X-MBX-USED-WEIGHT-1M",
+    },
+    "coinbasepro": {"limit": 9, "period": 1},
+    "kucoin": {
+        "limit": 27,
+        "period": 3,
+        "remaining_header": "gw-ratelimit-remaining",
+        "reset_header": "gw-ratelimit-reset",
+    },
+}
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        period: float,
+        weights: dict = None,
+        used_header: str = None,
+        remaining_header: str = None,
+        reset_header: str = None,
+        directory: str = None,
+    ) -> None:
+        """Token bucket rate limiter shared between processes
+
+        The bucket refills at limit / period weight per second. When the exchange
+        reports its own count (used or remaining weight headers) the limiter also
+        keeps within the exchange's window until it resets, and a 429 response
+        blocks every process until the exchange allows requests again.
+
+        Parameters
+        ----------
+        name : str
+            limiter name, processes using the same name and directory share the budget
+        limit : int
+            weight allowed per period
+        period : float
+            period in seconds
+        weights : dict
+            request weight of each URL path, others weigh 1
+        used_header : str
+            response header with the weight used in the current window (e.g. Binance)
+        remaining_header : str
+            response header with the weight remaining in the current window
+        reset_header : str
+            response header with the milliseconds until the window resets
+        directory : str
+            directory of the shared state file, default the system temporary directory
+        """
+
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+        self.weights = weights or {}
+        self.used_header = used_header
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self.path = os.path.join(
+            directory or tempfile.gettempdir(), f"pycryptobot-{name}.ratelimit"
+        )
+
+        self._lock = Lock()
+        self._fd = None
+        self._pid = None
+        self._state = None
+
+    @classmethod
+    def forExchange(cls, exchange: str, directory: str = None):
+        """Limiter with the budget of an exchange, None if it has none"""
+
+        if exchange not in EXCHANGE_LIMITS:
+            return None
+
+        return cls(exchange, directory=directory, **EXCHANGE_LIMITS[exchange])
+
+    def getWeight(self, url: str) -> int:
+        return self.weights.get(urlparse(url).path, 1)
+
+    def acquire(self, weight: int = 1) -> float:
+        """Wait until the request weight is available, returns the seconds waited"""
+
+        waited = 0.0
+        while True:
+            with self._shared() as state:
+                now = time.time()
+                tokens, remaining, window_end, blocked_until = self._refill(state, now)
+
+                # a request heavier than the bucket waits for a full bucket
+                needed = min(weight, self.limit)
+                if blocked_until > now:
+                    wait = blocked_until - now
+                elif tokens >= needed and remaining >= needed:
+                    state[:] = [tokens - weight, now, remaining - weight, window_end, blocked_until]
+                    return waited
+                else:
+                    wait = max(
+                        (needed - tokens) / self.rate,
+                        window_end - now if remaining < needed else 0,
+                    )
+
+                state[:] = [tokens, now, remaining, window_end, blocked_until]
+
+            time.sleep(wait)
+            waited += wait
+
+    def update(self, status_code: int, headers: dict) -> None:
+        """Synchronise with the limits reported in an exchange response"""
+
+        now = time.time()
+        remaining = None
+        if self.used_header is not None and self.used_header in headers:
+            remaining = self.limit - int(headers[self.used_header])
+        elif self.remaining_header is not None and self.remaining_header in headers:
+            remaining = int(headers[self.remaining_header])
+
+        reset = None
+        if self.reset_header is not None and self.reset_header in headers:
+            reset = now + int(headers[self.reset_header]) / 1000
+        elif remaining is not None:
+            # fixed windows, e.g. Binance counts weight per clock minute
+            reset = (math.floor(now / self.period) + 1) * self.period
+
+        if remaining is None and status_code not in [418, 429]:
+            return
+
+        with self._shared() as state:
+            if remaining is not None:
+                state[2] = remaining
+                state[3] = reset
+
+            if status_code in [418, 429]:
+                if "Retry-After" in headers:
+                    wait_until = now + float(headers["Retry-After"])
+                elif reset is not None:
+                    wait_until = reset
+                else:
+                    wait_until = now + self.period
+
+                state[0] = 0
+                state[1] = now
+                state[4] = max(state[4], wait_until)
+
+    def _refill(self, state: list, now: float) -> tuple:
+        tokens, updated, remaining, window_end, blocked_until = state
+        tokens = min(self.limit, tokens + (now - updated) * self.rate)
+
+        if now >= window_end:
+            # the exchange's window has reset or was never reported
+            remaining = self.limit
+            window_end = 0.0
+
+        return tokens, remaining, window_end, blocked_until
+
+    @contextmanager
+    def _shared(self):
+        """State of the limiter, locked and written back for all processes"""
+
+        with self._lock:
+            if fcntl is None:
+                if self._state is None:
+                    self._state = self._initialState()
+
+                yield self._state
+                return
+
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(fd, STATE.size, 0)
+                state = (
+                    list(STATE.unpack(data))
+                    if len(data) == STATE.size
+                    else self._initialState()
+                )
+
+                yield state
+
+                os.pwrite(fd, STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _open(self) -> int:
+        # locks are shared with a forked parent through the file, so reopen it
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+
+        return self._fd
+
+    def _initialState(self) -> list:
+        return [float(self.limit), time.time(), float(self.limit), 0.0, 0.0]
@@ -0,0 +1,148 @@
+"""Shared HTTP sessions for the exchange API clients"""
+
+import re
+import time
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from models.helper.MetricsHelper import Metrics
+from models.helper.RateLimitHelper import RateLimiter
+
+
+class ExchangeSession(requests.Session):
+    """Session applying a default timeout and the exchange's rate limit
+
+    The time of each request is observed per endpoint, including the retries and the
+    wait for the rate limit, as api.<exchange>.<method> <path>.
+    """
+
+    def __init__(self, timeout: float = None, limiter: RateLimiter = None, name: str = "api") -> None:
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = limiter
+        self.name = name
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+
+        start = time.perf_counter()
+        try:
+            if self.limiter is None:
+                resp = super().request(method, url, **kwargs)
+            else:
+                self.limiter.acquire(self.limiter.getWeight(url))
+                Metrics.observe(f"api.{self.name}.ratelimit", time.perf_counter() - start)
+                resp = super().request(method, url, **kwargs)
+                self.limiter.update(resp.status_code, resp.headers)
+        except requests.RequestException:
+            Metrics.increment(f"api.{self.name}.errors")
+            raise
+        finally:
+            Metrics.observe(f"api.{self.name}.{method.upper()} {_endpoint(url)}", time.perf_counter() - start)
+
+        # the retries urllib3 made before this response
+        history = getattr(getattr(resp.raw, "retries", None), "history", None)
+        if isinstance(history, tuple) and len(history) > 0:
+            Metrics.increment(f"api.{self.name}.retries", len(history))
+        if resp.status_code == 429:
+            Metrics.increment(f"api.{self.name}.ratelimited")
+
+        return resp
+
+
+def _endpoint(url: str) -> str:
+    """Path of a URL, with the markets and ids replaced so each endpoint is one metric"""
+
+    return "/".join(
+        segment if re.fullmatch(r"[A-Za-z_]*|v[0-9]+", segment) else "{id}"
+        for segment in urlparse(url).path.split("/")
+    )
+
+
+class SessionHelper:
+    pool_size = 10
+    timeout = 30
+    retries = 3
+    backoff = 0.5
+    rate_limit = True
+
+    sessions = {}
+    _lock = Lock()
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def configure(
+        cls,
+        pool_size: int = 10,
+        timeout: float = 30,
+        retries: int = 3,
+        backoff: float = 0.5,
+        rate_limit: bool = True,
+    ) -> None:
+        """Set the connection pool options, existing sessions are replaced
+
+        Parameters
+        ----------
+        pool_size : int
+            keep-alive connections kept per exchange host
+        timeout : float
+            seconds to wait for a connection or response
+        retries : int
+            retries of GET requests after connection errors or 5xx responses
+        backoff : float
+            backoff factor between retries, in seconds
+        rate_limit : bool
+            keep within the exchange's rate limit, shared by the bots on the host
+        """
+
+        with cls._lock:
+            cls.pool_size = pool_size
+            cls.timeout = timeout
+            cls.retries = retries
+            cls.backoff = backoff
+            cls.rate_limit = rate_limit
+
+            for session in cls.sessions.values():
+                session.close()
+            cls.sessions = {}
+
+    @classmethod
+    def getSession(cls, exchange: str) -> requests.Session:
+        """Connection pooled session shared by the API clients of an exchange"""
+
+        with cls._lock:
+            if exchange not in cls.sessions:
+                cls.sessions[exchange] = cls._createSession(exchange)
+
+            return cls.sessions[exchange]
+
+    @classmethod
+    def _createSession(cls, exchange: str) -> requests.Session:
+        retry = Retry(
+            total=cls.retries,
+            backoff_factor=cls.backoff,
+            status_forcelist=(500, 502, 503, 504),
+            # orders must never be placed twice
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=cls.pool_size,
+            pool_maxsize=cls.pool_size,
+            max_retries=retry,
+        )
+
+        session = ExchangeSession(
+            cls.timeout,
+            RateLimiter.forExchange(exchange) if cls.rate_limit else None,
+            exchange,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
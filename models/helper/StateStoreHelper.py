@@ -0,0 +1,331 @@
+"""Shared state of the bots, the telegram bot and the web gui"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from models.helper.LogHelper import Logger
+
+STATE_FILE = "state.db"
+
+# legacy files in telegram_data that are not bot state
+_NOT_BOT_FILES = ("data.json", "settings.json")
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS bots (
+        market TEXT PRIMARY KEY,
+        exchange TEXT,
+        status TEXT,
+        startmethod TEXT,
+        margin TEXT,
+        started REAL,
+        watchdog_ping REAL,
+        updated REAL NOT NULL,
+        version INTEGER NOT NULL,
+        data TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS bots_status ON bots (status, watchdog_ping, started)",
+    "CREATE INDEX IF NOT EXISTS bots_exchange ON bots (exchange, status)",
+    "CREATE INDEX IF NOT EXISTS bots_margin ON bots (margin)",
+    "CREATE INDEX IF NOT EXISTS bots_version ON bots (version)",
+    """CREATE TABLE IF NOT EXISTS shared (
+        name TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    )""",
+    # incremented by every change to the bots, see getChanges()
+    """CREATE TABLE IF NOT EXISTS versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO versions (name, version) VALUES ('bots', 0)",
+)
+
+
+class StateStore:
+    def __init__(self, folder: str = os.curdir) -> None:
+        """State store object model
+
+        The state of each bot and the shared data (closed trades, open orders,
+        scanner markets and exceptions) are kept in one SQLite database in WAL mode
+        in the telegram_data folder. Writers do not block readers, and every
+        read-modify-write is one transaction, so the bots, telegram_bot.py and
+        webgui.py can share it without retrying half written files.
+
+        Parameters
+        ----------
+        folder : str
+            folder holding the telegram_data folder
+        """
+
+        self.directory = os.path.join(folder, "telegram_data")
+        self.path = os.path.join(self.directory, STATE_FILE)
+        self._local = threading.local()
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+
+        created = not os.path.isfile(self.path)
+        with self._transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+        if created:
+            self._importFiles()
+
+    def getBot(self, market: str) -> dict:
+        """State of a bot, None if the bot is not running"""
+
+        row = self._connection().execute(
+            "SELECT data FROM bots WHERE market = ?", (market,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def putBot(self, market: str, data: dict) -> None:
+        """Replaces the state of a bot"""
+
+        with self._transaction() as conn:
+            self._putBot(conn, market, data)
+
+    def updateBot(self, market: str, update) -> dict:
+        """Changes the state of a bot in one transaction
+
+        Parameters
+        ----------
+        market : str
+            market of the bot
+        update : function
+            called with the current state, changes it in place, returns False to discard the changes
+        """
+
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM bots WHERE market = ?", (market,)).fetchone()
+            if row is None:
+                return None
+
+            data = json.loads(row[0])
+            if update(data) is not False:
+                self._putBot(conn, market, data)
+            return data
+
+    def deleteBot(self, market: str) -> None:
+        with self._transaction() as conn:
+            if conn.execute("DELETE FROM bots WHERE market = ?", (market,)).rowcount > 0:
+                self._nextVersion(conn)
+
+    def getBots(self, status: str = None, exchange: str = None, startmethod: str = None) -> list:
+        """Markets of the bots, optionally with a status, exchange and start method"""
+
+        return [market for market, _ in self._select(status, exchange, startmethod, False)]
+
+    def getBotsData(self, status: str = None, exchange: str = None) -> dict:
+        """State of the bots by market, optionally with a status and exchange"""
+
+        return {
+            market: json.loads(data) for market, data in self._select(status, exchange, None, True)
+        }
+
+    def getBotsWithOpenOrders(self) -> list:
+        """Markets of the bots in a trade, their margin is not blank"""
+
+        rows = self._connection().execute(
+            "SELECT market FROM bots WHERE margin IS NULL OR margin != ' ' ORDER BY market"
+        )
+        return [row[0] for row in rows]
+
+    def getHungBots(self, status: str = "active", ping_timeout: int = 600, start_timeout: int = 300) -> list:
+        """Markets of the bots not in a status, or without a watchdog ping in time"""
+
+        now = time.time()
+        rows = self._connection().execute(
+            """SELECT market FROM bots
+            WHERE status IS NULL OR status != ?
+            OR (watchdog_ping IS NOT NULL AND watchdog_ping <= ?)
+            OR (watchdog_ping IS NULL AND (started IS NULL OR started <= ?))
+            ORDER BY market""",
+            (status, now - ping_timeout, now - start_timeout),
+        )
+        return [row[0] for row in rows]
+
+    def getLastUpdated(self, market: str) -> datetime:
+        """When the state of a bot was last written, None if the bot is not running"""
+
+        row = self._connection().execute(
+            "SELECT updated FROM bots WHERE market = ?", (market,)
+        ).fetchone()
+        return None if row is None else datetime.fromtimestamp(row[0])
+
+    def getChanges(self, version: int = 0) -> tuple:
+        """Bots changed since a version
+
+        Parameters
+        ----------
+        version : int
+            version returned by the previous call, 0 for every bot
+
+        Returns
+        -------
+        tuple
+            (version, state of the bots changed by market, markets of all the bots),
+            the markets are None if nothing changed
+        """
+
+        conn = self._connection()
+        # one read transaction, the version and the bots are the same snapshot
+        conn.execute("BEGIN")
+        try:
+            current = conn.execute("SELECT version FROM versions WHERE name = 'bots'").fetchone()[0]
+            if current == version:
+                return (version, {}, None)
+
+            changed = {
+                market: json.loads(data)
+                for market, data in conn.execute(
+                    "SELECT market, data FROM bots WHERE version > ? ORDER BY market", (version,)
+                )
+            }
+            markets = [row[0] for row in conn.execute("SELECT market FROM bots ORDER BY market")]
+        finally:
+            conn.execute("COMMIT")
+
+        return (current, changed, markets)
+
+    def getShared(self, name: str = "data") -> dict:
+        """Shared data, None if it has not been written"""
+
+        row = self._connection().execute(
+            "SELECT data FROM shared WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def putShared(self, data: dict, name: str = "data") -> None:
+        with self._transaction() as conn:
+            self._putShared(conn, name, data)
+
+    def updateShared(self, update, name: str = "data") -> dict:
+        """Changes the shared data in one transaction, see updateBot()"""
+
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM shared WHERE name = ?", (name,)).fetchone()
+            data = {} if row is None else json.loads(row[0])
+            if update(data) is not False:
+                self._putShared(conn, name, data)
+            return data
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _select(self, status: str, exchange: str, startmethod: str, with_data: bool):
+        conditions = []
+        parameters = []
+        for column, value in (("status", status), ("exchange", exchange), ("startmethod", startmethod)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+
+        where = f" WHERE {' AND '.join(conditions)}" if len(conditions) > 0 else ""
+        columns = "market, data" if with_data else "market, NULL"
+        return self._connection().execute(
+            f"SELECT {columns} FROM bots{where} ORDER BY market", parameters
+        ).fetchall()
+
+    @staticmethod
+    def _putBot(conn, market: str, data: dict) -> None:
+        botcontrol = data.get("botcontrol", {})
+        conn.execute(
+            """INSERT OR REPLACE INTO bots
+            (market, exchange, status, startmethod, margin, started, watchdog_ping, updated, version, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                market,
+                data.get("exchange"),
+                botcontrol.get("status"),
+                botcontrol.get("startmethod"),
+                data.get("margin"),
+                _timestamp(botcontrol.get("started")),
+                _timestamp(botcontrol.get("watchdog_ping")),
+                time.time(),
+                StateStore._nextVersion(conn),
+                json.dumps(data),
+            ),
+        )
+
+    @staticmethod
+    def _nextVersion(conn) -> int:
+        """Increments the version of the bots, within the write transaction"""
+
+        conn.execute("UPDATE versions SET version = version + 1 WHERE name = 'bots'")
+        return conn.execute("SELECT version FROM versions WHERE name = 'bots'").fetchone()[0]
+
+    @staticmethod
+    def _putShared(conn, name: str, data: dict) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO shared (name, data) VALUES (?, ?)",
+            (name, json.dumps(data)),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread, reopened after a fork"""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _importFiles(self) -> None:
+        """Imports the JSON files written before the store existed"""
+
+        with self._transaction() as conn:
+            for file in sorted(os.listdir(self.directory)):
+                if not file.endswith(".json") or file.endswith("output.json"):
+                    continue
+
+                try:
+                    with open(os.path.join(self.directory, file), "r", encoding="utf8") as json_file:
+                        data = json.load(json_file)
+                except (OSError, ValueError) as err:
+                    Logger.warning(f"Unable to import {file}: {err}")
+                    continue
+
+                if file == "data.json":
+                    self._putShared(conn, "data", data)
+                elif file not in _NOT_BOT_FILES:
+                    self._putBot(conn, file[: -len(".json")], data)
+
+
+class _Transaction:
+    """Immediate transaction, the write lock is taken before reading"""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds of an ISO 8601 date, None if it is not one"""
+
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
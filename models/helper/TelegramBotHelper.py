@@ -1,12 +1,11 @@
-from json.decoder import JSONDecodeError
 import os
-import json
-from time import sleep
 from datetime import datetime
 
 from pandas.core.frame import DataFrame
 from models.PyCryptoBot import PyCryptoBot
 from models.helper.LogHelper import Logger
+from models.helper.MetricsHelper import Metrics
+from models.helper.StateStoreHelper import StateStore
 
 
 class TelegramBotHelper:
@@ -20,56 +19,27 @@ class TelegramBotHelper:
             self.app.telegramdatafolder, self.botfolder, self.market
         )
         self.filename = self.market + ".json"
+        self.data = {}
+        self._pending = {}
 
         if not self.app.isSimulation() and self.app.enableTelegramBotControl() and not scanner:
             if not os.path.exists(self.botfolder):
                 os.makedirs(self.botfolder)
 
-            self.data = {}
-
-            if not os.path.exists(
-                os.path.join(self.app.telegramdatafolder, "telegram_data")
-            ):
-                os.mkdir(os.path.join(self.app.telegramdatafolder, "telegram_data"))
-
-            if os.path.isfile(
-                os.path.join(
-                    self.app.telegramdatafolder, "telegram_data", self.filename
-                )
-            ):
-                if not self._read_data():
-                    self.create_bot_data()
-            else:
+            self.store = StateStore(self.app.telegramdatafolder)
+            self.data = self.store.getBot(self.market)
+            if self.data is None:
                 self.create_bot_data()
 
-            if os.path.isfile(
-                os.path.join(self.app.telegramdatafolder, "telegram_data", "data.json")
-            ):
-
-                write_ok, try_count = False, 0
-                while not write_ok and try_count <= 5:
-                    try_count += 1
-                    self._read_data("data.json")
-                    write_ok = True
-                    if "markets" not in self.data:
-                        self.data.update({"markets": {}})
-                        write_ok = self._write_data("data.json")
-                    if "scannerexceptions" not in self.data:
-                        self.data.update({"scannerexceptions": {}})
-                        write_ok = self._write_data("data.json")
-                    if "opentrades" not in self.data:
-                        self.data.update({"opentrades": {}})
-                        write_ok = self._write_data("data.json")
-            else:
-                write_ok, try_count = False, 0
-                while not write_ok and try_count <= 5:
-                    try_count += 1
-                    ds = {"trades": {}, "markets": {}, "scannerexceptions": {}, "opentrades": {}}
-                    self.data = ds
-                    write_ok = self._write_data("data.json")
+            def addSections(data):
+                for section in ("trades", "markets", "scannerexceptions", "opentrades"):
+                    if section not in data:
+                        data.update({section: {}})
+
+            self.store.updateShared(addSections)
 
     def create_bot_data(self):
-        """ Create pair.json file """
+        """ Create the bot's state """
         ds = {
                 "botcontrol": {
                     "status": "active",
@@ -89,78 +59,73 @@ class TelegramBotHelper:
                 "change_pcnt_high" : 0.0
             }
         self.data = ds
-        self._write_data()
-
-    def _read_data(self, name: str = "") -> bool:
-        file = self.filename if name == "" else name
-
-        read_ok, try_count = False, 0
-        while not read_ok and try_count <= 5:
-            try_count += 1
-            try:
-                with open(
-                    os.path.join(self.app.telegramdatafolder, "telegram_data", file),
-                    "r",
-                    encoding="utf8",
-                ) as json_file:
-                    self.data = json.load(json_file)
-                read_ok = True
-            except FileNotFoundError:
-                Logger.warning("File Not Found:  Recreating File..")
+        self._pending = {}
+        self.store.putBot(self.market, self.data)
+
+    def _update(self, changes: dict) -> None:
+        """Changes the bot's state, written by the next flush()"""
+        self.data.update(changes)
+        self._pending.update(changes)
+
+    @Metrics.timed("job.telegram")
+    def flush(self) -> None:
+        """Writes the changes of this iteration in one transaction"""
+        if not self.app.isSimulation() and self.app.enableTelegramBotControl():
+            pending, self._pending = self._pending, {}
+            botcontrol = self.data["botcontrol"] if "botcontrol" in self.data else {}
+
+            def apply(data):
+                data.update(pending)
+                # the telegram bot owns the rest of botcontrol
+                if "watchdog_ping" in botcontrol and "botcontrol" in data:
+                    data["botcontrol"]["watchdog_ping"] = botcontrol["watchdog_ping"]
+
+            data = self.store.updateBot(self.market, apply)
+            if data is None:
+                Logger.warning("Bot state not found:  Recreating..")
                 self.create_bot_data()
-            except JSONDecodeError:
-                if len(self.data) > 0:
-                    Logger.warning("JSON Decode Error: Recreating File..")
-                    if name == "":
-                        self._write_data()
-                else:
-                    Logger.warning("JSON Decode Error: Removing File..")
-                    if name == "":
-                        self.removeactivebot()
-        return read_ok
-
-    def _write_data(self, name: str = "") -> bool:
-        file = self.filename if name == "" else name
-        try:
-            with open(
-                os.path.join(self.app.telegramdatafolder, "telegram_data", file),
-                "w",
-                encoding="utf8",
-            ) as outfile:
-                json.dump(self.data, outfile, indent=4)
-            return True
-        except JSONDecodeError as err:
-            Logger.critical(str(err))
-            return False
+                self._update(pending)
+                data = self.store.updateBot(self.market, apply)
+
+            self.data = data
+
+    def _refresh(self) -> bool:
+        """Reads the bot's control settings, changed by the telegram bot"""
+        data = self.store.getBot(self.market)
+        if data is None:
+            Logger.warning("Bot state not found:  Recreating..")
+            self.create_bot_data()
+        elif "botcontrol" in data:
+            self.data["botcontrol"] = data["botcontrol"]
+        return True
 
     def addmargin(self, margin: str = "", delta: str = "", price: str = "", change_pcnt_high: float = 0.0, signal = "WAIT"):
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data():
-                addmarket = {
-                    "exchange": self.exchange.value,
-                    "signal": signal,
-                    "margin": margin,
-                    "delta": delta,
-                    "price": price,
-                    "df_high": " ",
-                    "from_df_high": " ",
-                    "trailingstoplosstriggered" : float(margin.replace("%", "")) > self.app.trailingStopLossTrigger() if "trailingstoplosstriggered" in self.data and self.data['trailingstoplosstriggered'] == False else True,
-                    "change_pcnt_high" : change_pcnt_high if "trailingstoplosstriggered" in self.data and self.data['trailingstoplosstriggered'] == True else 0.0,
-                    # "change_pcnt_low" : change_pcnt_high if "preventlosstriggered" in self.data and self.data['preventlosstriggered'] == True else 0.0
-                }
-                
-                if self.app.preventLoss():
-                    self.data.update({"preventlosstriggered" : float(margin.replace("%", "")) > self.app.preventLossTrigger() if "preventlosstriggered" in self.data and self.data['preventlosstriggered'] == False else True})
-
-                self.data.update(addmarket)
-                self._write_data()
+            addmarket = {
+                "exchange": self.exchange.value,
+                "signal": signal,
+                "margin": margin,
+                "delta": delta,
+                "price": price,
+                "df_high": " ",
+                "from_df_high": " ",
+                "trailingstoplosstriggered" : float(margin.replace("%", "")) > self.app.trailingStopLossTrigger() if "trailingstoplosstriggered" in self.data and self.data['trailingstoplosstriggered'] == False else True,
+                "change_pcnt_high" : change_pcnt_high if "trailingstoplosstriggered" in self.data and self.data['trailingstoplosstriggered'] == True else 0.0,
+                # "change_pcnt_low" : change_pcnt_high if "preventlosstriggered" in self.data and self.data['preventlosstriggered'] == True else 0.0
+            }
+
+            if self.app.preventLoss():
+                self._update({"preventlosstriggered" : float(margin.replace("%", "")) > self.app.preventLossTrigger() if "preventlosstriggered" in self.data and self.data['preventlosstriggered'] == False else True})
+
+            self._update(addmarket)
 
     def updatewatchdogping(self):
+        """Updates the watchdog ping and writes the changes of this iteration"""
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data() and "botcontrol" in self.data:
+            if "botcontrol" in self.data:
                 self.data["botcontrol"]["watchdog_ping"] =  datetime.now().isoformat()
-                self._write_data()
-    
+            self.flush()
+
     def addinfo(
         self,
         message: str = "",
@@ -170,87 +135,86 @@ class TelegramBotHelper:
         signal ="WAIT"
     ) -> None:
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data():
-                addmarket = {
-                    "signal": signal,
-                    "message": message,
-                    "margin": " ",
-                    "delta": " ",
-                    "price": price,
-                    "exchange": self.exchange.value,
-                    "df_high": df_high,
-                    "from_df_high": from_df_high,
-                }
-                self.data.update(addmarket)
-                self._write_data()
+            addmarket = {
+                "signal": signal,
+                "message": message,
+                "margin": " ",
+                "delta": " ",
+                "price": price,
+                "exchange": self.exchange.value,
+                "df_high": df_high,
+                "from_df_high": from_df_high,
+            }
+            self._update(addmarket)
 
     def addindicators(self, indicator, state) -> None:
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data():
-                if not "indicators" in self.data:
-                    self.data.update({"indicators": {}})
-
-                self.data["indicators"].update({indicator: state})
-                self._write_data()
+            indicators = dict(self.data["indicators"]) if "indicators" in self.data else {}
+            indicators.update({indicator: state})
+            self._update({"indicators": indicators})
 
     def deletemargin(self):
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            try:
-                os.remove(
-                    os.path.join(
-                        self.app.telegramdatafolder, "telegram_data", self.filename
-                    )
-                )
-            except FileNotFoundError:
-                pass
+            self.store.deleteBot(self.market)
 
+    @Metrics.timed("job.telegram")
     def closetrade(self, ts, price, margin):
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            write_ok, try_count = False, 0
-            while not write_ok and try_count <= 5:
-                try_count += 1
-                self._read_data("data.json")
-                self.data["trades"].update(
+            def addTrade(data):
+                if "trades" not in data:
+                    data.update({"trades": {}})
+                data["trades"].update(
                     {ts: {"pair": self.market, "price": price, "margin": margin}}
                 )
-                write_ok = self._write_data("data.json")
-                if not write_ok:
-                    sleep(1)
-                    continue
-                self.remove_open_order()
 
+            self.store.updateShared(addTrade)
+            self.remove_open_order()
+
+    @Metrics.timed("job.telegram")
     def checkmanualbuysell(self) -> str:
         result = "WAIT"
 
-        if self._read_data() and "botcontrol" in self.data:
-            if len(self.data["botcontrol"]) > 0:
-                if self.data["botcontrol"]["manualsell"]:
-                    self.data["botcontrol"]["manualsell"] = False
+        if not self.app.isSimulation() and self.app.enableTelegramBotControl():
+            def takeManualOrder(data):
+                nonlocal result
+                if "botcontrol" not in data or len(data["botcontrol"]) == 0:
+                    return False
+
+                if data["botcontrol"]["manualsell"]:
+                    data["botcontrol"]["manualsell"] = False
                     result = "SELL"
-                    self._write_data()
 
-            if len(self.data["botcontrol"]) > 0:
-                if self.data["botcontrol"]["manualbuy"]:
-                    self.data["botcontrol"]["manualbuy"] = False
+                if data["botcontrol"]["manualbuy"]:
+                    data["botcontrol"]["manualbuy"] = False
                     result = "BUY"
-                    self._write_data()
+
+                return result != "WAIT"
+
+            data = self.store.updateBot(self.market, takeManualOrder)
+            if data is not None and "botcontrol" in data:
+                self.data["botcontrol"] = data["botcontrol"]
 
         return result
 
+    @Metrics.timed("job.telegram")
     def checkbotcontrolstatus(self) -> str:
         result = "active"
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data() and "botcontrol" in self.data:
+            if self._refresh() and "botcontrol" in self.data:
                 result = self.data["botcontrol"]["status"]
 
         return result
 
     def updatebotstatus(self, status) -> None:
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            if self._read_data() and "botcontrol" in self.data:
-                if not self.data["botcontrol"]["status"] == status:
-                    self.data["botcontrol"]["status"] = status
-                    self._write_data()
+            def setStatus(data):
+                if "botcontrol" not in data or data["botcontrol"]["status"] == status:
+                    return False
+                data["botcontrol"]["status"] = status
+
+            data = self.store.updateBot(self.market, setStatus)
+            if data is not None and "botcontrol" in data:
+                self.data["botcontrol"] = data["botcontrol"]
 
     def removeactivebot(self) -> None:
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
@@ -289,32 +253,25 @@ class TelegramBotHelper:
             orient="index",
         )
 
+    @Metrics.timed("job.telegram")
     def add_open_order(self):
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            write_ok, try_count = False, 0
-            while not write_ok and try_count <= 5:
-                try_count += 1
-                self._read_data("data.json")
-                if self.market in self.data["opentrades"]:
-                    if self.exchange != self.data["opentrades"][self.market]:
-                        return
-                self.data["opentrades"].update({self.market : {"exchange": self.exchange.value}})
-                write_ok = self._write_data("data.json")
-                if not write_ok:
-                    sleep(1)
+            def addOpenOrder(data):
+                if "opentrades" not in data:
+                    data.update({"opentrades": {}})
+                if self.market in data["opentrades"]:
+                    if self.exchange != data["opentrades"][self.market]:
+                        return False
+                data["opentrades"].update({self.market : {"exchange": self.exchange.value}})
 
+            self.store.updateShared(addOpenOrder)
+
+    @Metrics.timed("job.telegram")
     def remove_open_order(self):
         if not self.app.isSimulation() and self.app.enableTelegramBotControl():
-            write_ok, try_count = False, 0
-            while not write_ok and try_count <= 5:
-                try_count += 1
-                self._read_data("data.json")
-
-                if self.market not in self.data["opentrades"]:
-                    return
-
-                self.data["opentrades"].pop(self.market)
-                write_ok = self._write_data("data.json")
-                if not write_ok:
-                    sleep(1)
+            def removeOpenOrder(data):
+                if "opentrades" not in data or self.market not in data["opentrades"]:
+                    return False
+                data["opentrades"].pop(self.market)
 
+            self.store.updateShared(removeOpenOrder)
@@ -216,13 +216,7 @@ class TelegramActions:
                 output + f"\U0001F4C8 <b>{file} ({self.helper.data['exchange']})</b> "
             )
 
-            last_modified = datetime.now() - datetime.fromtimestamp(
-                os.path.getmtime(
-                    os.path.join(
-                        self.helper.datafolder, "telegram_data", f"{file}.json"
-                    )
-                )
-            )
+            last_modified = datetime.now() - self.helper.get_last_modified(file)
             icon = "\U0001F6D1"  # red dot
             if last_modified.seconds > 90 and last_modified.seconds != 86399:
                 output = f"{output} {icon} <b>Status</b>: <i>defaulted</i>"
@@ -418,9 +412,7 @@ class TelegramActions:
             ex = self.helper.get_running_bot_exchange(file)
             self.helper.stop_running_bot(file, "exit", True)
             sleep(3)
-            os.remove(
-                os.path.join(self.helper.datafolder, "telegram_data", f"{file}.json")
-            )
+            self.helper.remove_bot_data(file)
             sleep(1)
 
             if bool(self.helper.settings["notifications"]["enable_screener"]):
@@ -5,9 +5,6 @@ import subprocess
 import json
 import logging
 
-# from time import sleep
-from json.decoder import JSONDecodeError
-
 # from time import sleep
 from datetime import datetime
 from typing import List
@@ -16,6 +13,8 @@ import telegram
 from telegram.ext import Updater
 from telegram.ext.callbackcontext import CallbackContext
 
+from models.helper.StateStoreHelper import StateStore
+
 if not os.path.exists(os.path.join(os.curdir, "telegram_logs")):
     os.mkdir(os.path.join(os.curdir, "telegram_logs"))
 
@@ -41,6 +40,7 @@ class TelegramHelper:
         self.config_file = configfile
         self.screener = {}
         self.settings = {}
+        self._state_store = None
 
         logging.basicConfig(
         filename=os.path.join(
@@ -246,47 +246,58 @@ class TelegramHelper:
                 parse_mode="HTML",
             )
 
+    def get_state_store(self) -> StateStore:
+        """State store of the bots in the data folder"""
+        directory = os.path.join(self.datafolder, "telegram_data")
+        if self._state_store is None or self._state_store.directory != directory:
+            self._state_store = StateStore(self.datafolder)
+        return self._state_store
+
     def read_data(self, name: str = "data.json") -> bool:
-        """Read data from json file"""
-        fname = name if name.__contains__(".json") else f"{name}.json"
+        """Read the shared data (data.json) or a bot's state"""
+        fname = name.replace(".json", "")
         # self.logger.debug("METHOD(read_data) - DATA(%s)", fname)
-        read_ok, try_count = False, 0
-        while not read_ok and try_count <= 20:
-            try_count += 1
-            try:
-                self.data = {}
-                with open(
-                    os.path.join(self.datafolder, "telegram_data", fname),
-                    "r",
-                    encoding="utf8",
-                ) as json_file:
-                    self.data = json.load(json_file)
-                read_ok = True
-            except FileNotFoundError:
-                if try_count == 20:
-                    self.logger.error("File Not Found {%s}", fname)
-            except JSONDecodeError:
-                if try_count == 20:
-                    self.logger.error("Unable to read file {%s}", fname)
-
-        return read_ok
-
-    def write_data(self, name: str = "data.json") -> None:
-        """Write data to json file"""
-        fname = name if name.__contains__(".json") else f"{name}.json"
-        self.logger.debug("METHOD(write_data) - DATA(%s)", fname)
-        try:
-            with open(
-                os.path.join(self.datafolder, "telegram_data", fname),
-                "w",
-                encoding="utf8",
-            ) as outfile:
-                json.dump(self.data, outfile, indent=4)
-                return True
-        except JSONDecodeError as err:
-            self.logger.error(err)
+        if fname == "data":
+            data = self.get_state_store().getShared()
+        else:
+            data = self.get_state_store().getBot(fname)
+
+        if data is None:
+            self.data = {}
+            self.logger.error("Data Not Found {%s}", fname)
             return False
 
+        self.data = data
+        return True
+
+    def write_data(self, name: str = "data.json") -> bool:
+        """Write the shared data (data.json) or the control settings of a bot"""
+        fname = name.replace(".json", "")
+        self.logger.debug("METHOD(write_data) - DATA(%s)", fname)
+        if fname == "data":
+            self.get_state_store().putShared(self.data)
+            return True
+
+        # the rest of the state is written by the bot
+        botcontrol = self.data["botcontrol"] if "botcontrol" in self.data else None
+
+        def set_bot_control(data):
+            if botcontrol is None:
+                return False
+            data["botcontrol"] = botcontrol
+
+        return self.get_state_store().updateBot(fname, set_bot_control) is not None
+
+    def remove_bot_data(self, pair) -> None:
+        """Remove a bot's state"""
+        self.logger.debug("METHOD(remove_bot_data) - DATA(%s)", pair)
+        self.get_state_store().deleteBot(pair)
+
+    def get_last_modified(self, pair) -> datetime:
+        """When a bot's state was last written"""
+        last_updated = self.get_state_store().getLastUpdated(pair)
+        return datetime.now() if last_updated is None else last_updated
+
     def read_config(self):
         """Read config file"""
         self.logger.debug("METHOD(read_config)")
@@ -339,161 +350,45 @@ class TelegramHelper:
             return
 
     def get_all_bot_list(self) -> List[str]:
-        """Return ALL contents of telegram_data folder"""
+        """Return ALL bots in the state store"""
         self.logger.debug("METHOD(get_all_bot_list)")
-        jsonfiles = sorted(os.listdir(os.path.join(self.datafolder, "telegram_data")))
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            if (
-                jsonfiles[i] == "data.json"
-                or jsonfiles[i].__contains__("output.json")
-                or jsonfiles[i].__contains__(".csv")
-                or jsonfiles[i] == "settings.json"
-            ):
-                jsonfiles.pop(i)
-            else:
-                read_ok = self.read_data(jsonfiles[i])
-                if not read_ok:
-                    jsonfiles.pop(i)
-            i -= 1
-        jsonfiles.sort()
-        return [
-            x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles
-        ]
+        return self.get_state_store().getBots()
 
     def get_active_bot_list(self, state: str = "active") -> List[str]:
-        """Return contents of telegram_data folder"""
+        """Return bots with a status"""
         self.logger.debug("METHOD(get_active_bot_list) - DATA(%s)", state)
-        jsonfiles = self.get_all_bot_list()
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            read_ok = self.read_data(jsonfiles[i])
-            if not read_ok:
-                jsonfiles.pop(i)
-                i -= 1
-                continue
-            if "botcontrol" in self.data:
-                if not self.data["botcontrol"]["status"] == state:
-                    jsonfiles.pop(i)
-            i -= 1
-        jsonfiles.sort()
-        return [
-            x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles
-        ]
+        return self.get_state_store().getBots(status=state)
 
     def get_active_bot_list_with_open_orders(self, state: str = "active") -> List[str]:
-        """Return contents of telegram_data folder active bots with an open order"""
+        """Return bots with an open order"""
         self.logger.debug(
             "METHOD(get_active_bot_list_with_open_orders) - DATA(%s)", state
         )
-        jsonfiles = self.get_all_bot_list()
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            read_ok = self.read_data(jsonfiles[i])
-            if not read_ok:
-                jsonfiles.pop(i)
-                i -= 1
-                continue
-            if "botcontrol" in self.data:
-                if self.data["margin"] == " ":
-                    jsonfiles.pop(i)
-            i -= 1
-        jsonfiles.sort()
-        return [
-            x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles
-        ]
+        return self.get_state_store().getBotsWithOpenOrders()
 
     def get_hung_bot_list(self, state: str = "active") -> List[str]:
-        """Return contents of telegram_data folder - working out which are hung bots"""
+        """Return hung bots, not in the state or without a recent watchdog ping"""
         self.logger.debug("METHOD(get_hung_bot_list) - DATA(%s)", state)
-        jsonfiles = self.get_all_bot_list()
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            read_ok = self.read_data(jsonfiles[i])
-            if not read_ok:
-                jsonfiles.pop(i)
-                i -= 1
-                continue
-            elif "botcontrol" in self.data:
-                if "watchdog_ping" in self.data["botcontrol"]:
-                    last_ping = datetime.strptime(
-                        self.data["botcontrol"]["watchdog_ping"], "%Y-%m-%dT%H:%M:%S.%f"
-                    )
-                    current_dt = datetime.now()
-                    ping_delta = int((current_dt - last_ping).total_seconds())
-                    if self.data["botcontrol"]["status"] == state and ping_delta < 600:
-                        jsonfiles.pop(i)
-                else:
-                    start_time = datetime.strptime(
-                        self.data["botcontrol"]["started"], "%Y-%m-%dT%H:%M:%S.%f"
-                    )
-                    current_dt = datetime.now()
-                    start_delta = int((current_dt - start_time).total_seconds())
-                    if self.data["botcontrol"]["status"] == state and start_delta < 300:
-                        jsonfiles.pop(i)
-            i -= 1
-        jsonfiles.sort()
-        return [
-            x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles
-        ]
+        return self.get_state_store().getHungBots(state)
 
     def get_manual_started_bot_list(self, startMethod: str = "telegram") -> List[str]:
-        """Return contents of telegram_data folder"""
+        """Return bots started with a start method"""
         self.logger.debug("METHOD(get_manual_started_bot_list) - DATA(%s)", startMethod)
-        jsonfiles = self.get_all_bot_list()
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            read_ok = self.read_data(jsonfiles[i])
-            if not read_ok:
-                jsonfiles.pop(i)
-                i -= 1
-                continue
-            if "botcontrol" in self.data:
-                if not self.data["botcontrol"]["startmethod"] == startMethod:
-                    jsonfiles.pop(i)
-            i -= 1
-        jsonfiles.sort()
-        return [
-            x.replace(".json", "") if x.__contains__(".json") else x for x in jsonfiles
-        ]
+        return self.get_state_store().getBots(startmethod=startMethod)
 
     def get_exchange_bot_ruuning_count(self, exchange):
-        """Return contents of telegram_data folder"""
+        """Return the number of bots on an exchange"""
         self.logger.debug("METHOD(get_exchange_bot_ruuning_count) - DATA(%s)", exchange)
-        jsonfiles = self.get_all_bot_list()
-
-        i = len(jsonfiles) - 1
-        while i >= 0:
-            read_ok = self.read_data(jsonfiles[i])
-            if not read_ok:
-                jsonfiles.pop(i)
-                i -= 1
-                continue
-            if "exchange" in self.data:
-                if not self.data["exchange"] == exchange:
-                    jsonfiles.pop(i)
-            i -= 1
-        # jsonfiles.sort()
-        # jsonfiles.count()
+        count = len(self.get_state_store().getBots(exchange=exchange))
         self.logger.debug(
-            "METHOD(get_exchange_bot_ruuning_count) - RETURN(%s)", len(jsonfiles)
+            "METHOD(get_exchange_bot_ruuning_count) - RETURN(%s)", count
         )
-        return len(jsonfiles)
+        return count
 
     def is_bot_running(self, pair) -> bool:
-        """Check is bot running (pair.json file exists)"""
+        """Check is bot running (has a state)"""
         self.logger.debug("METHOD(is_bot_running) - DATA(%s)", pair)
-        if os.path.isfile(
-            os.path.join(self.datafolder, "telegram_data", f"{pair}.json")
-        ):
-            return True
-
-        return False
+        return self.get_state_store().getBot(pair) is not None
 
     def get_running_bot_exchange(self, pair) -> str:
         """Get bots exchange"""
@@ -552,17 +447,21 @@ class TelegramHelper:
         return True
 
     def update_bot_control(self, pair, status) -> bool:
-        """used to update bot json files for controlling state"""
+        """used to update bot state for controlling state"""
         self.logger.debug("METHOD(update_bot_control) - DATA(%s, %s)", pair, status)
-        read_ok = self.read_data(pair)
-        if not read_ok:
-            self.logger.warning("update_bot_control for %s unable to read file", pair)
-        elif "botcontrol" in self.data:
-            self.data["botcontrol"]["status"] = status
-            self.write_data(pair)
-            return True
 
-        return False
+        def set_status(data):
+            if "botcontrol" not in data:
+                return False
+            data["botcontrol"]["status"] = status
+
+        data = self.get_state_store().updateBot(pair, set_status)
+        if data is None:
+            self.logger.warning("update_bot_control for %s unable to read state", pair)
+            return False
+
+        self.data = data
+        return "botcontrol" in data
 
     def stop_running_bot(self, pair, state, is_open: bool = False) -> bool:
         """Stop current running bots"""
@@ -582,7 +481,7 @@ class TelegramHelper:
         return json.dumps({"c": callback_tag, "e": exchange, "p": parameter})
 
     def clean_data_folder(self):
-        """ check market files in data folder """
+        """ check bot states in data folder """
         self.logger.debug("cleandata started")
         jsonfiles = self.get_active_bot_list()
         for i in range(len(jsonfiles), 0, -1):
@@ -592,20 +491,10 @@ class TelegramHelper:
 
             self.read_data(jfile)
 
-            last_modified = datetime.now() - datetime.fromtimestamp(
-                os.path.getmtime(
-                    os.path.join(
-                        self.datafolder, "telegram_data", f"{jfile}.json"
-                    )
-                )
-            )
+            last_modified = datetime.now() - self.get_last_modified(jfile)
             if "margin" not in self.data:
                 self.logger.info("deleting %s", jfile)
-                os.remove(
-                    os.path.join(
-                        self.datafolder, "telegram_data", f"{jfile}.json"
-                    )
-                )
+                self.remove_bot_data(jfile)
                 continue
             if (
                 self.data["botcontrol"]["status"] == "active"
@@ -613,11 +502,7 @@ class TelegramHelper:
                 and (last_modified.seconds != 86399 and last_modified.days != -1)
             ):
                 self.logger.info("deleting %s %s", jfile, str(last_modified))
-                os.remove(
-                    os.path.join(
-                        self.datafolder, "telegram_data", f"{jfile}.json"
-                    )
-                )
+                self.remove_bot_data(jfile)
                 continue
             elif (
                 self.data["botcontrol"]["status"] == "exit"
@@ -627,9 +512,5 @@ class TelegramHelper:
                 self.logger.info(
                     "deleting %s %s", jfile, str(last_modified.seconds)
                 )
-                os.remove(
-                    os.path.join(
-                        self.datafolder, "telegram_data", f"{jfile}.json"
-                    )
-                )
+                self.remove_bot_data(jfile)
         self.logger.debug("cleandata complete")
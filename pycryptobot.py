@@ -6,7 +6,6 @@
 import functools
 import json
 import os
-import sched
 import signal
 import sys
 import time
@@ -15,23 +14,22 @@ from datetime import datetime, timedelta
 import pandas as pd
 
 from models.AppState import AppState
-from models.chat import telegram
-from models.exchange.binance import WebSocketClient as BWebSocketClient
-from models.exchange.coinbase_pro import WebSocketClient as CWebSocketClient
+from models.Backtest import Backtest
 from models.exchange.ExchangesEnum import Exchange
 from models.exchange.Granularity import Granularity
-from models.exchange.kucoin import WebSocketClient as KWebSocketClient
 from models.helper.LogHelper import Logger
 from models.helper.MarginHelper import calculate_margin
+from models.helper.MetricsHelper import Metrics
 from models.helper.TelegramBotHelper import TelegramBotHelper
 from models.helper.TextBoxHelper import TextBox
+from models.EventScheduler import EventScheduler
+from models.MarketScheduler import MarketScheduler
 from models.PyCryptoBot import PyCryptoBot
 from models.PyCryptoBot import truncate as _truncate
 from models.Stats import Stats
 from models.Strategy import Strategy
 from models.Trading import TechnicalAnalysis
 from models.TradingAccount import TradingAccount
-from views.TradingGraphs import TradingGraphs
 
 # minimal traceback
 sys.tracebacklimit = 1
@@ -45,7 +43,13 @@ state.initLastAction()
 
 telegram_bot = TelegramBotHelper(app)
 
-s = sched.scheduler(time.time, time.sleep)
+s = EventScheduler()
+
+# Telegram bot helpers of the markets run by this process
+telegram_bots = {app: telegram_bot}
+
+# websockets of several markets, which a market does not close or restart on its own
+shared_websockets = []
 
 pd.set_option('display.float_format', '{:.8f}'.format)
 
@@ -56,6 +60,72 @@ def signal_handler(signum):
         return
 
 
+def getWebSocket(_app: PyCryptoBot = None, markets: list = None):
+    """Websocket client of the markets (default: the bot's market), through the websocket hub if one is configured"""
+
+    if markets is None:
+        markets = [_app.getMarket()]
+
+    # the exchange modules are imported on first use, so only the configured one is loaded
+    if _app.getWebSocketHub() is not None:
+        from models.WebSocketHub import HubWebSocketClient
+
+        return HubWebSocketClient(
+            markets, _app.getGranularity(), _app.getWebSocketHub(), _app.getWebSocketHubKey()
+        )
+    elif _app.getExchange() == Exchange.BINANCE:
+        from models.exchange.binance import WebSocketClient as BWebSocketClient
+
+        return BWebSocketClient(markets, _app.getGranularity())
+    elif _app.getExchange() == Exchange.KUCOIN:
+        from models.exchange.kucoin import WebSocketClient as KWebSocketClient
+
+        return KWebSocketClient(markets, _app.getGranularity())
+    else:
+        from models.exchange.coinbase_pro import WebSocketClient as CWebSocketClient
+
+        return CWebSocketClient(markets, _app.getGranularity())
+
+
+def watchWebSocket(sc=None, _app: PyCryptoBot = None, _websocket=None) -> None:
+    """Run the bot's job as soon as its websocket candle closes or the price moves"""
+
+    # the websocket hub client has no events, its bots poll it
+    if hasattr(_websocket, "candle_buffer"):
+        _websocket.candle_buffer.addListener(
+            _app.getMarket(),
+            lambda market, event: sc.trigger(_app),
+            _app.getWebSocketTriggerPcnt(),
+        )
+
+
+def getTelegramBot(_app: PyCryptoBot = None) -> TelegramBotHelper:
+    """Telegram bot helper of the bot's market"""
+
+    if _app not in telegram_bots:
+        telegram_bots[_app] = TelegramBotHelper(_app)
+
+    return telegram_bots[_app]
+
+
+def cancelJobs(sc=None, _app: PyCryptoBot = None) -> None:
+    """Cancel the scheduled jobs of the bot, the other markets of the process keep theirs"""
+
+    for event in sc.queue:
+        if len(event.argument) > 1 and event.argument[1] is _app:
+            sc.cancel(event)
+
+
+def reloadConfig(_app: PyCryptoBot = None) -> None:
+    """Read the config file again, a bot of a multi-market process keeps its market"""
+
+    market = _app.getMarket()
+    _app.read_config(_app.getExchange())
+    if len(_app.getMarkets()) > 0:
+        _app.setMarketOptions(market)
+
+
+@Metrics.timed("job")
 def execute_job(
     sc=None,
     _app: PyCryptoBot = None,
@@ -66,21 +136,23 @@ def execute_job(
 ):
     """Trading bot job which runs at a scheduled interval"""
 
-    if app.isLive():
-        state.account.mode = "live"
+    if _app.isLive():
+        _state.account.mode = "live"
     else:
-        state.account.mode = "test"
+        _state.account.mode = "test"
 
     # This is used to control some API calls when using websockets
     last_api_call_datetime = datetime.now() - _state.last_api_call_datetime
     if last_api_call_datetime.seconds > 60:
         _state.last_api_call_datetime = datetime.now()
 
+    telegram_bot = getTelegramBot(_app)
+
     # This is used by the telegram bot
     # If it not enabled in config while will always be False
     if not _app.isSimulation():
         controlstatus = telegram_bot.checkbotcontrolstatus()
-        while controlstatus == "pause" or controlstatus == "paused":
+        if controlstatus == "pause" or controlstatus == "paused":
             if controlstatus == "pause":
                 text_box = TextBox(80, 22)
                 text_box.singleLine()
@@ -90,12 +162,14 @@ def execute_job(
                 print(str(datetime.now()).format() + " - Bot is paused")
                 _app.notifyTelegram(f"{_app.getMarket()} bot is paused")
                 telegram_bot.updatebotstatus("paused")
-                if _app.enableWebsocket():
+                if _app.enableWebsocket() and _websocket not in shared_websockets:
                     Logger.info("Stopping _websocket...")
                     _websocket.close()
 
-            time.sleep(30)
-            controlstatus = telegram_bot.checkbotcontrolstatus()
+            # check again in 30 seconds, the other markets of the process keep running
+            cancelJobs(sc, _app)
+            sc.enter(30, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+            return
 
         if controlstatus == "start":
             text_box = TextBox(80, 22)
@@ -106,8 +180,8 @@ def execute_job(
             # print(str(datetime.now()).format() + " - Bot has restarted")
             _app.notifyTelegram(f"{_app.getMarket()} bot has restarted")
             telegram_bot.updatebotstatus("active")
-            _app.read_config(_app.getExchange())
-            if _app.enableWebsocket():
+            reloadConfig(_app)
+            if _app.enableWebsocket() and _websocket not in shared_websockets:
                 Logger.info("Starting _websocket...")
                 _websocket.start()
 
@@ -127,19 +201,15 @@ def execute_job(
             text_box.center(f"Reloading config parameters {_app.getMarket()}")
             text_box.singleLine()
             Logger.debug("Reloading config parameters.")
-            _app.read_config(_app.getExchange())
-            if _app.enableWebsocket():
+            reloadConfig(_app)
+            if _app.enableWebsocket() and _websocket not in shared_websockets:
                 _websocket.close()
-                if _app.getExchange() == Exchange.BINANCE:
-                    _websocket = BWebSocketClient([app.getMarket()], app.getGranularity())
-                elif _app.getExchange() == Exchange.COINBASEPRO:
-                    _websocket = CWebSocketClient([app.getMarket()], app.getGranularity())
-                elif _app.getExchange() == Exchange.KUCOIN:
-                    _websocket = KWebSocketClient([app.getMarket()], app.getGranularity())
+                _websocket = getWebSocket(_app)
+                watchWebSocket(sc, _app, _websocket)
                 _websocket.start()
             _app.setGranularity(_app.getGranularity())
-            list(map(s.cancel, s.queue))
-            s.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+            cancelJobs(sc, _app)
+            sc.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
             # _app.read_config(_app.getExchange())
             telegram_bot.updatebotstatus("active")
 
@@ -153,18 +223,21 @@ def execute_job(
             Logger.info("Starting _websocket...")
             _websocket.start()
             Logger.info("Restarting job in 30 seconds...")
-            s.enter(
+            sc.enter(
                 30, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket)
             )
 
     # increment _state.iterations
     _state.iterations = _state.iterations + 1
 
+    Metrics.logSummary(Logger.info)
+
     if not _app.isSimulation():
         # retrieve the _app.getMarket() data
-        trading_data = _app.getHistoricalData(
-            _app.getMarket(), _app.getGranularity(), _websocket
-        )
+        with Metrics.timer("job.fetch"):
+            trading_data = _app.getHistoricalData(
+                _app.getMarket(), _app.getGranularity(), _websocket
+            )
 
     else:
         if len(trading_data) == 0:
@@ -203,12 +276,13 @@ def execute_job(
 
                 simDate = _app.getDateFromISO8601Str(str(_state.last_df_index))
 
-                trading_data = _app.getSmartSwitchHistoricalDataChained(
-                    _app.getMarket(),
-                    _app.getGranularity(),
-                    str(startDate),
-                    str(endDate),
-                )
+                with Metrics.timer("job.fetch"):
+                    trading_data = _app.getSmartSwitchHistoricalDataChained(
+                        _app.getMarket(),
+                        _app.getGranularity(),
+                        str(startDate),
+                        str(endDate),
+                    )
 
                 if _app.getGranularity() == Granularity.ONE_HOUR:
                     simDate = _app.getDateFromISO8601Str(str(simDate))
@@ -244,7 +318,8 @@ def execute_job(
                 _technical_analysis = TechnicalAnalysis(trading_dataCopy)
 
                 # if 'morning_star' not in df:
-                _technical_analysis.addAll()
+                with Metrics.timer("job.indicators"):
+                    _technical_analysis.addAll()
 
                 df = _technical_analysis.getDataFrame()
 
@@ -255,14 +330,21 @@ def execute_job(
             _technical_analysis = TechnicalAnalysis(trading_dataCopy)
 
             if "morning_star" not in df:
-                _technical_analysis.addAll()
+                with Metrics.timer("job.indicators"):
+                    _technical_analysis.addAll()
 
             df = _technical_analysis.getDataFrame()
 
     else:
         trading_dataCopy = trading_data.copy()
+        previous_technical_analysis = _technical_analysis
         _technical_analysis = TechnicalAnalysis(trading_dataCopy)
-        _technical_analysis.addAll()
+        with Metrics.timer("job.indicators"):
+            if _app.isSimulation():
+                _technical_analysis.addAll()
+            else:
+                # between candles only the newest row changes, reuse the previous analysis
+                _technical_analysis.addAllIncremental(previous_technical_analysis)
         df = _technical_analysis.getDataFrame()
 
         if _app.isSimulation() and _app.appStarted:
@@ -273,6 +355,15 @@ def execute_job(
             )
             _app.appStarted = False
 
+        if Backtest.isSupported(_app):
+            # result only simulations are walked in a single pass instead of rescheduling each iteration
+            backtest = Backtest(_app, _state, df)
+            simulation = backtest.run(_state.iterations)
+            if simulation is not None:
+                backtest.saveTrades()
+                Logger.info(json.dumps(simulation, sort_keys=True, indent=4))
+            return None
+
     if _app.isSimulation():
         df_last = _app.getInterval(df, _state.iterations)
     else:
@@ -324,8 +415,8 @@ def execute_job(
             _app.sim_smartswitch = True
 
         _app.setGranularity(Granularity.FIVE_MINUTES)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+        cancelJobs(sc, _app)
+        sc.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
 
     if (
         (last_api_call_datetime.seconds > 60 or _app.isSimulation())
@@ -350,8 +441,8 @@ def execute_job(
             _app.sim_smartswitch = True
 
         _app.setGranularity(Granularity.ONE_HOUR)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+        cancelJobs(sc, _app)
+        sc.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
 
     # use actual sim mode date to check smartchswitch
     if (
@@ -378,8 +469,8 @@ def execute_job(
             )
 
         _app.setGranularity(Granularity.FIFTEEN_MINUTES)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+        cancelJobs(sc, _app)
+        sc.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
 
     # use actual sim mode date to check smartchswitch
     if (
@@ -405,8 +496,8 @@ def execute_job(
             )
 
         _app.setGranularity(Granularity.ONE_HOUR)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
+        cancelJobs(sc, _app)
+        sc.enter(5, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket))
 
     if (
         _app.getExchange() == Exchange.BINANCE
@@ -415,8 +506,8 @@ def execute_job(
         if len(df) < 250:
             # data frame should have 250 rows, if not retry
             Logger.error(f"error: data frame length is < 250 ({str(len(df))})")
-            list(map(s.cancel, s.queue))
-            s.enter(
+            cancelJobs(sc, _app)
+            sc.enter(
                 300, 1, execute_job, (sc, _app, _state, _technical_analysis, _websocket)
             )
     else:
@@ -424,8 +515,8 @@ def execute_job(
             if not _app.isSimulation():
                 # data frame should have 300 rows, if not retry
                 Logger.error(f"error: data frame length is < 300 ({str(len(df))})")
-                list(map(s.cancel, s.queue))
-                s.enter(
+                cancelJobs(sc, _app)
+                sc.enter(
                     300,
                     1,
                     execute_job,
@@ -562,17 +653,18 @@ def execute_job(
         if not _app.disableBuyOBV():
             telegram_bot.addindicators("OBV", float(obv_pc) > 0)
 
-        if _app.isSimulation():
-            # Reset the Strategy so that the last record is the current sim date
-            # To allow for calculations to be done on the sim date being processed
-            sdf = df[df["date"] <= current_sim_date].tail(300)
-            strategy = Strategy(
-                _app, _state, sdf, sdf.index.get_loc(str(current_sim_date)) + 1
-            )
-        else:
-            strategy = Strategy(_app, _state, df, _state.iterations)
+        with Metrics.timer("job.strategy"):
+            if _app.isSimulation():
+                # Reset the Strategy so that the last record is the current sim date
+                # To allow for calculations to be done on the sim date being processed
+                sdf = df[df["date"] <= current_sim_date].tail(300)
+                strategy = Strategy(
+                    _app, _state, sdf, sdf.index.get_loc(str(current_sim_date)) + 1
+                )
+            else:
+                strategy = Strategy(_app, _state, df, _state.iterations)
 
-        _state.action = strategy.getAction(_app, price, current_sim_date)
+            _state.action = strategy.getAction(_app, price, current_sim_date)
 
         immediate_action = False
         margin, profit, sell_fee, change_pcnt_high = 0, 0, 0, 0
@@ -1057,18 +1149,14 @@ def execute_job(
                 if _app.enableML():
                     # Seasonal Autoregressive Integrated Moving Average (ARIMA) model (ML prediction for 3 intervals from now)
                     if not _app.isSimulation():
-                        try:
-                            prediction = (
-                                _technical_analysis.seasonalARIMAModelPrediction(
-                                    int(_app.getGranularity().to_integer / 60) * 3
-                                )
-                            )  # 3 intervals from now
+                        # the model is fitted in the background, show the latest prediction without waiting
+                        forecaster = _app.getForecaster()
+                        forecaster.update(df)
+                        prediction = forecaster.getPrediction()
+                        if prediction is not None:
                             Logger.info(
                                 f"Seasonal ARIMA model predicts the closing price will be {str(round(prediction[1], 2))} at {prediction[0]} (delta: {round(prediction[1] - price, 2)})"
                             )
-                        # pylint: disable=bare-except
-                        except:
-                            pass
 
                 if _state.last_action == "BUY":
                     # display support, resistance and fibonacci levels
@@ -1195,19 +1283,19 @@ def execute_job(
 
                 # if live
                 if _app.isLive():
-                    ac = account.getBalance()
-                    account.basebalance_before = 0.0
-                    account.quotebalance_before = 0.0
+                    ac = _state.account.getBalance()
+                    _state.account.basebalance_before = 0.0
+                    _state.account.quotebalance_before = 0.0
                     try:
                         df_base = ac[ac["currency"] == _app.getBaseCurrency()]["available"]
-                        account.basebalance_before = (0.0 if len(df_base) == 0 else float(df_base.values[0]))
+                        _state.account.basebalance_before = (0.0 if len(df_base) == 0 else float(df_base.values[0]))
 
                         df_quote = ac[ac["currency"] == _app.getQuoteCurrency()]["available"]
-                        account.quotebalance_before = (0.0 if len(df_quote) == 0 else float(df_quote.values[0]))
+                        _state.account.quotebalance_before = (0.0 if len(df_quote) == 0 else float(df_quote.values[0]))
                     except:
                         pass
 
-                    if not _app.insufficientfunds and _app.getBuyMinSize() < account.quotebalance_before:
+                    if not _app.insufficientfunds and _app.getBuyMinSize() < _state.account.quotebalance_before:
                         if not _app.isVerbose():
                             if not _app.isSimulation() or (
                                 _app.isSimulation() and not _app.simResultOnly()
@@ -1222,14 +1310,14 @@ def execute_job(
 
                         # display balances
                         Logger.info(
-                            f"{_app.getBaseCurrency()} balance before order: {str(account.basebalance_before)}"
+                            f"{_app.getBaseCurrency()} balance before order: {str(_state.account.basebalance_before)}"
                         )
                         Logger.info(
-                            f"{_app.getQuoteCurrency()} balance before order: {str(account.quotebalance_before)}"
+                            f"{_app.getQuoteCurrency()} balance before order: {str(_state.account.quotebalance_before)}"
                         )
 
                         # execute a live market buy
-                        _state.last_buy_size = float(account.quotebalance_before)
+                        _state.last_buy_size = float(_state.account.quotebalance_before)
 
                         if (
                             _app.getBuyMaxSize()
@@ -1257,26 +1345,26 @@ def execute_job(
                             resp_error = 1
 
                         if resp_error == 0:
-                            account.basebalance_after = 0
-                            account.quotebalance_after = 0        
+                            _state.account.basebalance_after = 0
+                            _state.account.quotebalance_after = 0        
                             try:
-                                ac = account.getBalance()
+                                ac = _state.account.getBalance()
                                 df_base = ac[ac["currency"] == _app.getBaseCurrency()]["available"]
-                                account.basebalance_after = (
+                                _state.account.basebalance_after = (
                                     0.0
                                     if len(df_base) == 0
                                     else float(df_base.values[0])
                                 )
                                 df_quote = ac[ac["currency"] == _app.getQuoteCurrency()]["available"]
 
-                                account.quotebalance_after = (
+                                _state.account.quotebalance_after = (
                                     0.0
                                     if len(df_quote) == 0
                                     else float(df_quote.values[0])
                                 )
                             except Exception as err:
                                 Logger.warning(
-                                    f"Error: Balance not retrieved after trade for {app.getMarket()}.  Trying again.\n"
+                                    f"Error: Balance not retrieved after trade for {_app.getMarket()}.  Trying again.\n"
                                     f"API Error Msg: {err}"
                                 )
 
@@ -1287,8 +1375,8 @@ def execute_job(
                             telegram_bot.add_open_order()
 
                             Logger.info(
-                                f"{_app.getBaseCurrency()} balance after order: {str(account.basebalance_after)}\n"
-                                f"{_app.getQuoteCurrency()} balance after order: {str(account.quotebalance_after)}"
+                                f"{_app.getBaseCurrency()} balance after order: {str(_state.account.basebalance_after)}\n"
+                                f"{_app.getQuoteCurrency()} balance after order: {str(_state.account.quotebalance_after)}"
                             )
 
                             now = datetime.today().strftime("%Y-%m-%d %H:%M:%S")
@@ -1315,10 +1403,10 @@ def execute_job(
                             _state.last_action = None
                             _state.action = "check_buy"
                             Logger.warning(
-                                f"API Error: Unable to place buy order for {app.getMarket()}."
+                                f"API Error: Unable to place buy order for {_app.getMarket()}."
                             )
-                            if not app.disableTelegramErrorMsgs():
-                                app.notifyTelegram(f"API Error: Unable to place buy order for {app.getMarket()}")
+                            if not _app.disableTelegramErrorMsgs():
+                                _app.notifyTelegram(f"API Error: Unable to place buy order for {_app.getMarket()}")
                             time.sleep(30)
 
                     else:
@@ -1326,7 +1414,7 @@ def execute_job(
                             "Unable to place order, insufficient funds or buyminsize has not been reached"
                         )
 
-                    state.last_api_call_datetime -= timedelta(seconds=60)
+                    _state.last_api_call_datetime -= timedelta(seconds=60)
 
                 # if not live
                 else:
@@ -1421,13 +1509,16 @@ def execute_job(
                                 "close"
                             ].max(),
                             "DF_Low": df[df["date"] <= current_sim_date]["close"].min(),
-                        }, index={0})], ignore_index=True)
+                        }, index=[0])], ignore_index=True)
 
-                    state.in_open_trade = True
+                    _state.in_open_trade = True
                     _state.last_action = "BUY"
-                    state.last_api_call_datetime -= timedelta(seconds=60)
+                    _state.last_api_call_datetime -= timedelta(seconds=60)
 
                 if _app.shouldSaveGraphs():
+                    # matplotlib is only imported when graphs are saved
+                    from views.TradingGraphs import TradingGraphs
+
                     tradinggraphs = TradingGraphs(_technical_analysis)
                     ts = datetime.now().timestamp()
                     filename = f"{_app.getMarket()}_{_app.printGranularity()}_buy_{str(ts)}.png"
@@ -1483,28 +1574,28 @@ def execute_job(
                         text_box.singleLine()
 
                     # check balances before and display
-                    account.basebalance_before = 0
-                    account.quotebalance_before = 0
+                    _state.account.basebalance_before = 0
+                    _state.account.quotebalance_before = 0
                     try:
-                        account.basebalance_before = float(account.getBalance(_app.getBaseCurrency()))
-                        account.quotebalance_before = float(account.getBalance(_app.getQuoteCurrency()))
+                        _state.account.basebalance_before = float(_state.account.getBalance(_app.getBaseCurrency()))
+                        _state.account.quotebalance_before = float(_state.account.getBalance(_app.getQuoteCurrency()))
                     except:
                         pass
 
                     Logger.info(
-                        f"{_app.getBaseCurrency()} balance before order: {str(account.basebalance_before)}\n"
-                        f"{_app.getQuoteCurrency()} balance before order: {str(account.quotebalance_before)}"
+                        f"{_app.getBaseCurrency()} balance before order: {str(_state.account.basebalance_before)}\n"
+                        f"{_app.getQuoteCurrency()} balance before order: {str(_state.account.quotebalance_before)}"
                     )
 
                     # execute a live market sell
                     baseamounttosell = (
-                        float(account.basebalance_before)
+                        float(_state.account.basebalance_before)
                         if _app.sellfullbaseamount == True
-                        else float(state.last_buy_filled)
+                        else float(_state.last_buy_filled)
                     )
 
-                    account.basebalance_after = 0
-                    account.quotebalance_after = 0
+                    _state.account.basebalance_after = 0
+                    _state.account.quotebalance_after = 0
                     # place the sell order
                     try:
                         resp = _app.marketSell(
@@ -1520,17 +1611,17 @@ def execute_job(
 
                     if resp_error == 0:
                         try:
-                            account.basebalance_after = float(account.getBalance(_app.getBaseCurrency()))
-                            account.quotebalance_after = float(account.getBalance(_app.getQuoteCurrency()))
+                            _state.account.basebalance_after = float(_state.account.getBalance(_app.getBaseCurrency()))
+                            _state.account.quotebalance_after = float(_state.account.getBalance(_app.getQuoteCurrency()))
                         except Exception as err:
                             Logger.warning(
-                                f"Error: Balance not retrieved after trade for {app.getMarket()}.\n"
+                                f"Error: Balance not retrieved after trade for {_app.getMarket()}.\n"
                                 f"API Error Msg: {err}"
                         )
 
                         Logger.info(
-                            f"{_app.getBaseCurrency()} balance after order: {str(account.basebalance_after)}\n"
-                            f"{_app.getQuoteCurrency()} balance after order: {str(account.quotebalance_after)}"
+                            f"{_app.getBaseCurrency()} balance after order: {str(_state.account.basebalance_after)}\n"
+                            f"{_app.getQuoteCurrency()} balance after order: {str(_state.account.quotebalance_after)}"
                         )
                         _state.prevent_loss = 0
                         _state.tsl_triggered = 0
@@ -1577,13 +1668,13 @@ def execute_job(
                         _state.last_action = None
                         _state.action = "check_sell"
                         Logger.warning(
-                            f"API Error: Unable to place SELL order for {app.getMarket()}."
+                            f"API Error: Unable to place SELL order for {_app.getMarket()}."
                         )
-                        if not app.disableTelegramErrorMsgs():
-                            app.notifyTelegram(f"API Error: Unable to place SELL order for {app.getMarket()}")
+                        if not _app.disableTelegramErrorMsgs():
+                            _app.notifyTelegram(f"API Error: Unable to place SELL order for {_app.getMarket()}")
                         time.sleep(30)
 
-                    state.last_api_call_datetime -= timedelta(seconds=60)
+                    _state.last_api_call_datetime -= timedelta(seconds=60)
 
                 # if not live
                 else:
@@ -1683,13 +1774,16 @@ def execute_job(
                                 "close"
                             ].max(),
                             "DF_Low": df[df["date"] <= current_sim_date]["close"].min(),
-                        }, index={0})], ignore_index=True)
+                        }, index=[0])], ignore_index=True)
                         
-                    state.in_open_trade = False
-                    state.last_api_call_datetime -= timedelta(seconds=60)
+                    _state.in_open_trade = False
+                    _state.last_api_call_datetime -= timedelta(seconds=60)
                     _state.last_action = "SELL"
 
                 if _app.shouldSaveGraphs():
+                    # matplotlib is only imported when graphs are saved
+                    from views.TradingGraphs import TradingGraphs
+
                     tradinggraphs = TradingGraphs(_technical_analysis)
                     ts = datetime.now().timestamp()
                     filename = f"{_app.getMarket()}_{_app.printGranularity()}_sell_{str(ts)}.png"
@@ -1725,7 +1819,7 @@ def execute_job(
                         "last_trade": {"size": 0},
                         "margin": 0.0,
                     },
-                    "exchange": _app.getExchange(),
+                    "exchange": _app.getExchange().value,
                 }
 
                 if _app.getConfig() != "":
@@ -1959,19 +2053,19 @@ def execute_job(
         if not _app.disableTracker() and _app.isLive() and not _app.enableWebsocket():
             # update order tracker csv
             if _app.getExchange() == Exchange.BINANCE:
-                account.saveTrackerCSV(_app.getMarket())
+                _state.account.saveTrackerCSV(_app.getMarket())
             elif (
                 _app.getExchange() == Exchange.COINBASEPRO
                 or _app.getExchange() == Exchange.KUCOIN
             ):
-                account.saveTrackerCSV()
+                _state.account.saveTrackerCSV()
 
         if _app.isSimulation():
             if _state.iterations < len(df):
                 if _app.simuluationSpeed() in ["fast", "fast-sample"]:
                     # fast processing
-                    list(map(s.cancel, s.queue))
-                    s.enter(
+                    cancelJobs(sc, _app)
+                    sc.enter(
                         0,
                         1,
                         execute_job,
@@ -1979,8 +2073,8 @@ def execute_job(
                     )
                 else:
                     # slow processing
-                    list(map(s.cancel, s.queue))
-                    s.enter(
+                    cancelJobs(sc, _app)
+                    sc.enter(
                         1,
                         1,
                         execute_job,
@@ -1988,30 +2082,39 @@ def execute_job(
                     )
 
         else:
-            list(map(s.cancel, s.queue))
+            cancelJobs(sc, _app)
             if (
                 _app.enableWebsocket()
                 and _websocket is not None
                 and (
                     isinstance(_websocket.tickers, pd.DataFrame)
-                    and len(_websocket.tickers) == 1
+                    and (_websocket.tickers["market"] == _app.getMarket()).sum() == 1
                 )
                 and (
                     isinstance(_websocket.candles, pd.DataFrame)
-                    and len(_websocket.candles) == 300
+                    and (_websocket.candles["market"] == _app.getMarket()).sum() == 300
                 )
             ):
-                # poll every 5 seconds (_websocket)
-                s.enter(
-                    5,
-                    1,
-                    execute_job,
-                    (sc, _app, _state, _technical_analysis, _websocket),
-                )
+                if hasattr(_websocket, "candle_buffer"):
+                    # run on the _websocket events, or every minute without any
+                    sc.enter(
+                        60,
+                        1,
+                        execute_job,
+                        (sc, _app, _state, _technical_analysis, _websocket),
+                    )
+                else:
+                    # poll every 5 seconds (websocket hub)
+                    sc.enter(
+                        5,
+                        1,
+                        execute_job,
+                        (sc, _app, _state, _technical_analysis, _websocket),
+                    )
             else:
                 if _app.enableWebsocket() and not _app.isSimulation():
                     # poll every 15 seconds (waiting for _websocket)
-                    s.enter(
+                    sc.enter(
                         15,
                         1,
                         execute_job,
@@ -2019,7 +2122,7 @@ def execute_job(
                     )
                 else:
                     # poll every 1 minute (no _websocket)
-                    s.enter(
+                    sc.enter(
                         60,
                         1,
                         execute_job,
@@ -2027,7 +2130,79 @@ def execute_job(
                     )
 
 
+def runMarkets():
+    """Run the bot for each of its markets in this process
+
+    Every market has its own PyCryptoBot, TradingAccount and AppState and the jobs of all
+    of them take turns on one scheduler. The API clients, the higher timeframe candles
+    and a websocket per granularity are shared by the markets.
+    """
+
+    sc = MarketScheduler()
+    bots = []
+    for market in app.getMarkets():
+        _app = app.forMarket(market)
+        _state = AppState(_app, TradingAccount(_app))
+        _state.initLastAction()
+        bots.append((_app, _state))
+
+    markets = [_app.getMarket() for _app, _ in bots]
+    if app.getMarket() not in markets:
+        try:
+            # the bot of the config's market is not run
+            telegram_bot.removeactivebot()
+        except:
+            pass
+
+    groups = {}
+    for _app, _ in bots:
+        if _app.enableWebsocket() and not _app.isSimulation():
+            groups.setdefault(_app.getGranularity(), []).append(_app)
+
+    websockets = {}
+    for apps in groups.values():
+        print(f"Opening websocket for {len(apps)} markets ({apps[0].printGranularity()})...")
+        _websocket = getWebSocket(apps[0], [_app.getMarket() for _app in apps])
+        for _app in apps:
+            watchWebSocket(sc, _app, _websocket)
+            websockets[_app] = _websocket
+        _websocket.start()
+        shared_websockets.append(_websocket)
+
+    if app.startmethod in ("standard", "telegram"):
+        app.notifyTelegram(
+            f"Starting {app.getExchange().value} bot for {', '.join(markets)} in one process"
+        )
+
+    try:
+        for _app, _state in bots:
+            trading_data = _app.startApp(_app, _state.account, _state.last_action)
+            if _app.isSimulation():
+                sc.enter(0, 1, execute_job, (sc, _app, _state, None, None, trading_data))
+            else:
+                sc.enter(0, 1, execute_job, (sc, _app, _state, None, websockets.get(_app)))
+
+        # returns once the jobs of every market have stopped
+        sc.run()
+
+    except (KeyboardInterrupt, SystemExit):
+        Logger.warning(f"{str(datetime.now())} bot is closed via keyboard interrupt...")
+        for _app, _ in bots:
+            try:
+                getTelegramBot(_app).removeactivebot()
+            except:
+                pass
+
+    finally:
+        for _websocket in shared_websockets:
+            _websocket.close()
+
+
 def main():
+    if len(app.getMarkets()) > 0:
+        runMarkets()
+        return
+
     try:
         _websocket = None
         message = "Starting "
@@ -2035,21 +2210,24 @@ def main():
             message += "Coinbase Pro bot"
             if app.enableWebsocket() and not app.isSimulation():
                 print("Opening websocket to Coinbase Pro...")
-                _websocket = CWebSocketClient([app.getMarket()], app.getGranularity())
+                _websocket = getWebSocket(app)
                 _websocket.start()
         elif app.getExchange() == Exchange.BINANCE:
             message += "Binance bot"
             if app.enableWebsocket() and not app.isSimulation():
                 print("Opening websocket to Binance...")
-                _websocket = BWebSocketClient([app.getMarket()], app.getGranularity())
+                _websocket = getWebSocket(app)
                 _websocket.start()
         elif app.getExchange() == Exchange.KUCOIN:
             message += "Kucoin bot"
             if app.enableWebsocket() and not app.isSimulation():
                 print("Opening websocket to Kucoin...")
-                _websocket = KWebSocketClient([app.getMarket()], app.getGranularity())
+                _websocket = getWebSocket(app)
                 _websocket.start()
 
+        if _websocket is not None:
+            watchWebSocket(s, app, _websocket)
+
         smartswitchstatus = "enabled" if app.getSmartSwitch() else "disabled"
         message += f" for {app.getMarket()} using granularity {app.printGranularity()}. Smartswitch {smartswitchstatus}"
 
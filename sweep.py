@@ -0,0 +1,73 @@
+"""Rank pycryptobot simulations over a grid of config options"""
+
+import argparse
+import json
+
+from models.AppState import AppState
+from models.PyCryptoBot import PyCryptoBot
+from models.Sweep import Sweep
+from models.Trading import TechnicalAnalysis
+from models.TradingAccount import TradingAccount
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank pycryptobot simulations over a grid of config options"
+    )
+    parser.add_argument(
+        "--sweep", type=str, default="sweep.json", help="options to sweep (default: sweep.json)"
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=0,
+        help="random search of this many combinations, 0 for the full grid",
+    )
+    parser.add_argument("--seed", type=int, help="random search seed")
+    parser.add_argument(
+        "--workers", type=int, help="worker processes (default: number of cores)"
+    )
+    parser.add_argument(
+        "--top", type=int, default=20, help="number of ranked results to print"
+    )
+    parser.add_argument("--output", type=str, help="save all ranked results as csv")
+    args, unknown = parser.parse_known_args()  # pylint: disable=unused-variable
+
+    with open(args.sweep, encoding="utf8") as json_file:
+        options = json.load(json_file)
+
+    # the remaining arguments configure the simulations as they would pycryptobot.py
+    app = PyCryptoBot()
+    app.is_sim = 1
+    app.simresultonly = True
+    app.smart_switch = 0
+    account = TradingAccount(app)
+
+    # load and analyse the market data once for every simulation
+    trading_data = app.startApp(app, account, banner=False)
+    ta = TechnicalAnalysis(trading_data)
+    ta.addAll()
+    df = ta.getDataFrame()
+
+    iterations = 1
+    if app.simstartdate is not None:
+        iterations = df.index.get_loc(str(app.getDateFromISO8601Str(app.simstartdate))) + 1
+
+    state = AppState(app, account)
+    state.initLastAction()
+
+    sweep = Sweep(app, state, df, iterations)
+    combinations = sweep.getCombinations(options, args.samples, args.seed)
+    print(
+        f"Simulating {len(combinations)} combinations of {app.getMarket()} ({app.printGranularity()})..."
+    )
+
+    results = sweep.run(combinations, args.workers)
+    print(results.head(args.top).to_string(index=False))
+
+    if args.output is not None:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
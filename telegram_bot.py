@@ -123,29 +123,12 @@ class TelegramBot(TelegramBotBase):
         if not os.path.exists(os.path.join(self.helper.datafolder, "telegram_data")):
             os.mkdir(os.path.join(self.helper.datafolder, "telegram_data"))
 
-        if os.path.isfile(
-            os.path.join(self.helper.datafolder, "telegram_data", "data.json")
-        ):
-            write_ok, try_count = False, 0
-            while not write_ok and try_count <= 5:
-                try_count += 1
-                self.helper.read_data("data.json")
-                write_ok = True
-                if "trades" not in self.helper.data:
-                    self.helper.data.update({"trades": {}})
-                    write_ok = self.helper.write_data()
-                if "markets" not in self.helper.data:
-                    self.helper.data.update({"markets": {}})
-                    write_ok = self.helper.write_data()
-                if "scannerexceptions" not in self.helper.data:
-                    self.helper.data.update({"scannerexceptions": {}})
-                    write_ok = self.helper.write_data()
-                if not write_ok:
-                    sleep(1)
-        else:
-            ds = {"trades": {}, "markets": {}, "scannerexceptions": {}}
-            self.helper.data = ds
-            self.helper.write_data()
+        def add_sections(data):
+            for section in ("trades", "markets", "scannerexceptions"):
+                if section not in data:
+                    data.update({section: {}})
+
+        self.helper.get_state_store().updateShared(add_sections)
 
         self.updater = Updater(
             self.token,
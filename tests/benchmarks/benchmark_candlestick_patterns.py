@@ -0,0 +1,61 @@
+"""Candlestick pattern benchmark
+
+Compares adding the patterns one method at a time with the single pass of
+TechnicalAnalysis.addCandlestickPatterns() on 300 and 500k candles.
+
+    python tests/benchmarks/benchmark_candlestick_patterns.py
+"""
+
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Trading import TechnicalAnalysis
+from synthetic import make_candles
+
+ADD_METHODS = [
+    "addCandleAstralBuy",
+    "addCandleAstralSell",
+    "addCandleHammer",
+    "addCandleInvertedHammer",
+    "addCandleShootingStar",
+    "addCandleHangingMan",
+    "addCandleThreeWhiteSoldiers",
+    "addCandleThreeBlackCrows",
+    "addCandleDoji",
+    "addCandleThreeLineStrike",
+    "addCandleTwoBlackGapping",
+    "addCandleMorningStar",
+    "addCandleEveningStar",
+    "addCandleAbandonedBaby",
+    "addCandleMorningDojiStar",
+    "addCandleEveningDojiStar",
+]
+
+
+def per_method(df: pd.DataFrame) -> None:
+    ta = TechnicalAnalysis(df.copy())
+    for method in ADD_METHODS:
+        getattr(ta, method)()
+
+
+def single_pass(df: pd.DataFrame) -> None:
+    TechnicalAnalysis(df.copy()).addCandlestickPatterns()
+
+
+def best(function, df: pd.DataFrame, number: int) -> float:
+    """Best time of a call in milliseconds"""
+
+    return min(timeit.repeat(lambda: function(df), number=number, repeat=5)) / number * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'candles':>10} {'per method':>12} {'single pass':>12} {'speedup':>8}")
+    for length, number in ((300, 50), (500000, 1)):
+        df = make_candles(length)
+        methods = best(per_method, df, number)
+        fused = best(single_pass, df, number)
+        print(f"{length:>10} {methods:>10.2f}ms {fused:>10.2f}ms {methods / fused:>7.1f}x")
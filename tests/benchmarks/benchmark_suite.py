@@ -0,0 +1,444 @@
+"""Benchmark suite of the trading hot paths
+
+Times the indicators, the websocket clients, the strategy, the simulation engine,
+the margin calculation and the trade pairing on synthetic data, and saves the
+results as JSON so that commits can be compared.
+
+    python tests/benchmarks/benchmark_suite.py                      # all benchmarks
+    python tests/benchmarks/benchmark_suite.py --quick              # without the 1M candle cases
+    python tests/benchmarks/benchmark_suite.py --filter websocket   # names containing websocket
+    python tests/benchmarks/benchmark_suite.py --compare tests/benchmarks/results/<commit>.json
+
+With --compare the exit status is 1 if a benchmark is slower than the baseline by
+more than --threshold, so the suite can gate a release.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections import namedtuple
+from datetime import datetime, timezone
+from statistics import median
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.AppState import AppState
+from models.Backtest import Backtest
+from models.PyCryptoBot import PyCryptoBot
+from models.Stats import Stats
+from models.Strategy import Strategy
+from models.TradePairs import pairTrades
+from models.Trading import TechnicalAnalysis
+from models.TradingAccount import TradingAccount
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+from models.exchange.binance import WebSocketClient as BWebSocketClient
+from models.exchange.coinbase_pro import WebSocketClient as CWebSocketClient
+from models.exchange.kucoin import PublicAPI as KPublicAPI, WebSocketClient as KWebSocketClient
+from models.helper.LogHelper import Logger
+from models.helper.MarginHelper import calculate_margin
+from synthetic import make_candles, make_messages, make_orders
+
+RESULTS_DIR = os.path.join("tests", "benchmarks", "results")
+
+# candles of the indicator benchmarks, the last size is skipped with --quick
+CANDLES = (300, 10000, 1000000)
+
+# individual indicators, with the indicators they are calculated from
+INDICATORS = {
+    "addSMA200": ("addSMA", (200,), ()),
+    "addEMA26": ("addEMA", (26,), ()),
+    "addRSI14": ("addRSI", (14,), ()),
+    "addStochasticRSI14": ("addStochasticRSI", (14,), ()),
+    "addWilliamsR14": ("addWilliamsR", (14,), ()),
+    "addMACD": ("addMACD", (), (("addEMA", (12,)), ("addEMA", (26,)))),
+    "addOBV": ("addOBV", (), ()),
+    "addElderRayIndex": ("addElderRayIndex", (), ()),
+    "addFibonacciBollingerBands": ("addFibonacciBollingerBands", (), ()),
+    "addADXBuySignals": ("addADXBuySignals", (), ()),
+    "addCandlestickPatterns": ("addCandlestickPatterns", (), ()),
+}
+
+Benchmark = namedtuple("Benchmark", ["name", "setup", "items", "unit", "large"])
+
+BENCHMARKS = []
+
+
+def register(name: str, setup, items: int = 1, unit: str = "call", large: bool = False) -> None:
+    """Add a benchmark, setup() is not timed and returns the function that is
+
+    Parameters
+    ----------
+    name : str
+        unique name, the key of the results
+    setup : function
+        prepares the data and returns the function to time, called without arguments
+    items : int
+        items (candles, messages, orders...) processed by each call, for the rate
+    unit : str
+        name of the items
+    large : bool
+        skipped with --quick
+    """
+
+    BENCHMARKS.append(Benchmark(name, setup, items, unit, large))
+
+
+def analysed_candles(length: int, seed: int = 3) -> pd.DataFrame:
+    """Candles with the indicators, indexed by date strings as the simulation reads them"""
+
+    df = make_candles(length, seed)
+    df.index = df.index.strftime("%Y-%m-%d %H:%M:%S")
+    ta = TechnicalAnalysis(df)
+    ta.addAll()
+    return ta.getDataFrame()
+
+
+def simulation_app(candles: pd.DataFrame) -> PyCryptoBot:
+    """A fast result only simulation of the candles, with the 1h trend taken from them"""
+
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+    app.is_sim = 1
+    app.simresultonly = True
+    app.sim_speed = "fast"
+    app.smart_switch = 0
+    app.market = "BTC-GBP"
+    app.disablebullonly = True
+    app.sma50200_1h_cache = candles[["date", "market", "granularity", "low", "high", "open", "close", "volume"]]
+    return app
+
+
+# indicators
+
+
+def setup_add_all(length: int):
+    df = make_candles(length)
+    return lambda: TechnicalAnalysis(df.copy()).addAll()
+
+
+def setup_indicator(length: int, method: str, args: tuple, requires: tuple):
+    ta = TechnicalAnalysis(make_candles(length))
+    for required, required_args in requires:
+        getattr(ta, required)(*required_args)
+
+    # each call replaces the columns of the previous one
+    return lambda: getattr(ta, method)(*args)
+
+
+for candles in CANDLES:
+    register(
+        f"indicators.addAll[{candles}]",
+        lambda candles=candles: setup_add_all(candles),
+        candles,
+        "candles",
+        candles == CANDLES[-1],
+    )
+    for indicator, (method, args, requires) in INDICATORS.items():
+        register(
+            f"indicators.{indicator}[{candles}]",
+            lambda candles=candles, method=method, args=args, requires=requires: setup_indicator(
+                candles, method, args, requires
+            ),
+            candles,
+            "candles",
+            candles == CANDLES[-1],
+        )
+
+
+# websocket clients
+
+
+def setup_websocket(client, exchange: str, market: str, messages: int = 10000):
+    history = make_candles(300, market=market)
+    history["granularity"] = client.candle_buffer.label
+    client.candle_buffer.load(history)
+    client.on_open()
+    feed = make_messages(exchange, messages, market=market)
+
+    def run():
+        for msg in feed:
+            client.on_message(msg)
+
+    return run
+
+
+def setup_kucoin_websocket():
+    # the client requests a token on creation, which the benchmark does not connect with
+    get_socket_token = KPublicAPI.getSocketToken
+    KPublicAPI.getSocketToken = lambda self: {"data": {"token": ""}}
+    try:
+        client = KWebSocketClient(["BTC-USDT"], Granularity.ONE_HOUR)
+    finally:
+        KPublicAPI.getSocketToken = get_socket_token
+
+    return setup_websocket(client, "kucoin", "BTC-USDT")
+
+
+register(
+    "websocket.binance.on_message",
+    lambda: setup_websocket(BWebSocketClient(["BTCGBP"], Granularity.ONE_HOUR), "binance", "BTCGBP"),
+    10000,
+    "messages",
+)
+register(
+    "websocket.coinbasepro.on_message",
+    lambda: setup_websocket(CWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR), "coinbasepro", "BTC-GBP"),
+    10000,
+    "messages",
+)
+register("websocket.kucoin.on_message", setup_kucoin_websocket, 10000, "messages")
+
+
+# strategy and simulation
+
+
+def setup_strategy(candles: int = 600, evaluated: int = 300):
+    df = analysed_candles(candles)
+    app = simulation_app(df)
+    state = AppState(app, TradingAccount(app))
+    rows = range(candles - evaluated, candles)
+    close = df["close"].tolist()
+
+    def run():
+        for i in rows:
+            sdf = df.iloc[i - 299 : i + 1]
+            strategy = Strategy(app, state, sdf, len(sdf))
+            strategy.getAction(app, close[i], df.index[i])
+
+    return run
+
+
+def setup_simulation(candles: int):
+    df = analysed_candles(candles)
+    app = simulation_app(df)
+    account = TradingAccount(app)
+    trade_tracker = app.trade_tracker
+
+    def run():
+        app.trade_tracker = trade_tracker
+        state = AppState(app, account)
+        state.initLastAction()
+        Backtest(app, state, df).run(300)
+
+    return run
+
+
+register("strategy.getAction", setup_strategy, 300, "candles")
+register("simulation.backtest[2000]", lambda: setup_simulation(2000), 1701, "candles")
+register("simulation.backtest[20000]", lambda: setup_simulation(20000), 19701, "candles", True)
+
+
+# margins and trade pairing
+
+
+def setup_margin(calls: int = 10000):
+    rng = np.random.default_rng(5)
+    buy_price = rng.uniform(20000, 40000, calls).tolist()
+    sell_price = (np.array(buy_price) * rng.uniform(0.9, 1.1, calls)).tolist()
+
+    def run():
+        for buy, sell in zip(buy_price, sell_price):
+            calculate_margin(
+                buy_size=100.0,
+                buy_filled=round(99.5 / buy, 8),
+                buy_price=buy,
+                buy_fee=0.5,
+                sell_percent=100,
+                sell_price=sell,
+                sell_taker_fee=0.005,
+            )
+
+    return run
+
+
+def setup_pair_trades(count: int):
+    orders = make_orders(count, markets=("BTC-GBP", "ETH-GBP", "LTC-GBP", "ADA-GBP"))
+    return lambda: pairTrades(orders, first=["created_at", "price"], total=["size", "fees"])
+
+
+def setup_stats(count: int):
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+    account = TradingAccount(app)
+    orders = make_orders(count)
+    account.getOrders = lambda *args, **kwargs: orders
+
+    def run():
+        Stats(app, account).get_data("BTC-GBP")
+
+    return run
+
+
+def setup_tracker(count: int):
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+    account = TradingAccount(app)
+    orders = make_orders(count, markets=("BTC-GBP", "ETH-GBP", "LTC-GBP", "ADA-GBP"))
+    # the columns of the orders of a test account
+    account.orders = orders[["created_at", "market", "action", "type", "size", "value", "fees", "price", "status"]]
+    save_file = os.path.join(tempfile.mkdtemp(), "tracker.csv")
+    return lambda: account.saveTrackerCSV(save_file=save_file)
+
+
+register("margin.calculate_margin", setup_margin, 10000, "calls")
+for orders in (10000, 1000000):
+    register(
+        f"trades.pairTrades[{orders}]",
+        lambda orders=orders: setup_pair_trades(orders),
+        orders,
+        "orders",
+        orders > 10000,
+    )
+    register(
+        f"trades.Stats.get_data[{orders}]",
+        lambda orders=orders: setup_stats(orders),
+        orders,
+        "orders",
+        orders > 10000,
+    )
+    register(
+        f"trades.saveTrackerCSV[{orders}]",
+        lambda orders=orders: setup_tracker(orders),
+        orders,
+        "orders",
+        orders > 10000,
+    )
+
+
+def measure(benchmark: Benchmark, repeat: int, min_time: float) -> dict:
+    """Best and median seconds per call, over repeats of at least min_time each"""
+
+    timer = timeit.Timer(benchmark.setup())
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    # a single call of the large cases already takes seconds
+    times = [elapsed] + timer.repeat(repeat=max(repeat - 1, 0), number=number)
+    best = min(times) / number
+    return {
+        "best": best,
+        "median": median(times) / number,
+        "number": number,
+        "repeat": len(times),
+        "items": benchmark.items,
+        "unit": benchmark.unit,
+        "per_second": benchmark.items / best,
+    }
+
+
+def metadata() -> dict:
+    def git(*args) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": git("status", "--porcelain", "--untracked-files=no") != "",
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print the change of each benchmark against the baseline, returns the regressions"""
+
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        change = result["best"] / baseline[name]["best"] - 1
+        flag = ""
+        if change > threshold:
+            flag = " slower"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = " faster"
+        print(
+            f"{name:<48} {baseline[name]['best'] * 1000:>10.3f}ms {result['best'] * 1000:>10.3f}ms "
+            f"{change:>+7.1%}{flag}"
+        )
+
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--filter", default="", help="only run benchmarks with names containing this")
+    parser.add_argument("--quick", action="store_true", help="skip the 1M candle and order benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repeat")
+    parser.add_argument("--output", help="results file (default: tests/benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="slowdown reported as a regression (default: 0.2)"
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        benchmark
+        for benchmark in BENCHMARKS
+        if args.filter in benchmark.name and not (args.quick and benchmark.large)
+    ]
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+
+    # the time spent writing the log depends on the terminal and disk, not on the code
+    Logger.configure(filelog=0, consolelog=0)
+
+    meta = metadata()
+    meta.update({"quick": args.quick, "repeat": args.repeat, "min_time": args.min_time})
+
+    results = {}
+    print(f"{'benchmark':<48} {'best':>12} {'median':>12} {'rate':>20}")
+    for benchmark in benchmarks:
+        result = results[benchmark.name] = measure(benchmark, args.repeat, args.min_time)
+        print(
+            f"{benchmark.name:<48} {result['best'] * 1000:>10.3f}ms {result['median'] * 1000:>10.3f}ms "
+            f"{result['per_second']:>12,.0f} {benchmark.unit}/s"
+        )
+
+    output = args.output
+    if output is None:
+        output = os.path.join(RESULTS_DIR, f"{meta['commit'][:12] or 'results'}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf8") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=4)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {baseline['meta'].get('commit', '')[:12]}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
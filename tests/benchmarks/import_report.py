@@ -0,0 +1,116 @@
+"""Import time report of the bot's startup
+
+Imports pycryptobot in a fresh interpreter with python -X importtime and reports the
+total time, the slowest packages and modules, and the heavy optional dependencies
+loaded at startup, which should only be imported when a feature using them is enabled.
+
+    python tests/benchmarks/import_report.py
+    python tests/benchmarks/import_report.py --top 30
+    python tests/benchmarks/import_report.py --max-seconds 1    # exit 1 if slower or a deferred module is loaded
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict, namedtuple
+from statistics import median
+
+# imported on first use: graphs, ARIMA models, Telegram bot, screener and the exchanges
+DEFERRED = (
+    "statsmodels",
+    "scipy",
+    "matplotlib",
+    "tradingview_ta",
+    "telegram",
+    "apscheduler",
+    "views.TradingGraphs",
+    "models.WebSocketHub",
+    "models.exchange.binance",
+    "models.exchange.coinbase_pro",
+    "models.exchange.kucoin",
+)
+
+Import = namedtuple("Import", ["name", "self_us", "cumulative_us"])
+
+
+def import_times(module: str = "pycryptobot") -> list:
+    """Imports of the module in a new interpreter, in the order python -X importtime reports them"""
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append(Import(name.strip(), int(self_us), int(cumulative_us)))
+
+    return imports
+
+
+def package(name: str) -> str:
+    """Top level package of a module, or the module for the bot's own"""
+
+    parts = name.split(".")
+    if parts[0] in ("models", "views"):
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def deferred(imports: list) -> list:
+    """Deferred modules that were imported"""
+
+    names = {item.name for item in imports}
+    return [
+        module
+        for module in DEFERRED
+        if module in names or any(name.startswith(module + ".") for name in names)
+    ]
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--module", default="pycryptobot", help="module to import (default: pycryptobot)")
+    parser.add_argument("--runs", type=int, default=3, help="imports, the fastest is reported in detail")
+    parser.add_argument("--top", type=int, default=15, help="number of packages and modules to list")
+    parser.add_argument(
+        "--max-seconds", type=float, help="exit 1 if the import is slower or a deferred module is imported"
+    )
+    args = parser.parse_args(argv)
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [max(item.cumulative_us for item in imports) / 1e6 for imports in runs]
+    imports = runs[totals.index(min(totals))]
+
+    print(f"import {args.module}: best {min(totals):.3f}s, median {median(totals):.3f}s of {args.runs}\n")
+
+    packages = defaultdict(int)
+    for item in imports:
+        packages[package(item.name)] += item.self_us
+    print(f"{'package':<40} {'self':>10}")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{name:<40} {self_us / 1000:>8.1f}ms")
+
+    print(f"\n{'module':<56} {'self':>10} {'cumulative':>12}")
+    for item in sorted(imports, key=lambda item: -item.self_us)[: args.top]:
+        print(f"{item.name:<56} {item.self_us / 1000:>8.1f}ms {item.cumulative_us / 1000:>10.1f}ms")
+
+    loaded = deferred(imports)
+    if loaded:
+        print(f"\nDeferred modules imported at startup: {', '.join(loaded)}")
+    else:
+        print("\nNo deferred modules imported at startup")
+
+    if args.max_seconds is not None and (min(totals) > args.max_seconds or loaded):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
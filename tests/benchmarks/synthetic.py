@@ -0,0 +1,167 @@
+"""Synthetic market data for the benchmarks
+
+Every generator is seeded, so the same arguments always give the same data and
+benchmark results of different commits can be compared.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from models.exchange.Granularity import Granularity
+
+START = "2021-10-10 14:00:00"
+
+
+def make_candles(
+    length: int,
+    seed: int = 1,
+    market: str = "BTC-GBP",
+    granularity=3600,
+    start: str = START,
+    freq: str = None,
+) -> pd.DataFrame:
+    """OHLCV candles of a geometric random walk, indexed by date
+
+    The candles are granularity seconds apart from start, pass freq as well for a
+    granularity in another format, e.g. "15m" for Binance.
+    """
+
+    rng = np.random.default_rng(seed)
+    close = (100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))).round(2)
+    open_ = (np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.01, length))).round(2)
+    high = (np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, length))).round(2)
+    low = (np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, length))).round(2)
+    dates = pd.date_range(start, periods=length, freq=freq or f"{granularity}s", name="ts")
+
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "market": market,
+            "granularity": granularity,
+            "low": low,
+            "high": high,
+            "open": open_,
+            "close": close,
+            "volume": rng.uniform(1, 100, length).round(3),
+        },
+        index=dates,
+    )
+
+
+def make_orders(count: int, seed: int = 1, markets: tuple = ("BTC-GBP",)) -> pd.DataFrame:
+    """Completed orders as TradingAccount.getOrders() returns them, oldest first
+
+    The actions are random, so there are runs of buys and sells to merge and sells
+    before the first buy of a market.
+    """
+
+    rng = np.random.default_rng(seed)
+    price = (30000 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))).round(2)
+    size = rng.uniform(10, 1000, count).round(2)
+    fees = (size * 0.005).round(8)
+
+    return pd.DataFrame(
+        {
+            "created_at": pd.date_range(START, periods=count, freq="H", tz="UTC"),
+            "market": rng.choice(list(markets), count),
+            "action": rng.choice(["buy", "sell"], count),
+            "type": "market",
+            "size": size,
+            "value": size,
+            "filled": ((size - fees) / price).round(8),
+            "fees": fees,
+            "price": price,
+            "status": "done",
+        }
+    )
+
+
+def make_messages(
+    exchange: str,
+    count: int,
+    seed: int = 1,
+    market: str = "BTC-GBP",
+    granularity: int = 3600,
+    history: int = 300,
+) -> list:
+    """Websocket messages of an exchange, in the format its on_message() receives them
+
+    The trades (tickers and closed klines for Binance) start after the candles
+    make_candles() returns for the history length, so the messages extend them.
+
+    Parameters
+    ----------
+    exchange : str
+        binance, coinbasepro or kucoin
+    count : int
+        number of messages
+    market : str
+        market in the format of the exchange
+    history : int
+        number of candles before the first message
+    """
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(START, tz="UTC").to_pydatetime() + timedelta(seconds=history * granularity)
+    # about ten trades per candle
+    seconds = np.cumsum(rng.uniform(0, granularity / 5, count))
+    price = (100 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))).round(2)
+    size = rng.uniform(0.001, 1, count).round(6)
+
+    messages = []
+    for second, trade_price, trade_size in zip(seconds.tolist(), price.tolist(), size.tolist()):
+        date = start + timedelta(seconds=second)
+        if exchange == "binance":
+            epoch_ms = int(date.timestamp() * 1000)
+            if len(messages) % 2 == 0:
+                messages.append(
+                    {"e": "24hrMiniTicker", "E": epoch_ms, "s": market, "c": f"{trade_price:.8f}"}
+                )
+            else:
+                candle_ms = epoch_ms - epoch_ms % (granularity * 1000)
+                messages.append(
+                    {
+                        "e": "kline",
+                        "E": epoch_ms,
+                        "s": market,
+                        "k": {
+                            "t": candle_ms,
+                            "i": Granularity.convert_to_enum(granularity).to_short,
+                            "o": f"{trade_price:.8f}",
+                            "h": f"{trade_price * 1.01:.8f}",
+                            "l": f"{trade_price * 0.99:.8f}",
+                            "c": f"{trade_price:.8f}",
+                            "v": f"{trade_size:.8f}",
+                            "V": f"{trade_size / 2:.8f}",
+                            "x": True,
+                        },
+                    }
+                )
+        elif exchange == "coinbasepro":
+            messages.append(
+                {
+                    "type": "ticker",
+                    "product_id": market,
+                    "time": date.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "price": f"{trade_price:.2f}",
+                    "size": f"{trade_size:.8f}",
+                }
+            )
+        elif exchange == "kucoin":
+            messages.append(
+                {
+                    "type": "message",
+                    "topic": f"/market/ticker:{market}",
+                    "data": {
+                        "time": int(date.timestamp() * 1e9),
+                        "price": f"{trade_price:.2f}",
+                        "size": f"{trade_size:.8f}",
+                    },
+                }
+            )
+        else:
+            raise ValueError(f"Unknown exchange: {exchange}")
+
+    return messages
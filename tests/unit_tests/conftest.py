@@ -0,0 +1,14 @@
+import sys
+
+import pytest
+
+sys.path.append('.')
+# pylint: disable=import-error
+from tests.benchmarks import synthetic
+
+
+@pytest.fixture
+def make_candles():
+    """Seeded random walk candles, from the generator shared with the benchmarks"""
+
+    return synthetic.make_candles
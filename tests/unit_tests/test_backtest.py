@@ -0,0 +1,72 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+from statsmodels.compat.pandas import assert_frame_equal
+
+sys.path.append('.')
+# pylint: disable=import-error
+import pycryptobot
+from models.AppState import AppState
+from models.Backtest import Backtest
+from models.helper.LogHelper import Logger
+from models.PyCryptoBot import PyCryptoBot
+
+
+def simulate(monkeypatch, mocker, candles: pd.DataFrame, tradesfile: str, engine: bool):
+    app = pycryptobot.app
+    monkeypatch.setattr(app, "appStarted", True, raising=False)
+    monkeypatch.setattr(app, "simstartdate", str(candles.index[300]))
+    monkeypatch.setattr(app, "tradesfile", tradesfile)
+    monkeypatch.setattr(app, "trade_tracker", PyCryptoBot.trade_tracker)
+
+    state = AppState(app, pycryptobot.account)
+    state.initLastAction()
+    # the simulation loop records open trades on the module level state
+    monkeypatch.setattr(pycryptobot, "state", state)
+
+    info = mocker.patch.object(Logger, "info")
+    mocker.patch.object(Backtest, "isSupported", return_value=engine)
+    pycryptobot.execute_job(pycryptobot.s, app, state, None, None, candles.copy())
+    pycryptobot.s.run()
+    mocker.stopall()
+
+    summary = [json.loads(call.args[0]) for call in info.call_args_list if str(call.args[0]).startswith("{")]
+    with open(tradesfile, encoding="utf8") as trades:
+        return app.trade_tracker, summary, trades.read()
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"disablebullonly": True, "sell_upper_pcnt": 3, "trailing_stop_loss": -1, "trailing_stop_loss_trigger": 1},
+        {"sell_lower_pcnt": -2, "sellatresistance": True},
+        {"disablebuyema": True, "trailingbuypcnt": 0.2},
+        {"disablebullonly": True, "preventloss": True, "preventlosstrigger": 1, "preventlossmargin": 0.1,
+         "disablebuynearhigh": True, "nobuynearhighpcnt": 2, "buymaxsize": 500, "disablebuyobv": True},
+    ],
+)
+def test_should_match_simulation_loop(monkeypatch, mocker, tmp_path, make_candles, config):
+    # GIVEN a result only simulation with recorded 1h candles
+    candles = make_candles(480, seed=3)
+    app = pycryptobot.app
+    monkeypatch.setattr(app, "is_sim", 1)
+    monkeypatch.setattr(app, "simresultonly", True)
+    monkeypatch.setattr(app, "sim_speed", "fast")
+    monkeypatch.setattr(app, "smart_switch", 0)
+    monkeypatch.setattr(app, "market", "BTC-GBP")
+    monkeypatch.setattr(app, "sma50200_1h_cache", candles)
+    for option, value in config.items():
+        monkeypatch.setattr(app, option, value)
+
+    # WHEN it is run by the scheduled loop and by the single pass engine
+    expected = simulate(monkeypatch, mocker, candles, str(tmp_path / "loop.csv"), engine=False)
+    actual = simulate(monkeypatch, mocker, candles, str(tmp_path / "backtest.csv"), engine=True)
+
+    # THEN the trades and the summary should be identical
+    assert len(expected[0]) > 0
+    assert_frame_equal(actual[0], expected[0], check_exact=True)
+    assert len(expected[1]) == 1
+    assert actual[1] == expected[1]
+    assert actual[2] == expected[2]
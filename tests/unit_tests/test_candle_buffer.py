@@ -0,0 +1,152 @@
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.exchange.CandleBuffer import CandleBuffer
+from models.exchange.Granularity import Granularity
+from models.exchange.coinbase_pro import PublicAPI, WebSocketClient
+from models.helper.LogHelper import Logger
+
+
+def make_history(market: str = "BTC-GBP", length: int = 300) -> pd.DataFrame:
+    tsidx = pd.date_range(end="2021-10-10 13:00:00", periods=length, freq="H", name="ts")
+    close = np.linspace(100, 130, length)
+
+    return pd.DataFrame(
+        {
+            "date": tsidx,
+            "market": market,
+            "granularity": 3600,
+            "low": close - 1,
+            "high": close + 1,
+            "open": close - 0.5,
+            "close": close,
+            "volume": close / 10,
+        },
+        index=tsidx,
+    )
+
+
+def test_should_update_open_candle_with_trades():
+    # GIVEN a buffer with the market history
+    buffer = CandleBuffer(Granularity.ONE_HOUR)
+    buffer.load(make_history())
+
+    # WHEN trades are added to a new candle
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 0, 5), 120.0, 0.5)
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 10, 0), 125.0, 0.25)
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 20, 0), 118.0, 0.25)
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 30, 0), 121.0, 1.0)
+
+    # THEN the oldest candle should be dropped and the new candle hold the trades
+    df = buffer.getCandles()
+    assert len(df) == 300
+    assert df.index[0] == pd.Timestamp("2021-09-28 03:00:00")
+    assert df.index[-1] == pd.Timestamp("2021-10-10 14:00:00")
+    assert list(df.columns) == ["date", "market", "granularity", "low", "high", "open", "close", "volume"]
+    assert df.iloc[-1][["low", "high", "open", "close", "volume"]].tolist() == [118.0, 125.0, 120.0, 121.0, 2.0]
+
+
+def test_should_keep_markets_apart():
+    # GIVEN a buffer with two markets
+    buffer = CandleBuffer(Granularity.ONE_HOUR)
+    buffer.load(pd.concat([make_history("BTC-GBP"), make_history("ETH-GBP", 10)]))
+
+    # WHEN one market trades in the last candle of both
+    buffer.trade("ETH-GBP", datetime(2021, 10, 10, 13, 30, 0), 200.0, 1.0)
+
+    # THEN only that market's candle should change
+    df = buffer.getCandles()
+    assert len(df[df["market"] == "BTC-GBP"]) == 300
+    assert len(df[df["market"] == "ETH-GBP"]) == 10
+    assert df[df["market"] == "BTC-GBP"]["high"].iloc[-1] == 131.0
+    assert df[df["market"] == "ETH-GBP"]["high"].iloc[-1] == 200.0
+
+
+def test_should_replace_closed_candle():
+    # GIVEN a buffer whose last candle was open when the history was loaded
+    buffer = CandleBuffer(Granularity.ONE_HOUR, "1h")
+    buffer.load(make_history())
+
+    # WHEN the candle closes
+    buffer.candle("BTC-GBP", datetime(2021, 10, 10, 13), 1.0, 4.0, 2.0, 3.0, 5.0)
+
+    # THEN it should be replaced rather than added
+    df = buffer.getCandles()
+    assert len(df) == 300
+    assert df.iloc[-1][["granularity", "low", "high", "open", "close", "volume"]].tolist() == ["1h", 1.0, 4.0, 2.0, 3.0, 5.0]
+
+
+def test_should_only_build_data_frames_on_change():
+    # GIVEN a buffer with candles and tickers
+    buffer = CandleBuffer(Granularity.ONE_HOUR)
+    buffer.load(make_history())
+    buffer.ticker("BTC-GBP", datetime(2021, 10, 10, 13, 30, 0), 130.5)
+    candles = buffer.getCandles()
+    tickers = buffer.getTickers()
+
+    # WHEN they are read again without any messages
+    # THEN the same data frames should be returned
+    assert buffer.getCandles() is candles
+    assert buffer.getTickers() is tickers
+
+    # WHEN a trade arrives
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 13, 31, 0), 130.6, 0.1)
+
+    # THEN the candles should be rebuilt
+    assert buffer.getCandles() is not candles
+    assert candles["close"].iloc[-1] == 130.0
+    assert buffer.getCandles()["close"].iloc[-1] == 130.6
+
+
+def test_should_notify_candle_close_and_price_moves():
+    # GIVEN a buffer with the market history and a listener of one market
+    buffer = CandleBuffer(Granularity.ONE_HOUR)
+    buffer.load(pd.concat([make_history("BTC-GBP"), make_history("ETH-GBP")]))
+    events = []
+    buffer.addListener("BTC-GBP", lambda market, event: events.append((market, event)), 0.1)
+
+    # WHEN the markets trade in the open candle, then in a new candle
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 13, 30, 0), 120.0, 0.5)
+    buffer.ticker("BTC-GBP", datetime(2021, 10, 10, 13, 30, 0), 120.0)
+    buffer.ticker("BTC-GBP", datetime(2021, 10, 10, 13, 40, 0), 120.1)
+    buffer.ticker("ETH-GBP", datetime(2021, 10, 10, 13, 45, 0), 150.0)
+    buffer.ticker("BTC-GBP", datetime(2021, 10, 10, 13, 50, 0), 120.2)
+    buffer.trade("ETH-GBP", datetime(2021, 10, 10, 14, 0, 1), 150.0, 0.5)
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 0, 5), 120.2, 0.5)
+    buffer.trade("BTC-GBP", datetime(2021, 10, 10, 14, 0, 10), 120.3, 0.5)
+
+    # THEN the listener should only be called for a move of 0.1% and the candle close of its market
+    assert events == [("BTC-GBP", "price"), ("BTC-GBP", "candle")]
+
+
+def test_should_serve_websocket_messages(mocker):
+    # GIVEN a websocket client for a market
+    history = mocker.patch.object(PublicAPI, "getHistoricalData", return_value=make_history())
+    client = WebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR)
+    client.on_open()
+
+    # WHEN trades are received
+    for second, price in enumerate(["120.50", "121.00", "119.75"]):
+        client.on_message(
+            {"time": f"2021-10-10T14:00:0{second}.123456Z", "product_id": "BTC-GBP", "price": price, "size": "0.5"}
+        )
+
+    # THEN the history should be requested once and the candles and tickers updated
+    assert history.call_count == 1
+    assert len(client.candles) == 300
+    assert client.candles.iloc[-1][["low", "high", "open", "close", "volume"]].tolist() == [119.75, 121.0, 121.0, 119.75, 1.0]
+    assert client.tickers[["market", "price"]].values.tolist() == [["BTC-GBP", 119.75]]
+    assert client.tickers["candle"].iloc[0] == pd.Timestamp("2021-10-10 14:00:00")
+
+    # WHEN the websocket fails
+    mocker.patch.object(Logger, "error")
+    client.on_error(Exception("connection lost"))
+
+    # THEN the candles and tickers should be cleared
+    assert client.candles is None
+    assert client.tickers is None
@@ -0,0 +1,181 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleCache import CandleCache
+from models.PyCryptoBot import PyCryptoBot
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+
+
+def make_history(end: str = "2021-10-10 13:00:00", market: str = "BTCGBP", freq: str = "H") -> pd.DataFrame:
+    tsidx = pd.date_range(end=end, periods=300, freq=freq, name="ts")
+    close = np.linspace(130, 100, 300)
+
+    return pd.DataFrame(
+        {
+            "date": tsidx,
+            "market": market,
+            "granularity": "1h",
+            "low": close - 1,
+            "high": close + 1,
+            "open": close + 0.5,
+            "close": close,
+            "volume": close / 10,
+        },
+        index=tsidx,
+    )
+
+
+def epoch(date: str) -> float:
+    return pd.Timestamp(date).timestamp()
+
+
+def test_should_fetch_once_per_candle(mocker):
+    # GIVEN a cache of hourly candles fetched at 13:10
+    fetch = mocker.Mock(side_effect=lambda market, granularity: make_history())
+    cache = CandleCache(fetch)
+    clock = mocker.patch("models.CandleCache.time.time", return_value=epoch("2021-10-10 13:10:00"))
+    cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+
+    # WHEN the candles are asked for again before the candle closes
+    clock.return_value = epoch("2021-10-10 13:59:59")
+    cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+
+    # THEN they should not be fetched again
+    assert fetch.call_count == 1
+
+    # WHEN the candle closes
+    clock.return_value = epoch("2021-10-10 14:00:01")
+    cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+
+    # THEN they should be fetched again
+    assert fetch.call_count == 2
+
+    # AND as the exchange has not opened the 14:00 candle yet, fetched again a minute later
+    clock.return_value = epoch("2021-10-10 14:00:30")
+    cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+    assert fetch.call_count == 2
+    clock.return_value = epoch("2021-10-10 14:01:02")
+    cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+    assert fetch.call_count == 3
+
+
+def test_should_update_open_candle_from_websocket(mocker):
+    # GIVEN a cached value calculated from hourly candles
+    cache = CandleCache(lambda market, granularity: make_history())
+    mocker.patch("models.CandleCache.time.time", return_value=epoch("2021-10-10 13:10:00"))
+    calculate = mocker.Mock(side_effect=lambda df: float(df["close"].iloc[-1]))
+    assert cache.getValue("BTCGBP", Granularity.ONE_HOUR, calculate) == 100.0
+
+    # WHEN five minute websocket candles of the open candle are added
+    candles = make_history("2021-10-10 13:10:00", freq="5T")
+    candles.loc[candles.index[-2], "high"] = 200.0
+    candles.loc[candles.index[-1], "close"] = 150.0
+    value = cache.getValue("BTCGBP", Granularity.ONE_HOUR, calculate, candles)
+
+    # THEN the open candle should include them
+    df = cache.getHistoricalData("BTCGBP", Granularity.ONE_HOUR)
+    assert value == 150.0
+    assert df["high"].iloc[-1] == 200.0 and df["low"].iloc[-1] == 99.0
+    assert df["close"].iloc[-2] == make_history()["close"].iloc[-2]
+
+    # AND the value should only be calculated again when they change
+    cache.getValue("BTCGBP", Granularity.ONE_HOUR, calculate, candles)
+    assert calculate.call_count == 2
+
+
+def test_should_check_trend_once_per_candle(mocker):
+    # GIVEN a live bot in a rising market
+    app = PyCryptoBot(exchange=Exchange.BINANCE)
+    app.market = "BTCGBP"
+    df = make_history()
+    df["close"] = df["close"].to_numpy()[::-1]
+    fetch = mocker.patch.object(app, "_getHistoricalData", return_value=df)
+    mocker.patch("models.CandleCache.time.time", return_value=epoch("2021-10-10 13:10:00"))
+
+    # WHEN the trends are checked on every iteration
+    results = [
+        (app.is1hEMA1226Bull(str(datetime.now())), app.is1hSMA50200Bull(str(datetime.now())))
+        for _ in range(5)
+    ]
+
+    # THEN the hourly candles should be fetched once
+    assert results == [(True, True)] * 5
+    fetch.assert_called_once_with("BTCGBP", Granularity.ONE_HOUR, None)
+
+
+def test_should_fetch_granularities_in_parallel(mocker):
+    # GIVEN a cache whose hourly fetch waits for the six hour fetch to start
+    six_hours = Event()
+
+    def fetch(market, granularity):
+        if granularity == Granularity.SIX_HOURS:
+            six_hours.set()
+        else:
+            assert six_hours.wait(5)
+        return make_history()
+
+    cache = CandleCache(fetch)
+    mocker.patch("models.CandleCache.time.time", return_value=epoch("2021-10-10 13:10:00"))
+    calculate = mocker.Mock(return_value=1.0)
+
+    # WHEN the values of both granularities are asked for at once
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = [
+            executor.submit(cache.getValue, "BTCGBP", granularity, calculate)
+            for granularity in (Granularity.ONE_HOUR, Granularity.SIX_HOURS, Granularity.ONE_HOUR)
+        ]
+
+        # THEN they should be fetched in parallel, each value calculated once
+        assert [result.result(10) for result in results] == [1.0] * 3
+    assert calculate.call_count == 2
+
+
+def test_should_check_simulation_trend_at_simulation_date(mocker):
+    # GIVEN a simulation whose 1h candles fall, then rise, and no 1h candles loaded yet
+    app = PyCryptoBot(exchange=Exchange.BINANCE)
+    app.is_sim = 1
+    app.market = "BTCGBP"
+    app.granularity = Granularity.ONE_HOUR
+    app.simstartdate = "2021-10-01 00:00:00"
+    app.simenddate = "2021-10-20 00:00:00"
+    app.sma50200_1h_cache = None
+    tsidx = pd.date_range("2021-09-01 00:00:00", "2021-10-20 00:00:00", freq="H", name="ts")
+    close = np.r_[np.linspace(200, 100, 800), np.linspace(100, 300, len(tsidx) - 800)]
+    history = pd.DataFrame(
+        {
+            "date": tsidx,
+            "market": "BTCGBP",
+            "granularity": "1h",
+            "low": close - 1,
+            "high": close + 1,
+            "open": close,
+            "close": close,
+            "volume": 1.0,
+        },
+        index=tsidx,
+    )
+
+    def getHistoricalData(market, granularity, websocket, iso8601start="", iso8601end=""):
+        return history[(history["date"] >= iso8601start) & (history["date"] <= iso8601end)]
+
+    fetch = mocker.patch.object(app, "getHistoricalData", side_effect=getHistoricalData)
+
+    # WHEN the trend is checked at dates of the simulation
+    trends = [app.is1hSMA50200Bull(date) for date in ("2021-10-02 00:00:00", "2021-10-19 00:00:00")]
+
+    # THEN the trend should be the one at each date, from 1h candles fetched once for the whole simulation
+    assert trends == [False, True]
+    assert all(call.args[3] != "" and call.args[4] != "" for call in fetch.call_args_list)
+    assert app.sma50200_1h_cache["date"].iloc[0] == pd.Timestamp("2021-09-18 12:00:00")
+    assert app.sma50200_1h_cache["date"].iloc[-1] == pd.Timestamp("2021-10-20 00:00:00")
+    calls = fetch.call_count
+    app.is1hSMA50200Bull("2021-10-10 00:00:00")
+    assert fetch.call_count == calls
@@ -0,0 +1,86 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleResampler import resampleCandles
+from models.PyCryptoBot import PyCryptoBot
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+
+
+def test_should_aggregate_candles(make_candles):
+    # GIVEN 15 minute candles starting in the middle of a 6 hour candle, with a gap
+    df = make_candles(200, 7, "BTCGBP", "15m", start="2021-10-10 03:45:00", freq="15T")
+    df = df.drop(df.index[50:54])
+
+    # WHEN they are resampled to 6 hours
+    resampled = resampleCandles(df, Granularity.SIX_HOURS, "6h")
+
+    # THEN they should be the candles of the exchange aligned 6 hour periods
+    expected = (
+        df[df["date"] >= "2021-10-10 06:00:00"]
+        .resample("6H")
+        .agg({"low": "min", "high": "max", "open": "first", "close": "last", "volume": "sum"})
+    )
+    assert list(resampled["date"]) == list(expected.index)
+    assert resampled["date"].iloc[0] == pd.Timestamp("2021-10-10 06:00:00")
+    for column in ("low", "high", "open", "close", "volume"):
+        np.testing.assert_allclose(resampled[column], expected[column])
+    assert (resampled["granularity"] == "6h").all() and (resampled["market"] == "BTCGBP").all()
+    # AND the last candle should be kept while still open
+    assert resampled["date"].iloc[-1] == pd.Timestamp("2021-10-12 00:00:00")
+
+    # AND the first candle should only be kept when asked for
+    assert resampleCandles(df, Granularity.SIX_HOURS, drop_partial=False)["date"].iloc[0] == pd.Timestamp(
+        "2021-10-10 00:00:00"
+    )
+
+
+def test_should_download_only_the_finest_simulation_data(mocker, make_candles):
+    # GIVEN a simulation on Binance, the exchange having every granularity
+    app = PyCryptoBot(exchange=Exchange.BINANCE)
+    app.is_sim = 1
+    app.simresultonly = True
+    app.sell_smart_switch = 0
+    app.ema1226_15m_cache = app.ema1226_1h_cache = app.ema1226_6h_cache = None
+    history = {
+        Granularity.FIFTEEN_MINUTES: make_candles(5000, 7, "BTCGBP", "15m", start="2021-09-01 00:00:00", freq="15T"),
+        Granularity.ONE_HOUR: resampleCandles(
+            make_candles(8000, 7, "BTCGBP", "1h", start="2021-08-01 00:00:00", freq="H"),
+            Granularity.ONE_HOUR,
+            "1h",
+        ),
+        Granularity.SIX_HOURS: resampleCandles(
+            make_candles(8000, 7, "BTCGBP", "1h", start="2021-06-01 00:00:00", freq="H"),
+            Granularity.SIX_HOURS,
+            "6h",
+        ),
+    }
+
+    def getHistoricalData(market, granularity, websocket, iso8601start="", iso8601end=""):
+        df = history[granularity]
+        return df[(df["date"] >= iso8601start) & (df["date"] <= iso8601end)].head(300)
+
+    fetch = mocker.patch.object(app, "getHistoricalData", side_effect=getHistoricalData)
+
+    # WHEN the smart switch data is loaded for a day
+    df = app.getSmartSwitchHistoricalDataChained(
+        "BTCGBP", Granularity.ONE_HOUR, "2021-10-01T00:00:00", "2021-10-02T00:00:00"
+    )
+
+    # THEN the higher granularities should only be downloaded before the 15 minute candles
+    fetched = [call.args[1] for call in fetch.call_args_list]
+    assert fetched.count(Granularity.ONE_HOUR) == 1 and fetched.count(Granularity.SIX_HOURS) == 1
+    first = app.ema1226_15m_cache["date"].iloc[0]
+    assert pd.Timestamp("2021-09-18 12:00:00") < first < pd.Timestamp("2021-10-01 00:00:00")
+
+    # AND the hourly candles should be the 15 minute candles resampled, after 300 hours downloaded
+    resampled = df[df["date"] >= first]
+    expected = resampleCandles(app.ema1226_15m_cache, Granularity.ONE_HOUR, "1h")
+    assert df["date"].iloc[0] == pd.Timestamp("2021-09-18 12:00:00")
+    assert df["date"].is_monotonic_increasing and not df["date"].duplicated().any()
+    assert resampled.equals(expected)
+    assert len(app.ema1226_6h_cache) > 300
@@ -0,0 +1,175 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleStore import CandleStore
+from models.PyCryptoBot import PyCryptoBot
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+
+
+class Exchange1h:
+    """1h candles as the exchange APIs return them, recording every request"""
+
+    def __init__(self, first_candle: str = "2021-01-01 00:00:00"):
+        self.first_candle = pd.Timestamp(first_candle)
+        self.requests = []
+
+    def fetch(self, iso8601start: str, iso8601end: str) -> pd.DataFrame:
+        self.requests.append((iso8601start, iso8601end))
+
+        start = max(pd.Timestamp(iso8601start).ceil("H"), self.first_candle)
+        end = pd.Timestamp(iso8601end)
+        tsidx = pd.date_range(start, end, freq="H", name="ts") if start <= end else pd.DatetimeIndex([], name="ts")
+        hours = ((tsidx - pd.Timestamp("2021-01-01")) // pd.Timedelta(hours=1)).to_numpy(dtype="float64")
+        close = 30000 + 100 * np.sin(hours / 10)
+
+        return pd.DataFrame(
+            {
+                "date": tsidx,
+                "market": "BTC-GBP",
+                "granularity": 3600,
+                "low": close - 50,
+                "high": close + 50,
+                "open": close - 10,
+                "close": close,
+                "volume": hours + 0.5,
+            },
+            index=tsidx,
+        )
+
+
+def test_should_fetch_pages_once(tmp_path):
+    # GIVEN an empty store
+    exchange = Exchange1h()
+    store = CandleStore(str(tmp_path), Exchange.COINBASEPRO, "BTC-GBP", Granularity.ONE_HOUR)
+
+    # WHEN 700 candles are requested twice
+    first = store.getHistoricalData("2021-02-01T00:00:00", "2021-03-01T03:00:00", exchange.fetch)
+    first_requests = list(exchange.requests)
+    exchange.requests.clear()
+    second = store.getHistoricalData("2021-02-01T00:00:00", "2021-03-01T03:00:00", exchange.fetch)
+
+    # THEN they should be fetched in pages of 300 the first time only
+    assert first_requests == [
+        ("2021-02-01T00:00:00", "2021-02-13T11:00:00"),
+        ("2021-02-13T12:00:00", "2021-02-25T23:00:00"),
+        ("2021-02-26T00:00:00", "2021-03-01T03:00:00"),
+    ]
+    assert exchange.requests == []
+    expected = Exchange1h().fetch("2021-02-01T00:00:00", "2021-03-01T03:00:00")
+    assert_frame_equal(first, expected)
+    assert_frame_equal(second, expected)
+
+
+def test_should_only_fetch_missing_ranges(tmp_path):
+    # GIVEN a store with two separate ranges
+    exchange = Exchange1h()
+    store = CandleStore(str(tmp_path), Exchange.COINBASEPRO, "BTC-GBP", Granularity.ONE_HOUR)
+    store.getHistoricalData("2021-02-01T00:00:00", "2021-02-02T00:00:00", exchange.fetch)
+    store.getHistoricalData("2021-02-03T00:00:00", "2021-02-04T00:00:00", exchange.fetch)
+    exchange.requests.clear()
+
+    # WHEN a range covering both is requested
+    df = store.getHistoricalData("2021-01-31T12:00:00", "2021-02-04T12:00:00", exchange.fetch)
+
+    # THEN only the gaps should be fetched
+    assert exchange.requests == [
+        ("2021-01-31T12:00:00", "2021-01-31T23:00:00"),
+        ("2021-02-02T01:00:00", "2021-02-02T23:00:00"),
+        ("2021-02-04T01:00:00", "2021-02-04T12:00:00"),
+    ]
+    assert_frame_equal(df, Exchange1h().fetch("2021-01-31T12:00:00", "2021-02-04T12:00:00"))
+
+
+def test_should_fetch_empty_ranges_again(tmp_path):
+    # GIVEN a market listed after the start of the requested range
+    exchange = Exchange1h(first_candle="2021-02-01 00:00:00")
+    store = CandleStore(str(tmp_path), Exchange.COINBASEPRO, "BTC-GBP", Granularity.ONE_HOUR)
+    store.getHistoricalData("2021-01-01T00:00:00", "2021-02-02T00:00:00", exchange.fetch)
+    exchange.requests.clear()
+
+    # WHEN the range is requested again
+    df = store.getHistoricalData("2021-01-01T00:00:00", "2021-02-02T00:00:00", exchange.fetch)
+
+    # THEN only the pages without candles should be fetched again
+    assert exchange.requests == [
+        ("2021-01-01T00:00:00", "2021-01-13T11:00:00"),
+        ("2021-01-13T12:00:00", "2021-01-25T23:00:00"),
+    ]
+    assert df.index[0] == pd.Timestamp("2021-02-01 00:00:00")
+    assert len(df) == 25
+
+
+def test_should_keep_ranges_of_bots_filling_at_once(tmp_path):
+    # GIVEN two bots sharing a store and a slow exchange
+    exchange = Exchange1h()
+
+    def slow_fetch(iso8601start: str, iso8601end: str) -> pd.DataFrame:
+        time.sleep(0.05)
+        return exchange.fetch(iso8601start, iso8601end)
+
+    stores = [
+        CandleStore(str(tmp_path), Exchange.COINBASEPRO, "BTC-GBP", Granularity.ONE_HOUR)
+        for _ in range(2)
+    ]
+
+    # WHEN they fill different ranges at the same time
+    ranges = [("2021-02-01T00:00:00", "2021-02-10T00:00:00"), ("2021-03-01T00:00:00", "2021-03-10T00:00:00")]
+    bots = [
+        threading.Thread(target=store.getHistoricalData, args=(start, end, slow_fetch))
+        for store, (start, end) in zip(stores, ranges)
+    ]
+    for bot in bots:
+        bot.start()
+    for bot in bots:
+        bot.join()
+    exchange.requests.clear()
+
+    # THEN both ranges should be stored
+    df = pd.concat([stores[0].getHistoricalData(start, end, exchange.fetch) for start, end in ranges])
+    assert exchange.requests == []
+    assert len(df) == 2 * (9 * 24 + 1)
+
+
+def test_should_not_store_open_candle(tmp_path):
+    # GIVEN an empty store
+    exchange = Exchange1h()
+    store = CandleStore(str(tmp_path), Exchange.COINBASEPRO, "BTC-GBP", Granularity.ONE_HOUR)
+    open_candle = pd.Timestamp.utcnow().tz_localize(None).floor("H")
+    start = (open_candle - pd.Timedelta(hours=5)).strftime("%Y-%m-%dT%H:%M:%S")
+    end = open_candle.strftime("%Y-%m-%dT%H:%M:%S")
+
+    # WHEN a range up to the open candle is requested twice
+    store.getHistoricalData(start, end, exchange.fetch)
+    exchange.requests.clear()
+    df = store.getHistoricalData(start, end, exchange.fetch)
+
+    # THEN only the open candle should be fetched again
+    assert exchange.requests == [(end, end)]
+    assert len(df) == 6
+    assert df.index[-1] == open_candle
+
+
+def test_should_use_store_for_date_ranges(mocker, tmp_path):
+    # GIVEN a bot with a candle store
+    app = PyCryptoBot()
+    mocker.patch.object(app, "candlestore", str(tmp_path))
+    exchange = Exchange1h()
+    fetch = mocker.patch.object(
+        app, "_getHistoricalData", side_effect=lambda market, granularity, websocket, start, end: exchange.fetch(start, end)
+    )
+
+    # WHEN the same date range is requested twice
+    first = app.getHistoricalData("BTC-GBP", Granularity.ONE_HOUR, None, "2021-02-01T00:00:00", "2021-02-02T00:00:00")
+    second = app.getHistoricalData("BTC-GBP", Granularity.ONE_HOUR, None, "2021-02-01T00:00:00", "2021-02-02T00:00:00")
+
+    # THEN the exchange should be called once
+    assert fetch.call_count == 1
+    assert_frame_equal(first, second)
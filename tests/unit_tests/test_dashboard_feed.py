@@ -0,0 +1,72 @@
+import sys
+from datetime import datetime
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.helper.DashboardHelper import DashboardFeed, getBotRow
+from models.helper.StateStoreHelper import StateStore
+
+
+def bot_data(signal: str = "WAIT", margin: str = " ", status: str = "active") -> dict:
+    return {
+        "botcontrol": {"status": status, "started": datetime.now().isoformat()},
+        "exchange": "binance",
+        "signal": signal,
+        "price": 1.5,
+        "margin": margin,
+        "df_high": 2.0,
+        "from_df_high": "-25%",
+        "trailingstoplosstriggered": False,
+        "indicators": {"EMA": True},
+    }
+
+
+def test_should_build_row():
+    # GIVEN the state of a bot in a trade
+    data = bot_data("SELL", margin="1.5%")
+
+    # WHEN its row is built
+    row = getBotRow("BTCGBP", data)
+
+    # THEN the percentages should be numbers and the margin colored
+    assert row["Uptime"] == "0h 0m"
+    assert row["Margin"] == 0.015 and row["From DF High"] == -0.25
+    assert row["Margincolor"] == "#3D9970"
+    assert row["TSLT"] == "False" and row["PVLT"] == "" and row["EMA"] == "True"
+
+    # AND a bot that has not reported should have no row
+    assert getBotRow("BTCGBP", {"botcontrol": {}, "margin": " "}) is None
+
+
+def test_should_send_changed_rows(tmp_path):
+    # GIVEN a page that received the rows of three bots
+    store = StateStore(str(tmp_path))
+    for market in ("BTCGBP", "ETHGBP", "LTCGBP"):
+        store.putBot(market, bot_data())
+    store.putBot("ADAGBP", bot_data(status="paused"))
+    feed = DashboardFeed(store, min_interval=0)
+    client, rows, changed = feed.getDelta(None)
+    assert [row["Trading Pair"] for row in rows] == ["BTCGBP", "ETHGBP", "LTCGBP"]
+
+    # WHEN nothing changes
+    # THEN nothing should be sent
+    assert feed.getDelta(client) == (client, None, {})
+
+    # WHEN a bot changes without changing the order of the rows
+    store.updateBot("ETHGBP", lambda data: data.update({"price": 1.6}))
+
+    # THEN only its row should be sent
+    client, rows, changed = feed.getDelta(client)
+    assert rows is None
+    assert list(changed) == [1] and changed[1]["Current Price"] == 1.6
+
+    # WHEN a bot's action changes the order of the rows
+    store.updateBot("LTCGBP", lambda data: data.update({"signal": "BUY"}))
+
+    # THEN every row should be sent
+    client, rows, changed = feed.getDelta(client)
+    assert [row["Trading Pair"] for row in rows] == ["LTCGBP", "BTCGBP", "ETHGBP"]
+    assert rows[0]["Action"] == "BUY"
+
+    # AND a page of another feed should be sent every row
+    assert DashboardFeed(store).getDelta(client)[1] is not None
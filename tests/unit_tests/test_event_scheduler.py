@@ -0,0 +1,33 @@
+import sys
+import threading
+import time
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.EventScheduler import EventScheduler
+
+
+def test_should_run_triggered_job_straight_away():
+    # GIVEN a job scheduled in a minute
+    sc = EventScheduler()
+    app = object()
+    runs = []
+
+    def job(sc, app):
+        runs.append(time.time())
+        if len(runs) == 1:
+            # triggered while running, so the next run is not in a minute
+            sc.trigger(app)
+            sc.enter(60, 1, job, (sc, app))
+
+    sc.enter(60, 1, job, (sc, app))
+
+    # WHEN another thread triggers the job
+    start = time.time()
+    threading.Timer(0.1, sc.trigger, (app,)).start()
+    sc.run()
+
+    # THEN it should run after the trigger, and again after a trigger while it was running
+    assert len(runs) == 2
+    assert runs[0] - start < 1
+    assert runs[1] - start < 1
@@ -0,0 +1,93 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Forecaster import ARIMAForecaster
+from models.exchange.Granularity import Granularity
+
+
+def make_closes(length: int = 330, seed: int = 3) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+    tsidx = pd.date_range("2021-10-01 00:00:00", periods=length, freq="H", name="ts")
+    return pd.Series(close, index=tsidx, name="close")
+
+
+def sarimax(closes: pd.Series) -> SARIMAX:
+    return SARIMAX(closes.to_numpy(), trend="n", order=(0, 1, 0), seasonal_order=(1, 1, 1, 12))
+
+
+def test_should_forecast_steps_ahead():
+    # GIVEN 300 candles, the last one open
+    closes = make_closes().head(300)
+    forecaster = ARIMAForecaster(Granularity.ONE_HOUR, steps=3)
+
+    # WHEN the close price is forecast
+    date, price = forecaster.forecast(closes)
+
+    # THEN it should be the forecast of a model fitted to the closed candles
+    results = sarimax(closes.iloc[:-1]).fit(disp=-1)
+    expected = results.append(closes.to_numpy()[-1:]).forecast(3)[-1]
+    assert price == pytest.approx(expected, rel=1e-6)
+    assert date == "2021-10-13 14:00:00"
+
+
+def test_should_reuse_parameters_until_refit_is_due(mocker):
+    # GIVEN a forecaster refitting every 10 candles, fitted to 300 candles
+    closes = make_closes()
+    forecaster = ARIMAForecaster(Granularity.ONE_HOUR, refit_interval=10)
+    fit = mocker.spy(forecaster, "_fit")
+    forecaster.forecast(closes.head(300))
+    params = forecaster._params
+
+    # WHEN the open candle is revised and 9 more candles close
+    forecaster.forecast(closes.head(300).mul(1.01))
+    for end in range(301, 310):
+        date, price = forecaster.forecast(closes.head(end))
+
+    # THEN the parameters should not be refitted
+    assert fit.call_count == 1
+    # AND the new candles should be appended to the model with the same parameters
+    expected = sarimax(closes.head(308)).filter(params).append(closes.to_numpy()[308:309]).forecast(3)[-1]
+    assert price == pytest.approx(expected, rel=1e-9)
+
+    # WHEN the 10th candle closes
+    forecaster.forecast(closes.head(311))
+
+    # THEN the model should be refitted, starting from the previous parameters
+    assert fit.call_count == 2
+    assert forecaster._results.nobs == 310
+
+
+def test_should_not_wait_for_fit(mocker):
+    # GIVEN a fit that takes until it is released
+    release = threading.Event()
+    forecaster = ARIMAForecaster(Granularity.ONE_HOUR)
+    fit = forecaster._fit
+    mocker.patch.object(forecaster, "_fit", side_effect=lambda closed: (release.wait(5), fit(closed)))
+
+    # WHEN the candles are queued
+    start = time.time()
+    forecaster.update(make_closes().head(300).to_frame())
+
+    # THEN no prediction should be available yet, without waiting
+    assert time.time() - start < 0.5
+    assert forecaster.getPrediction() is None
+
+    # WHEN the fit finishes
+    release.set()
+    for _ in range(100):
+        if forecaster.getPrediction() is not None:
+            break
+        time.sleep(0.05)
+    forecaster.stop()
+
+    # THEN the prediction should be available
+    assert forecaster.getPrediction()[0] == "2021-10-13 14:00:00"
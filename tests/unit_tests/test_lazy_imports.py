@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+# imported on first use, see tests/benchmarks/import_report.py
+DEFERRED = (
+    "statsmodels",
+    "scipy",
+    "matplotlib",
+    "views.TradingGraphs",
+    "models.WebSocketHub",
+    "models.exchange.binance",
+    "models.exchange.coinbase_pro",
+    "models.exchange.kucoin",
+)
+
+
+def test_should_not_import_optional_dependencies_at_startup():
+    # GIVEN a new interpreter
+    code = f"import sys, pycryptobot; print([m for m in {DEFERRED!r} if m in sys.modules])"
+
+    # WHEN the bot is imported
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    # THEN graphs, ARIMA models and the exchange clients should only be imported on first use
+    assert process.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,94 @@
+import json
+import sys
+
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+import pycryptobot
+from models.helper.LogHelper import Logger
+from models.MarketScheduler import MarketScheduler
+from models.PyCryptoBot import PyCryptoBot
+
+
+def make_app(mocker, market: str, autorestart: bool = False):
+    app = mocker.Mock()
+    app.getMarket.return_value = market
+    app.autoRestart.return_value = autorestart
+    app.disableTelegramErrorMsgs.return_value = True
+    return app
+
+
+def test_should_stop_only_the_failing_market(mocker):
+    # GIVEN a market that exits, one that raises and one that restarts after an exception
+    sc = MarketScheduler(restart_delay=0)
+    runs = {"BTC-GBP": 0, "ETH-GBP": 0, "LTC-GBP": 0}
+
+    def job(sc, app):
+        market = app.getMarket()
+        runs[market] += 1
+        if market == "BTC-GBP" and runs[market] == 2:
+            sys.exit(0)
+        if market == "ETH-GBP":
+            raise ValueError("API error")
+        if market == "LTC-GBP" and runs[market] == 2:
+            raise ConnectionError("connection reset")
+        if runs[market] < 4:
+            sc.enter(0, 1, job, (sc, app))
+
+    for market in runs:
+        sc.enter(0, 1, job, (sc, make_app(mocker, market, autorestart=market == "LTC-GBP")))
+    critical = mocker.patch.object(Logger, "critical")
+    mocker.patch.object(Logger, "warning")
+
+    # WHEN the jobs are run
+    sc.run()
+
+    # THEN the other markets should keep running when one stops
+    assert runs["BTC-GBP"] == 2 and runs["ETH-GBP"] == 1
+    # AND a market with autorestart should be run again
+    assert runs["LTC-GBP"] == 4
+    assert [call.args[0].split(" ")[0] for call in critical.call_args_list] == ["ETH-GBP", "Restarting"]
+    assert sc.getMarkets() == []
+
+
+def test_should_run_markets_in_one_process(monkeypatch, mocker, tmp_path, make_candles):
+    # GIVEN a result only simulation of two markets in one process
+    candles = {
+        "BTC-GBP": make_candles(480, 3, "BTC-GBP"),
+        "ETH-GBP": make_candles(480, 5, "ETH-GBP"),
+    }
+    app = pycryptobot.app
+    for option, value in {
+        "is_sim": 1,
+        "simresultonly": True,
+        "sim_speed": "fast",
+        "smart_switch": 0,
+        "market": "BTC-GBP",
+        "appStarted": True,
+        "simstartdate": str(candles["BTC-GBP"].index[300]),
+        "tradesfile": str(tmp_path / "trades.csv"),
+        "sma50200_1h_cache": candles["BTC-GBP"],
+        "disablebullonly": True,
+        "markets": {"BTC-GBP": {}, "ETH-GBP": {"sellupperpcnt": 2}},
+    }.items():
+        monkeypatch.setattr(app, option, value, raising=False)
+    sell_upper_pcnt = {}
+
+    def start_app(_app, account, last_action):
+        sell_upper_pcnt[_app.getMarket()] = _app.sellUpperPcnt()
+        return candles[_app.getMarket()].copy()
+
+    mocker.patch.object(PyCryptoBot, "startApp", side_effect=start_app)
+    info = mocker.patch.object(Logger, "info")
+
+    # WHEN the bot is started
+    pycryptobot.main()
+
+    # THEN each market should be simulated with its own options and state
+    summaries = [json.loads(call.args[0]) for call in info.call_args_list if str(call.args[0]).startswith("{")]
+    assert len(summaries) == 2
+    assert sell_upper_pcnt == {"BTC-GBP": None, "ETH-GBP": 2}
+    for market in candles:
+        trades = pd.read_csv(tmp_path / f"{market}-trades.csv")
+        assert len(trades) > 0 and set(trades["Market"]) == {market}
@@ -0,0 +1,90 @@
+import json
+import socket
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.helper.MetricsHelper import Metrics
+from models.helper.SessionHelper import SessionHelper
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    Metrics.reset()
+    yield
+    Metrics.reset()
+    Metrics.configure()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_should_keep_latency_percentiles():
+    # GIVEN stage latencies of 1 to 100 ms
+    for ms in range(1, 101):
+        Metrics.observe("job.fetch", ms / 1000)
+
+    # WHEN the summary is taken
+    summary = Metrics.getSummary()["latency"]["job.fetch"]
+
+    # THEN it should have the count, total and percentiles
+    assert summary["count"] == 100
+    assert summary["sum"] == pytest.approx(5.05)
+    assert summary["p50"] == 0.051 and summary["p95"] == 0.096 and summary["max"] == 0.1
+
+
+def test_should_time_api_calls_by_endpoint(mocker):
+    # GIVEN a session whose requests are retried twice
+    SessionHelper.configure(rate_limit=False)
+    session = SessionHelper.getSession("coinbasepro")
+    resp = mocker.Mock(status_code=200)
+    resp.raw.retries.history = ("first", "second")
+    mocker.patch("requests.Session.request", return_value=resp)
+
+    # WHEN the candles of two markets are requested
+    session.get("https://api.pro.coinbase.com/products/BTC-GBP/candles?granularity=3600")
+    session.get("https://api.pro.coinbase.com/products/ETH-GBP/candles?granularity=3600")
+
+    # THEN both should be timed as one endpoint, with the retries counted
+    summary = Metrics.getSummary()
+    assert summary["latency"]["api.coinbasepro.GET /products/{id}/candles"]["count"] == 2
+    assert summary["counters"]["api.coinbasepro.retries"] == 4
+    SessionHelper.configure()
+
+
+def test_should_serve_and_log_metrics(mocker):
+    # GIVEN timed stages and the metrics endpoint
+    port = free_port()
+    Metrics.configure(port=port, log_interval=60)
+    with Metrics.timer("job.strategy"):
+        pass
+    Metrics.increment("api.binance.errors")
+
+    # WHEN the endpoint is requested
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+        text = resp.read().decode()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json") as resp:
+        summary = json.loads(resp.read())
+
+    # THEN it should serve the histograms and counters
+    assert 'pycryptobot_latency_seconds_count{name="job.strategy"} 1' in text
+    assert 'pycryptobot_latency_seconds_bucket{name="job.strategy",le="+Inf"} 1' in text
+    assert 'pycryptobot_events_total{name="api.binance.errors"} 1' in text
+    assert summary["latency"]["job.strategy"]["count"] == 1
+
+    # AND the summary should be logged once per interval
+    log = mocker.Mock()
+    clock = mocker.patch("models.helper.MetricsHelper.time.time", return_value=Metrics._next_summary - 1)
+    assert not Metrics.logSummary(log)
+    clock.return_value += 2
+    assert Metrics.logSummary(log) and not Metrics.logSummary(log)
+    assert [call.args[0].split(":")[0] for call in log.call_args_list] == [
+        "metrics job.strategy",
+        "metrics api.binance.errors",
+    ]
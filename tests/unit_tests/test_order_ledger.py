@@ -0,0 +1,75 @@
+import sys
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.OrderLedger import OrderLedger
+from models.exchange.binance import AuthAPI
+
+API_KEY = "0" * 64
+API_SECRET = "1" * 64
+
+
+def make_order(order_id: int, status: str = "FILLED") -> dict:
+    return {
+        "symbol": "BTCGBP",
+        "orderId": order_id,
+        "price": "0.00000000",
+        "origQty": "0.00100000",
+        "executedQty": "0.00100000",
+        "cummulativeQuoteQty": "30.00000000",
+        "status": status,
+        "type": "MARKET",
+        "side": "BUY" if order_id % 2 == 0 else "SELL",
+        "time": 1633046400000 + order_id * 60000,
+    }
+
+
+def test_should_resume_from_oldest_open_order(tmp_path):
+    # GIVEN a ledger with a filled, an open and a newer filled order
+    ledger = OrderLedger(str(tmp_path / "orders.db"))
+    orders = [make_order(1), make_order(2, "NEW"), make_order(3)]
+    ledger.addOrders("a", "BTCGBP", [(o["orderId"], o["time"], o["status"] == "FILLED", o) for o in orders])
+
+    # THEN the market should not be synced yet and the open order resumed from
+    assert not ledger.isSynced("a", "BTCGBP")
+    assert ledger.getResumeOrder("a", "BTCGBP")["orderId"] == 2
+
+    # WHEN the open order is filled and the sync completes
+    orders[1]["status"] = "FILLED"
+    ledger.addOrders("a", "BTCGBP", [(2, orders[1]["time"], True, orders[1])], synced=True)
+
+    # THEN the newest order should be resumed from, and the orders kept oldest first
+    assert ledger.isSynced("a", "BTCGBP")
+    assert ledger.getResumeOrder("a", "BTCGBP")["orderId"] == 3
+    assert ledger.getOrders("a", "BTCGBP") == orders
+    # AND the orders of other accounts should be kept apart
+    assert ledger.getOrders("b", "BTCGBP") == [] and ledger.getResumeOrder("b", "BTCGBP") is None
+
+
+def test_should_request_only_orders_since_last_sync(tmp_path, mocker):
+    # GIVEN a Binance account with 1500 orders, the last one still open
+    exchange = {"orders": [make_order(i) for i in range(1, 1500)] + [make_order(1500, "NEW")]}
+
+    def authAPI(method, uri, payload=""):
+        orders = [o for o in exchange["orders"] if o["orderId"] >= payload["orderId"]]
+        return orders[: payload["limit"]]
+
+    api = AuthAPI(API_KEY, API_SECRET, order_ledger=OrderLedger(str(tmp_path / "orders.db")))
+    request = mocker.patch.object(api, "authAPI", side_effect=authAPI)
+
+    # WHEN the orders are first retrieved
+    df = api.getOrders("BTCGBP", status="all")
+
+    # THEN the whole history should be paged through
+    assert len(df) == 1500
+    assert [call.args[2]["orderId"] for call in request.call_args_list] == [0, 1001]
+
+    # WHEN the open order is filled and a new order placed
+    exchange["orders"][-1] = make_order(1500)
+    exchange["orders"].append(make_order(1501))
+    request.reset_mock()
+    df = api.getOrders("BTCGBP", status="all")
+
+    # THEN only the orders from the open order on should be requested
+    assert [call.args[2]["orderId"] for call in request.call_args_list] == [1500]
+    assert len(df) == 1501 and list(df["status"].tail(2)) == ["done", "done"]
@@ -0,0 +1,133 @@
+import multiprocessing
+import sys
+import time
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.exchange.kucoin.api import AuthAPI as KAuthAPI
+from models.helper.RateLimitHelper import RateLimiter
+from models.helper.SessionHelper import SessionHelper
+
+
+def acquire_all(directory, count):
+    limiter = RateLimiter("test", 10, 0.2, directory=directory)
+    for _ in range(count):
+        limiter.acquire()
+
+
+def test_should_wait_for_tokens(tmp_path):
+    # GIVEN a limiter of 10 requests per 0.2 seconds
+    limiter = RateLimiter("test", 10, 0.2, directory=str(tmp_path))
+
+    # WHEN the bucket is used up
+    waits = [limiter.acquire() for _ in range(10)]
+
+    # THEN the next request should wait for a token
+    assert waits == [0] * 10
+    assert 0.01 < limiter.acquire() < 0.1
+
+
+def test_should_share_budget_between_processes(tmp_path):
+    # GIVEN four processes using the same limiter
+    processes = [
+        multiprocessing.get_context("fork").Process(target=acquire_all, args=(str(tmp_path), 10))
+        for _ in range(4)
+    ]
+
+    # WHEN they make 40 requests in total
+    start = time.time()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # THEN the 30 requests after the first bucket should take 0.6 seconds
+    assert time.time() - start >= 0.55
+
+
+def test_should_keep_within_exchange_window(tmp_path):
+    # GIVEN a limiter synchronised with the weight used by the exchange
+    limiter = RateLimiter("test", 100, 1, used_header="X-MBX-USED-WEIGHT-1M", directory=str(tmp_path))
+    limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "100"})
+    window_end = int(time.time()) + 1
+
+    # WHEN a request is made with tokens left in the bucket
+    limiter.acquire()
+
+    # THEN it should wait for the exchange's window to reset
+    assert time.time() >= window_end
+
+
+def test_should_block_after_rate_limit_response(tmp_path):
+    # GIVEN a limiter with tokens
+    limiter = RateLimiter("test", 100, 1, directory=str(tmp_path))
+
+    # WHEN the exchange responds with a 429
+    limiter.update(429, {"Retry-After": "0.2"})
+
+    # THEN requests should wait until the exchange allows them again
+    assert limiter.acquire() >= 0.19
+
+
+def test_should_weigh_binance_requests(mocker, tmp_path):
+    # GIVEN a Binance session with a rate limiter
+    SessionHelper.configure()
+    session = SessionHelper.getSession("binance")
+    session.limiter = RateLimiter.forExchange("binance", str(tmp_path))
+    acquire = mocker.spy(session.limiter, "acquire")
+    response = mocker.Mock(status_code=200, headers={"X-MBX-USED-WEIGHT-1M": "50"})
+    mocker.patch("requests.Session.request", return_value=response)
+
+    # WHEN the order history is requested
+    session.get("https://api.binance.com/api/v3/allOrders?symbol=BTCGBP")
+
+    # THEN the request should weigh 10 and the exchange's count be used
+    assert acquire.call_args.args == (10,)
+    with session.limiter._shared() as state:
+        assert state[2] == 1050
+    SessionHelper.configure()
+
+
+
+def test_should_pace_kucoin_pages_with_limiter(mocker, tmp_path):
+    # GIVEN a Kucoin session with a rate limiter and orders on three pages
+    SessionHelper.configure()
+    session = SessionHelper.getSession("kucoin")
+    session.limiter = RateLimiter.forExchange("kucoin", str(tmp_path))
+    acquire = mocker.spy(session.limiter, "acquire")
+    pages = [
+        mocker.Mock(
+            status_code=200,
+            headers={},
+            **{
+                "json.return_value": {
+                    "code": "200000",
+                    "data": {
+                        "currentPage": page,
+                        "pageSize": 1,
+                        "totalPage": 3,
+                        "items": [{"id": str(page), "createdAt": page}],
+                    },
+                }
+            },
+        )
+        for page in (1, 2, 3)
+    ]
+    mocker.patch("requests.Session.request", side_effect=pages)
+    sleep = mocker.patch("models.exchange.kucoin.api.time.sleep")
+    api = KAuthAPI(
+        "0123456789abcdef01234567",
+        "01234567-89ab-cdef-0123-456789abcdef",
+        "passphrase",
+        "https://api.kucoin.com",
+        use_cache=False,
+    )
+
+    # WHEN the orders are requested
+    df = api.authAPI("GET", "api/v1/orders?symbol=BTC-USDT", per_page=1, use_pagination=True)
+
+    # THEN every page should be requested through the limiter without a fixed wait
+    assert list(df["id"]) == ["3", "2", "1"]
+    assert acquire.call_count == 3
+    sleep.assert_not_called()
+    SessionHelper.configure()
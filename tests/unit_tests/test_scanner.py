@@ -0,0 +1,95 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.PyCryptoBot import PyCryptoBot
+from models.Scanner import Scanner
+from models.Trading import TechnicalAnalysis
+from models.exchange.ExchangesEnum import Exchange
+
+
+class FakePublicAPI:
+    """Binance public API answering after a delay, recording the concurrent requests"""
+
+    def __init__(self, markets: int):
+        self.markets = [f"COIN{i}USDT" for i in range(markets)]
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def getMarkets24HrStats(self):
+        stats = [
+            {"symbol": market, "lastPrice": str(100 + i), "quoteVolume": str(1000 * i)}
+            for i, market in enumerate(self.markets)
+        ]
+        return stats + [{"symbol": "COINBTC", "lastPrice": "1", "quoteVolume": "1"}]
+
+    def getHistoricalData(self, market, granularity, websocket):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+        time.sleep(0.05)
+
+        with self._lock:
+            self.active -= 1
+
+        seed = self.markets.index(market)
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, 300)))
+        tsidx = pd.date_range(end="2021-10-10 13:00:00", periods=300, freq="H", name="ts")
+        return pd.DataFrame(
+            {
+                "date": tsidx,
+                "market": market,
+                "granularity": "1h",
+                "low": close * 0.99,
+                "high": close * 1.01,
+                "open": close,
+                "close": close,
+                "volume": 10.0,
+            },
+            index=tsidx,
+        )
+
+
+def test_should_scan_markets_concurrently(mocker):
+    # GIVEN a scanner for 16 USDT markets, one without volume
+    api = FakePublicAPI(16)
+    app = PyCryptoBot(exchange=Exchange.BINANCE)
+    mocker.patch.object(app, "getPublicAPI", return_value=api)
+    scanner = Scanner(app, fetch_workers=4, analysis_workers=2, batch_size=4)
+    df_markets = scanner.getMarkets("USDT")
+    progress = []
+
+    # WHEN the markets are scanned
+    start = time.time()
+    df_results = scanner.scan(df_markets, lambda df, scanned, total: progress.append((scanned, total)))
+
+    # THEN the candles should be fetched four at a time
+    assert api.max_active == 4
+    assert time.time() - start < 16 * 0.05
+
+    # AND the results should be reported as each batch of markets is analysed
+    assert len(progress) >= 4
+    assert progress[-1] == (15, 15)
+    assert list(df_results.index) == sorted(api.markets)
+    assert df_results.loc["COIN0USDT", "buy_next"] is None
+
+    # AND the results should match the analysis of each market
+    for market in api.markets[1:]:
+        ta = TechnicalAnalysis(api.getHistoricalData(market, None, None))
+        ta.addEMA(12)
+        ta.addEMA(26)
+        ta.addATR(72)
+        df_last = ta.getDataFrame().iloc[-1]
+        price = df_markets.loc[market, "price"]
+
+        assert df_results.loc[market, "atr72"] == pytest.approx(df_last["atr72"])
+        assert df_results.loc[market, "atr72_pcnt"] == round(df_last["atr72"] / price * 100, 2)
+        assert df_results.loc[market, "buy_next"] == (df_last["ema12"] < df_last["ema26"])
@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.PyCryptoBot import PyCryptoBot
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.binance import AuthAPI as BAuthAPI, PublicAPI as BPublicAPI
+from models.exchange.coinbase_pro import PublicAPI as CBPublicAPI
+from models.helper.SessionHelper import SessionHelper
+
+
+@pytest.fixture(autouse=True)
+def sessions():
+    SessionHelper.configure()
+    yield
+    SessionHelper.configure()
+
+
+def test_should_share_session_per_exchange():
+    # GIVEN API clients of two exchanges
+    # WHEN they are created more than once
+    # THEN the clients of one exchange should share a session
+    assert CBPublicAPI()._session is CBPublicAPI()._session
+    assert BPublicAPI()._session is BAuthAPI("0" * 64, "0" * 64)._session
+    assert CBPublicAPI()._session is not BPublicAPI()._session
+
+
+def test_should_configure_pool_timeout_and_retries():
+    # GIVEN pool options
+    SessionHelper.configure(pool_size=4, timeout=5, retries=2, backoff=1)
+
+    # WHEN a session is created
+    session = SessionHelper.getSession("coinbasepro")
+
+    # THEN its adapter and default timeout should use them
+    adapter = session.get_adapter("https://api.pro.coinbase.com")
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 1
+    assert "POST" not in adapter.max_retries.allowed_methods
+    assert session.timeout == 5
+
+
+def test_should_apply_default_timeout(mocker):
+    # GIVEN a session with a default timeout
+    SessionHelper.configure(timeout=7)
+    session = SessionHelper.getSession("binance")
+    send = mocker.patch("requests.Session.request")
+
+    # WHEN requests are made with and without a timeout
+    session.get("https://api.binance.com/api/v3/time")
+    session.get("https://api.binance.com/api/v3/time", timeout=1)
+
+    # THEN the default should only apply when none is given
+    assert send.call_args_list[0].kwargs["timeout"] == 7
+    assert send.call_args_list[1].kwargs["timeout"] == 1
+
+
+def test_should_reuse_api_clients():
+    # GIVEN a bot
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+
+    # WHEN its API clients are requested twice
+    # THEN the same clients should be returned
+    assert app.getPublicAPI() is app.getPublicAPI()
+    assert app.getAuthAPI() is app.getAuthAPI()
+
+    # WHEN the API options change
+    public_api = app.getPublicAPI()
+    app.exchange = Exchange.BINANCE
+    app.api_url = "https://api.binance.com"
+
+    # THEN new clients should be created
+    assert isinstance(app.getPublicAPI(), BPublicAPI)
+    assert app.getPublicAPI() is not public_api
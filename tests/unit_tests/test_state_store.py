@@ -0,0 +1,157 @@
+import json
+import multiprocessing
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.PyCryptoBot import PyCryptoBot
+from models.exchange.ExchangesEnum import Exchange
+from models.helper.StateStoreHelper import StateStore
+from models.helper.TelegramBotHelper import TelegramBotHelper
+
+
+def bot_data(status: str = "active", margin: str = " ", ping: datetime = None, exchange: str = "binance") -> dict:
+    data = {
+        "botcontrol": {
+            "status": status,
+            "manualsell": False,
+            "manualbuy": False,
+            "started": (datetime.now() - timedelta(hours=1)).isoformat(),
+            "startmethod": "scanner",
+        },
+        "exchange": exchange,
+        "margin": margin,
+    }
+    if ping is not None:
+        data["botcontrol"]["watchdog_ping"] = ping.isoformat()
+    return data
+
+
+def add_trades(folder: str, count: int) -> None:
+    store = StateStore(folder)
+    for i in range(count):
+        store.updateShared(lambda data, i=i: data["trades"].update({f"{os.getpid()}-{i}": {}}))
+
+
+def test_should_import_json_files(tmp_path):
+    # GIVEN the JSON files of a bot and the shared data
+    os.mkdir(tmp_path / "telegram_data")
+    with open(tmp_path / "telegram_data" / "BTCGBP.json", "w", encoding="utf8") as json_file:
+        json.dump(bot_data(margin="1.5%"), json_file)
+    with open(tmp_path / "telegram_data" / "data.json", "w", encoding="utf8") as json_file:
+        json.dump({"trades": {"2021-10-10 10:00:00": {"pair": "ETHGBP"}}}, json_file)
+    with open(tmp_path / "telegram_data" / "binance_USDT_output.json", "w", encoding="utf8") as json_file:
+        json.dump({"BTCUSDT": {}}, json_file)
+
+    # WHEN the store is created
+    store = StateStore(str(tmp_path))
+
+    # THEN the bot and shared data should be imported, and the scanner output left alone
+    assert store.getBots() == ["BTCGBP"]
+    assert store.getBot("BTCGBP")["margin"] == "1.5%"
+    assert store.getShared()["trades"]["2021-10-10 10:00:00"]["pair"] == "ETHGBP"
+
+
+def test_should_query_bots(tmp_path):
+    # GIVEN bots in different states
+    store = StateStore(str(tmp_path))
+    store.putBot("ACTIVE", bot_data(ping=datetime.now()))
+    store.putBot("TRADING", bot_data(margin="2.1%", ping=datetime.now(), exchange="kucoin"))
+    store.putBot("PAUSED", bot_data(status="paused", ping=datetime.now()))
+    store.putBot("HUNG", bot_data(ping=datetime.now() - timedelta(minutes=11)))
+    store.putBot("NOTPINGED", bot_data())
+
+    # WHEN the bots are queried
+    # THEN they should be selected by their state
+    assert store.getBots(status="active") == ["ACTIVE", "HUNG", "NOTPINGED", "TRADING"]
+    assert store.getBots(exchange="kucoin") == ["TRADING"]
+    assert store.getBotsWithOpenOrders() == ["TRADING"]
+    assert store.getHungBots("active") == ["HUNG", "NOTPINGED", "PAUSED"]
+    assert list(store.getBotsData(status="paused")) == ["PAUSED"]
+
+    # AND a bot removed should not be running
+    store.deleteBot("HUNG")
+    assert store.getBot("HUNG") is None
+    assert store.updateBot("HUNG", lambda data: None) is None
+
+
+def test_should_return_changed_bots(tmp_path):
+    # GIVEN two bots
+    store = StateStore(str(tmp_path))
+    store.putBot("BTCGBP", bot_data())
+    store.putBot("ETHGBP", bot_data())
+    version, changed, markets = store.getChanges()
+    assert list(changed) == markets == ["BTCGBP", "ETHGBP"]
+
+    # WHEN nothing changes
+    # THEN no bots should be returned
+    assert store.getChanges(version) == (version, {}, None)
+
+    # WHEN a bot is updated and another removed
+    store.updateBot("ETHGBP", lambda data: data.update({"signal": "BUY"}))
+    store.deleteBot("BTCGBP")
+
+    # THEN only the updated bot should be returned, with the bots still running
+    version, changed, markets = store.getChanges(version)
+    assert changed["ETHGBP"]["signal"] == "BUY"
+    assert list(changed) == markets == ["ETHGBP"]
+
+
+def test_should_not_lose_concurrent_updates(tmp_path):
+    # GIVEN the shared data
+    store = StateStore(str(tmp_path))
+    store.putShared({"trades": {}})
+
+    # WHEN four processes add trades at the same time
+    processes = [multiprocessing.Process(target=add_trades, args=(str(tmp_path), 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    # THEN every trade should be kept
+    assert len(store.getShared()["trades"]) == 100
+
+
+def test_should_write_bot_state_once_per_iteration(tmp_path, mocker, monkeypatch):
+    # GIVEN a bot controlled by telegram
+    monkeypatch.chdir(tmp_path)
+    app = PyCryptoBot(exchange=Exchange.BINANCE)
+    app.enabletelegrambotcontrol = True
+    app.telegramdatafolder = str(tmp_path)
+    bot = TelegramBotHelper(app)
+    store = StateStore(str(tmp_path))
+    put = mocker.spy(bot.store, "_putBot")
+
+    # WHEN an iteration adds its indicators and info, and telegram pauses the bot meanwhile
+    bot.addindicators("EMA", True)
+    bot.addindicators("MACD", False)
+    bot.addinfo("waiting", 1.5, "2.0", "-25%", "WAIT")
+    store.updateBot(app.getMarket(), lambda data: data["botcontrol"].update({"status": "pause"}))
+    assert "indicators" not in store.getBot(app.getMarket())
+    bot.updatewatchdogping()
+
+    # THEN the state should be written once, without losing the new status
+    data = store.getBot(app.getMarket())
+    assert put.call_count == 1
+    assert data["indicators"] == {"EMA": True, "MACD": False}
+    assert data["message"] == "waiting"
+    assert data["botcontrol"]["status"] == "pause"
+    assert "watchdog_ping" in data["botcontrol"]
+    assert bot.checkbotcontrolstatus() == "pause"
+
+    # WHEN telegram asks for a manual sell
+    store.updateBot(app.getMarket(), lambda data: data["botcontrol"].update({"manualsell": True}))
+
+    # THEN the bot should sell once
+    assert bot.checkmanualbuysell() == "SELL"
+    assert bot.checkmanualbuysell() == "WAIT"
+
+    # AND open orders and closed trades should be shared
+    bot.add_open_order()
+    assert app.getMarket() in store.getShared()["opentrades"]
+    bot.closetrade("2021-10-10 10:00:00", "1.5", "2%")
+    assert app.getMarket() not in store.getShared()["opentrades"]
+    assert store.getShared()["trades"]["2021-10-10 10:00:00"]["pair"] == app.getMarket()
@@ -0,0 +1,88 @@
+import sys
+
+import pandas as pd
+import pytest
+from statsmodels.compat.pandas import assert_frame_equal
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.AppState import AppState
+from models.PyCryptoBot import PyCryptoBot
+from models.Sweep import Sweep
+from models.Trading import TechnicalAnalysis
+from models.TradingAccount import TradingAccount
+
+OPTIONS = {
+    "disablebullonly": [True],
+    "sell_upper_pcnt": [None, 3],
+    "trailing_stop_loss": [None, -1],
+    "nobuynearhighpcnt": [2, 5],
+}
+
+
+@pytest.fixture
+def sweep(monkeypatch, make_candles):
+    candles = make_candles(480, seed=3)
+    ta = TechnicalAnalysis(candles.copy())
+    ta.addAll()
+
+    app = PyCryptoBot()
+    monkeypatch.setattr(app, "market", "BTC-GBP")
+    monkeypatch.setattr(app, "sim_speed", "fast")
+    monkeypatch.setattr(app, "sma50200_1h_cache", candles)
+    account = TradingAccount(app)
+    state = AppState(app, account)
+    state.initLastAction()
+
+    return Sweep(app, state, ta.getDataFrame(), 301)
+
+
+def test_should_return_full_grid(sweep):
+    # GIVEN options to sweep
+    # WHEN the combinations are requested
+    combinations = sweep.getCombinations(OPTIONS)
+
+    # THEN every combination of values should be returned once
+    assert len(combinations) == 8
+    assert len({tuple(combination.items()) for combination in combinations}) == 8
+    assert {"disablebullonly": True, "sell_upper_pcnt": 3, "trailing_stop_loss": None, "nobuynearhighpcnt": 5} in combinations
+
+
+def test_should_return_repeatable_random_samples(sweep):
+    # GIVEN options to sweep
+    # WHEN a seeded random search is requested
+    combinations = sweep.getCombinations(OPTIONS, samples=3, seed=1)
+
+    # THEN a repeatable subset of the grid should be returned
+    assert len(combinations) == 3
+    assert combinations == sweep.getCombinations(OPTIONS, samples=3, seed=1)
+    assert all(combination in sweep.getCombinations(OPTIONS) for combination in combinations)
+
+
+def test_should_fail_on_unknown_option(sweep):
+    # GIVEN an option the bot does not have
+    # WHEN the combinations are requested
+    # THEN a ValueError should be raised
+    with pytest.raises(ValueError, match="Unknown option"):
+        sweep.getCombinations({"sellupper": [1, 2]})
+
+    with pytest.raises(ValueError, match="needs a list of values"):
+        sweep.getCombinations({"sell_upper_pcnt": 3})
+
+
+def test_should_match_sequential_simulations(sweep):
+    # GIVEN every combination of the options
+    combinations = sweep.getCombinations(OPTIONS)
+
+    # WHEN they are simulated by worker processes
+    results = sweep.run(combinations, workers=2)
+
+    # THEN the ranked results should match simulating each one in turn
+    expected = [sweep.simulate(combination) for combination in combinations]
+    assert len(results) == len(combinations)
+    assert max(result["trades"] for result in expected) > 0
+    assert list(results["margin"]) == sorted(results["margin"], reverse=True)
+    assert_frame_equal(
+        results.sort_values(list(OPTIONS.keys()), na_position="first", ignore_index=True),
+        pd.DataFrame(expected).sort_values(list(OPTIONS.keys()), na_position="first", ignore_index=True),
+    )
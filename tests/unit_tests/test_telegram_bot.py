@@ -1,5 +1,7 @@
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 # pylint: disable=import-error
 from models.telegram import (
@@ -9,7 +11,12 @@ from models.telegram import (
 sys.path.append(".")
 
 wrapper = Wrapper("config.json.sample")
-wrapper.helper.datafolder = os.path.join(os.curdir, "tests", "unit_tests", "data")
+# the bot states are imported into a state store, keep it out of the fixtures
+wrapper.helper.datafolder = tempfile.mkdtemp()
+shutil.copytree(
+    os.path.join(os.curdir, "tests", "unit_tests", "data", "telegram_data"),
+    os.path.join(wrapper.helper.datafolder, "telegram_data"),
+)
 
 MARKET = "TESTUSDT"
 
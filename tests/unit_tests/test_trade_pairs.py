@@ -0,0 +1,114 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.PyCryptoBot import PyCryptoBot
+from models.Stats import Stats
+from models.TradePairs import pairTrades
+from models.TradingAccount import TradingAccount
+from models.exchange.ExchangesEnum import Exchange
+
+
+def make_orders(actions: str, market: str = "BTC-GBP", start: str = "2021-10-01") -> pd.DataFrame:
+    created_at = pd.date_range(start, periods=len(actions), freq="H", tz="UTC")
+    price = 30000.0 + np.arange(len(actions)) * 100
+
+    return pd.DataFrame(
+        {
+            "created_at": created_at,
+            "market": market,
+            "action": ["buy" if action == "b" else "sell" for action in actions],
+            "type": "market",
+            "size": np.full(len(actions), 100.0),
+            "value": np.full(len(actions), 100.0),
+            "filled": 100.0 / price,
+            "fees": np.full(len(actions), 0.5),
+            "price": price,
+            "status": "done",
+        }
+    )
+
+
+def legacy_pairs(orders: pd.DataFrame, market: str) -> list:
+    """The pairs as Stats.get_data built them with iterrows"""
+
+    order_pairs, last_order = [], None
+    for _, row in orders.iterrows():
+        time = row['created_at'].to_pydatetime()
+        if row['action'] == 'buy':
+            amount = row['filled'] * row['price'] + row['fees']
+            if last_order in ['sell', None]:
+                last_order = 'buy'
+                order_pairs.append({'buy': {'time': time, 'size': float(amount)}, 'sell': None, 'market': market})
+            else:
+                order_pairs[-1]['buy']['size'] += float(amount)
+        else:
+            amount = (row['filled'] * row['price']) - row['fees']
+            if last_order is None:
+                continue
+            if last_order == 'buy':
+                last_order = 'sell'
+                order_pairs[-1]['sell'] = {'time': time, 'size': float(amount)}
+            else:
+                order_pairs[-1]['sell']['size'] += float(amount)
+
+    return [pair for pair in order_pairs if pair['sell'] is not None]
+
+
+def test_should_pair_runs_of_orders():
+    # GIVEN orders of two markets, starting with a sell and ending with an open trade
+    df = pd.concat([make_orders("sbbsbss", "BTC-GBP"), make_orders("bsb", "ETH-GBP")])
+
+    # WHEN they are paired, with the orders of the markets interleaved
+    trades = pairTrades(df.sort_values("created_at", kind="stable"), ["created_at"], ["size"])
+
+    # THEN each run of buys should be paired with the run of sells after it
+    assert list(trades["market"]) == ["BTC-GBP", "BTC-GBP", "ETH-GBP"]
+    assert list(trades["buy_size"]) == [200.0, 100.0, 100.0]
+    assert list(trades["sell_size"]) == [100.0, 200.0, 100.0]
+    assert list(trades["buy_created_at"]) == list(df["created_at"].iloc[[1, 4, 7]])
+    assert list(trades["sell_created_at"]) == list(df["created_at"].iloc[[3, 5, 8]])
+
+
+def test_should_match_legacy_stats(mocker):
+    # GIVEN a Coinbase Pro account with thousands of random orders
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+    rng = np.random.default_rng(11)
+    orders = make_orders("".join(rng.choice(["b", "s"], 5000)))
+    account = TradingAccount(app)
+    mocker.patch.object(account, "getOrders", return_value=orders)
+
+    # WHEN the stats are calculated
+    stats = Stats(app, account)
+    stats.get_data("BTC-GBP")
+
+    # THEN the pairs should be the ones the order by order loop built
+    expected = legacy_pairs(orders, "BTC-GBP")
+    assert len(stats.order_pairs) == len(expected) > 1000
+    for pair, legacy in zip(stats.order_pairs, expected):
+        assert pair['market'] == legacy['market']
+        for side in ('buy', 'sell'):
+            assert pair[side]['time'] == legacy[side]['time']
+            assert np.isclose(pair[side]['size'], legacy[side]['size'])
+
+
+def test_should_save_tracker(tmp_path):
+    # GIVEN a test account with the orders of two markets
+    app = PyCryptoBot(exchange=Exchange.COINBASEPRO)
+    account = TradingAccount(app)
+    account.orders = pd.concat([make_orders("bsbbs", "ETH-GBP"), make_orders("sbs", "BTC-GBP")])[
+        ["created_at", "market", "action", "type", "size", "value", "fees", "price", "status"]
+    ]
+
+    # WHEN the tracker is saved
+    account.saveTrackerCSV(save_file=str(tmp_path / "tracker.csv"))
+
+    # THEN it should have the first buy and sell of each trade, by market
+    tracker = pd.read_csv(tmp_path / "tracker.csv")
+    assert list(tracker["market"]) == ["BTC-GBP", "ETH-GBP", "ETH-GBP"]
+    assert list(tracker["buy_price"]) == [30100.0, 30000.0, 30200.0]
+    assert list(tracker["sell_price"]) == [30200.0, 30100.0, 30400.0]
+    assert list(tracker["profit"]) == [-1.0] * 3
@@ -0,0 +1,187 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.append('.')
+# pylint: disable=import-error
+import models.WebSocketHub
+from models.exchange.ExchangesEnum import Exchange
+from models.exchange.Granularity import Granularity
+from models.helper.LogHelper import Logger
+from models.WebSocketHub import HubWebSocketClient, WebSocketHub
+
+
+class FakeWebSocketClient:
+    """Exchange websocket client with one candle and ticker per market"""
+
+    instances = []
+    backfills = []
+
+    def __init__(self, markets, granularity):
+        self.markets = list(markets)
+        self.granularity = granularity
+        self.stop = True
+        self.candle_buffer = {}
+        FakeWebSocketClient.instances.append(self)
+
+    @property
+    def candles(self):
+        return pd.DataFrame(
+            {
+                "date": pd.Timestamp("2021-10-10 14:00:00"),
+                "market": list(self.candle_buffer),
+                "granularity": self.granularity.to_integer,
+                "close": list(self.candle_buffer.values()),
+            }
+        )
+
+    @property
+    def tickers(self):
+        return pd.DataFrame({"market": list(self.candle_buffer), "price": 100.5})
+
+    def start(self):
+        # the history of the markets missing from the buffer is fetched from the REST API
+        for market in self.markets:
+            if market not in self.candle_buffer:
+                FakeWebSocketClient.backfills.append(market)
+                self.candle_buffer[market] = 100.0 + len(self.candle_buffer)
+        self.stop = False
+
+    def close(self):
+        self.stop = True
+
+    def getTimeElapsed(self):
+        return 0
+
+
+@pytest.fixture
+def hub(monkeypatch, mocker, tmp_path):
+    FakeWebSocketClient.instances = []
+    FakeWebSocketClient.backfills = []
+    mocker.patch.object(Logger, "debug")
+    mocker.patch.object(Logger, "info")
+    monkeypatch.setattr(models.WebSocketHub, "CWebSocketClient", FakeWebSocketClient)
+
+    hub = WebSocketHub(Exchange.COINBASEPRO, ["BTC-GBP"], Granularity.ONE_HOUR, str(tmp_path / "hub.sock"))
+    hub.start()
+    thread = threading.Thread(target=hub.serve, daemon=True)
+    thread.start()
+    while not os.path.exists(hub.address):
+        time.sleep(0.01)
+
+    yield hub
+    hub.close()
+    thread.join(5)
+
+
+def test_should_share_one_websocket_between_bots(hub):
+    # GIVEN two bots for different markets
+    btc = HubWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR, hub.address)
+    eth = HubWebSocketClient(["ETH-GBP"], Granularity.ONE_HOUR, hub.address)
+
+    # WHEN they connect to the hub
+    btc.start()
+    eth.start()
+
+    # THEN one websocket should be subscribed to both markets
+    open_clients = [client for client in FakeWebSocketClient.instances if not client.stop]
+    assert len(open_clients) == 1
+    assert open_clients[0].markets == ["BTC-GBP", "ETH-GBP"]
+
+    # AND each bot should only get the data of its market
+    assert list(btc.candles["market"]) == ["BTC-GBP"]
+    assert list(eth.candles["market"]) == ["ETH-GBP"]
+    assert list(eth.tickers["market"]) == ["ETH-GBP"]
+    btc.close()
+    eth.close()
+
+
+def test_should_only_fetch_history_of_new_markets(hub):
+    # GIVEN bots for three markets
+    bots = [
+        HubWebSocketClient([market], Granularity.ONE_HOUR, hub.address)
+        for market in ["BTC-GBP", "ETH-GBP", "LTC-GBP"]
+    ]
+
+    # WHEN they connect to the hub one after the other
+    for bot in bots:
+        bot.start()
+
+    # THEN the history of each market should only be fetched once
+    assert FakeWebSocketClient.backfills == ["BTC-GBP", "ETH-GBP", "LTC-GBP"]
+    assert list(bots[0].candles["market"]) == ["BTC-GBP"]
+    assert list(bots[2].candles["market"]) == ["LTC-GBP"]
+    for bot in bots:
+        bot.close()
+
+
+def test_should_reply_to_failed_requests(hub, mocker):
+    # GIVEN a bot connected to the hub and an exchange websocket that fails to open
+    error = mocker.patch.object(Logger, "error")
+    warning = mocker.patch.object(Logger, "warning")
+    bot = HubWebSocketClient(["BTC-GBP", "ETH-GBP"], Granularity.ONE_HOUR, hub.address)
+    bot.start()
+    mocker.patch.object(FakeWebSocketClient, "start", side_effect=ValueError("market not found"))
+
+    # WHEN it subscribes to a market the exchange does not have
+    result = bot._request("subscribe", "XXX-GBP")
+
+    # THEN the hub should log the error and answer so the bot uses the REST API
+    assert result is None
+    assert error.call_count == 1
+    assert warning.call_count == 1
+
+    # AND the hub should keep answering the bot
+    mocker.patch.object(FakeWebSocketClient, "start", lambda self: setattr(self, "stop", False))
+    assert bot._request("subscribe", "BTC-GBP") is True
+    bot.close()
+
+
+def test_should_refuse_bots_without_the_key(hub, mocker):
+    # GIVEN a bot with another key than the hub's
+    warning = mocker.patch.object(Logger, "warning")
+    bot = HubWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR, hub.address, "wrong key")
+
+    # WHEN it requests candles
+    candles = bot.candles
+
+    # THEN it should get none and the hub should keep serving bots with the key
+    assert candles is None
+    assert warning.call_count >= 1
+    bot = HubWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR, hub.address)
+    assert list(bot.candles["market"]) == ["BTC-GBP"]
+    bot.close()
+
+
+def test_should_reconnect_closed_websocket(hub):
+    # GIVEN a bot connected to the hub
+    bot = HubWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR, hub.address)
+    bot.start()
+
+    # WHEN the exchange websocket stops after an error
+    FakeWebSocketClient.instances[-1].stop = True
+    candles = bot.candles
+
+    # THEN the hub should open a new websocket
+    assert len(FakeWebSocketClient.instances) == 2
+    assert not FakeWebSocketClient.instances[-1].stop
+    assert list(candles["market"]) == ["BTC-GBP"]
+    bot.close()
+
+
+def test_should_return_none_without_hub(mocker, tmp_path):
+    # GIVEN a bot configured for a hub that is not running
+    warning = mocker.patch.object(Logger, "warning")
+    bot = HubWebSocketClient(["BTC-GBP"], Granularity.ONE_HOUR, str(tmp_path / "hub.sock"))
+
+    # WHEN it starts
+    bot.start()
+
+    # THEN it should have no data so the REST API is used
+    assert bot.candles is None
+    assert bot.tickers is None
+    assert warning.call_count == 1
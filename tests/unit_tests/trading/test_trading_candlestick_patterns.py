@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+from models.Trading import CandlestickPatterns, TechnicalAnalysis
+
+
+def add_flat_candles(df: pd.DataFrame, seed: int = 5) -> pd.DataFrame:
+    """Candles where nothing traded, with the open, high and low at the close"""
+
+    df = df.copy()
+    flat = np.random.default_rng(seed).random(len(df)) < 0.05
+    for column in ["open", "high", "low"]:
+        df.loc[flat, column] = df.loc[flat, "close"]
+    return df
+
+
+def test_should_match_series_expressions(make_candles):
+    # GIVEN candles including flat ones
+    df = add_flat_candles(make_candles(1000, seed=5))
+    ta = TechnicalAnalysis(df.copy())
+
+    # WHEN the patterns are evaluated
+    doji = ta.candleDoji()
+    astral_buy = ta.candleAstralBuy()
+    shooting_star = ta.candleShootingStar()
+
+    # THEN they should be the patterns calculated with pandas Series
+    expected_doji = (
+        (abs(df["close"] - df["open"]) / (df["high"] - df["low"]) < 0.1)
+        & ((df["high"] - np.maximum(df["close"], df["open"])) > (3 * abs(df["close"] - df["open"])))
+        & ((np.minimum(df["close"], df["open"]) - df["low"]) > (3 * abs(df["close"] - df["open"])))
+    )
+    expected_astral_buy = pd.Series(True, index=df.index)
+    for lag in range(8):
+        expected_astral_buy &= (df["close"].shift(lag) < df["close"].shift(lag + 3)) & (
+            df["low"].shift(lag) < df["low"].shift(lag + 5)
+        )
+    expected_shooting_star = (
+        (df["open"].shift(1) < df["close"].shift(1))
+        & (df["close"].shift(1) < df["open"])
+        & (df["high"] - np.maximum(df["open"], df["close"]) >= abs(df["open"] - df["close"]) * 3)
+        & ((np.minimum(df["close"], df["open"]) - df["low"]) <= abs(df["open"] - df["close"]))
+    )
+
+    assert doji.sum() > 0 and astral_buy.sum() > 0 and shooting_star.sum() > 0
+    assert doji.equals(expected_doji)
+    assert astral_buy.equals(expected_astral_buy)
+    assert shooting_star.equals(expected_shooting_star)
+
+
+# open, high, low, close of candles that complete the rarer patterns on their last candle
+PATTERN_CANDLES = [
+    # three line strike
+    (120, 121, 109, 110), (115, 116, 104, 105), (110, 111, 99, 100), (98, 123, 97, 122),
+    # two black gapping
+    (120, 121, 117, 118), (114, 115, 109, 110), (112, 113, 104, 105),
+    # hanging man
+    (89, 90, 88, 89.5), (94, 95, 93, 94.5), (100, 101, 96, 100.5),
+    # abandoned baby
+    (110, 111, 104, 105), (100, 101, 98, 99), (102, 107, 101.5, 106),
+    # morning doji star
+    (110, 111, 99.5, 100), (95, 97, 93, 95.2), (96, 102.5, 95.8, 102),
+    # evening doji star
+    (100, 110.5, 99, 110), (115, 117, 113, 115.2), (114, 114.2, 107.5, 108),
+]
+
+
+def add_pattern_candles(df: pd.DataFrame) -> pd.DataFrame:
+    dates = pd.date_range(df["date"].iloc[-1], periods=len(PATTERN_CANDLES) + 1, freq="H", name="ts")[1:]
+    open_, high, low, close = zip(*PATTERN_CANDLES)
+    patterns = pd.DataFrame(
+        {
+            "date": dates,
+            "market": "BTC-GBP",
+            "granularity": 3600,
+            "low": low,
+            "high": high,
+            "open": open_,
+            "close": close,
+            "volume": 1.0,
+        },
+        index=dates,
+    )
+    return pd.concat([df, patterns])
+
+
+def expected_patterns(df: pd.DataFrame) -> dict:
+    """Patterns calculated with the pandas Series expressions they were defined with"""
+
+    o, h, l, c = df["open"], df["high"], df["low"], df["close"]
+
+    def body(lag=0):
+        return abs(c.shift(lag) - o.shift(lag))
+
+    def top(lag=0):
+        return np.maximum(o.shift(lag), c.shift(lag))
+
+    def bottom(lag=0):
+        return np.minimum(o.shift(lag), c.shift(lag))
+
+    def ratio(lag=0):
+        return body(lag) / (h.shift(lag) - l.shift(lag))
+
+    astral_buy = pd.Series(True, index=df.index)
+    astral_sell = pd.Series(True, index=df.index)
+    for lag in range(8):
+        astral_buy &= (c.shift(lag) < c.shift(lag + 3)) & (l.shift(lag) < l.shift(lag + 5))
+        astral_sell &= (c.shift(lag) > c.shift(lag + 3)) & (h.shift(lag) > h.shift(lag + 5))
+
+    def falling(lag, previous):
+        return (
+            (o.shift(lag) < o.shift(previous))
+            & (o.shift(lag) > c.shift(previous))
+            & (c.shift(lag) < l.shift(previous))
+            & (l.shift(lag) - top(lag) < body(lag))
+        )
+
+    return {
+        "astral_buy": astral_buy,
+        "astral_sell": astral_sell,
+        "hammer": ((h - l) > 3 * (o - c))
+        & ((c - l) / (0.001 + h - l) > 0.6)
+        & ((o - l) / (0.001 + h - l) > 0.6),
+        "inverted_hammer": ((h - l) > 3 * (o - c))
+        & ((h - c) / (0.001 + h - l) > 0.6)
+        & ((h - o) / (0.001 + h - l) > 0.6),
+        "shooting_star": (o.shift(1) < c.shift(1))
+        & (c.shift(1) < o)
+        & (h - top() >= body() * 3)
+        & (bottom() - l <= body()),
+        "hanging_man": ((h - l) > 4 * (o - c))
+        & ((c - l) / (0.001 + h - l) >= 0.75)
+        & ((o - l) / (0.001 + h - l) >= 0.75)
+        & (h.shift(1) < o)
+        & (h.shift(2) < o),
+        "three_white_soldiers": (o > o.shift(1))
+        & (o < c.shift(1))
+        & (c > h.shift(1))
+        & (h - top() < body())
+        & (o.shift(1) > o.shift(2))
+        & (o.shift(1) < c.shift(2))
+        & (c.shift(1) > h.shift(2))
+        & (h.shift(1) - top(1) < body(1)),
+        "three_black_crows": falling(0, 1) & falling(1, 2),
+        "doji": (ratio() < 0.1) & (h - top() > 3 * body()) & (bottom() - l > 3 * body()),
+        "three_line_strike": falling(1, 2) & falling(2, 3) & (o < l.shift(1)) & (c > h.shift(3)),
+        "two_black_gapping": falling(0, 1) & (h.shift(1) < l.shift(2)),
+        "morning_star": (top(1) < c.shift(2)) & (c.shift(2) < o.shift(2)) & (c > o) & (o > top(1)),
+        "evening_star": (bottom(1) > c.shift(2)) & (c.shift(2) > o.shift(2)) & (c < o) & (o < bottom(1)),
+        "abandoned_baby": (o < c) & (h.shift(1) < l) & (o.shift(2) > c.shift(2)) & (h.shift(1) < l.shift(2)),
+        # the last comparison applies to all the conditions, as it always has
+        "morning_doji_star": (
+            (c.shift(2) < o.shift(2))
+            & (ratio(2) >= 0.7)
+            & (ratio(1) < 0.1)
+            & (c > o)
+            & (ratio() >= 0.7)
+            & (c.shift(2) > c.shift(1))
+            & (c.shift(2) > o.shift(1))
+            & (c.shift(1) < o)
+            & (o.shift(1) < o)
+            & (c > c.shift(2))
+            & (h.shift(1) - top(1) > 3 * body(1))
+            & (bottom(1) - l.shift(1))
+        )
+        > 3 * body(1),
+        "evening_doji_star": (
+            (c.shift(2) > o.shift(2))
+            & (ratio(2) >= 0.7)
+            & (ratio(1) < 0.1)
+            & (c < o)
+            & (ratio() >= 0.7)
+            & (c.shift(2) < c.shift(1))
+            & (c.shift(2) < o.shift(1))
+            & (c.shift(1) > o)
+            & (o.shift(1) > o)
+            & (c < c.shift(2))
+            & (h.shift(1) - top(1) > 3 * body(1))
+            & (bottom(1) - l.shift(1))
+        )
+        > 3 * body(1),
+    }
+
+
+def test_should_add_every_pattern_in_one_pass(make_candles):
+    # GIVEN candles including the rarer patterns
+    df = add_pattern_candles(add_flat_candles(make_candles(1000, seed=5)))
+
+    # WHEN the patterns are added in one pass
+    ta = TechnicalAnalysis(df.copy())
+    ta.addCandlestickPatterns()
+
+    # THEN each column should match its pattern's expression
+    expected = expected_patterns(df)
+    assert list(ta.getDataFrame().columns[len(df.columns):]) == CandlestickPatterns.getPatterns()
+    assert sorted(expected) == sorted(CandlestickPatterns.getPatterns())
+    for column, pattern in expected.items():
+        assert pattern.sum() > 0, column
+        assert ta.getDataFrame()[column].equals(pattern), column
+
+
+def test_should_add_registered_patterns(make_candles):
+    # GIVEN an extra pattern registered
+    @CandlestickPatterns.register("two_green", lookback=1)
+    def two_green(c):
+        return (c.close() > c.open()) & (c.close(1) > c.open(1))
+
+    try:
+        df = make_candles(300, seed=5)
+
+        # WHEN the analysis is added, in full and incrementally for a new candle
+        ta = TechnicalAnalysis(df.head(299).copy())
+        ta.addAllIncremental()
+        incremental = TechnicalAnalysis(df.copy())
+        incremental.addAllIncremental(ta)
+
+        # THEN the extra pattern should be added too
+        expected = (df["close"] > df["open"]) & (df["close"].shift(1) > df["open"].shift(1))
+        assert ta.getDataFrame()["two_green"].equals(expected.head(299))
+        assert incremental.getDataFrame()["two_green"].equals(expected)
+        assert CandlestickPatterns.getLookback() == 13
+    finally:
+        CandlestickPatterns.unregister("two_green")
@@ -0,0 +1,111 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from models.Trading import TechnicalAnalysis, _IndicatorState
+
+
+def add_all(df: pd.DataFrame) -> pd.DataFrame:
+    ta = TechnicalAnalysis(df.copy())
+    ta.addAll()
+    return ta.getDataFrame()
+
+
+def test_should_match_addAll_when_open_candle_is_revised(mocker, make_candles):
+    # GIVEN an analysis of 300 candles
+    candles = make_candles(300, seed=7)
+    previous = TechnicalAnalysis(candles.copy())
+    previous.addAllIncremental()
+    full_recalculation = mocker.spy(TechnicalAnalysis, "addAll")
+
+    for change in [1.002, 0.997, 1.01]:
+        # WHEN the open candle is revised
+        revised = candles.copy()
+        revised.iloc[-1, revised.columns.get_loc("close")] *= change
+        revised.iloc[-1, revised.columns.get_loc("high")] = revised[["high", "close"]].iloc[-1].max()
+        revised.iloc[-1, revised.columns.get_loc("low")] = revised[["low", "close"]].iloc[-1].min()
+        revised.iloc[-1, revised.columns.get_loc("volume")] += 1.5
+
+        ta = TechnicalAnalysis(revised.copy())
+        ta.addAllIncremental(previous)
+        assert full_recalculation.call_count == 0
+
+        # THEN the result should be identical to a full recalculation
+        assert_frame_equal(ta.getDataFrame(), add_all(revised), check_exact=True)
+        full_recalculation.reset_mock()
+        previous = ta
+
+
+def test_should_match_addAll_when_candles_are_appended(mocker, make_candles):
+    # GIVEN an analysis of 300 candles
+    candles = make_candles(310, seed=11)
+    previous = TechnicalAnalysis(candles.head(300).copy())
+    previous.addAllIncremental()
+    full_recalculation = mocker.spy(TechnicalAnalysis, "addAll")
+
+    for length in range(301, 305):
+        # WHEN a new candle is appended
+        ta = TechnicalAnalysis(candles.head(length).copy())
+        ta.addAllIncremental(previous)
+        assert full_recalculation.call_count == 0
+
+        # THEN the result should be identical to a full recalculation
+        assert_frame_equal(ta.getDataFrame(), add_all(candles.head(length)), check_exact=True)
+        full_recalculation.reset_mock()
+        previous = ta
+
+
+def test_should_recalculate_when_candle_window_moves(make_candles):
+    # GIVEN an analysis of 300 candles
+    candles = make_candles(310, seed=3)
+    previous = TechnicalAnalysis(candles.head(300).copy())
+    previous.addAllIncremental()
+
+    # WHEN the oldest candle drops out of the window
+    moved = candles.iloc[1:301]
+    ta = TechnicalAnalysis(moved.copy())
+    ta.addAllIncremental(previous)
+
+    # THEN the result should be identical to a full recalculation
+    assert_frame_equal(ta.getDataFrame(), add_all(moved), check_exact=True)
+
+
+def test_should_only_replay_window_when_open_candle_is_revised(mocker, make_candles):
+    # GIVEN live candles that are always the last 300
+    candles = make_candles(305, seed=5)
+    previous = TechnicalAnalysis(candles.head(300).copy())
+    previous.addAllIncremental()
+    full_recalculation = mocker.spy(TechnicalAnalysis, "addAll")
+    replay = mocker.spy(_IndicatorState, "update")
+
+    for start in range(1, 6):
+        window = candles.iloc[start : start + 300]
+        expected = add_all(window)
+        full_recalculation.reset_mock()
+        replay.reset_mock()
+
+        # WHEN a candle closes and the window moves
+        ta = TechnicalAnalysis(window.copy())
+        ta.addAllIncremental(previous)
+
+        # THEN it should be recalculated without replaying the window
+        assert full_recalculation.call_count == 1
+        assert replay.call_count == 0
+        assert_frame_equal(ta.getDataFrame(), expected, check_exact=True)
+        previous = ta
+
+        for polls, change in enumerate([1.003, 0.998], start=1):
+            # WHEN the next polls revise the open candle
+            revised = window.copy()
+            revised.iloc[-1, revised.columns.get_loc("close")] *= change
+            revised.iloc[-1, revised.columns.get_loc("high")] = revised[["high", "close"]].iloc[-1].max()
+            revised.iloc[-1, revised.columns.get_loc("low")] = revised[["low", "close"]].iloc[-1].min()
+            expected = add_all(revised)
+            full_recalculation.reset_mock()
+
+            ta = TechnicalAnalysis(revised.copy())
+            ta.addAllIncremental(previous)
+
+            # THEN the window should only be replayed by the first poll and not recalculated
+            assert full_recalculation.call_count == 0
+            assert replay.call_count == 300 + polls
+            assert_frame_equal(ta.getDataFrame(), expected, check_exact=True)
+            previous = ta
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from models.Trading import MultiMarketAnalysis, TechnicalAnalysis
+
+INDICATORS = ["ema12", "ema26", "sma50", "sma200", "atr72", "rsi14", "macd", "signal", "-di14", "+di14", "adx14"]
+
+
+def add_indicators(analysis):
+    analysis.addEMA(12)
+    analysis.addEMA(26)
+    analysis.addSMA(50)
+    analysis.addSMA(200)
+    analysis.addATR(72)
+    analysis.addRSI(14)
+    analysis.addMACD()
+    analysis.addADX(14)
+
+
+def test_should_match_technical_analysis_per_market(make_candles):
+    # GIVEN a panel of markets with different numbers of candles
+    frames = [make_candles(300, 1, "BTC-GBP"), make_candles(250, 2, "ETH-GBP"), make_candles(210, 3, "LTC-GBP")]
+
+    # WHEN the indicators of all the markets are added at once
+    analysis = MultiMarketAnalysis(pd.concat(frames))
+    add_indicators(analysis)
+    df = analysis.getDataFrame()
+
+    # THEN each market should have the indicators TechnicalAnalysis adds
+    for frame in frames:
+        ta = TechnicalAnalysis(frame.copy())
+        add_indicators(ta)
+        expected = ta.getDataFrame()[INDICATORS]
+
+        actual = df[df["market"] == frame["market"].iloc[0]][INDICATORS]
+        assert_frame_equal(actual, expected, check_exact=False, rtol=1e-12, check_freq=False)
+
+    # AND the last candle of each market should be available
+    last = analysis.getLast()
+    assert list(last.index) == ["BTC-GBP", "ETH-GBP", "LTC-GBP"]
+    assert last.loc["ETH-GBP", "close"] == frames[1]["close"].iloc[-1]
+    assert last.loc["LTC-GBP", "rsi14"] == pytest.approx(df[df["market"] == "LTC-GBP"]["rsi14"].iloc[-1])
+
+
+def test_should_analyse_arrays(make_candles):
+    # GIVEN close prices of two markets in a 2-D array
+    frames = [make_candles(100, 1, "BTC-GBP"), make_candles(100, 2, "ETH-GBP")]
+    close = np.column_stack([frame["close"].to_numpy() for frame in frames])
+
+    # WHEN the EMA is added
+    analysis = MultiMarketAnalysis.fromArrays(close, markets=["BTC-GBP", "ETH-GBP"])
+    analysis.addEMA(26)
+
+    # THEN each column should be the market's EMA
+    ema = analysis.getIndicator("ema26")
+    for frame in frames:
+        expected = frame["close"].ewm(span=26, adjust=False).mean().to_numpy()
+        assert np.allclose(ema[frame["market"].iloc[0]].to_numpy(), expected, rtol=0)
+
+    # AND indicators needing high and low prices should not be available
+    with pytest.raises(AttributeError):
+        analysis.addATR(14)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from models.Trading import TechnicalAnalysis
+
+
+def expected_levels(df: pd.DataFrame) -> pd.Series:
+    """Fractal levels found candle by candle, at least the mean range from each other"""
+
+    s = np.mean(df["high"] - df["low"])
+    levels = {}
+    low = df["low"].to_numpy()
+    high = df["high"].to_numpy()
+    for i in range(2, len(df) - 2):
+        if low[i] < low[i - 1] and low[i] < low[i + 1] and low[i + 1] < low[i + 2] and low[i - 1] < low[i - 2]:
+            l = low[i]
+        elif high[i] > high[i - 1] and high[i] > high[i + 1] and high[i + 1] > high[i + 2] and high[i - 1] > high[i - 2]:
+            l = high[i]
+        else:
+            continue
+
+        if np.sum([abs(l - x) < s for x in levels.values()]) == 0:
+            levels[df.index[i]] = l
+
+    return pd.Series(levels, dtype=float)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_should_find_fractal_levels(seed, make_candles):
+    # GIVEN 500 candles
+    df = make_candles(500, seed)
+
+    # WHEN the support and resistance levels are calculated
+    levels = TechnicalAnalysis(df.copy()).getSupportResistanceLevels()
+
+    # THEN they should be the levels found candle by candle
+    expected = expected_levels(df)
+    assert len(levels) > 0
+    assert list(levels.index) == list(expected.index)
+    assert list(levels) == list(expected)
+
+
+def test_should_reuse_levels_until_last_candle_changes(mocker, make_candles):
+    # GIVEN the levels of 500 candles
+    df = make_candles(500, seed=11)
+    ta = TechnicalAnalysis(df.copy())
+    calculate = mocker.spy(ta, "_TechnicalAnalysis__calculateSupportResistenceLevels")
+    levels = ta.getSupportResistanceLevels()
+
+    # WHEN they are asked for again, and modified by a caller
+    levels.iloc[0] = 0
+    cached = ta.getSupportResistanceLevels()
+
+    # THEN they should not be recalculated, or changed by the caller
+    assert calculate.call_count == 1
+    assert cached.iloc[0] != 0
+
+    # WHEN the last candle changes
+    ta.df.iloc[-1, ta.df.columns.get_loc("low")] = ta.df["low"].min() / 2
+    ta.getSupportResistanceLevels()
+
+    # THEN they should be recalculated
+    assert calculate.call_count == 2
+
+
+def test_should_have_no_levels_without_candles(make_candles):
+    # GIVEN fewer candles than a fractal needs
+    ta = TechnicalAnalysis(make_candles(4))
+
+    # WHEN the support and resistance levels are calculated
+    levels = ta.getSupportResistanceLevels()
+
+    # THEN there should be none
+    assert len(levels) == 0
@@ -0,0 +1,41 @@
+"""Share one exchange websocket between all the bots on this host"""
+
+import argparse
+
+from models.PyCryptoBot import PyCryptoBot
+from models.WebSocketHub import DEFAULT_ADDRESS, WebSocketHub
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Share one exchange websocket between all the bots on this host"
+    )
+    parser.add_argument(
+        "--markets",
+        type=str,
+        default="",
+        help="comma separated markets to subscribe to on start, bots subscribe to their own market",
+    )
+    args, unknown = parser.parse_known_args()  # pylint: disable=unused-variable
+
+    # the exchange, granularity and hub address are read as the bots read them
+    app = PyCryptoBot()
+    address = app.getWebSocketHub() if app.getWebSocketHub() is not None else DEFAULT_ADDRESS
+    markets = [market.strip() for market in args.markets.split(",") if market.strip() != ""]
+
+    hub = WebSocketHub(
+        app.getExchange(), markets, app.getGranularity(), address, app.getWebSocketHubKey()
+    )
+    hub.start()
+
+    print(f"Websocket hub for {app.getExchange().value} listening on {address}")
+    try:
+        hub.serve()
+    except KeyboardInterrupt:
+        print("Closing websocket hub, please wait...")
+    finally:
+        hub.close()
+
+
+if __name__ == "__main__":
+    main()
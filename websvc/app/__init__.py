@@ -39,4 +39,4 @@ def coinbasepro():
 
 @app.route("/coinbasepro/<market>")
 def coinbasepro_market(market):
-    return Pages.technical_analysis('coinbasepro', market, 900, 3600, 21600)
+    return Pages.technical_analysis('coinbasepro', market, Granularity.FIFTEEN_MINUTES, Granularity.ONE_HOUR, Granularity.SIX_HOURS)
@@ -1,13 +1,68 @@
 import re
 import sys
+import time
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import pandas as pd
 
 sys.path.append(".")
 # pylint: disable=import-error
+from models.CandleCache import CandleCache
 from models.Trading import TechnicalAnalysis
 from models.exchange.binance import PublicAPI as BPublicAPI
 from models.exchange.coinbase_pro import PublicAPI as CPublicAPI
 
+# seconds the 24 hour market statistics are kept
+MARKETS_TTL = 60
+
+
+def publicAPI(exchange: str):
+    if exchange == "binance":
+        return BPublicAPI()
+    return CPublicAPI()
+
+
+# the analysis of each exchange, market and granularity is kept until its candle closes
+candle_caches = {
+    exchange: CandleCache(
+        lambda market, granularity, exchange=exchange: publicAPI(exchange).getHistoricalData(
+            market, granularity, None
+        )
+    )
+    for exchange in ("binance", "coinbasepro")
+}
+# the granularities of a page are fetched and analysed in parallel
+executor = ThreadPoolExecutor(max_workers=8)
+
+# exchange -> (expiry, 24 hour market statistics)
+_markets = {}
+_markets_lock = Lock()
+
+
+def getMarkets24HrStats(exchange: str):
+    """24 hour statistics of the exchange's markets, fetched at most once per MARKETS_TTL"""
+
+    with _markets_lock:
+        if exchange not in _markets or time.time() >= _markets[exchange][0]:
+            _markets[exchange] = (
+                time.time() + MARKETS_TTL,
+                publicAPI(exchange).getMarkets24HrStats(),
+            )
+
+        return _markets[exchange][1]
+
+
+def _addAll(df: pd.DataFrame) -> pd.DataFrame:
+    ta = TechnicalAnalysis(df)
+    ta.addAll()
+    return ta.getDataFrame()
+
+
+def _fitARIMA(df: pd.DataFrame):
+    return TechnicalAnalysis(df).seasonalARIMAModel()
+
 
 def header() -> str:
     return """
@@ -95,8 +150,7 @@ class Pages:
         def markets():
             html = ""
 
-            api = BPublicAPI()
-            resp = api.getMarkets24HrStats()
+            resp = getMarkets24HrStats("binance")
             for market in resp:
                 if market["lastPrice"] > market["openPrice"]:
                     html += f"""
@@ -170,8 +224,7 @@ class Pages:
         def markets():
             html = ""
 
-            api = CPublicAPI()
-            resp = api.getMarkets24HrStats()
+            resp = getMarkets24HrStats("coinbasepro")
             for market in resp:
                 stats_30day_volume = 0
                 if "stats_30day" in resp[market]:
@@ -289,27 +342,27 @@ class Pages:
         else:
             return "Invalid Exchange!"
 
-        if exchange == 'binance':
-            api = BPublicAPI()
-        if exchange == 'coinbasepro':
-            api = CPublicAPI()
-        ticker = api.getTicker(market)
-
-        ta = TechnicalAnalysis(api.getHistoricalData(market, g1, None))
-        ta.addAll()
-        df_15m = ta.getDataFrame()
+        cache = candle_caches[exchange]
+        ticker = executor.submit(publicAPI(exchange).getTicker, market)
+        analyses = [
+            executor.submit(cache.getValue, market, granularity, _addAll)
+            for granularity in (g1, g2, g3)
+        ]
+        # the model is fitted once per candle, not per page view
+        results_ARIMA = executor.submit(cache.getValue, market, g3, _fitARIMA)
+
+        df_15m, df_1h, df_6h = [analysis.result() for analysis in analyses]
+        ticker = ticker.result()
         df_15m_last = df_15m.tail(1)
-
-        ta = TechnicalAnalysis(api.getHistoricalData(market, g2, None))
-        ta.addAll()
-        df_1h = ta.getDataFrame()
         df_1h_last = df_1h.tail(1)
-
-        ta = TechnicalAnalysis(api.getHistoricalData(market, g3, None))
-        ta.addAll()
-        df_6h = ta.getDataFrame()
         df_6h_last = df_6h.tail(1)
 
+        start_date = df_1h.last_valid_index()
+        end_date = start_date + datetime.timedelta(days=3)
+        arima_pred = results_ARIMA.result().predict(
+            start=str(start_date), end=str(end_date), dynamic=True
+        )
+
         if exchange == 'binance':
             exchange_name = 'Binance'
         elif exchange == 'coinbasepro':
@@ -442,20 +495,13 @@ class Pages:
             adx14_6h_desc = 'Weak Trend Up'
 
         def arima_predictions(even_rows: bool = True):
-            results_ARIMA = ta.seasonalARIMAModel()
-            start_date = df_1h.last_valid_index()
-            end_date = start_date + datetime.timedelta(days=3)
-            arima_pred = results_ARIMA.predict(
-                start=str(start_date), end=str(end_date), dynamic=True
-            )
-
             if even_rows:
                 arima_pred_rows = arima_pred.iloc[::2]
             else:
                 arima_pred_rows = arima_pred.iloc[1::2]
 
             html = ""
-            for index, pred in arima_pred_rows.iteritems():
+            for index, pred in arima_pred_rows.items():
                 html += f"""
                 <tbody>
                     <tr class={'table-success' if pred >= ticker[1] else 'table-danger'}>